@@ -0,0 +1,60 @@
+"""
+稀疏字段集（?fields=id,name,stock）
+
+序列化器只输出请求的字段，视图按字段裁剪 SQL：only() 只查询需要的列，
+只 select_related / prefetch_related 需要的关联。
+
+序列化器在 Meta 中声明字段与查询的对应关系：
+    field_columns: {字段名: (ORM 字段路径, ...)}，路径中的关联（如 'stock__available_quantity'）
+                   会自动 select_related
+    field_prefetches: {字段名: (Prefetch 或路径, ...)}
+"""
+
+
+def requested_fields(request):
+    """解析 ?fields= 参数，未指定时返回 None"""
+    if request is None:
+        return None
+    value = request.query_params.get('fields') if hasattr(request, 'query_params') else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetSerializerMixin:
+    """只保留 ?fields= 指定的字段（仅作用于顶层序列化器）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin:
+    """按请求字段裁剪查询集的列和关联（列表、详情动作）"""
+
+    sparse_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_actions:
+            return queryset
+        meta = self.get_serializer_class().Meta
+        columns = getattr(meta, 'field_columns', {})
+        prefetches = getattr(meta, 'field_prefetches', {})
+        fields = requested_fields(self.request)
+        names = (fields & (columns.keys() | prefetches.keys())) if fields else columns.keys() | prefetches.keys()
+
+        lookups = {'pk'}
+        for name in names:
+            lookups.update(columns.get(name, ()))
+        relations = {lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup}
+        if relations:
+            # 不带参数的 select_related() 会关联所有非空外键
+            queryset = queryset.select_related(*relations)
+        queryset = queryset.only(*lookups)
+        for name in names:
+            queryset = queryset.prefetch_related(*prefetches.get(name, ()))
+        return queryset
@@ -0,0 +1,50 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+
+from apps.events.services import events_after
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    按主键游标分页
+
+    游标条件为 WHERE id < 上一页最后一条的 id，直接走主键索引，
+    翻页成本与页码无关，也不执行 COUNT；新数据插入不会造成重复或遗漏。
+    """
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class AscendingIdCursorPagination(IdCursorPagination):
+    ordering = 'id'
+
+
+class AfterIdPagination(BasePagination):
+    """
+    变更订阅分页：?after=<已读到的事件 ID>&limit=
+
+    与 CursorPagination 不同，读到末尾时仍返回 next_after，
+    消费者保存它即可在下次请求时从断点继续增量读取。
+    事件按 (事务号, ID) 排序（见 apps.events.services），next_after 不一定是已读到的最大 ID。
+    """
+    page_size = 100
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            self.after = int(request.query_params.get('after', 0))
+            self.limit = min(int(request.query_params.get('limit', self.page_size)), self.max_page_size)
+        except ValueError:
+            raise ValidationError('after 和 limit 必须是整数')
+        self.page = list(events_after(queryset, self.after)[:max(self.limit, 1)])
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next_after': self.page[-1].pk if self.page else self.after,
+            'has_more': len(self.page) >= self.limit,
+            'results': data,
+        })
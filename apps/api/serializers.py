@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .mixins import SparseFieldsetSerializerMixin
+from apps.cart.models import CartItem
+from apps.events.models import OutboxEvent
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product, ProductStock
+
+
+class CategorySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'parent', 'sort_order']
+        field_columns = {
+            'id': ('id',),
+            'name': ('name',),
+            'parent': ('parent',),
+            'sort_order': ('sort_order',),
+        }
+
+
+class ProductStockSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductStock
+        fields = ['available_quantity', 'frozen_quantity', 'updated_at']
+
+
+class ProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
+    stock = ProductStockSerializer(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'category', 'category_name', 'selling_price', 'image',
+                  'description', 'stock', 'created_at', 'updated_at']
+        field_columns = {
+            'id': ('id',),
+            'name': ('name',),
+            'category': ('category',),
+            'category_name': ('category__name',),
+            'selling_price': ('selling_price',),
+            'image': ('image',),
+            'description': ('description',),
+            'stock': ('stock__available_quantity', 'stock__frozen_quantity', 'stock__updated_at'),
+            'created_at': ('created_at',),
+            'updated_at': ('updated_at',),
+        }
+
+
+class CartItemSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.filter(is_active=True))
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    unit_price = serializers.DecimalField(
+        source='product.selling_price', max_digits=10, decimal_places=2, read_only=True
+    )
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    available_quantity = serializers.IntegerField(
+        source='product.stock.available_quantity', read_only=True, default=0
+    )
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = CartItem
+        fields = ['id', 'product', 'product_name', 'unit_price', 'quantity', 'subtotal',
+                  'available_quantity', 'updated_at']
+        read_only_fields = ['updated_at']
+        field_columns = {
+            'id': ('id',),
+            'product': ('product',),
+            'product_name': ('product__name',),
+            'unit_price': ('product__selling_price',),
+            'quantity': ('quantity',),
+            'subtotal': ('quantity', 'product__selling_price'),
+            'available_quantity': ('product__stock__available_quantity',),
+            'updated_at': ('updated_at',),
+        }
+
+    def validate_product(self, value):
+        if self.instance is not None and value.pk != self.instance.product_id:
+            raise serializers.ValidationError('不能修改购物车商品，请删除后重新添加')
+        return value
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'quantity', 'unit_price', 'subtotal']
+
+
+class OrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'order_no', 'status', 'payment_method', 'total_amount',
+                  'customer_name', 'customer_remark', 'paid_at', 'created_at', 'updated_at', 'items']
+        field_columns = {
+            'id': ('id',),
+            'order_no': ('order_no',),
+            'status': ('status',),
+            'payment_method': ('payment_method',),
+            'total_amount': ('total_amount',),
+            'customer_name': ('customer_name',),
+            'customer_remark': ('customer_remark',),
+            'paid_at': ('paid_at',),
+            'created_at': ('created_at',),
+            'updated_at': ('updated_at',),
+        }
+        field_prefetches = {
+            'items': (
+                Prefetch('items', queryset=OrderItem.objects.select_related('product').only(
+                    'order', 'product__name', 'quantity', 'unit_price'
+                )),
+            ),
+        }
+
+
+class OrderLineInputSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderInputSerializer(serializers.Serializer):
+    """批量下单中的单个订单"""
+    customer_name = serializers.CharField(max_length=100)
+    customer_remark = serializers.CharField(required=False, allow_blank=True, default='')
+    items = OrderLineInputSerializer(many=True, allow_empty=False)
+
+
+class BulkOrderSerializer(serializers.Serializer):
+    """批量下单请求体，单个订单的校验在视图中逐个进行，一个订单不合法不影响其他订单"""
+    orders = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False,
+        max_length=settings.BULK_ORDER_MAX_SIZE,
+    )
+
+
+class OutboxEventSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='event_type')
+
+    class Meta:
+        model = OutboxEvent
+        fields = ['id', 'topic', 'type', 'key', 'payload', 'created_at']
@@ -0,0 +1,221 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from apps.cart.models import Cart, CartItem
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product, ProductStock
+from apps.users.models import User
+
+
+class ApiTestCase(APITestCase):
+    """接口测试基类：每个列表接口的查询数不随数据量增长"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('api_user', password='test')
+        cls.root = Category.objects.create(name='食品')
+        cls.child = Category.objects.create(name='零食', parent=cls.root)
+        cls.products = [cls.create_product(index) for index in range(3)]
+        cart = Cart.objects.create(user=cls.user)
+        for product in cls.products:
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        cls.orders = [cls.create_order(index) for index in range(3)]
+
+    @classmethod
+    def create_product(cls, index):
+        product = Product.objects.create(
+            name=f'商品{index}', category=cls.child,
+            cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+        )
+        ProductStock.objects.create(product=product, available_quantity=100)
+        return product
+
+    @classmethod
+    def create_order(cls, index):
+        order = Order.objects.create(
+            order_no=f'ORDTEST{index:04d}', user=cls.user, customer_name='测试',
+            total_amount=Decimal('16.00'), total_cost=Decimal('10.00'),
+        )
+        for product in cls.products[:2]:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=1,
+                unit_price=product.selling_price, cost_price=product.cost_price,
+            )
+        return order
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class QueryCountTests(ApiTestCase):
+
+    def test_category_list(self):
+        self.assertEqual(len(self.get('/api/categories/', 1)['results']), 2)
+
+    def test_product_list(self):
+        data = self.get('/api/products/', 1)
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['results'][0]['stock']['available_quantity'], 100)
+        self.assertEqual(data['results'][0]['category_name'], '零食')
+
+    def test_product_detail(self):
+        self.get(f'/api/products/{self.products[0].pk}/', 1)
+
+    def test_cart_item_list(self):
+        data = self.get('/api/cart/items/', 1)
+        self.assertEqual([item['subtotal'] for item in data['results']], ['16.00'] * 3)
+
+    def test_order_list(self):
+        data = self.get('/api/orders/', 2)
+        self.assertEqual(len(data['results'][0]['items']), 2)
+
+    def test_order_detail(self):
+        self.get(f'/api/orders/{self.orders[0].pk}/', 2)
+
+    def test_query_count_independent_of_rows(self):
+        for index in range(3, 8):
+            self.create_product(index)
+            self.create_order(index)
+        self.get('/api/products/', 1)
+        self.get('/api/orders/', 2)
+
+
+class SparseFieldsetTests(ApiTestCase):
+
+    def test_fields_trim_response_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/api/products/?fields=id,name').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'name'})
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('product_stocks', sql)
+
+    def test_fields_skip_prefetch(self):
+        data = self.get('/api/orders/?fields=id,status', 1)
+        self.assertEqual(set(data['results'][0]), {'id', 'status'})
+
+
+class CursorPaginationTests(ApiTestCase):
+
+    def test_pages_follow_primary_key(self):
+        first = self.client.get('/api/products/?page_size=2').json()
+        second = self.client.get(first['next']).json()
+        ids = [item['id'] for item in first['results'] + second['results']]
+        self.assertEqual(ids, sorted((product.pk for product in self.products), reverse=True))
+        self.assertIsNone(second['next'])
+
+
+class CartApiTests(ApiTestCase):
+
+    def test_add_accumulates_quantity(self):
+        product = self.products[0]
+        response = self.client.post('/api/cart/items/', {'product': product.pk, 'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['quantity'], 5)
+        self.assertEqual(CartItem.objects.get(cart__user=self.user, product=product).quantity, 5)
+
+    def test_other_users_items_hidden(self):
+        other = User.objects.create_user('other_user', password='test')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/cart/items/').json()['results'], [])
+        self.assertEqual(self.client.get('/api/orders/').json()['results'], [])
+
+
+class BulkOrderTests(ApiTestCase):
+
+    def test_partial_success_reserves_stock_for_accepted_orders(self):
+        first, second = self.products[:2]
+        payload = {'orders': [
+            {'customer_name': '门店A', 'items': [{'product_id': first.pk, 'quantity': 60},
+                                                  {'product_id': second.pk, 'quantity': 1}]},
+            {'customer_name': '门店B', 'items': [{'product_id': first.pk, 'quantity': 50}]},
+            {'customer_name': '门店C', 'items': [{'product_id': first.pk, 'quantity': 40},
+                                                  {'product_id': first.pk, 'quantity': 0}]},
+            {'customer_name': '门店D', 'items': [{'product_id': first.pk, 'quantity': 40}]},
+        ]}
+        response = self.client.post('/api/orders/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([result['success'] for result in data['results']], [True, False, False, True])
+        self.assertEqual((data['created'], data['failed']), (2, 2))
+        self.assertIn('库存不足', data['results'][1]['error'])
+        self.assertIn('items', data['results'][2]['errors'])
+
+        first.stock.refresh_from_db()
+        self.assertEqual((first.stock.available_quantity, first.stock.frozen_quantity), (0, 100))
+        order = Order.objects.get(pk=data['results'][0]['order_id'])
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.total_amount, Decimal('488.00'))
+
+    def test_batch_size_limit(self):
+        orders = [{'customer_name': '门店', 'items': []}] * 1001
+        response = self.client.post('/api/orders/bulk/', {'orders': orders}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotencyTests(ApiTestCase):
+
+    def post_bulk(self, key, quantity=1):
+        payload = {'orders': [{'customer_name': '门店', 'items': [
+            {'product_id': self.products[0].pk, 'quantity': quantity}
+        ]}]}
+        return self.client.post('/api/orders/bulk/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self.post_bulk('retry-key')
+        second = self.post_bulk('retry-key')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.filter(customer_name='门店').count(), 1)
+        self.products[0].stock.refresh_from_db()
+        self.assertEqual(self.products[0].stock.frozen_quantity, 1)
+
+    def test_reused_key_with_different_body_rejected(self):
+        self.post_bulk('reused-key')
+        self.assertEqual(self.post_bulk('reused-key', quantity=2).status_code, 422)
+
+
+class EventFeedTests(APITransactionTestCase):
+    # PostgreSQL 上只读取写入事务已结束的事件，测试数据须实际提交
+
+    def setUp(self):
+        self.user = User.objects.create_user('api_user', password='test')
+        self.product = Product.objects.create(
+            name='商品', cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+        )
+        ProductStock.objects.create(product=self.product, available_quantity=100)
+        self.client.force_authenticate(self.user)
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.get('/api/events/').status_code, 403)
+
+    def test_bulk_orders_write_events_and_feed_resumes_after_cursor(self):
+        payload = {'orders': [
+            {'customer_name': '门店A', 'items': [{'product_id': self.product.pk, 'quantity': 2}]},
+            {'customer_name': '门店B', 'items': [{'product_id': self.product.pk, 'quantity': 3}]},
+        ]}
+        self.client.post('/api/orders/bulk/', payload, format='json')
+        self.user.is_staff = True
+        self.user.save()
+
+        first = self.client.get('/api/events/?limit=2').json()
+        self.assertEqual([event['type'] for event in first['results']], ['stock.reserved', 'order.created'])
+        self.assertEqual(first['results'][0]['payload'], {'product_id': self.product.pk, 'quantity': 5})
+        self.assertTrue(first['has_more'])
+
+        rest = self.client.get(f"/api/events/?after={first['next_after']}&topic=order").json()
+        self.assertEqual([event['payload']['customer_name'] for event in rest['results']], ['门店B'])
+        self.assertFalse(rest['has_more'])
+        done = self.client.get(f"/api/events/?after={rest['next_after']}").json()
+        self.assertEqual((done['results'], done['next_after']), ([], rest['next_after']))
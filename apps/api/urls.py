@@ -0,0 +1,12 @@
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+router = DefaultRouter()
+router.register('categories', views.CategoryViewSet, basename='api-category')
+router.register('products', views.ProductViewSet, basename='api-product')
+router.register('cart/items', views.CartItemViewSet, basename='api-cart-item')
+router.register('orders', views.OrderViewSet, basename='api-order')
+router.register('events', views.EventViewSet, basename='api-event')
+
+urlpatterns = router.urls
@@ -0,0 +1,155 @@
+from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.filters import SearchFilter
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .mixins import SparseFieldsetViewMixin
+from .pagination import AfterIdPagination, AscendingIdCursorPagination, IdCursorPagination
+from .serializers import (
+    BulkOrderSerializer, CartItemSerializer, CategorySerializer, OrderInputSerializer,
+    OrderSerializer, OutboxEventSerializer, ProductSerializer,
+)
+from apps.cart.models import Cart, CartItem
+from apps.events.services import visible_events
+from apps.orders.idempotency import idempotent_action
+from apps.orders.models import Order
+from apps.orders.services import create_orders_bulk
+from apps.products.models import Category, Product
+from apps.products.services import get_category_descendant_ids
+from warehouse_management.dbutils import upsert_add
+from warehouse_management.optimistic import VersionConflict
+
+
+class StockConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = '库存并发更新冲突，请稍后重试'
+    default_code = 'stock_conflict'
+
+
+class CategoryViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
+    """商品分类（启用的分类）"""
+    queryset = Category.objects.filter(is_active=True)
+    serializer_class = CategorySerializer
+    pagination_class = AscendingIdCursorPagination
+    filter_backends = []
+
+
+class ProductViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    上架商品（含库存）
+
+    ?category= 一级分类包含其下所有子分类；?search= 按名称搜索
+    """
+    queryset = Product.objects.filter(is_active=True)
+    serializer_class = ProductSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [SearchFilter]
+    search_fields = ['name']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        category_id = self.request.query_params.get('category')
+        if category_id:
+            category_ids = get_category_descendant_ids(int(category_id)) if category_id.isdigit() else None
+            if category_ids is None:
+                raise NotFound('分类不存在')
+            queryset = queryset.filter(category_id__in=category_ids)
+        return queryset
+
+
+class CartItemViewSet(SparseFieldsetViewMixin, mixins.ListModelMixin, mixins.CreateModelMixin,
+                      mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    当前用户的购物车商品
+
+    POST 同一商品时累加数量；PATCH 设置数量
+    """
+    queryset = CartItem.objects.all()
+    serializer_class = CartItemSerializer
+    pagination_class = AscendingIdCursorPagination
+    filter_backends = []
+    http_method_names = ['get', 'post', 'patch', 'delete']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(cart__user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart, _ = Cart.objects.get_or_create(user=request.user)
+        pk = upsert_add(
+            CartItem,
+            keys={'cart_id': cart.pk, 'product_id': serializer.validated_data['product'].pk},
+            increments={'quantity': serializer.validated_data['quantity']},
+        )
+        item = get_object_or_404(self.get_queryset(), pk=pk)
+        return Response(self.get_serializer(item).data, status=status.HTTP_201_CREATED)
+
+
+class OrderViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
+    """当前用户的订单，?status= 按状态筛选"""
+    queryset = Order.objects.all()
+    serializer_class = OrderSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    @idempotent_action('api_order_bulk')
+    def bulk(self, request):
+        """
+        批量下单
+
+        请求体 {"orders": [{"customer_name", "customer_remark", "items": [{"product_id", "quantity"}]}]}，
+        返回与提交顺序一致的逐单结果；校验失败或库存不足的订单不影响其他订单，
+        并发扣减库存重试后仍冲突时返回 409。
+        携带 Idempotency-Key 请求头时，重试直接返回首次提交的结果。
+        """
+        serializer = BulkOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        valid_orders = []
+        for index, data in enumerate(serializer.validated_data['orders']):
+            order_serializer = OrderInputSerializer(data=data)
+            if order_serializer.is_valid():
+                valid_orders.append((index, order_serializer.validated_data))
+                results.append(None)
+            else:
+                results.append({'success': False, 'errors': order_serializer.errors})
+
+        try:
+            created = create_orders_bulk(request.user, [data for _, data in valid_orders])
+        except VersionConflict:
+            # 抛出异常而不是直接返回响应，幂等键不保存该结果，客户端可用同一个键重试
+            raise StockConflict()
+        for (index, _), result in zip(valid_orders, created):
+            results[index] = result
+
+        return Response({
+            'created': sum(1 for result in results if result['success']),
+            'failed': sum(1 for result in results if not result['success']),
+            'results': [{'index': index, **result} for index, result in enumerate(results)],
+        })
+
+
+class EventViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    变更订阅（仅管理员）：订单、支付、库存变更事件按提交顺序增量读取
+
+    ?after= 上次响应中的 next_after；?topic= order/payment/stock/stock_in
+    """
+    serializer_class = OutboxEventSerializer
+    pagination_class = AfterIdPagination
+    permission_classes = [IsAdminUser]
+    filter_backends = []
+
+    def get_queryset(self):
+        return visible_events(self.request.query_params.get('topic'))
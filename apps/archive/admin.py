@@ -0,0 +1,38 @@
+from django.contrib import admin
+
+from .models import ArchivedOrder, ArchivedOrderItem, ArchivedPayment
+
+
+class ReadOnlyAdminMixin:
+    """归档数据只读"""
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ArchivedOrderItemInline(ReadOnlyAdminMixin, admin.TabularInline):
+    model = ArchivedOrderItem
+    fields = ['product_id', 'product_name', 'quantity', 'unit_price', 'cost_price']
+
+
+class ArchivedPaymentInline(ReadOnlyAdminMixin, admin.TabularInline):
+    model = ArchivedPayment
+    fields = ['payment_no', 'amount', 'payment_method', 'status', 'trade_no', 'paid_at']
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ['order_no', 'user_id', 'total_amount', 'total_cost', 'status',
+                    'payment_method', 'paid_at', 'created_at', 'archived_at']
+    list_filter = ['status', 'payment_method']
+    search_fields = ['order_no']
+    ordering = ['-created_at']
+    list_per_page = 20
+    show_full_result_count = False
+    inlines = [ArchivedOrderItemInline, ArchivedPaymentInline]
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.archive.services import archive_orders
+
+
+class Command(BaseCommand):
+    help = '把超过归档期限的已完成/已取消订单移入归档表，并累加到订单日汇总'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days', type=int, default=settings.ORDER_ARCHIVE_HORIZON_DAYS,
+            help='归档期限（天），早于该期限的已关闭订单会被归档',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='每批归档的订单数')
+
+    def handle(self, *args, **options):
+        count = archive_orders(options['horizon_days'], options['batch_size'])
+        self.stdout.write(f'已归档 {count} 个订单')
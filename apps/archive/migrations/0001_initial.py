@@ -0,0 +1,77 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='订单ID')),
+                ('order_no', models.CharField(max_length=50, unique=True, verbose_name='订单号')),
+                ('user_id', models.BigIntegerField(verbose_name='用户ID')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='订单金额')),
+                ('total_cost', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='总成本')),
+                ('status', models.CharField(choices=[('pending', '待支付'), ('completed', '已完成'), ('cancelled', '已取消')], max_length=20, verbose_name='订单状态')),
+                ('payment_method', models.CharField(blank=True, choices=[('offline', '线下支付'), ('online', '线上支付')], max_length=20, null=True, verbose_name='支付方式')),
+                ('customer_name', models.CharField(max_length=100, verbose_name='客户名称')),
+                ('customer_remark', models.TextField(blank=True, verbose_name='客户备注')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='支付时间')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(verbose_name='更新时间')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '归档订单',
+                'verbose_name_plural': '归档订单',
+                'db_table': 'archived_orders',
+                'indexes': [models.Index(fields=['-created_at'], name='archived_or_created_d807f1_idx'), models.Index(fields=['user_id', '-created_at'], name='archived_or_user_id_413cf4_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='明细ID')),
+                ('product_id', models.BigIntegerField(verbose_name='商品ID')),
+                ('product_name', models.CharField(max_length=200, verbose_name='商品名称')),
+                ('quantity', models.IntegerField(verbose_name='数量')),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='单价')),
+                ('cost_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='成本价')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='archive.archivedorder', verbose_name='订单')),
+            ],
+            options={
+                'verbose_name': '归档订单明细',
+                'verbose_name_plural': '归档订单明细',
+                'db_table': 'archived_order_items',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='支付记录ID')),
+                ('payment_no', models.CharField(max_length=50, unique=True, verbose_name='支付单号')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='支付金额')),
+                ('payment_method', models.CharField(max_length=100, verbose_name='支付方式')),
+                ('status', models.CharField(max_length=20, verbose_name='支付状态')),
+                ('trade_no', models.CharField(blank=True, max_length=100, verbose_name='交易流水号')),
+                ('operator_id', models.BigIntegerField(blank=True, null=True, verbose_name='操作人ID')),
+                ('remark', models.TextField(blank=True, verbose_name='备注')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='支付时间')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='archive.archivedorder', verbose_name='订单')),
+            ],
+            options={
+                'verbose_name': '归档支付记录',
+                'verbose_name_plural': '归档支付记录',
+                'db_table': 'archived_payments',
+            },
+        ),
+    ]
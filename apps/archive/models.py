@@ -0,0 +1,113 @@
+from django.db import models
+
+from apps.orders.models import Order
+
+
+class ArchivedOrder(models.Model):
+    """
+    归档订单
+
+    保存在归档库（DATABASES['archive']，未配置时与主库相同），主键沿用原订单 ID；
+    跨库不能建立外键，用户、商品、操作人只保存 ID。
+    """
+    id = models.BigIntegerField('订单ID', primary_key=True)
+    order_no = models.CharField('订单号', max_length=50, unique=True)
+    user_id = models.BigIntegerField('用户ID')
+    total_amount = models.DecimalField('订单金额', max_digits=10, decimal_places=2)
+    total_cost = models.DecimalField('总成本', max_digits=10, decimal_places=2)
+    status = models.CharField('订单状态', max_length=20, choices=Order.ORDER_STATUS)
+    payment_method = models.CharField(
+        '支付方式', max_length=20, choices=Order.PAYMENT_METHODS,
+        null=True, blank=True
+    )
+    customer_name = models.CharField('客户名称', max_length=100)
+    customer_remark = models.TextField('客户备注', blank=True)
+    paid_at = models.DateTimeField('支付时间', null=True, blank=True)
+    created_at = models.DateTimeField('创建时间')
+    updated_at = models.DateTimeField('更新时间')
+    archived_at = models.DateTimeField('归档时间', auto_now_add=True)
+
+    class Meta:
+        db_table = 'archived_orders'
+        verbose_name = '归档订单'
+        verbose_name_plural = '归档订单'
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['user_id', '-created_at']),
+        ]
+
+    def __str__(self):
+        return self.order_no
+
+    @property
+    def profit(self):
+        return self.total_amount - self.total_cost
+
+
+class ArchivedOrderItem(models.Model):
+    """归档订单明细（保存下单时的商品名称）"""
+    id = models.BigIntegerField('明细ID', primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder, on_delete=models.CASCADE,
+        related_name='items', verbose_name='订单'
+    )
+    product_id = models.BigIntegerField('商品ID')
+    product_name = models.CharField('商品名称', max_length=200)
+    quantity = models.IntegerField('数量')
+    unit_price = models.DecimalField('单价', max_digits=10, decimal_places=2, null=True, blank=True)
+    cost_price = models.DecimalField('成本价', max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        db_table = 'archived_order_items'
+        verbose_name = '归档订单明细'
+        verbose_name_plural = '归档订单明细'
+
+    def __str__(self):
+        return f'{self.order.order_no} - {self.product_name}'
+
+    @property
+    def product(self):
+        """
+        对应的商品（由 services.attach_products 从主库批量加载）
+
+        商品已删除时返回只带 ID 和名称的未保存对象，模板中的商品名称、链接仍可使用。
+        """
+        product = getattr(self, '_product', None)
+        if product is None:
+            from apps.products.models import Product
+            product = Product(pk=self.product_id, name=self.product_name)
+        return product
+
+    @property
+    def subtotal(self):
+        return self.unit_price * self.quantity
+
+    @property
+    def profit(self):
+        return (self.unit_price - self.cost_price) * self.quantity
+
+
+class ArchivedPayment(models.Model):
+    """归档支付记录"""
+    id = models.BigIntegerField('支付记录ID', primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder, on_delete=models.CASCADE,
+        related_name='payments', verbose_name='订单'
+    )
+    payment_no = models.CharField('支付单号', max_length=50, unique=True)
+    amount = models.DecimalField('支付金额', max_digits=10, decimal_places=2)
+    payment_method = models.CharField('支付方式', max_length=100)
+    status = models.CharField('支付状态', max_length=20)
+    trade_no = models.CharField('交易流水号', max_length=100, blank=True)
+    operator_id = models.BigIntegerField('操作人ID', null=True, blank=True)
+    remark = models.TextField('备注', blank=True)
+    paid_at = models.DateTimeField('支付时间', null=True, blank=True)
+    created_at = models.DateTimeField('创建时间')
+
+    class Meta:
+        db_table = 'archived_payments'
+        verbose_name = '归档支付记录'
+        verbose_name_plural = '归档支付记录'
+
+    def __str__(self):
+        return f'{self.payment_no} - {self.order.order_no}'
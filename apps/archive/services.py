@@ -0,0 +1,278 @@
+"""
+订单归档服务模块
+提供订单归档和统一的订单历史查询（主库 + 归档库）
+
+订单移出主库时累加两类日汇总，报表归档前后结果一致：
+- OrderRollup：按 (本地日期, 状态, 支付方式) 的订单数和金额，供销售/利润报表
+- OrderItemRollup：已完成订单明细按 (本地日期, 商品) 的销量和金额，供需求预测和 ABC/XYZ 分类
+"""
+import heapq
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, ArchivedPayment
+from apps.orders.models import Order, OrderItem, Payment
+from apps.products.models import Product
+from apps.reports.models import OrderItemRollup, OrderRollup
+from warehouse_management.dbutils import upsert_add
+
+
+CLOSED_STATUSES = ('completed', 'cancelled')
+HISTORY_PAGE_SIZE = 20
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def archive_orders(horizon_days=None, batch_size=500):
+    """
+    把超过归档期限的已完成/已取消订单连同明细、支付记录移入归档表
+
+    每批先写归档库（主键沿用原 ID，重复写入会被忽略），再在主库的一个事务中
+    累加订单和订单明细的日汇总并删除原记录；中途失败后重新运行不会重复归档或重复汇总。
+
+    Returns:
+        int: 归档的订单数
+    """
+    if horizon_days is None:
+        horizon_days = settings.ORDER_ARCHIVE_HORIZON_DAYS
+    cutoff = timezone.now() - timedelta(days=horizon_days)
+    archive_db = router.db_for_write(ArchivedOrder)
+
+    archived = 0
+    while True:
+        orders = list(
+            Order.objects.filter(status__in=CLOSED_STATUSES, created_at__lt=cutoff)
+            .order_by('id')[:batch_size]
+        )
+        if not orders:
+            return archived
+        order_ids = [order.pk for order in orders]
+        items = list(
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .select_related('product')
+            .only('order', 'product__name', 'quantity', 'unit_price', 'cost_price')
+        )
+        payments = list(Payment.objects.filter(order_id__in=order_ids))
+
+        with transaction.atomic(using=archive_db):
+            ArchivedOrder.objects.bulk_create(
+                [to_archived_order(order) for order in orders], ignore_conflicts=True
+            )
+            ArchivedOrderItem.objects.bulk_create(
+                [to_archived_item(item) for item in items], ignore_conflicts=True
+            )
+            ArchivedPayment.objects.bulk_create(
+                [to_archived_payment(payment) for payment in payments], ignore_conflicts=True
+            )
+
+        with transaction.atomic():
+            add_to_rollups(orders, items)
+            Payment.objects.filter(order_id__in=order_ids).delete()
+            OrderItem.objects.filter(order_id__in=order_ids).delete()
+            Order.objects.filter(pk__in=order_ids).delete()
+        archived += len(orders)
+
+
+def to_archived_order(order):
+    return ArchivedOrder(
+        id=order.pk,
+        order_no=order.order_no,
+        user_id=order.user_id,
+        total_amount=order.total_amount,
+        total_cost=order.total_cost,
+        status=order.status,
+        payment_method=order.payment_method,
+        customer_name=order.customer_name,
+        customer_remark=order.customer_remark,
+        paid_at=order.paid_at,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+    )
+
+
+def to_archived_item(item):
+    return ArchivedOrderItem(
+        id=item.pk,
+        order_id=item.order_id,
+        product_id=item.product_id,
+        product_name=item.product.name,
+        quantity=item.quantity,
+        unit_price=item.unit_price,
+        cost_price=item.cost_price,
+    )
+
+
+def to_archived_payment(payment):
+    return ArchivedPayment(
+        id=payment.pk,
+        order_id=payment.order_id,
+        payment_no=payment.payment_no,
+        amount=payment.amount,
+        payment_method=payment.payment_method,
+        status=payment.status,
+        trade_no=payment.trade_no,
+        operator_id=payment.operator_id,
+        remark=payment.remark,
+        paid_at=payment.paid_at,
+        created_at=payment.created_at,
+    )
+
+
+def add_to_rollups(orders, items):
+    """
+    把一批订单按 (本地日期, 状态, 支付方式)、其中已完成订单的明细按 (本地日期, 商品) 累加到日汇总
+    """
+    totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+    completed = {}
+    for order in orders:
+        date = timezone.localdate(order.created_at)
+        key = (date, order.status, order.payment_method or '')
+        totals[key][0] += 1
+        totals[key][1] += order.total_amount
+        totals[key][2] += order.total_cost
+        if order.status == 'completed':
+            completed[order.pk] = date
+    for (date, status, payment_method), (count, amount, cost) in totals.items():
+        upsert_add(
+            OrderRollup,
+            keys={'date': date, 'status': status, 'payment_method': payment_method},
+            increments={'order_count': count, 'total_amount': amount, 'total_cost': cost},
+        )
+
+    item_totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+    for item in items:
+        if item.order_id in completed:
+            total = item_totals[completed[item.order_id], item.product_id]
+            total[0] += item.quantity
+            total[1] += item.quantity * (item.unit_price or 0)
+            total[2] += item.quantity * (item.cost_price or 0)
+    for (date, product_id), (quantity, amount, cost) in item_totals.items():
+        upsert_add(
+            OrderItemRollup,
+            keys={'date': date, 'product_id': product_id},
+            increments={'quantity': quantity, 'total_amount': amount, 'total_cost': cost},
+        )
+
+
+def rebuild_order_rollups():
+    """
+    按归档库重新计算订单和订单明细的日汇总（汇总与归档数据不一致时使用，例如归档中途失败后手工修复过数据）
+
+    在归档库按汇总的键一次聚合，再在主库的一个事务中整体替换两张汇总表。
+
+    Returns:
+        dict: {'rollups': 订单日汇总行数, 'item_rollups': 订单明细日汇总行数}
+    """
+    totals = ArchivedOrder.objects.annotate(date=TruncDate('created_at')).values(
+        'date', 'status', 'payment_method'
+    ).annotate(
+        order_count=Count('id'), total_amount=Sum('total_amount'), total_cost=Sum('total_cost')
+    ).order_by()
+    rollups = {}
+    for item in totals:
+        key = (item['date'], item['status'], item['payment_method'] or '')
+        rollup = rollups.setdefault(key, OrderRollup(
+            date=key[0], status=key[1], payment_method=key[2],
+            order_count=0, total_amount=Decimal('0'), total_cost=Decimal('0'),
+        ))
+        rollup.order_count += item['order_count']
+        rollup.total_amount += item['total_amount']
+        rollup.total_cost += item['total_cost']
+
+    item_totals = ArchivedOrderItem.objects.filter(order__status='completed').annotate(
+        date=TruncDate('order__created_at')
+    ).values_list('date', 'product_id').annotate(
+        units=Sum('quantity'),
+        amount=Sum(F('quantity') * F('unit_price')),
+        cost=Sum(F('quantity') * F('cost_price')),
+    ).order_by()
+    item_rollups = [
+        OrderItemRollup(
+            date=date, product_id=product_id, quantity=quantity,
+            total_amount=amount or Decimal('0'), total_cost=cost or Decimal('0'),
+        )
+        for date, product_id, quantity, amount, cost in item_totals
+    ]
+
+    with transaction.atomic():
+        OrderRollup.objects.all().delete()
+        OrderRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+        OrderItemRollup.objects.all().delete()
+        OrderItemRollup.objects.bulk_create(item_rollups, batch_size=1000)
+    return {'rollups': len(rollups), 'item_rollups': len(item_rollups)}
+
+
+def attach_products(orders):
+    """为归档订单明细批量加载主库中的商品（用于展示图片和链接）"""
+    items = [item for order in orders for item in order.items.all()]
+    products = Product.objects.in_bulk({item.product_id for item in items})
+    for item in items:
+        item._product = products.get(item.product_id)
+
+
+def encode_history_cursor(order):
+    """游标：订单创建时间（自 1970 年起的微秒数）和 ID"""
+    return f'{(order.created_at - CURSOR_EPOCH) // timedelta(microseconds=1)}.{order.pk}'
+
+
+def decode_history_cursor(cursor):
+    """解析 encode_history_cursor 生成的游标，格式错误时抛出 ValueError"""
+    microseconds, pk = cursor.split('.')
+    return CURSOR_EPOCH + timedelta(microseconds=int(microseconds)), int(pk)
+
+
+def get_order_history(user, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """
+    用户的订单（主库 + 归档库）按创建时间倒序的一页
+
+    按 (created_at, id) 游标分页：主库和归档库各读取游标之后的 limit + 1 条再归并，
+    每页的查询量与页码和订单总数无关。
+
+    Args:
+        cursor: 上一页返回的下一页游标，None 表示第一页
+
+    Returns:
+        tuple: (Order 与 ArchivedOrder 对象混合的列表，两者对模板提供相同的属性；下一页游标，没有下一页时为 None)
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    hot = Order.objects.filter(user=user)
+    archived = ArchivedOrder.objects.filter(user_id=user.pk)
+    if cursor is not None:
+        created_at, pk = decode_history_cursor(cursor)
+        after = Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        hot, archived = hot.filter(after), archived.filter(after)
+    hot = hot.prefetch_related('items__product').order_by('-created_at', '-pk')[:limit + 1]
+    archived = list(archived.prefetch_related('items').order_by('-created_at', '-pk')[:limit + 1])
+
+    orders = list(islice(
+        heapq.merge(hot, archived, key=lambda order: (order.created_at, order.pk), reverse=True), limit + 1
+    ))
+    next_cursor = encode_history_cursor(orders[limit - 1]) if len(orders) > limit else None
+    orders = orders[:limit]
+    attach_products([order for order in orders if isinstance(order, ArchivedOrder)])
+    return orders, next_cursor
+
+
+def get_order(user, pk):
+    """
+    按 ID 获取用户的订单，主库中不存在时查找归档库
+
+    Returns:
+        Order | ArchivedOrder | None
+    """
+    order = Order.objects.prefetch_related('items__product').filter(pk=pk, user=user).first()
+    if order is not None:
+        return order
+    order = ArchivedOrder.objects.prefetch_related('items').filter(pk=pk, user_id=user.pk).first()
+    if order is not None:
+        attach_products([order])
+    return order
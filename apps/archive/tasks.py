@@ -0,0 +1,19 @@
+"""
+归档后台任务
+"""
+from django.tasks import task
+
+from .services import archive_orders, rebuild_order_rollups
+from apps.jobs.registry import admin_task
+
+
+@admin_task('归档已关闭订单')
+@task
+def archive_closed_orders():
+    return {'archived': archive_orders()}
+
+
+@admin_task('重建订单日汇总')
+@task
+def rebuild_rollups():
+    return rebuild_order_rollups()
@@ -0,0 +1,160 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, ArchivedPayment
+from .services import archive_orders, get_order, get_order_history, rebuild_order_rollups
+from apps.inventory.forecasting import demand_matrix
+from apps.orders.models import Order, OrderItem, Payment
+from apps.products.models import Category, Product
+from apps.reports.classification import product_revenue
+from apps.reports.models import OrderItemRollup, OrderRollup
+from apps.reports.services import order_status_counts, order_totals, payment_method_totals
+from apps.users.models import User
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='test')
+        cls.other = User.objects.create_user('other', password='test')
+        category = Category.objects.create(name='食品')
+        cls.products = [
+            Product.objects.create(
+                name=f'商品{index}', category=category, cost_price=Decimal('2.00'), selling_price=Decimal('5.00'),
+            )
+            for index in range(2)
+        ]
+
+    def create_order(self, days_ago, items, status='completed', user=None, minutes=0):
+        amount = sum(Decimal('5.00') * quantity for _, quantity in items)
+        order = Order.objects.create(
+            order_no=f'ORDARC{Order.objects.count() + ArchivedOrder.objects.count():04d}',
+            user=user or self.user, customer_name='测试', status=status,
+            total_amount=amount, total_cost=sum(Decimal('2.00') * quantity for _, quantity in items),
+            payment_method='online' if status == 'completed' else None,
+        )
+        for product, quantity in items:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity,
+                unit_price=Decimal('5.00'), cost_price=Decimal('2.00'),
+            )
+        if status == 'completed':
+            Payment.objects.create(
+                payment_no=f'PAY{order.order_no}', order=order, amount=amount, payment_method='在线支付',
+                status='success',
+            )
+        created = timezone.now() - timedelta(days=days_ago, minutes=minutes)
+        Order.objects.filter(pk=order.pk).update(created_at=created, created_date=timezone.localdate(created))
+        return order
+
+    def report(self):
+        """订单级报表和按明细统计的需求、销售额"""
+        product_ids = np.array(sorted(product.pk for product in self.products), dtype=np.int64)
+        start = timezone.localdate() - timedelta(days=399)
+        begin = timezone.make_aware(datetime.combine(start, time.min))
+        return (
+            order_totals(), order_status_counts(), payment_method_totals(),
+            demand_matrix(product_ids, start, 400).tolist(),
+            product_revenue(product_ids, begin, begin + timedelta(days=400), restrict=False).tolist(),
+        )
+
+    def test_archive_moves_closed_orders_and_keeps_reports(self):
+        first, second = self.products
+        old = self.create_order(200, [(first, 2), (second, 1)])
+        self.create_order(200, [(first, 5)], status='cancelled')
+        pending = self.create_order(200, [(first, 1)], status='pending')
+        recent = self.create_order(10, [(second, 3)])
+        before = self.report()
+
+        self.assertEqual(archive_orders(horizon_days=180), 2)
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {pending.pk, recent.pk})
+        self.assertFalse(OrderItem.objects.filter(order_id=old.pk).exists())
+        self.assertFalse(Payment.objects.filter(order_id=old.pk).exists())
+        self.assertEqual(
+            (ArchivedOrder.objects.count(), ArchivedOrderItem.objects.count(), ArchivedPayment.objects.count()),
+            (2, 3, 1),
+        )
+        # 已取消订单的明细不计入明细日汇总
+        self.assertEqual(
+            sorted(OrderItemRollup.objects.values_list('product_id', 'quantity', 'total_amount')),
+            [(first.pk, 2, Decimal('10.00')), (second.pk, 1, Decimal('5.00'))],
+        )
+        self.assertEqual(self.report(), before)
+
+        self.assertEqual(archive_orders(horizon_days=180), 0)
+        self.assertEqual(self.report(), before)
+
+    def test_rerun_after_failure_does_not_count_twice(self):
+        self.create_order(200, [(self.products[0], 2)])
+        before = self.report()
+        with mock.patch('apps.archive.services.add_to_rollups', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                archive_orders(horizon_days=180)
+        self.assertEqual((Order.objects.count(), ArchivedOrder.objects.count()), (1, 1))
+
+        self.assertEqual(archive_orders(horizon_days=180), 1)
+        self.assertEqual((Order.objects.count(), ArchivedOrder.objects.count()), (0, 1))
+        self.assertEqual(self.report(), before)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        first, second = self.products
+        self.create_order(200, [(first, 2), (second, 1)])
+        self.create_order(201, [(first, 4)])
+        self.create_order(200, [(second, 5)], status='cancelled')
+        archive_orders(horizon_days=180)
+
+        def rollups():
+            return (
+                sorted(OrderRollup.objects.values_list(
+                    'date', 'status', 'payment_method', 'order_count', 'total_amount', 'total_cost'
+                )),
+                sorted(OrderItemRollup.objects.values_list(
+                    'date', 'product_id', 'quantity', 'total_amount', 'total_cost'
+                )),
+            )
+
+        incremental = rollups()
+        self.assertEqual(rebuild_order_rollups(), {'rollups': 3, 'item_rollups': 3})
+        self.assertEqual(rollups(), incremental)
+
+    def test_order_history_pages_across_hot_and_archived(self):
+        product = self.products[0]
+        orders = [
+            self.create_order(days_ago, [(product, 1)], minutes=minutes)
+            for days_ago, minutes in [(1, 0), (200, 0), (2, 0), (200, 5), (300, 0)]
+        ]
+        self.create_order(3, [(product, 1)], user=self.other)
+        expected = list(Order.objects.filter(user=self.user).order_by('-created_at').values_list('order_no', flat=True))
+        self.assertEqual(archive_orders(horizon_days=180), 3)
+
+        pages, cursor = [], None
+        while True:
+            page, cursor = get_order_history(self.user, cursor, limit=2)
+            pages.append([order.order_no for order in page])
+            if cursor is None:
+                break
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+        archived = get_order(self.user, orders[4].pk)
+        self.assertIsInstance(archived, ArchivedOrder)
+        self.assertEqual([item.product.name for item in archived.items.all()], [product.name])
+        self.assertIsNone(get_order(self.other, orders[4].pk))
+        with self.assertRaises(ValueError):
+            get_order_history(self.user, 'abc')
+
+    def test_order_list_view_pages(self):
+        for days_ago in range(3):
+            self.create_order(days_ago, [(self.products[0], 1)])
+        self.client.force_login(self.user)
+        response = self.client.get('/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['orders']), 3)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(self.client.get('/orders/?cursor=abc').status_code, 404)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Cart, CartItem
+from warehouse_management.routers import ReplicaChangeListMixin
 
 
 class CartItemInline(admin.TabularInline):
@@ -17,7 +18,7 @@ class CartItemInline(admin.TabularInline):
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['user', 'item_count', 'total_quantity_display', 'total_amount_display', 'updated_at']
     list_filter = ['created_at', 'updated_at']
     search_fields = ['user__username', 'user__phone']
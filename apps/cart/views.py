@@ -1,3 +1,5 @@
+import uuid
+
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
@@ -5,6 +7,7 @@ from django.views.decorators.http import require_POST
 
 from .models import Cart, CartItem
 from apps.products.models import Product
+from warehouse_management.dbutils import upsert_add
 
 
 # ==================== 前台视图 ====================
@@ -21,17 +24,13 @@ def cart_add(request):
     # 获取或创建购物车
     cart, _ = Cart.objects.get_or_create(user=request.user)
     
-    # 添加或更新购物车项
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product=product,
-        defaults={'quantity': quantity}
+    # 添加或累加购物车项（一条 INSERT ... ON CONFLICT 语句）
+    upsert_add(
+        CartItem,
+        keys={'cart_id': cart.pk, 'product_id': product.pk},
+        increments={'quantity': quantity},
     )
     
-    if not created:
-        cart_item.quantity += quantity
-        cart_item.save()
-    
     return JsonResponse({
         'success': True,
         'message': '已加入购物车',
@@ -53,6 +52,7 @@ def cart_list(request):
         'cart': cart,
         'items': items,
         'cart_count': len(items),
+        'idempotency_key': uuid.uuid4().hex,  # 重复提交下单时只创建一个订单
     }
     return render(request, 'frontend/cart/list.html', context)
 
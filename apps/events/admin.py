@@ -0,0 +1,29 @@
+from django.contrib import admin
+
+from .models import OutboxCursor, OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'event_type', 'key', 'created_at']
+    list_filter = ['topic', 'event_type']
+    search_fields = ['key']
+    ordering = ['-id']
+    list_per_page = 50
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxCursor)
+class OutboxCursorAdmin(admin.ModelAdmin):
+    list_display = ['sink', 'last_event_id', 'delivered_count', 'last_error', 'updated_at']
+    readonly_fields = ['sink', 'delivered_count', 'last_error', 'updated_at']
+    fields = ['sink', 'last_event_id', 'delivered_count', 'last_error', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
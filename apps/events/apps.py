@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class EventsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.events'
+    verbose_name = '变更事件'
+
+    def ready(self):
+        import apps.events.bus
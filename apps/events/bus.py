@@ -0,0 +1,116 @@
+"""
+进程内事件总线
+
+每个进程（ASGI worker）中每个 EventBus 只有一个后台任务按 (事务号, 事件 ID) 增量读取发件箱，
+每批新事件调用一次 build 生成消息，再放入全部订阅者的队列：订阅者数量只影响分发，不增加查询和计算。
+
+发件箱由订单、支付和入库的业务事务写入，其他进程（WSGI worker、后台任务、管理命令）的变更同样可见：
+本进程内写入事件的事务提交后（events_committed 信号）立即读取，其他进程的变更最迟 LIVE_POLL_SECONDS 秒后读到。
+读取任务在第一个订阅者加入时启动，只读取启动之后的新事件；最后一个订阅者离开后退出。
+订阅者的队列已满（客户端读取过慢）时清空队列并放入 None，订阅者收到 None 后应断开，由客户端重连后重新加载完整数据。
+"""
+import asyncio
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.dispatch import receiver
+
+from .services import events_after, visible_events
+from .signals import events_committed
+
+
+logger = logging.getLogger(__name__)
+
+_buses = weakref.WeakSet()
+
+
+class EventBus:
+
+    def __init__(self, build, batch_size=500):
+        """build(events) 把一批事件（OutboxEvent 列表）转换为推送给订阅者的消息，返回 None 时不推送"""
+        self.build = build
+        self.batch_size = batch_size
+        self.subscribers = set()
+        self.last_event_id = None
+        self._loop = None
+        self._task = None
+        self._wake = None
+        _buses.add(self)
+
+    def subscribe(self):
+        """加入一个订阅者并返回其队列，需在事件循环中调用"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self.subscribers = set()
+            self.last_event_id = None
+            self._task = loop.create_task(self.run())
+        queue = asyncio.Queue(settings.LIVE_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def wake(self):
+        """立即读取新事件，可在任意线程调用"""
+        loop, event = self._loop, self._wake
+        if loop is None or not self.subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:  # 事件循环已关闭
+            pass
+
+    async def run(self):
+        self.last_event_id = await sync_to_async(self.latest_event_id)()
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.LIVE_POLL_SECONDS)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            if not self.subscribers:
+                break
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception('事件总线读取失败 after=%s', self.last_event_id)
+
+    def latest_event_id(self):
+        latest = visible_events().order_by('-xact_id', '-id').values_list('id', flat=True).first()
+        return latest or 0
+
+    def fetch(self, after):
+        """读取 after 之后的一批事件，返回 (最后一个事件 ID, 消息, 事件数)"""
+        events = list(events_after(visible_events(), after)[:self.batch_size])
+        if not events:
+            return after, None, 0
+        return events[-1].pk, self.build(events), len(events)
+
+    async def poll(self):
+        while True:
+            self.last_event_id, message, count = await sync_to_async(self.fetch)(self.last_event_id)
+            if message is not None:
+                self.publish(message)
+            if count < self.batch_size:
+                return
+
+    def publish(self, message):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+@receiver(events_committed)
+def wake_buses(sender, **kwargs):
+    for bus in list(_buses):
+        bus.wake()
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.events.services import dispatch
+
+
+class Command(BaseCommand):
+    help = '把发件箱中的新事件批量投递给 OUTBOX_SINKS 中配置的下游，可按间隔持续运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sink', action='append', dest='sinks', help='只投递给指定下游，可重复')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批投递的事件数')
+        parser.add_argument('--interval', type=int, default=0, help='运行间隔（秒），0 表示只运行一次')
+
+    def handle(self, *args, **options):
+        while True:
+            for sink, count in dispatch(options['batch_size'], options['sinks']).items():
+                self.stdout.write(f'{sink}: 已投递 {count} 个事件')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,34 @@
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = '启动本地 Webhook 接收端，打印收到的事件（联调 WebhookSink 用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help='监听端口')
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                for event in json.loads(body)['events']:
+                    stdout.write(f"{event['id']} {event['type']} {event['key']}")
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f'Webhook 接收端已启动: http://127.0.0.1:{options["port"]}/')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
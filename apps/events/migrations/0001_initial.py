@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:52
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sink', models.CharField(max_length=50, unique=True, verbose_name='下游')),
+                ('last_event_id', models.BigIntegerField(default=0, verbose_name='已投递事件ID')),
+                ('delivered_count', models.BigIntegerField(default=0, verbose_name='已投递事件数')),
+                ('last_error', models.TextField(blank=True, verbose_name='最近错误')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '投递进度',
+                'verbose_name_plural': '投递进度',
+                'db_table': 'outbox_cursors',
+            },
+        ),
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(choices=[('order', '订单'), ('payment', '支付'), ('stock', '库存'), ('stock_in', '入库')], max_length=20, verbose_name='主题')),
+                ('event_type', models.CharField(max_length=50, verbose_name='事件类型')),
+                ('key', models.CharField(max_length=50, verbose_name='对象ID')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='事件内容')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '变更事件',
+                'verbose_name_plural': '变更事件',
+                'db_table': 'outbox_events',
+                'indexes': [models.Index(fields=['topic', 'id'], name='outbox_even_topic_810286_idx')],
+            },
+        ),
+    ]
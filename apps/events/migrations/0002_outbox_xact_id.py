@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:24
+
+import warehouse_management.dbutils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxevent',
+            name='outbox_even_topic_810286_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='xact_id',
+            field=models.BigIntegerField(db_default=warehouse_management.dbutils.CurrentTransactionId(), editable=False, help_text='写入事件的事务号（PostgreSQL），SQLite 为 0', verbose_name='事务号'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['xact_id', 'id'], name='outbox_even_xact_id_7c29fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['topic', 'xact_id', 'id'], name='outbox_even_topic_cdad92_idx'),
+        ),
+    ]
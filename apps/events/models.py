@@ -0,0 +1,68 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from warehouse_management.dbutils import CurrentTransactionId
+
+
+class OutboxEvent(models.Model):
+    """
+    事件发件箱
+
+    订单、支付和库存变更时在同一事务中写入，业务事务回滚时事件一并回滚；
+    下游通过 dispatch_outbox 命令投递或变更订阅接口按 (事务号, 事件 ID) 增量读取。
+    """
+    TOPICS = [
+        ('order', '订单'),
+        ('payment', '支付'),
+        ('stock', '库存'),
+        ('stock_in', '入库'),
+    ]
+
+    topic = models.CharField('主题', max_length=20, choices=TOPICS)
+    event_type = models.CharField('事件类型', max_length=50)
+    key = models.CharField('对象ID', max_length=50)
+    payload = models.JSONField('事件内容', encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    xact_id = models.BigIntegerField(
+        '事务号', db_default=CurrentTransactionId(), editable=False,
+        help_text='写入事件的事务号（PostgreSQL），SQLite 为 0',
+    )
+
+    class Meta:
+        db_table = 'outbox_events'
+        verbose_name = '变更事件'
+        verbose_name_plural = '变更事件'
+        indexes = [
+            models.Index(fields=['xact_id', 'id']),
+            models.Index(fields=['topic', 'xact_id', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.pk} {self.event_type}'
+
+    def to_message(self):
+        return {
+            'id': self.pk,
+            'topic': self.topic,
+            'type': self.event_type,
+            'key': self.key,
+            'payload': self.payload,
+            'created_at': self.created_at,
+        }
+
+
+class OutboxCursor(models.Model):
+    """投递进度：每个下游记录已确认投递的最大事件 ID（高水位）"""
+    sink = models.CharField('下游', max_length=50, unique=True)
+    last_event_id = models.BigIntegerField('已投递事件ID', default=0)
+    delivered_count = models.BigIntegerField('已投递事件数', default=0)
+    last_error = models.TextField('最近错误', blank=True)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'outbox_cursors'
+        verbose_name = '投递进度'
+        verbose_name_plural = '投递进度'
+
+    def __str__(self):
+        return f'{self.sink}@{self.last_event_id}'
@@ -0,0 +1,109 @@
+"""
+变更事件服务模块
+提供事件写入（发件箱）、按高水位批量投递和增量读取
+
+读取顺序为 (事务号, 事件 ID)：PostgreSQL 上事件 ID 的分配顺序与事务提交顺序不一定一致，
+较小的 ID 可能属于仍未提交的长事务（如大批量对账、后台批量完成订单），按 ID 推进的高水位会越过它。
+因此每个事件记录写入它的事务号，只读取事务号小于当前快照 xmin（最早的未结束事务）的事件：
+这些事务都已结束，之后新提交的事件的事务号一定不小于 xmin，按 (事务号, ID) 排序的高水位不会遗漏。
+长事务未结束期间，之后提交的事件会等它结束后再一起投递。SQLite 写事务串行提交，事务号均为 0，即按 ID 读取。
+"""
+import logging
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import OutboxCursor, OutboxEvent
+from .signals import events_committed
+from warehouse_management.dbutils import SnapshotXmin
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_event(topic, event_type, key, payload):
+    """构造未保存的事件，配合 record_events 批量写入"""
+    return OutboxEvent(topic=topic, event_type=event_type, key=str(key), payload=payload)
+
+
+def record_events(events):
+    """批量写入事件，需在业务事务中调用，业务回滚时事件一并回滚；事务提交后发送 events_committed"""
+    events = OutboxEvent.objects.bulk_create(events)
+    transaction.on_commit(lambda: events_committed.send(sender=OutboxEvent))
+    return events
+
+
+def record_event(topic, event_type, key, payload):
+    return record_events([build_event(topic, event_type, key, payload)])[0]
+
+
+def visible_events(topic=None):
+    """可供下游读取的事件（写入事务均已结束），按 (事务号, ID) 升序"""
+    queryset = OutboxEvent.objects.order_by('xact_id', 'id')
+    if topic:
+        queryset = queryset.filter(topic=topic)
+    if connections[router.db_for_read(OutboxEvent)].vendor == 'postgresql':
+        queryset = queryset.filter(xact_id__lt=SnapshotXmin())
+    return queryset
+
+
+def events_after(queryset, after):
+    """
+    读取位置 after（已读到的事件 ID）之后的事件
+
+    按该事件的 (事务号, ID) 比较；after 为 0 或事件不存在时从头读取 ID 大于 after 的事件。
+    """
+    if not after:
+        return queryset
+    xact_id = OutboxEvent.objects.filter(pk=after).values_list('xact_id', flat=True).first()
+    if xact_id is None:
+        return queryset.filter(pk__gt=after)
+    return queryset.filter(Q(xact_id__gt=xact_id) | Q(xact_id=xact_id, pk__gt=after))
+
+
+def get_sinks(names=None):
+    """按 settings.OUTBOX_SINKS 创建投递目标 {name: sink}"""
+    sinks = {}
+    for name, config in settings.OUTBOX_SINKS.items():
+        if names and name not in names:
+            continue
+        sinks[name] = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return sinks
+
+
+def dispatch(batch_size=500, sink_names=None):
+    """
+    把新事件按 (事务号, ID) 顺序批量投递给各下游
+
+    每个下游单独记录高水位，一批投递成功后才推进；投递失败时记录错误并停在原位置，
+    下次运行从失败的批次重新投递（至少一次，下游按事件 ID 去重）。
+    同一下游只应运行一个投递进程。
+
+    Returns:
+        dict: {下游名称: 本次投递的事件数}
+    """
+    delivered = {}
+    for name, sink in get_sinks(sink_names).items():
+        cursor, _ = OutboxCursor.objects.get_or_create(sink=name)
+        delivered[name] = 0
+        while True:
+            events = list(events_after(visible_events(), cursor.last_event_id)[:batch_size])
+            if not events:
+                break
+            try:
+                sink.deliver([event.to_message() for event in events])
+            except Exception as exc:
+                logger.warning('事件投递失败 sink=%s after=%s: %s', name, cursor.last_event_id, exc)
+                cursor.last_error = str(exc)
+                cursor.save(update_fields=['last_error', 'updated_at'])
+                break
+            cursor.last_event_id = events[-1].pk
+            cursor.delivered_count += len(events)
+            cursor.last_error = ''
+            cursor.save(update_fields=['last_event_id', 'delivered_count', 'last_error', 'updated_at'])
+            delivered[name] += len(events)
+            if len(events) < batch_size:
+                break
+    return delivered
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+# 写入发件箱事件的事务提交后发送（本进程内），用于立即唤醒进程内事件总线（bus.py）
+events_committed = Signal()
@@ -0,0 +1,49 @@
+"""
+事件投递目标
+
+在 settings.OUTBOX_SINKS 中按名称配置，BACKEND 为类路径，OPTIONS 为构造参数；
+投递目标实现 deliver(messages)，抛出异常表示该批投递失败，下次从该批重新投递。
+"""
+import json
+import os
+import urllib.request
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+class JsonlFileSink:
+    """追加写入 JSON Lines 文件，每行一个事件"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def deliver(self, messages):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(dumps(message) + '\n' for message in messages)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class WebhookSink:
+    """以 {"events": [...]} POST 到 url，连接失败或 4xx/5xx 响应视为投递失败"""
+
+    def __init__(self, url, timeout=10, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def deliver(self, messages):
+        request = urllib.request.Request(
+            self.url,
+            data=dumps({'events': messages}).encode('utf-8'),
+            headers={'Content-Type': 'application/json', **self.headers},
+            method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
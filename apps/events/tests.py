@@ -0,0 +1,72 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .models import OutboxCursor, OutboxEvent
+from .services import dispatch, events_after, record_event
+
+
+class FailingSink:
+    def deliver(self, messages):
+        raise ConnectionError('下游不可用')
+
+
+class OutboxTestMixin:
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'outbox.jsonl'
+        for index in range(5):
+            record_event('order', 'order.status_changed', index, {'to': 'completed'})
+
+    def sinks(self, **extra):
+        return {
+            'jsonl': {'BACKEND': 'apps.events.sinks.JsonlFileSink', 'OPTIONS': {'path': self.path}},
+            **extra,
+        }
+
+
+class DispatchTests(OutboxTestMixin, TransactionTestCase):
+    # PostgreSQL 上只读取写入事务已结束的事件，测试数据须实际提交
+
+    def test_delivers_in_batches_and_advances_high_water_mark(self):
+        with override_settings(OUTBOX_SINKS=self.sinks()):
+            self.assertEqual(dispatch(batch_size=2), {'jsonl': 5})
+            record_event('payment', 'payment.created', 1, {'amount': '10.00'})
+            self.assertEqual(dispatch(batch_size=2), {'jsonl': 1})
+        lines = [json.loads(line) for line in self.path.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual([line['key'] for line in lines], ['0', '1', '2', '3', '4', '1'])
+        self.assertEqual(OutboxCursor.objects.get(sink='jsonl').last_event_id, lines[-1]['id'])
+
+    def test_failed_sink_keeps_position(self):
+        failing = {'failing': {'BACKEND': 'apps.events.tests.FailingSink'}}
+        with override_settings(OUTBOX_SINKS=self.sinks(**failing)):
+            self.assertEqual(dispatch(), {'jsonl': 5, 'failing': 0})
+        cursor = OutboxCursor.objects.get(sink='failing')
+        self.assertEqual(cursor.last_event_id, 0)
+        self.assertIn('下游不可用', cursor.last_error)
+
+    def test_reads_in_transaction_order(self):
+        # 模拟 PostgreSQL 上 ID 较小的事件属于较晚提交的事务
+        events = list(OutboxEvent.objects.order_by('id'))
+        OutboxEvent.objects.filter(pk=events[1].pk).update(xact_id=events[-1].xact_id + 1)
+        queryset = OutboxEvent.objects.order_by('xact_id', 'id')
+        self.assertEqual(
+            [event.key for event in events_after(queryset, events[2].pk)], ['3', '4', '1'],
+        )
+        self.assertEqual([event.key for event in events_after(queryset, events[1].pk)], [])
+        self.assertEqual(len(events_after(queryset, 0)), 5)
+
+@skipUnless(connection.vendor == 'postgresql', '只有 PostgreSQL 按快照 xmin 过滤')
+class UnfinishedTransactionTests(OutboxTestMixin, TestCase):
+
+    def test_hides_events_of_unfinished_transactions(self):
+        # TestCase 在未提交的事务中运行，写入的事件对下游不可见
+        with override_settings(OUTBOX_SINKS=self.sinks()):
+            self.assertEqual(dispatch(), {'jsonl': 0})
+        self.assertEqual(OutboxCursor.objects.get(sink='jsonl').last_event_id, 0)
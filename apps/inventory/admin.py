@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db.models import Sum
 from django.utils.html import format_html
-from .models import Supplier, StockIn
+from .models import Supplier, StockIn, StockAlert
+from warehouse_management.routers import ReplicaChangeListMixin
+from apps.products.services import get_category_tree, get_category_descendant_ids
 
 
 # 自定义筛选器
@@ -9,17 +12,16 @@ class ProductCategoryFilter(admin.SimpleListFilter):
     parameter_name = 'product_category'
     
     def lookups(self, request, model_admin):
-        from apps.products.models import Category
-        categories = Category.objects.filter(parent__isnull=True)
-        return [(c.id, c.name) for c in categories]
+        return [(c.id, c.name) for c in get_category_tree()['roots']]
     
     def queryset(self, request, queryset):
         if self.value():
-            from apps.products.models import Category
-            category = Category.objects.get(id=self.value())
             # 包含该分类及其子分类的商品
-            category_ids = [category.id] + list(category.children.values_list('id', flat=True))
-            return queryset.filter(product__category_id__in=category_ids)
+            try:
+                category_ids = get_category_descendant_ids(int(self.value()))
+            except ValueError:
+                category_ids = None
+            return queryset.filter(product__category_id__in=category_ids or [])
 
 
 class HasSupplierFilter(admin.SimpleListFilter):
@@ -57,28 +59,35 @@ class HasStockInFilter(admin.SimpleListFilter):
 
 
 @admin.register(Supplier)
-class SupplierAdmin(admin.ModelAdmin):
-    list_display = ['name', 'contact', 'phone', 'is_active', 'stock_in_count', 'total_stock_in_amount', 'created_at']
+class SupplierAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['name', 'contact', 'phone', 'lead_time_days', 'is_active', 'stock_in_count', 'total_stock_in_amount', 'created_at']
     list_filter = ['is_active', HasStockInFilter, 'created_at']
     search_fields = ['name', 'contact', 'phone', 'address']
     list_editable = ['is_active']
     ordering = ['-created_at']
     list_per_page = 20
     
+    def get_queryset(self, request):
+        # 读取供应商入库月汇总，不再逐行聚合入库记录
+        return super().get_queryset(request).annotate(
+            _stock_in_count=Sum('monthly_stats__record_count'),
+            _stock_in_amount=Sum('monthly_stats__total_cost'),
+        )
+    
     def stock_in_count(self, obj):
-        return obj.stock_ins.count()
+        return obj._stock_in_count or 0
     stock_in_count.short_description = '入库次数'
+    stock_in_count.admin_order_field = '_stock_in_count'
     
     def total_stock_in_amount(self, obj):
-        from django.db.models import Sum, F
-        result = obj.stock_ins.aggregate(total=Sum(F('quantity') * F('unit_cost')))
-        total = result['total'] or 0
+        total = obj._stock_in_amount or 0
         return format_html('<b>{}</b>', f'{total:.2f}')
     total_stock_in_amount.short_description = '入库总额'
+    total_stock_in_amount.admin_order_field = '_stock_in_amount'
 
 
 @admin.register(StockIn)
-class StockInAdmin(admin.ModelAdmin):
+class StockInAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['stock_in_no', 'product', 'product_category', 'quantity', 'unit_cost', 'total_cost',
                     'supplier', 'operator', 'created_at']
     list_filter = [ProductCategoryFilter, 'supplier', HasSupplierFilter, 'created_at']
@@ -131,3 +140,37 @@ class StockInAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # 不允许删除入库记录
         return False
+
+
+class AlertOpenFilter(admin.SimpleListFilter):
+    title = '是否已恢复'
+    parameter_name = 'resolved'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('no', '预警中'),
+            ('yes', '已恢复'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'no':
+            return queryset.filter(resolved_at__isnull=True)
+        elif self.value() == 'yes':
+            return queryset.filter(resolved_at__isnull=False)
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['product', 'level', 'available_quantity', 'reorder_point', 'safety_stock', 'created_at', 'resolved_at']
+    list_filter = [AlertOpenFilter, 'level', 'created_at']
+    search_fields = ['product__name']
+    list_select_related = ['product']
+    ordering = ['-id']
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        # 预警由库存变更自动创建
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,115 @@
+"""
+库存预警
+
+每个商品的补货点/安全库存依次取商品设置、分类默认值、系统默认值（STOCK_REORDER_POINT_DEFAULT /
+STOCK_SAFETY_STOCK_DEFAULT）。预警级别保存在 ProductStock.alert_level：
+0 正常，1 可用库存 <= 补货点，2 可用库存 <= 安全库存。
+
+库存服务每次变更后对涉及的商品调用 evaluate_stock_alerts（与库存 UPDATE 在同一事务中，
+库存行此时已被本事务锁定），只有级别变化的商品才写入：级别升高时创建 StockAlert，
+降低时关闭高于新级别的预警，并写入 stock.alert_raised / stock.alert_resolved 事件。
+低库存列表按 alert_level 的部分索引查询，不需要扫描全部库存。
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, QuerySet, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StockAlert
+from apps.events.services import build_event, record_events
+from apps.products.models import ProductStock
+from warehouse_management.dbutils import update_rows
+
+
+def with_thresholds(queryset):
+    """为 ProductStock 查询集标注生效的补货点（reorder）、安全库存（safety）和预警级别（level）"""
+    reorder = Coalesce(
+        F('product__reorder_point'), F('product__category__reorder_point'), Value(settings.STOCK_REORDER_POINT_DEFAULT)
+    )
+    safety = Coalesce(
+        F('product__safety_stock'), F('product__category__safety_stock'), Value(settings.STOCK_SAFETY_STOCK_DEFAULT)
+    )
+    return queryset.annotate(reorder=reorder, safety=safety).annotate(level=Case(
+        When(available_quantity__lte=F('safety'), then=Value(2)),
+        When(available_quantity__lte=F('reorder'), then=Value(1)),
+        default=Value(0),
+    ))
+
+
+def evaluate_stock_alerts(product_ids=None):
+    """
+    重新计算商品的预警级别，只处理级别发生变化的商品
+
+    Args:
+        product_ids: 商品 ID 列表或查询集，None 表示全部商品（补货点默认值变化后）
+
+    Returns:
+        list: 新创建的 StockAlert
+    """
+    stocks = with_thresholds(ProductStock.objects.all())
+    if product_ids is not None:
+        if not isinstance(product_ids, QuerySet):
+            product_ids = list(product_ids)
+            if not product_ids:
+                return []
+        stocks = stocks.filter(product_id__in=product_ids)
+    changes = list(stocks.exclude(alert_level=F('level')).values_list(
+        'pk', 'product_id', 'available_quantity', 'alert_level', 'level', 'reorder', 'safety'
+    ))
+    if not changes:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        update_rows(ProductStock, ['alert_level'], [(pk, level) for pk, _, _, _, level, _, _ in changes])
+
+        resolved = []
+        for level in (0, 1):
+            recovered = [product_id for _, product_id, _, old, new, _, _ in changes if new == level < old]
+            if recovered:
+                alerts = StockAlert.objects.filter(product_id__in=recovered, resolved_at__isnull=True, level__gt=level)
+                resolved += list(alerts.values_list('pk', 'product_id', 'level'))
+                alerts.update(resolved_at=now)
+
+        # 级别下降但仍在预警中（如紧急直接补货到低库存）：没有该级别的未解除预警时按新级别创建
+        downgraded = [product_id for _, product_id, _, old, new, _, _ in changes if 0 < new < old]
+        still_open = set(StockAlert.objects.filter(
+            product_id__in=downgraded, resolved_at__isnull=True,
+        ).values_list('product_id', 'level')) if downgraded else set()
+
+        created = StockAlert.objects.bulk_create([
+            StockAlert(
+                product_id=product_id, level=new, available_quantity=available,
+                reorder_point=reorder, safety_stock=safety,
+            )
+            for _, product_id, available, old, new, reorder, safety in changes
+            if new > old or (0 < new < old and (product_id, new) not in still_open)
+        ])
+
+        record_events(
+            [
+                build_event('stock', 'stock.alert_raised', alert.product_id, {
+                    'product_id': alert.product_id,
+                    'level': alert.level,
+                    'available_quantity': alert.available_quantity,
+                    'reorder_point': alert.reorder_point,
+                    'safety_stock': alert.safety_stock,
+                })
+                for alert in created
+            ]
+            + [
+                build_event('stock', 'stock.alert_resolved', product_id, {
+                    'product_id': product_id, 'alert_id': pk, 'level': level,
+                })
+                for pk, product_id, level in resolved
+            ]
+        )
+    return created
+
+
+def low_stocks():
+    """预警中的商品库存（按部分索引查询），紧急的在前"""
+    return with_thresholds(
+        ProductStock.objects.filter(alert_level__gt=0).select_related('product')
+    ).order_by('-alert_level', 'available_quantity')
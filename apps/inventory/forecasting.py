@@ -0,0 +1,259 @@
+"""
+需求预测与补货建议
+
+1. 按商品 × 本地日期汇总最近 FORECAST_HISTORY_DAYS 天的下单数量（已取消订单除外，已归档的订单读取明细日汇总），
+   分组 SQL 读取后填入 NumPy 矩阵（行为商品，列为日期），后续计算全部按矩阵整体运算，
+   不逐个商品循环：
+   - 日均销量：按 FORECAST_HALF_LIFE_DAYS 半衰期指数加权，近期销量权重更高
+   - 星期季节系数：各星期几的日均销量 / 整体日均销量，销量少的商品向 1 收缩
+   - 日销量标准差：用于计算统计安全库存
+2. 按日均销量 × 未来各天的季节系数累计预测需求，得到当前可用库存可支撑的天数
+3. 商品的供应商取最近一次入库的供应商；供应商的到货周期取最近入库记录中，
+   入库时该商品已处于库存预警的，从预警时间到入库时间的中位数，没有样本时使用 Supplier.lead_time_days
+4. 建议采购量 = 到货周期 + 补货间隔（FORECAST_REVIEW_DAYS）内的预测需求 + 安全库存 - 可用库存，
+   安全库存取 z × 日销量标准差 × √到货周期 与商品设置的安全库存中较大者
+"""
+import csv
+import math
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from statistics import median
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .alerts import with_thresholds
+from .models import StockAlert, StockIn, Supplier
+from apps.orders.models import OrderItem
+from apps.products.models import Product, ProductStock
+from apps.reports.models import OrderItemRollup
+
+
+# 季节系数的收缩强度：相当于额外加入若干天销量等于整体日均值的样本
+SEASONALITY_PRIOR_DAYS = 2
+# 入库时距离预警超过该天数的不计入到货周期样本（预警后很久才入库多半不是为它补货）
+MAX_LEAD_TIME_DAYS = 60
+
+
+@dataclass
+class Forecast:
+    """
+    预测结果，各数组按 product_ids 对齐
+
+    days_of_cover 为 inf 表示没有销量；suggested 为建议采购量（0 表示不需要补货）
+    """
+    as_of: object
+    product_ids: np.ndarray
+    available: np.ndarray
+    velocity: np.ndarray
+    days_of_cover: np.ndarray
+    lead_days: np.ndarray
+    safety: np.ndarray
+    suggested: np.ndarray
+    supplier_ids: np.ndarray  # 0 表示没有供应商
+
+    def suggestions(self):
+        """需要补货的商品 [(product_id, supplier_id|None, 建议采购量, 可用库存, 日均销量, 可支撑天数, 到货周期)]，按供应商分组"""
+        indexes = np.flatnonzero(self.suggested > 0)
+        indexes = indexes[np.lexsort((self.days_of_cover[indexes], self.supplier_ids[indexes]))]
+        return [
+            (
+                int(self.product_ids[i]), int(self.supplier_ids[i]) or None, int(self.suggested[i]),
+                int(self.available[i]), float(self.velocity[i]), float(self.days_of_cover[i]), float(self.lead_days[i]),
+            )
+            for i in indexes
+        ]
+
+    def supplier_totals(self):
+        """各供应商的建议采购 {supplier_id|None: (商品数, 建议采购总量)}"""
+        mask = self.suggested > 0
+        supplier_ids, inverse = np.unique(self.supplier_ids[mask], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(supplier_ids))
+        totals = np.bincount(inverse, weights=self.suggested[mask], minlength=len(supplier_ids))
+        return {
+            int(supplier_id) or None: (int(count), int(total))
+            for supplier_id, count, total in zip(supplier_ids, counts, totals)
+        }
+
+
+def demand_matrix(product_ids, start, days, restrict=False):
+    """
+    商品 × 日期的下单数量矩阵
+
+    Args:
+        product_ids: 升序的商品 ID 数组（矩阵的行）
+        start: 第一列对应的本地日期
+        days: 列数
+        restrict: 只查询 product_ids 中商品的明细（商品数远少于全部商品时使用）
+    """
+    matrix = np.zeros((len(product_ids), days))
+    if not len(product_ids):
+        return matrix
+    begin = timezone.make_aware(datetime.combine(start, time.min))
+    rows = OrderItem.objects.filter(
+        order__created_at__gte=begin,
+        order__created_at__lt=begin + timedelta(days=days),
+    ).exclude(order__status='cancelled')
+    if restrict:
+        rows = rows.filter(product_id__in=product_ids.tolist())
+    rows = rows.annotate(
+        day=TruncDate('order__created_at')
+    ).values_list('product_id', 'day').annotate(quantity=Sum('quantity')).order_by()
+    # 已归档订单的明细日汇总（与主库同一天的两行由 np.add.at 累加）
+    rollups = OrderItemRollup.objects.filter(date__gte=start, date__lt=start + timedelta(days=days))
+    if restrict:
+        rollups = rollups.filter(product_id__in=product_ids.tolist())
+    rows = list(rows) + list(rollups.values_list('product_id', 'date', 'quantity'))
+    if not rows:
+        return matrix
+    item_products, item_days, quantities = zip(*rows)
+    item_products = np.fromiter(item_products, dtype=np.int64, count=len(rows))
+    columns = np.fromiter(((day - start).days for day in item_days), dtype=np.int64, count=len(rows))
+    positions = np.searchsorted(product_ids, item_products)
+    positions = np.minimum(positions, len(product_ids) - 1)
+    known = product_ids[positions] == item_products  # 没有库存记录的商品不预测
+    np.add.at(matrix, (positions[known], columns[known]), np.asarray(quantities, dtype=float)[known])
+    return matrix
+
+
+def weekday_factors(matrix, start):
+    """各商品的星期季节系数矩阵 (商品数, 7)，第 j 列对应星期 j（周一为 0）"""
+    weekdays = (start.weekday() + np.arange(matrix.shape[1])) % 7
+    onehot = np.eye(7)[weekdays]  # (天数, 7)
+    weekday_sums = matrix @ onehot
+    weekday_counts = onehot.sum(axis=0)
+    daily_mean = matrix.mean(axis=1, keepdims=True)
+    prior = SEASONALITY_PRIOR_DAYS * daily_mean
+    expected = (weekday_counts + SEASONALITY_PRIOR_DAYS) * daily_mean
+    return np.divide(weekday_sums + prior, expected, out=np.ones_like(weekday_sums), where=expected > 0)
+
+
+def weighted_velocity(matrix, half_life):
+    """按半衰期指数加权的日均销量（最后一列权重最高）"""
+    ages = np.arange(matrix.shape[1])[::-1]
+    weights = 0.5 ** (ages / half_life)
+    return matrix @ weights / weights.sum()
+
+
+def supplier_lead_times(since):
+    """
+    各供应商的到货周期（天）{supplier_id: 天数}
+
+    样本为 since 之后的入库记录中，入库时该商品有未恢复的库存预警的，取预警时间到入库时间；
+    没有样本的供应商使用其 lead_time_days。
+    """
+    alert_at = StockAlert.objects.filter(
+        Q(resolved_at__isnull=True) | Q(resolved_at__gte=OuterRef('created_at')),
+        product_id=OuterRef('product_id'),
+        created_at__lte=OuterRef('created_at'),
+    ).order_by('created_at').values('created_at')[:1]
+    samples = {}
+    stock_ins = StockIn.objects.filter(created_at__gte=since, supplier__isnull=False).annotate(
+        alert_at=Subquery(alert_at)
+    ).filter(alert_at__isnull=False).values_list('supplier_id', 'created_at', 'alert_at')
+    for supplier_id, created_at, alerted_at in stock_ins:
+        lead = (created_at - alerted_at).total_seconds() / 86400
+        if lead <= MAX_LEAD_TIME_DAYS:
+            samples.setdefault(supplier_id, []).append(lead)
+
+    lead_times = {}
+    for supplier_id, default in Supplier.objects.values_list('pk', 'lead_time_days'):
+        lead_times[supplier_id] = median(samples[supplier_id]) if supplier_id in samples else float(default)
+    return lead_times
+
+
+def product_suppliers(product_ids):
+    """商品最近一次入库的供应商，数组按 product_ids 对齐，0 表示没有"""
+    latest = StockIn.objects.filter(supplier__isnull=False).values('product_id').annotate(
+        last_id=Max('id')
+    ).values('last_id')
+    rows = StockIn.objects.filter(id__in=Subquery(latest)).values_list('product_id', 'supplier_id')
+    supplier_ids = np.zeros(len(product_ids), dtype=np.int64)
+    if rows and len(product_ids):
+        products, suppliers = (np.asarray(column, dtype=np.int64) for column in zip(*rows))
+        positions = np.minimum(np.searchsorted(product_ids, products), len(product_ids) - 1)
+        known = product_ids[positions] == products
+        supplier_ids[positions[known]] = suppliers[known]
+    return supplier_ids
+
+
+def forecast_replenishment(as_of=None, history_days=None, review_days=None):
+    """
+    计算全部商品的日均销量、可支撑天数和建议采购量
+
+    Args:
+        as_of: 预测基准日期（本地日期，不含当天销量），默认今天
+        history_days: 使用的历史天数，默认 FORECAST_HISTORY_DAYS
+        review_days: 补货间隔天数，默认 FORECAST_REVIEW_DAYS
+
+    Returns:
+        Forecast
+    """
+    as_of = as_of or timezone.localdate()
+    history_days = history_days or settings.FORECAST_HISTORY_DAYS
+    review_days = settings.FORECAST_REVIEW_DAYS if review_days is None else review_days
+    start = as_of - timedelta(days=history_days)
+
+    stocks = with_thresholds(ProductStock.objects.all()).order_by('product_id').values_list(
+        'product_id', 'available_quantity', 'safety'
+    )
+    stocks = np.array(list(stocks), dtype=np.int64).reshape(-1, 3)
+    product_ids, available, configured_safety = stocks.T
+
+    matrix = demand_matrix(product_ids, start, history_days)
+    velocity = weighted_velocity(matrix, settings.FORECAST_HALF_LIFE_DAYS)
+    factors = weekday_factors(matrix, start)
+    deviation = matrix.std(axis=1)
+
+    supplier_ids = product_suppliers(product_ids)
+    lead_times = supplier_lead_times(timezone.now() - timedelta(days=history_days))
+    default_lead = float(Supplier._meta.get_field('lead_time_days').default)
+    suppliers, inverse = np.unique(supplier_ids, return_inverse=True)
+    lead_days = np.array([lead_times.get(int(supplier_id), default_lead) for supplier_id in suppliers])[inverse]
+
+    # 未来第 1..horizon 天的累计预测需求 (商品数, horizon)
+    horizon = max(int(math.ceil(lead_days.max(initial=0))) + review_days, settings.FORECAST_COVER_DAYS)
+    future_weekdays = (as_of.weekday() + np.arange(horizon)) % 7
+    cumulative = velocity[:, None] * np.cumsum(factors[:, future_weekdays], axis=1)
+
+    # 可支撑天数：累计需求首次超过可用库存的天数，预测范围内不超过时按日均销量外推
+    exceeded = cumulative - available[:, None] > 1e-6  # 容忍加权平均的浮点误差
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extrapolated = np.where(velocity > 0, np.maximum(available, 0) / velocity, np.inf)
+    days_of_cover = np.where(exceeded.any(axis=1), exceeded.argmax(axis=1), extrapolated).astype(float)
+
+    # 到货周期 + 补货间隔内的预测需求（按小数天在相邻两天之间插值）
+    needed_days = np.clip(lead_days + review_days, 0, horizon)
+    whole = np.floor(needed_days).astype(np.int64)
+    padded = np.hstack([np.zeros((len(product_ids), 1)), cumulative])
+    rows = np.arange(len(product_ids))
+    upper = np.minimum(whole + 1, horizon)
+    demand = padded[rows, whole] + (needed_days - whole) * (padded[rows, upper] - padded[rows, whole])
+
+    safety = np.maximum(settings.FORECAST_SERVICE_LEVEL_Z * deviation * np.sqrt(lead_days), configured_safety)
+    suggested = np.ceil(np.round(np.maximum(demand + safety - available, 0), 6)).astype(np.int64)
+    suggested[velocity <= 0] = 0
+
+    return Forecast(
+        as_of=as_of, product_ids=product_ids, available=available, velocity=velocity,
+        days_of_cover=days_of_cover, lead_days=lead_days, safety=safety, suggested=suggested,
+        supplier_ids=supplier_ids,
+    )
+
+
+def write_suggestions(forecast, f):
+    """把补货建议按供应商分组写入 CSV"""
+    suggestions = forecast.suggestions()
+    names = dict(Product.objects.filter(pk__in=[row[0] for row in suggestions]).values_list('pk', 'name'))
+    suppliers = dict(Supplier.objects.values_list('pk', 'name'))
+    writer = csv.writer(f)
+    writer.writerow(['供应商', '商品ID', '商品名称', '建议采购量', '可用库存', '日均销量', '可支撑天数', '到货周期（天）'])
+    for product_id, supplier_id, quantity, available, velocity, cover, lead in suggestions:
+        writer.writerow([
+            suppliers.get(supplier_id, '无供应商'), product_id, names.get(product_id, ''), quantity, available,
+            f'{velocity:.2f}', f'{cover:.0f}', f'{lead:.1f}',
+        ])
+    return len(suggestions)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.alerts import evaluate_stock_alerts
+from apps.products.models import ProductStock
+
+
+class Command(BaseCommand):
+    help = '按补货点/安全库存重新计算全部商品的库存预警级别（上线后首次执行，或修改默认补货点设置后执行）'
+
+    def handle(self, *args, **options):
+        created = evaluate_stock_alerts()
+        self.stdout.write(
+            f'新增预警 {len(created)} 条，当前预警商品 {ProductStock.objects.filter(alert_level__gt=0).count()} 个'
+        )
@@ -0,0 +1,37 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.forecasting import forecast_replenishment, write_suggestions
+from apps.inventory.models import Supplier
+
+
+class Command(BaseCommand):
+    help = '按订单历史预测各商品销量和可支撑天数，按供应商汇总建议采购量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='预测基准日期（如 2025-01-01），默认今天')
+        parser.add_argument('--history-days', type=int, help='使用的历史天数，默认 FORECAST_HISTORY_DAYS')
+        parser.add_argument('--review-days', type=int, help='补货间隔天数，默认 FORECAST_REVIEW_DAYS')
+        parser.add_argument('--output', help='补货建议明细 CSV 路径')
+
+    def handle(self, *args, **options):
+        try:
+            as_of = date.fromisoformat(options['as_of']) if options['as_of'] else None
+        except ValueError:
+            raise CommandError('--as-of 格式应为 YYYY-MM-DD')
+
+        started = time.monotonic()
+        forecast = forecast_replenishment(as_of, options['history_days'], options['review_days'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'预测 {len(forecast.product_ids)} 个商品，用时 {elapsed:.1f} 秒')
+
+        names = dict(Supplier.objects.values_list('pk', 'name'))
+        for supplier_id, (count, total) in forecast.supplier_totals().items():
+            self.stdout.write(f'{names.get(supplier_id, "无供应商")}：{count} 个商品，建议采购 {total}')
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8-sig') as f:
+                rows = write_suggestions(forecast, f)
+            self.stdout.write(f'补货建议 {rows} 行已写入 {options["output"]}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.supplier_stats import rebuild_supplier_stats
+
+
+class Command(BaseCommand):
+    help = '按全部入库记录重新计算供应商入库月汇总（上线后首次执行，或批量导入、修改入库记录后执行）'
+
+    def handle(self, *args, **options):
+        monthly, products = rebuild_supplier_stats()
+        self.stdout.write(f'供应商月汇总 {monthly} 行，供应商商品月汇总 {products} 行')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.services import set_stock_shards
+from apps.products.models import ProductStock
+
+
+class Command(BaseCommand):
+    help = '设置热门商品的库存分片数，下单冻结库存时分散到多行，0 表示取消分片'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='+', type=int, help='商品 ID')
+        parser.add_argument('--shards', type=int, required=True, help='分片数，0 取消分片')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['shards'] <= 64:
+            raise CommandError('分片数须在 0 到 64 之间')
+        for product_id in options['product_ids']:
+            try:
+                stock = set_stock_shards(product_id, options['shards'])
+            except ProductStock.DoesNotExist:
+                raise CommandError(f'商品 {product_id} 没有库存记录')
+            self.stdout.write(
+                f'商品 {product_id}：{stock.shard_count} 个分片，'
+                f'可用 {stock.available_quantity}，冻结 {stock.frozen_quantity}'
+            )
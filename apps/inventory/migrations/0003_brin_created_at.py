@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from warehouse_management.dbutils import brin_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_initial'),
+    ]
+
+    operations = [
+        brin_index('stock_ins', 'created_at'),
+    ]
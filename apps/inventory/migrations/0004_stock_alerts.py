@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_brin_created_at'),
+        ('products', '0005_reorder_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField(choices=[(1, '低于补货点'), (2, '低于安全库存')], verbose_name='预警级别')),
+                ('available_quantity', models.IntegerField(verbose_name='可用库存')),
+                ('reorder_point', models.PositiveIntegerField(verbose_name='补货点')),
+                ('safety_stock', models.PositiveIntegerField(verbose_name='安全库存')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='预警时间')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='恢复时间')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='products.product', verbose_name='商品')),
+            ],
+            options={
+                'verbose_name': '库存预警',
+                'verbose_name_plural': '库存预警',
+                'db_table': 'stock_alerts',
+                'indexes': [models.Index(condition=models.Q(('resolved_at__isnull', True)), fields=['product'], name='stock_alert_open_idx')],
+            },
+        ),
+    ]
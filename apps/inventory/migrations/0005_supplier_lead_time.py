@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='lead_time_days',
+            field=models.PositiveSmallIntegerField(default=7, help_text='补货预测在没有历史到货记录时使用', verbose_name='到货周期（天）'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_supplier_lead_time'),
+        ('products', '0005_reorder_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='当月 1 日', verbose_name='月份')),
+                ('quantity', models.BigIntegerField(default=0, verbose_name='入库数量')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='入库成本')),
+                ('record_count', models.IntegerField(default=0, verbose_name='入库次数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='inventory.supplier', verbose_name='供应商')),
+            ],
+            options={
+                'verbose_name': '供应商入库月汇总',
+                'verbose_name_plural': '供应商入库月汇总',
+                'db_table': 'supplier_monthly_stats',
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'month'), name='uniq_supplier_monthly_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierProductMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='当月 1 日', verbose_name='月份')),
+                ('quantity', models.BigIntegerField(default=0, verbose_name='入库数量')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='入库成本')),
+                ('record_count', models.IntegerField(default=0, verbose_name='入库次数')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplier_monthly_stats', to='products.product', verbose_name='商品')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_monthly_stats', to='inventory.supplier', verbose_name='供应商')),
+            ],
+            options={
+                'verbose_name': '供应商商品入库月汇总',
+                'verbose_name_plural': '供应商商品入库月汇总',
+                'db_table': 'supplier_product_monthly_stats',
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'month', 'product'), name='uniq_supplier_product_monthly_stat')],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from warehouse_management.fields import LocalDateField
+
 
 class Supplier(models.Model):
     """供应商"""
@@ -8,6 +10,9 @@ class Supplier(models.Model):
     contact = models.CharField('联系人', max_length=100, blank=True)
     phone = models.CharField('联系电话', max_length=20, blank=True)
     address = models.TextField('地址', blank=True)
+    lead_time_days = models.PositiveSmallIntegerField(
+        '到货周期（天）', default=7, help_text='补货预测在没有历史到货记录时使用'
+    )
     is_active = models.BooleanField('是否启用', default=True)
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
 
@@ -39,6 +44,7 @@ class StockIn(models.Model):
     )
     remark = models.TextField('备注', blank=True)
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    created_date = LocalDateField('创建日期', source='created_at', help_text='创建时间的本地日期，报表按该列分组')
 
     class Meta:
         db_table = 'stock_ins'
@@ -46,6 +52,7 @@ class StockIn(models.Model):
         verbose_name_plural = '入库记录'
         indexes = [
             models.Index(fields=['-created_at']),
+            models.Index(fields=['created_date']),
             models.Index(fields=['product']),
             models.Index(fields=['supplier']),
         ]
@@ -53,3 +60,99 @@ class StockIn(models.Model):
     def __str__(self):
         return f'{self.stock_in_no} - {self.product.name}'
 
+
+
+class SupplierMonthlyStat(models.Model):
+    """
+    供应商入库月汇总
+
+    入库记录创建时按 (供应商, 本地月份) 累加，供应商统计和后台列表读取该表，不再聚合全部入库记录。
+    没有供应商的入库记录不计入；入库记录修改或删除后需执行 rebuild_supplier_stats 命令重新汇总。
+    """
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.CASCADE,
+        related_name='monthly_stats', verbose_name='供应商'
+    )
+    month = models.DateField('月份', help_text='当月 1 日')
+    quantity = models.BigIntegerField('入库数量', default=0)
+    total_cost = models.DecimalField('入库成本', max_digits=16, decimal_places=2, default=0)
+    record_count = models.IntegerField('入库次数', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'supplier_monthly_stats'
+        verbose_name = '供应商入库月汇总'
+        verbose_name_plural = '供应商入库月汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['supplier', 'month'], name='uniq_supplier_monthly_stat'),
+        ]
+
+    def __str__(self):
+        return f'{self.supplier_id} {self.month:%Y-%m}'
+
+    @property
+    def average_unit_cost(self):
+        """平均单位成本"""
+        return self.total_cost / self.quantity if self.quantity else None
+
+
+class SupplierProductMonthlyStat(models.Model):
+    """供应商各商品入库月汇总（单位成本走势），与 SupplierMonthlyStat 同时累加"""
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.CASCADE,
+        related_name='product_monthly_stats', verbose_name='供应商'
+    )
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE,
+        related_name='supplier_monthly_stats', verbose_name='商品'
+    )
+    month = models.DateField('月份', help_text='当月 1 日')
+    quantity = models.BigIntegerField('入库数量', default=0)
+    total_cost = models.DecimalField('入库成本', max_digits=16, decimal_places=2, default=0)
+    record_count = models.IntegerField('入库次数', default=0)
+
+    class Meta:
+        db_table = 'supplier_product_monthly_stats'
+        verbose_name = '供应商商品入库月汇总'
+        verbose_name_plural = '供应商商品入库月汇总'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['supplier', 'month', 'product'], name='uniq_supplier_product_monthly_stat'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.supplier_id} {self.product_id} {self.month:%Y-%m}'
+
+
+class StockAlert(models.Model):
+    """
+    库存预警
+
+    库存变更使商品预警级别升高时创建，库存恢复到该级别以上时关闭（resolved_at），
+    记录创建时的可用库存和生效的补货点/安全库存。
+    """
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE,
+        related_name='stock_alerts', verbose_name='商品'
+    )
+    level = models.PositiveSmallIntegerField('预警级别', choices=[
+        (1, '低于补货点'),
+        (2, '低于安全库存'),
+    ])
+    available_quantity = models.IntegerField('可用库存')
+    reorder_point = models.PositiveIntegerField('补货点')
+    safety_stock = models.PositiveIntegerField('安全库存')
+    created_at = models.DateTimeField('预警时间', auto_now_add=True)
+    resolved_at = models.DateTimeField('恢复时间', null=True, blank=True)
+
+    class Meta:
+        db_table = 'stock_alerts'
+        verbose_name = '库存预警'
+        verbose_name_plural = '库存预警'
+        indexes = [
+            models.Index(fields=['product'], condition=models.Q(resolved_at__isnull=True), name='stock_alert_open_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} {self.get_level_display()}'
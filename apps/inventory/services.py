@@ -1,8 +1,32 @@
 """
 库存服务模块
-提供库存检查和验证的业务逻辑
+提供库存检查、验证和库存变更的业务逻辑
+
+库存变更统一通过本模块的函数执行：按商品汇总数量后每个商品一条条件 UPDATE，
+不需要先加锁读取再回写（条件本身就是比较交换：available_quantity >= 数量），
+每次变更把 version 加 1，并在同一事务中为每个商品写入一条 stock.* 事件，
+再按补货点/安全库存重新计算预警级别（见 alerts.py）。
+
+设置了库存分片（ProductStock.shard_count > 0）的热门商品，变更落在 StockShard 分片行上：
+冻结库存时随机选择一个分片做条件 UPDATE，不足时依次尝试其他分片，都不足时锁定全部分片合并扣减。
+ProductStock 的可用/冻结库存作为分片合计供读取，由合并后的后台任务延迟刷新（STOCK_SHARD_REFRESH_SECONDS），
+下单事务及其提交后都不写 ProductStock 行；下单检查库存时直接按分片合计（available_quantities）。
 """
-from apps.products.models import ProductStock
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.tasks import TaskResultStatus
+from django.utils import timezone
+
+from .alerts import evaluate_stock_alerts
+from apps.events.services import build_event, record_events
+from apps.jobs.models import Job
+from apps.products.models import Product, ProductStock, StockShard
+from warehouse_management.dbutils import upsert_add
 
 
 class InsufficientStockError(Exception):
@@ -60,3 +84,292 @@ def check_cart_items_stock(cart_items):
         check_stock_availability(item.product, item.quantity)
     
     return True
+
+
+def increase_available_stock(product_id, quantity):
+    """
+    增加商品可用库存，库存记录不存在时创建
+
+    使用 INSERT ... ON CONFLICT 一条语句完成，不需要先加锁读取再回写；
+    分片商品的入库数量平均分配到各分片。
+    """
+    shard_count = sharded_products([product_id]).get(product_id)
+    if shard_count:
+        share, extra = divmod(quantity, shard_count)
+        for shard_no in range(shard_count):
+            StockShard.objects.filter(product_id=product_id, shard_no=shard_no).update(
+                available_quantity=F('available_quantity') + share + int(shard_no < extra)
+            )
+        refresh_shard_totals([product_id])
+        record_stock_events('stock.increased', {product_id: quantity})
+        return ProductStock.objects.values_list('pk', flat=True).get(product_id=product_id)
+
+    pk = upsert_add(
+        ProductStock,
+        keys={'product_id': product_id},
+        increments={'available_quantity': quantity, 'version': 1},
+        defaults={'frozen_quantity': 0, 'shard_count': 0, 'alert_level': 0},
+    )
+    record_stock_events('stock.increased', {product_id: quantity})
+    evaluate_stock_alerts([product_id])
+    return pk
+
+
+def record_stock_events(event_type, quantities):
+    """为每个商品写入一条库存变更事件 {product_id: quantity}"""
+    record_events([
+        build_event('stock', event_type, product_id, {'product_id': product_id, 'quantity': quantity})
+        for product_id, quantity in quantities.items()
+    ])
+
+
+def sum_quantities(lines):
+    """
+    按商品汇总数量
+
+    Args:
+        lines: 可迭代的 (product_id, quantity)
+
+    Returns:
+        dict: {product_id: quantity}，按商品 ID 排序（固定加锁顺序，避免死锁）
+    """
+    totals = Counter()
+    for product_id, quantity in lines:
+        totals[product_id] += quantity
+    return dict(sorted(totals.items()))
+
+
+def reserve_stock(quantities):
+    """
+    冻结库存（可用 -> 冻结），每个商品一条条件 UPDATE：available_quantity >= 数量时才更新
+
+    需在事务中调用，任一商品库存不足时抛出异常，由事务回滚已更新的商品。
+
+    Args:
+        quantities: {product_id: quantity}
+
+    Raises:
+        InsufficientStockError: 当任一商品库存不足时抛出
+    """
+    now = timezone.now()
+    sharded = sharded_products(quantities)
+    for product_id, quantity in quantities.items():
+        if product_id in sharded:
+            reserve_from_shards(product_id, quantity, sharded[product_id])
+            continue
+        updated = ProductStock.objects.filter(
+            product_id=product_id, available_quantity__gte=quantity
+        ).update(
+            available_quantity=F('available_quantity') - quantity,
+            frozen_quantity=F('frozen_quantity') + quantity,
+            version=F('version') + 1,
+            updated_at=now,
+        )
+        if not updated:
+            stock = ProductStock.objects.select_related('product').filter(product_id=product_id).first()
+            if stock is None:
+                name = Product.objects.filter(pk=product_id).values_list('name', flat=True).first()
+                raise InsufficientStockError(name or product_id, 0, quantity)
+            raise InsufficientStockError(stock.product.name, stock.available_quantity, quantity)
+    refresh_shard_totals(sharded)
+    record_stock_events('stock.reserved', quantities)
+    evaluate_stock_alerts([product_id for product_id in quantities if product_id not in sharded])
+
+
+def release_stock(quantities):
+    """释放冻结库存（冻结 -> 可用），用于取消订单"""
+    now = timezone.now()
+    sharded = sharded_products(quantities)
+    for product_id, quantity in quantities.items():
+        if product_id in sharded:
+            StockShard.objects.filter(
+                product_id=product_id, shard_no=random.randrange(sharded[product_id])
+            ).update(
+                available_quantity=F('available_quantity') + quantity,
+                frozen_quantity=F('frozen_quantity') - quantity,
+            )
+            continue
+        ProductStock.objects.filter(product_id=product_id).update(
+            available_quantity=F('available_quantity') + quantity,
+            frozen_quantity=F('frozen_quantity') - quantity,
+            version=F('version') + 1,
+            updated_at=now,
+        )
+    refresh_shard_totals(sharded)
+    record_stock_events('stock.released', quantities)
+    evaluate_stock_alerts([product_id for product_id in quantities if product_id not in sharded])
+
+
+def consume_stock(quantities):
+    """扣减冻结库存（订单完成后商品出库）"""
+    now = timezone.now()
+    sharded = sharded_products(quantities)
+    for product_id, quantity in quantities.items():
+        if product_id in sharded:
+            StockShard.objects.filter(
+                product_id=product_id, shard_no=random.randrange(sharded[product_id])
+            ).update(frozen_quantity=F('frozen_quantity') - quantity)
+            continue
+        ProductStock.objects.filter(product_id=product_id).update(
+            frozen_quantity=F('frozen_quantity') - quantity,
+            version=F('version') + 1,
+            updated_at=now,
+        )
+    refresh_shard_totals(sharded)
+    record_stock_events('stock.consumed', quantities)
+    evaluate_stock_alerts([product_id for product_id in quantities if product_id not in sharded])
+
+
+def sharded_products(product_ids):
+    """设置了库存分片的商品 {product_id: 分片数}"""
+    return dict(
+        ProductStock.objects.filter(product_id__in=list(product_ids), shard_count__gt=0)
+        .values_list('product_id', 'shard_count')
+    )
+
+
+def reserve_from_shards(product_id, quantity, shard_count):
+    """
+    从库存分片冻结库存
+
+    从随机分片开始依次尝试条件 UPDATE，任一分片足够即完成；
+    都不足时（库存分散在多个分片上）按分片号锁定全部分片，合计足够则从各分片依次扣减。
+    """
+    start = random.randrange(shard_count)
+    for offset in range(shard_count):
+        if StockShard.objects.filter(
+            product_id=product_id, shard_no=(start + offset) % shard_count, available_quantity__gte=quantity
+        ).update(
+            available_quantity=F('available_quantity') - quantity,
+            frozen_quantity=F('frozen_quantity') + quantity,
+        ):
+            return
+
+    shards = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard_no'))
+    available = sum(shard.available_quantity for shard in shards)
+    if available < quantity:
+        name = Product.objects.filter(pk=product_id).values_list('name', flat=True).first()
+        raise InsufficientStockError(name or product_id, available, quantity)
+    remaining = quantity
+    for shard in shards:
+        take = min(shard.available_quantity, remaining)
+        if take:
+            StockShard.objects.filter(pk=shard.pk).update(
+                available_quantity=F('available_quantity') - take,
+                frozen_quantity=F('frozen_quantity') + take,
+            )
+            remaining -= take
+
+
+def refresh_shard_totals(product_ids):
+    """
+    事务提交后安排刷新分片商品的 ProductStock 合计（不在事务中调用时立即安排）
+
+    STOCK_SHARD_REFRESH_SECONDS 秒内的多次变更合并为一个 refresh_stock_shard_totals 任务：
+    已有等待执行的刷新任务时不再入队，热门商品的 ProductStock 行每个间隔最多写一次（任务由 run_worker 执行）；
+    设为 0 时每次提交后立即刷新。
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+
+    def schedule():
+        delay = settings.STOCK_SHARD_REFRESH_SECONDS
+        if not delay:
+            write_shard_totals(product_ids)
+            return
+        from .tasks import refresh_stock_shard_totals
+
+        # 并发提交时可能各入队一个任务，重复刷新的结果相同
+        if not Job.objects.filter(
+            task_path=refresh_stock_shard_totals.module_path, status=TaskResultStatus.READY
+        ).exists():
+            refresh_stock_shard_totals.using(
+                run_after=timezone.now() + timedelta(seconds=delay)
+            ).enqueue()
+
+    transaction.on_commit(schedule)
+
+
+def write_shard_totals(product_ids=None):
+    """
+    把分片合计写回 ProductStock，product_ids 为 None 时刷新全部分片商品
+
+    合计用子查询重新计算而不是累加差值，重复执行或漏执行一次后下次刷新都会得到正确结果；
+    合计没有变化的行不写入。刷新后按新的合计重新计算预警级别。
+
+    Returns:
+        int: 写入的行数
+    """
+    shards = StockShard.objects.filter(product_id=OuterRef('product_id')).values('product_id')
+    available = Subquery(shards.annotate(total=Sum('available_quantity')).values('total')[:1])
+    frozen = Subquery(shards.annotate(total=Sum('frozen_quantity')).values('total')[:1])
+    stocks = ProductStock.objects.filter(shard_count__gt=0)
+    if product_ids is not None:
+        stocks = stocks.filter(product_id__in=list(product_ids))
+    with transaction.atomic():
+        updated = stocks.exclude(available_quantity=available, frozen_quantity=frozen).update(
+            available_quantity=available,
+            frozen_quantity=frozen,
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            evaluate_stock_alerts(stocks.values('product_id'))
+    return updated
+
+
+def available_quantities(product_ids):
+    """
+    商品可用库存 {product_id: 可用库存}（不加锁）
+
+    分片商品按分片合计，不使用可能尚未刷新的 ProductStock 合计。
+    读到的值可能在冻结前被其他事务改变，冻结时的条件 UPDATE 会发现库存不足。
+    """
+    stocks = list(
+        ProductStock.objects.filter(product_id__in=product_ids)
+        .values_list('product_id', 'available_quantity', 'shard_count')
+    )
+    available = {product_id: quantity for product_id, quantity, _ in stocks}
+    sharded = [product_id for product_id, _, shard_count in stocks if shard_count]
+    if sharded:
+        for product_id in sharded:
+            available[product_id] = 0
+        shards = StockShard.objects.filter(product_id__in=sharded)
+        for product_id, quantity in shards.values_list('product_id', 'available_quantity'):
+            available[product_id] += quantity
+    return available
+
+
+def set_stock_shards(product_id, shard_count):
+    """
+    设置商品的库存分片数（0 表示取消分片）
+
+    在一个事务中锁定库存行，把现有分片合并回 ProductStock，再按新的分片数平均拆分可用库存，
+    冻结库存记在 0 号分片上。
+
+    Returns:
+        ProductStock
+    """
+    with transaction.atomic():
+        stock = ProductStock.objects.select_for_update().get(product_id=product_id)
+        shards = list(StockShard.objects.select_for_update().filter(product_id=product_id))
+        if stock.shard_count:
+            stock.available_quantity = sum(shard.available_quantity for shard in shards)
+            stock.frozen_quantity = sum(shard.frozen_quantity for shard in shards)
+        StockShard.objects.filter(product_id=product_id).delete()
+
+        share, extra = divmod(stock.available_quantity, shard_count) if shard_count else (0, 0)
+        StockShard.objects.bulk_create([
+            StockShard(
+                product_id=product_id,
+                shard_no=shard_no,
+                available_quantity=share + (shard_no < extra),
+                frozen_quantity=stock.frozen_quantity if shard_no == 0 else 0,
+            )
+            for shard_no in range(shard_count)
+        ])
+        stock.shard_count = shard_count
+        stock.version += 1
+        stock.save(update_fields=['available_quantity', 'frozen_quantity', 'shard_count', 'version', 'updated_at'])
+    return stock
@@ -1,19 +1,37 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.db import transaction
+from .alerts import evaluate_stock_alerts
 from .models import StockIn
-from apps.products.models import ProductStock
+from .services import increase_available_stock
+from .supplier_stats import add_stock_in
+from apps.events.services import record_event
+from apps.products.models import Category, Product
 
 
 @receiver(post_save, sender=StockIn)
 def update_stock_on_stock_in(sender, instance, created, **kwargs):
-    """入库后自动增加商品库存"""
+    """入库后自动增加商品库存，并累加供应商入库汇总"""
     if created:  # 只在新创建时处理
-        with transaction.atomic():
-            # 获取或创建商品库存记录
-            stock, _ = ProductStock.objects.select_for_update().get_or_create(
-                product=instance.product
-            )
-            # 增加可用库存
-            stock.available_quantity += instance.quantity
-            stock.save()
+        increase_available_stock(instance.product_id, instance.quantity)
+        add_stock_in(instance)
+        record_event('stock_in', 'stock_in.created', instance.pk, {
+            'stock_in_no': instance.stock_in_no,
+            'product_id': instance.product_id,
+            'quantity': instance.quantity,
+            'unit_cost': instance.unit_cost,
+            'supplier_id': instance.supplier_id,
+        })
+
+
+@receiver(post_save, sender=Product)
+def evaluate_product_alerts(sender, instance, created, **kwargs):
+    """商品补货点/安全库存可能变化，重新计算该商品的预警级别"""
+    if not created:
+        evaluate_stock_alerts([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def evaluate_category_alerts(sender, instance, created, **kwargs):
+    """分类默认补货点/安全库存可能变化，重新计算该分类下商品的预警级别"""
+    if not created:
+        evaluate_stock_alerts(Product.objects.filter(category=instance).values('pk'))
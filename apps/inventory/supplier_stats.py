@@ -0,0 +1,97 @@
+"""
+供应商入库汇总
+
+入库记录创建时（入库信号）按 (供应商, 本地月份) 和 (供应商, 本地月份, 商品) 累加入库数量、入库成本和入库次数，
+供应商统计、供应商分析和后台列表只读取汇总表，查询量与供应商数（× 月份数）成正比，与入库记录数无关。
+入库成本按单位成本计算，未填写单位成本时使用商品成本价（与入库列表的"总成本"一致）。
+
+汇总只在创建入库记录时累加，批量写入入库记录（bulk_create）或修改、删除入库记录后，
+执行 rebuild_supplier_stats 命令按入库记录重新汇总。
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import StockIn, SupplierMonthlyStat, SupplierProductMonthlyStat
+from warehouse_management.dbutils import upsert_add
+
+
+def month_of(value):
+    """时间所在的本地月份（当月 1 日）"""
+    return timezone.localdate(value).replace(day=1)
+
+
+def add_stock_in(stock_in):
+    """把一条新入库记录累加到供应商汇总，没有供应商时跳过"""
+    if stock_in.supplier_id is None:
+        return
+    unit_cost = stock_in.unit_cost if stock_in.unit_cost is not None else stock_in.product.cost_price
+    month = month_of(stock_in.created_at)
+    increments = {'quantity': stock_in.quantity, 'total_cost': stock_in.quantity * unit_cost, 'record_count': 1}
+    upsert_add(SupplierMonthlyStat, keys={'supplier_id': stock_in.supplier_id, 'month': month}, increments=increments)
+    upsert_add(
+        SupplierProductMonthlyStat,
+        keys={'supplier_id': stock_in.supplier_id, 'month': month, 'product_id': stock_in.product_id},
+        increments=increments,
+    )
+
+
+def rebuild_supplier_stats():
+    """
+    按全部入库记录重新计算供应商汇总，在一个事务中整体替换两张汇总表
+
+    Returns:
+        tuple: (供应商月汇总行数, 供应商商品月汇总行数)
+    """
+    rows = StockIn.objects.filter(supplier__isnull=False).annotate(
+        month=TruncMonth('created_at', output_field=DateField()),
+    ).values_list('supplier_id', 'month', 'product_id').annotate(
+        total_quantity=Sum('quantity'),
+        cost=Sum(F('quantity') * Coalesce('unit_cost', 'product__cost_price')),
+        records=Count('id'),
+    ).order_by()
+
+    monthly = defaultdict(lambda: [0, Decimal('0'), 0])
+    product_stats = []
+    for supplier_id, month, product_id, quantity, cost, records in rows.iterator(chunk_size=5000):
+        totals = monthly[supplier_id, month]
+        totals[0] += quantity
+        totals[1] += cost
+        totals[2] += records
+        product_stats.append(SupplierProductMonthlyStat(
+            supplier_id=supplier_id, month=month, product_id=product_id,
+            quantity=quantity, total_cost=cost, record_count=records,
+        ))
+
+    with transaction.atomic():
+        SupplierMonthlyStat.objects.all().delete()
+        SupplierProductMonthlyStat.objects.all().delete()
+        SupplierMonthlyStat.objects.bulk_create([
+            SupplierMonthlyStat(
+                supplier_id=supplier_id, month=month, quantity=quantity, total_cost=cost, record_count=records,
+            )
+            for (supplier_id, month), (quantity, cost, records) in monthly.items()
+        ], batch_size=2000)
+        SupplierProductMonthlyStat.objects.bulk_create(product_stats, batch_size=2000)
+    return len(monthly), len(product_stats)
+
+
+def supplier_totals(start=None, end=None):
+    """
+    各供应商在 [start, end] 月份范围内的入库汇总（None 表示不限）
+
+    Returns:
+        QuerySet: 每个供应商一行 {'supplier_id', 'supplier__name', 'stock_in_quantity', 'stock_in_cost', 'stock_in_count'}
+    """
+    stats = SupplierMonthlyStat.objects.all()
+    if start is not None:
+        stats = stats.filter(month__gte=start.replace(day=1))
+    if end is not None:
+        stats = stats.filter(month__lte=end.replace(day=1))
+    return stats.values('supplier_id', 'supplier__name').annotate(
+        stock_in_quantity=Sum('quantity'), stock_in_cost=Sum('total_cost'), stock_in_count=Sum('record_count'),
+    ).order_by('-stock_in_quantity')
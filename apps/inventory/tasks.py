@@ -0,0 +1,136 @@
+"""
+库存后台任务
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django import forms
+from django.db import transaction
+from django.tasks import task
+from django.utils import timezone
+
+from .forecasting import forecast_replenishment, write_suggestions
+from .models import StockIn, Supplier
+from .services import write_shard_totals
+from apps.jobs.forms import TaskForm
+from apps.jobs.registry import admin_task
+from apps.jobs.services import report_progress, result_file_path, save_upload
+from apps.products.models import Product, ProductStock
+from warehouse_management.routers import use_replica
+
+
+IMPORT_BATCH_SIZE = 200
+
+
+@admin_task('导出库存 CSV')
+@task(takes_context=True)
+def export_stock_csv(context):
+    """导出全部商品库存及库存成本为 CSV"""
+    stocks = ProductStock.objects.select_related('product__category').order_by('product_id')
+    path = result_file_path(context, f'stock_{timezone.localdate():%Y%m%d}.csv')
+    rows = 0
+    with use_replica():
+        total = stocks.count()
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['商品ID', '商品名称', '分类', '可用库存', '冻结库存', '总库存', '成本价', '库存成本'])
+            for stock in stocks.iterator(chunk_size=2000):
+                product = stock.product
+                writer.writerow([
+                    product.pk, product.name, product.category.name if product.category else '未分类',
+                    stock.available_quantity, stock.frozen_quantity, stock.total_quantity,
+                    product.cost_price, stock.total_quantity * product.cost_price,
+                ])
+                rows += 1
+                if rows % 2000 == 0:
+                    report_progress(context, rows, total)
+    return {'rows': rows}
+
+
+class StockInImportForm(TaskForm):
+    file = forms.FileField(
+        label='CSV 文件',
+        help_text='第一行为表头，列依次为：商品名称, 数量, 单位成本(可空), 供应商名称(可空), 备注(可空)',
+    )
+
+    def task_kwargs(self):
+        return {'path': save_upload(self.cleaned_data['file']), 'operator_id': self.user.pk if self.user else None}
+
+
+def parse_stock_in_row(row, products, suppliers):
+    """校验一行导入数据，返回 (StockIn 字段, 错误信息)"""
+    name, quantity, unit_cost, supplier_name, remark = (row + [''] * 5)[:5]
+    product = products.get(name.strip())
+    if product is None:
+        return None, f'商品不存在：{name}'
+    try:
+        quantity = int(quantity)
+        unit_cost = Decimal(unit_cost) if unit_cost.strip() else product.cost_price
+    except (ValueError, InvalidOperation):
+        return None, '数量或单位成本格式错误'
+    if quantity <= 0:
+        return None, '数量必须大于 0'
+    supplier = suppliers.get(supplier_name.strip()) if supplier_name.strip() else None
+    if supplier_name.strip() and supplier is None:
+        return None, f'供应商不存在：{supplier_name}'
+    return {'product': product, 'quantity': quantity, 'unit_cost': unit_cost,
+            'supplier': supplier, 'remark': remark.strip()}, None
+
+
+@admin_task('批量导入入库记录', StockInImportForm)
+@task(takes_context=True)
+def import_stock_ins(context, path, operator_id=None):
+    """
+    从 CSV 批量导入入库记录（每行一条，库存由入库信号增加）
+
+    入库单号由任务 ID 和行号生成，每批一个事务；任务失败重试时跳过已导入的行，不会重复入库。
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))[1:]
+    products = Product.objects.in_bulk({row[0].strip() for row in rows if row}, field_name='name')
+    suppliers = {supplier.name: supplier for supplier in Supplier.objects.filter(is_active=True)}
+    prefix = f'SIJ{context.task_result.id}-'
+    imported = set(
+        StockIn.objects.filter(stock_in_no__startswith=prefix).values_list('stock_in_no', flat=True)
+    )
+
+    created, errors = 0, []
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        with transaction.atomic():
+            for line, row in enumerate(rows[start:start + IMPORT_BATCH_SIZE], start=start + 2):
+                stock_in_no = f'{prefix}{line}'
+                if not row or stock_in_no in imported:
+                    continue
+                fields, error = parse_stock_in_row(row, products, suppliers)
+                if error:
+                    errors.append(f'第 {line} 行：{error}')
+                    continue
+                StockIn.objects.create(stock_in_no=stock_in_no, operator_id=operator_id, **fields)
+                created += 1
+        report_progress(context, min(start + IMPORT_BATCH_SIZE, len(rows)), len(rows))
+    Path(path).unlink(missing_ok=True)
+    return {'created': created, 'skipped': len(imported), 'errors': errors[:100]}
+
+
+class ReplenishmentForm(TaskForm):
+    history_days = forms.IntegerField(label='历史天数', required=False, min_value=7, help_text='留空使用系统设置')
+    review_days = forms.IntegerField(label='补货间隔（天）', required=False, min_value=0, help_text='留空使用系统设置')
+
+
+@admin_task('生成补货建议', ReplenishmentForm)
+@task(takes_context=True)
+def export_replenishment_csv(context, history_days=None, review_days=None):
+    """按订单历史预测销量，把建议采购量按供应商分组导出为 CSV"""
+    with use_replica():
+        forecast = forecast_replenishment(history_days=history_days, review_days=review_days)
+        path = result_file_path(context, f'replenishment_{forecast.as_of:%Y%m%d}.csv')
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            rows = write_suggestions(forecast, f)
+    return {'products': len(forecast.product_ids), 'suggestions': rows}
+
+
+@task
+def refresh_stock_shard_totals():
+    """把全部分片商品的分片合计写回 ProductStock（由 refresh_shard_totals 合并入队）"""
+    return {'updated': write_shard_totals()}
@@ -1,3 +1,347 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib import admin
+from django.tasks import TaskResultStatus
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from .alerts import evaluate_stock_alerts
+from .forecasting import forecast_replenishment, supplier_lead_times, weekday_factors
+from .models import StockAlert, StockIn, Supplier, SupplierMonthlyStat, SupplierProductMonthlyStat
+from .services import (
+    InsufficientStockError, consume_stock, increase_available_stock, available_quantities,
+    release_stock, reserve_stock, set_stock_shards,
+)
+from .supplier_stats import rebuild_supplier_stats
+from .tasks import refresh_stock_shard_totals
+from apps.events.models import OutboxEvent
+from apps.jobs.models import Job
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product, ProductStock, StockShard
+from apps.users.models import User
+
+
+class StockShardTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name='食品')
+        self.product = Product.objects.create(
+            name='爆款', category=category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+        )
+        ProductStock.objects.create(product=self.product, available_quantity=10, frozen_quantity=2)
+        set_stock_shards(self.product.pk, 4)
+
+    def shards(self):
+        return list(StockShard.objects.filter(product=self.product).order_by('shard_no').values_list(
+            'available_quantity', 'frozen_quantity'
+        ))
+
+    def totals(self):
+        return ProductStock.objects.filter(product=self.product).values_list(
+            'available_quantity', 'frozen_quantity'
+        ).get()
+
+    def test_split_and_merge_keep_totals(self):
+        self.assertEqual(self.shards(), [(3, 2), (3, 0), (2, 0), (2, 0)])
+        set_stock_shards(self.product.pk, 0)
+        self.assertEqual(self.shards(), [])
+        self.assertEqual(self.totals(), (10, 2))
+
+    @override_settings(STOCK_SHARD_REFRESH_SECONDS=0)
+    def test_totals_refreshed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock({self.product.pk: 2})
+        self.assertEqual(self.totals(), (8, 4))
+        with self.captureOnCommitCallbacks(execute=True):
+            release_stock({self.product.pk: 1})
+            consume_stock({self.product.pk: 3})
+            increase_available_stock(self.product.pk, 5)
+        self.assertEqual(self.totals(), (14, 0))
+        self.assertEqual(sum(available for available, _ in self.shards()), 14)
+
+    def test_refreshes_are_coalesced_into_one_job(self):
+        version = ProductStock.objects.values_list('version', flat=True).get(product=self.product)
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                reserve_stock({self.product.pk: 1})
+        jobs = Job.objects.filter(task_path=refresh_stock_shard_totals.module_path)
+        self.assertEqual(list(jobs.values_list('status', flat=True)), [TaskResultStatus.READY])
+        self.assertGreater(jobs.get().run_after, timezone.now())
+        self.assertEqual(self.totals(), (10, 2))  # 下单提交后不写 ProductStock 行
+
+        self.assertEqual(refresh_stock_shard_totals.call(), {'updated': 1})
+        self.assertEqual(self.totals(), (7, 5))
+        self.assertEqual(refresh_stock_shard_totals.call(), {'updated': 0})  # 合计未变化时不写入
+        self.assertEqual(
+            ProductStock.objects.values_list('version', flat=True).get(product=self.product), version + 1
+        )
+
+    def test_reservation_larger_than_any_shard_drains_several(self):
+        reserve_stock({self.product.pk: 9})
+        self.assertEqual(available_quantities([self.product.pk]), {self.product.pk: 1})
+        self.assertTrue(all(available >= 0 for available, _ in self.shards()))
+        with self.assertRaises(InsufficientStockError):
+            reserve_stock({self.product.pk: 2})
+
+    def test_available_uses_shards(self):
+        StockShard.objects.filter(product=self.product, shard_no=0).update(available_quantity=0)
+        self.assertEqual(available_quantities([self.product.pk]), {self.product.pk: 7})
+
+
+class StockAlertTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='食品', reorder_point=20, safety_stock=5)
+        self.product = Product.objects.create(
+            name='牛奶', category=self.category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+        )
+        increase_available_stock(self.product.pk, 30)
+
+    def level(self):
+        return ProductStock.objects.values_list('alert_level', flat=True).get(product=self.product)
+
+    def alerts(self):
+        return list(StockAlert.objects.order_by('id').values_list('level', 'available_quantity', 'resolved_at'))
+
+    def test_alerts_raised_and_resolved_when_crossing_thresholds(self):
+        reserve_stock({self.product.pk: 5})
+        self.assertEqual((self.level(), self.alerts()), (0, []))
+
+        reserve_stock({self.product.pk: 6})
+        self.assertEqual(self.level(), 1)
+        reserve_stock({self.product.pk: 1})
+        self.assertEqual(len(self.alerts()), 1)
+
+        reserve_stock({self.product.pk: 14})
+        self.assertEqual(self.level(), 2)
+        self.assertEqual([alert[:2] for alert in self.alerts()], [(1, 19), (2, 4)])
+
+        release_stock({self.product.pk: 10})
+        alerts = self.alerts()
+        self.assertEqual(self.level(), 1)
+        self.assertIsNone(alerts[0][2])
+        self.assertIsNotNone(alerts[1][2])
+
+        increase_available_stock(self.product.pk, 50)
+        self.assertEqual(self.level(), 0)
+        self.assertFalse(StockAlert.objects.filter(resolved_at__isnull=True).exists())
+        self.assertEqual(OutboxEvent.objects.filter(event_type='stock.alert_raised').count(), 2)
+        self.assertEqual(OutboxEvent.objects.filter(event_type='stock.alert_resolved').count(), 2)
+
+    def test_partial_restock_from_urgent_keeps_alert_open(self):
+        reserve_stock({self.product.pk: 27})
+        self.assertEqual([alert[:2] for alert in self.alerts()], [(2, 3)])
+
+        increase_available_stock(self.product.pk, 7)
+        alerts = self.alerts()
+        self.assertEqual(self.level(), 1)
+        self.assertEqual([alert[:2] for alert in alerts], [(2, 3), (1, 10)])
+        self.assertIsNotNone(alerts[0][2])
+        self.assertIsNone(alerts[1][2])
+
+        # 再次降为紧急、补货到低库存时沿用仍未解除的低库存预警
+        reserve_stock({self.product.pk: 8})
+        increase_available_stock(self.product.pk, 8)
+        self.assertEqual(StockAlert.objects.filter(resolved_at__isnull=True).values_list('level', flat=True).get(), 1)
+        self.assertEqual(StockAlert.objects.count(), 3)
+
+    def test_threshold_resolution_and_settings_change(self):
+        self.product.reorder_point = 40
+        self.product.save()
+        self.assertEqual(self.level(), 1)
+        self.assertEqual(StockAlert.objects.get().reorder_point, 40)
+
+        self.product.reorder_point = None
+        self.product.save()
+        self.assertEqual(self.level(), 0)
+
+        self.category.reorder_point = None
+        self.category.safety_stock = 30
+        self.category.save()
+        self.assertEqual(self.level(), 2)
+
+        with self.settings(STOCK_SAFETY_STOCK_DEFAULT=0):
+            Category.objects.filter(pk=self.category.pk).update(safety_stock=None)
+            ProductStock.objects.filter(product=self.product).update(available_quantity=10)
+            evaluate_stock_alerts()
+        self.assertEqual(self.level(), 1)
+
+    def test_sharded_product_evaluated_on_refresh(self):
+        set_stock_shards(self.product.pk, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock({self.product.pk: 26})
+        self.assertEqual(self.level(), 0)
+        refresh_stock_shard_totals.call()
+        self.assertEqual(self.level(), 2)
+
+
+class LowStockApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='test')
+        category = Category.objects.create(name='食品')
+        for index, quantity in enumerate((100, 8, 0)):
+            product = Product.objects.create(
+                name=f'商品{index}', category=category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+            )
+            increase_available_stock(product.pk, quantity)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_low_stock_lists_alerting_products(self):
+        data = self.client.get('/admin/reports/api/low-stock/').json()['data']
+        self.assertEqual([(item['product_name'], item['level']) for item in data], [('商品2', 2), ('商品1', 1)])
+        self.assertEqual((data[1]['reorder_point'], data[1]['safety_stock']), (10, 0))
+
+    def test_alert_feed_is_incremental(self):
+        feed = self.client.get('/admin/reports/api/stock-alerts/').json()
+        self.assertEqual([item['product_name'] for item in feed['data']], ['商品1', '商品2'])
+        product = Product.objects.get(name='商品0')
+        reserve_stock({product.pk: 95})
+        feed = self.client.get('/admin/reports/api/stock-alerts/', {'after': feed['next_after']}).json()
+        self.assertEqual([(item['product_name'], item['level']) for item in feed['data']], [('商品0', 1)])
+        self.assertEqual(self.client.get('/admin/reports/api/stock-alerts/', {'limit': -1}).status_code, 400)
+
+
+class SupplierStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='test')
+        cls.supplier, cls.other = Supplier.objects.create(name='甲'), Supplier.objects.create(name='乙')
+        cls.apple = Product.objects.create(name='苹果', cost_price=Decimal('5.00'), selling_price=Decimal('8.00'))
+        cls.pear = Product.objects.create(name='梨', cost_price=Decimal('3.00'), selling_price=Decimal('6.00'))
+        for no, product, quantity, unit_cost, supplier in [
+            ('SI1', cls.apple, 10, Decimal('8.00'), cls.supplier),
+            ('SI2', cls.apple, 10, None, cls.supplier),  # 按商品成本价 5 计
+            ('SI3', cls.pear, 5, Decimal('4.00'), cls.supplier),
+            ('SI4', cls.apple, 20, Decimal('7.00'), cls.other),
+            ('SI5', cls.pear, 3, None, None),
+        ]:
+            StockIn.objects.create(
+                stock_in_no=no, product=product, quantity=quantity, unit_cost=unit_cost, supplier=supplier,
+            )
+
+    def stats(self):
+        return sorted(SupplierMonthlyStat.objects.values_list('supplier__name', 'quantity', 'total_cost', 'record_count'))
+
+    def test_stock_in_signal_matches_rebuild(self):
+        expected = [('乙', 20, Decimal('140.00'), 1), ('甲', 25, Decimal('150.00'), 3)]
+        self.assertEqual(self.stats(), expected)
+        product_stats = sorted(
+            SupplierProductMonthlyStat.objects.values_list('supplier__name', 'product__name', 'quantity', 'total_cost')
+        )
+        self.assertEqual(rebuild_supplier_stats(), (2, 3))
+        self.assertEqual(self.stats(), expected)
+        self.assertEqual(sorted(
+            SupplierProductMonthlyStat.objects.values_list('supplier__name', 'product__name', 'quantity', 'total_cost')
+        ), product_stats)
+
+    def test_supplier_admin_and_analytics_read_rollups(self):
+        this_month = timezone.localdate().replace(day=1)
+        last_month = (this_month - timedelta(days=1)).replace(day=1)
+        StockIn.objects.filter(stock_in_no='SI1').update(
+            created_at=timezone.make_aware(datetime.combine(last_month.replace(day=15), time(12)))
+        )
+        rebuild_supplier_stats()
+        self.client.force_login(self.admin)
+
+        supplier_admin = admin.site._registry[Supplier]
+        request = RequestFactory().get('/admin/inventory/supplier/')
+        request.user = self.admin
+        supplier = supplier_admin.get_queryset(request).get(pk=self.supplier.pk)
+        self.assertEqual(supplier_admin.stock_in_count(supplier), 3)
+        self.assertEqual(supplier_admin.total_stock_in_amount(supplier), '<b>150.00</b>')
+
+        data = self.client.get('/admin/reports/api/supplier-analytics/', {
+            'start': this_month.strftime('%Y-%m'), 'supplier': self.supplier.pk,
+        }).json()
+        self.assertEqual(
+            [(item['name'], item['quantity'], item['count']) for item in data['suppliers']], [('乙', 20, 1), ('甲', 15, 2)]
+        )
+        self.assertEqual([item['month'] for item in data['months']], [this_month.strftime('%Y-%m')])
+
+        data = self.client.get('/admin/reports/api/supplier-analytics/', {'supplier': self.supplier.pk}).json()
+        apple = data['products'][0]
+        self.assertEqual((apple['product_name'], apple['avg_unit_cost']), ('苹果', 6.5))
+        self.assertEqual(
+            [(point['month'], point['avg_unit_cost']) for point in apple['trend']],
+            [(last_month.strftime('%Y-%m'), 8.0), (this_month.strftime('%Y-%m'), 5.0)],
+        )
+        self.assertEqual(
+            self.client.get('/admin/reports/api/supplier-analytics/', {'start': '2026-13'}).status_code, 400
+        )
+        self.assertEqual(self.client.get(
+            '/admin/reports/api/supplier-analytics/', {'supplier': self.supplier.pk, 'limit': -1},
+        ).status_code, 400)
+
+
+class ForecastTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='test')
+        cls.supplier = Supplier.objects.create(name='供应商甲', lead_time_days=5)
+        category = Category.objects.create(name='食品')
+        cls.steady, cls.idle = (
+            Product.objects.create(
+                name=name, category=category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+            )
+            for name in ('日销品', '滞销品')
+        )
+        StockIn.objects.create(stock_in_no='SI0001', product=cls.steady, quantity=20, supplier=cls.supplier)
+        increase_available_stock(cls.idle.pk, 20)
+
+    def create_sales(self, product, quantities, as_of):
+        """as_of 之前每天一笔订单，quantities[0] 为最早一天"""
+        for offset, quantity in enumerate(quantities, start=-len(quantities)):
+            order = Order.objects.create(
+                order_no=f'ORDFC{product.pk}{offset}', user=self.user, customer_name='测试',
+                total_amount=Decimal('8.00') * quantity, total_cost=Decimal('5.00') * quantity,
+            )
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity,
+                unit_price=Decimal('8.00'), cost_price=Decimal('5.00'),
+            )
+            created_at = timezone.make_aware(datetime.combine(as_of + timedelta(days=offset), time(12)))
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+
+    def test_steady_demand_suggests_lead_time_plus_review_quantity(self):
+        as_of = timezone.localdate()
+        self.create_sales(self.steady, [4] * 28, as_of)
+        ProductStock.objects.filter(product=self.steady).update(available_quantity=20)
+
+        forecast = forecast_replenishment(as_of, history_days=28, review_days=7)
+        self.assertEqual(list(forecast.product_ids), [self.steady.pk, self.idle.pk])
+        self.assertAlmostEqual(forecast.velocity[0], 4)
+        self.assertEqual(forecast.days_of_cover[0], 5)
+        self.assertEqual(forecast.days_of_cover[1], np.inf)
+        # (5 天到货 + 7 天补货间隔) × 4 - 20，销量稳定时统计安全库存为 0
+        (suggestion,) = forecast.suggestions()
+        self.assertEqual(suggestion[:4], (self.steady.pk, self.supplier.pk, 28, 20))
+        self.assertEqual(suggestion[5:], (5.0, 5.0))
+        self.assertEqual(forecast.supplier_totals(), {self.supplier.pk: (1, 28)})
+
+    def test_weekday_factors_shrink_toward_one(self):
+        start = datetime(2025, 1, 6).date()  # 周一
+        matrix = np.zeros((2, 28))
+        matrix[0, ::7] = 7
+        factors = weekday_factors(matrix, start)
+        self.assertGreater(factors[0, 0], 4)
+        self.assertTrue(np.all(factors[0, 1:] < 1))
+        self.assertAlmostEqual(factors[0].mean(), 1)
+        self.assertTrue(np.all(factors[1] == 1))
+
+    def test_lead_time_measured_from_alert_to_stock_in(self):
+        ProductStock.objects.filter(product=self.steady).update(available_quantity=0)
+        (alert,) = evaluate_stock_alerts([self.steady.pk])
+        StockAlert.objects.filter(pk=alert.pk).update(created_at=timezone.now() - timedelta(days=3))
+        StockIn.objects.create(stock_in_no='SI0002', product=self.steady, quantity=50, supplier=self.supplier)
+
+        lead_times = supplier_lead_times(timezone.now() - timedelta(days=30))
+        self.assertAlmostEqual(lead_times[self.supplier.pk], 3, places=2)
@@ -0,0 +1,126 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect, render
+from django.tasks import TaskResultStatus
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import Job
+from .registry import admin_tasks
+from .services import enqueue
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task_label', 'status', 'progress_display', 'attempts',
+                    'created_by', 'enqueued_at', 'finished_at', 'download_link']
+    list_filter = ['status', 'queue_name']
+    search_fields = ['task_path']
+    ordering = ['-id']
+    list_per_page = 20
+    show_full_result_count = False
+    actions = ['retry_jobs']
+    change_list_template = 'admin/jobs/job/change_list.html'
+    fields = ['task_path', 'queue_name', 'priority', 'args', 'kwargs', 'status', 'progress',
+              'progress_message', 'attempts', 'max_attempts', 'run_after', 'worker_ids',
+              'return_value', 'errors', 'result_file', 'created_by', 'enqueued_at',
+              'started_at', 'finished_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_run_job_permission(self, request):
+        """新建、重新执行任务和下载他人任务的结果文件需要 run_job 权限"""
+        opts = self.opts
+        return request.user.has_perm(f'{opts.app_label}.{get_permission_codename("run", opts)}')
+
+    def task_label(self, obj):
+        registered = admin_tasks.get(obj.task_path)
+        return registered.label if registered else obj.task_name
+    task_label.short_description = '任务'
+
+    def progress_display(self, obj):
+        if obj.status != TaskResultStatus.RUNNING or obj.started_at is None:
+            return '-'
+        return format_html(
+            '<progress value="{}" max="100"></progress> {}% {}',
+            obj.progress, obj.progress, obj.progress_message,
+        )
+    progress_display.short_description = '进度'
+
+    def download_link(self, obj):
+        if obj.status != TaskResultStatus.SUCCESSFUL or not obj.result_file:
+            return '-'
+        url = reverse('admin:jobs_job_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, Path(obj.result_file).name)
+    download_link.short_description = '结果文件'
+
+    def retry_jobs(self, request, queryset):
+        count = queryset.filter(status=TaskResultStatus.FAILED).update(
+            status=TaskResultStatus.READY, attempts=0, run_after=None, started_at=None,
+            finished_at=None, worker_id='', lease_expires_at=None, progress=0, progress_message='',
+        )
+        self.message_user(request, f'已重新排队 {count} 个任务')
+    retry_jobs.short_description = '重新执行所选失败任务'
+    retry_jobs.allowed_permissions = ['run_job']
+
+    def changelist_view(self, request, extra_context=None):
+        # 有排队或执行中的任务时列表页自动刷新
+        active = Job.objects.filter(status__in=[TaskResultStatus.READY, TaskResultStatus.RUNNING]).exists()
+        return super().changelist_view(request, {
+            **(extra_context or {}), 'auto_refresh': active, 'can_run_job': self.has_run_job_permission(request),
+        })
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('start/', self.admin_site.admin_view(self.start_view), name='jobs_job_start'),
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view),
+                 name='jobs_job_download'),
+        ]
+        return custom_urls + urls
+
+    def start_view(self, request):
+        """新建任务：选择已注册的任务，填写参数后入队"""
+        if not self.has_run_job_permission(request):
+            raise PermissionDenied
+        registered = admin_tasks.get(request.GET.get('task', ''))
+        form = None
+        if registered is not None:
+            bound = request.method == 'POST'
+            form = registered.form_class(
+                request.POST if bound else None, request.FILES if bound else None, user=request.user
+            )
+            if bound and form.is_valid():
+                result = enqueue(registered.task, user=request.user, **form.task_kwargs())
+                messages.success(request, f'已创建任务 #{result.id}：{registered.label}')
+                return redirect('admin:jobs_job_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': '新建后台任务',
+            'opts': self.model._meta,
+            'tasks': sorted(admin_tasks.items(), key=lambda item: item[1].label),
+            'selected': registered,
+            'form': form,
+        }
+        return render(request, 'admin/jobs/job/start.html', context)
+
+    def download_view(self, request, pk):
+        job = get_object_or_404(Job, pk=pk, status=TaskResultStatus.SUCCESSFUL)
+        # 结果文件可能包含导出的业务数据，只有任务创建者和有 run_job 权限的用户可以下载
+        if not job.result_file or not (job.created_by_id == request.user.pk or self.has_run_job_permission(request)):
+            raise Http404
+        root = Path(settings.JOB_RESULT_ROOT).resolve()
+        file_path = (root / job.result_file).resolve()
+        if not file_path.is_relative_to(root) or not file_path.is_file():
+            raise Http404
+        return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=file_path.name)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+    verbose_name = '后台任务'
+
+    def ready(self):
+        # 加载各应用的 tasks.py，注册后台可启动的任务
+        autodiscover_modules('tasks')
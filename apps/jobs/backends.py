@@ -0,0 +1,73 @@
+"""
+django.tasks 数据库后端
+
+任务入队时写入 jobs 表（在调用方的事务中，事务回滚时任务一并撤销），
+由 run_worker 命令启动的 worker 进程认领执行，执行结果可通过 get_result() 查询。
+
+TASKS['default']['OPTIONS']:
+- MAX_ATTEMPTS: 任务失败后最多执行的总次数
+- RETRY_DELAY: 首次重试的等待秒数，之后每次翻倍
+- LEASE_SECONDS: 认领后未完成也未上报进度的任务经过该秒数重新排队
+"""
+from django.tasks import TaskResult, TaskResultStatus
+from django.tasks.backends.base import BaseTaskBackend
+from django.tasks.base import TaskError
+from django.tasks.exceptions import TaskResultDoesNotExist
+from django.tasks.signals import task_enqueued
+from django.utils.json import normalize_json
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+class DatabaseBackend(BaseTaskBackend):
+    supports_defer = True
+    supports_priority = True
+    supports_get_result = True
+
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        self.max_attempts = self.options.get('MAX_ATTEMPTS', 3)
+        self.retry_delay = self.options.get('RETRY_DELAY', 30)
+        self.lease_seconds = self.options.get('LEASE_SECONDS', 300)
+
+    def enqueue(self, task, args, kwargs):
+        self.validate_task(task)
+        job = Job.objects.create(
+            task_path=task.module_path,
+            queue_name=task.queue_name,
+            priority=task.priority,
+            run_after=task.run_after,
+            args=normalize_json(args),
+            kwargs=normalize_json(kwargs),
+            max_attempts=self.max_attempts,
+        )
+        result = self.to_task_result(job, task)
+        task_enqueued.send(type(self), task_result=result)
+        return result
+
+    def get_result(self, result_id):
+        job = Job.objects.filter(pk=result_id).first() if str(result_id).isdigit() else None
+        if job is None:
+            raise TaskResultDoesNotExist(result_id)
+        return self.to_task_result(job)
+
+    def to_task_result(self, job, task=None):
+        if task is None:
+            task = import_string(job.task_path)
+        result = TaskResult(
+            task=task,
+            id=str(job.pk),
+            status=TaskResultStatus(job.status),
+            enqueued_at=job.enqueued_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            last_attempted_at=job.last_attempted_at,
+            args=job.args,
+            kwargs=job.kwargs,
+            backend=self.alias,
+            errors=[TaskError(**error) for error in job.errors],
+            worker_ids=list(job.worker_ids),
+        )
+        object.__setattr__(result, '_return_value', job.return_value)
+        return result
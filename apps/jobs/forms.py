@@ -0,0 +1,18 @@
+from datetime import date
+
+from django import forms
+
+
+class TaskForm(forms.Form):
+    """后台启动任务的参数表单，task_kwargs() 的结果作为任务的关键字参数（须可 JSON 序列化）"""
+
+    def __init__(self, *args, user=None, **kwargs):
+        self.user = user
+        super().__init__(*args, **kwargs)
+
+    def task_kwargs(self):
+        return {
+            name: value.isoformat() if isinstance(value, date) else value
+            for name, value in self.cleaned_data.items()
+            if value not in (None, '')
+        }
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.worker import run_workers
+
+
+class Command(BaseCommand):
+    help = '启动后台任务 worker，执行 django.tasks 数据库后端中排队的任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='worker 进程数')
+        parser.add_argument('--queue', action='append', dest='queues', help='只执行指定队列的任务，可重复')
+        parser.add_argument('--batch-size', type=int, default=1, help='每次认领的任务数')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='队列为空时的轮询间隔（秒）')
+        parser.add_argument('--burst', action='store_true', help='执行完队列中的任务后退出')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'启动 {options["processes"]} 个 worker 进程')
+        run_workers(
+            options['processes'], options['queues'], options['batch_size'],
+            options['poll_interval'], options['burst'],
+        )
+        self.stdout.write('worker 已退出')
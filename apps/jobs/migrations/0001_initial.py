@@ -0,0 +1,51 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_path', models.CharField(max_length=200, verbose_name='任务')),
+                ('queue_name', models.CharField(default='default', max_length=50, verbose_name='队列')),
+                ('priority', models.IntegerField(default=0, verbose_name='优先级')),
+                ('args', models.JSONField(default=list, verbose_name='位置参数')),
+                ('kwargs', models.JSONField(default=dict, verbose_name='关键字参数')),
+                ('status', models.CharField(choices=[('READY', 'Ready'), ('RUNNING', 'Running'), ('FAILED', 'Failed'), ('SUCCESSFUL', 'Successful')], default='READY', max_length=20, verbose_name='状态')),
+                ('run_after', models.DateTimeField(blank=True, null=True, verbose_name='最早执行时间')),
+                ('attempts', models.IntegerField(default=0, verbose_name='已执行次数')),
+                ('max_attempts', models.IntegerField(default=1, verbose_name='最多执行次数')),
+                ('worker_id', models.CharField(blank=True, max_length=64, verbose_name='当前 worker')),
+                ('worker_ids', models.JSONField(default=list, verbose_name='执行过的 worker')),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='认领到期时间')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='进度(%)')),
+                ('progress_message', models.CharField(blank=True, max_length=200, verbose_name='进度说明')),
+                ('return_value', models.JSONField(blank=True, null=True, verbose_name='返回值')),
+                ('errors', models.JSONField(default=list, verbose_name='错误')),
+                ('result_file', models.CharField(blank=True, max_length=255, verbose_name='结果文件')),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True, verbose_name='入队时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('last_attempted_at', models.DateTimeField(blank=True, null=True, verbose_name='最近执行时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='创建人')),
+            ],
+            options={
+                'verbose_name': '后台任务',
+                'verbose_name_plural': '后台任务',
+                'db_table': 'jobs',
+                'indexes': [models.Index(fields=['status', 'queue_name', '-priority', 'id'], name='jobs_status_6173fa_idx'), models.Index(fields=['status', 'lease_expires_at'], name='jobs_status_e4ebba_idx')],
+            },
+        ),
+    ]
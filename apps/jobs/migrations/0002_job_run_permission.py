@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='job',
+            options={'permissions': [('run_job', '可以新建和重新执行后台任务')], 'verbose_name': '后台任务', 'verbose_name_plural': '后台任务'},
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import models
+from django.tasks import TaskResultStatus
+
+
+class Job(models.Model):
+    """
+    后台任务（django.tasks 数据库后端的任务记录）
+
+    由 run_worker 命令认领执行；status 为 RUNNING 且 started_at 为空表示已被认领、尚未开始，
+    lease_expires_at 之前未完成也未上报进度的任务视为 worker 已退出，会被重新排队。
+    """
+    task_path = models.CharField('任务', max_length=200)
+    queue_name = models.CharField('队列', max_length=50, default='default')
+    priority = models.IntegerField('优先级', default=0)
+    args = models.JSONField('位置参数', default=list)
+    kwargs = models.JSONField('关键字参数', default=dict)
+    status = models.CharField(
+        '状态', max_length=20, choices=TaskResultStatus.choices, default=TaskResultStatus.READY
+    )
+    run_after = models.DateTimeField('最早执行时间', null=True, blank=True)
+    attempts = models.IntegerField('已执行次数', default=0)
+    max_attempts = models.IntegerField('最多执行次数', default=1)
+    worker_id = models.CharField('当前 worker', max_length=64, blank=True)
+    worker_ids = models.JSONField('执行过的 worker', default=list)
+    lease_expires_at = models.DateTimeField('认领到期时间', null=True, blank=True)
+    progress = models.PositiveSmallIntegerField('进度(%)', default=0)
+    progress_message = models.CharField('进度说明', max_length=200, blank=True)
+    return_value = models.JSONField('返回值', null=True, blank=True)
+    errors = models.JSONField('错误', default=list)
+    result_file = models.CharField('结果文件', max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='jobs', verbose_name='创建人'
+    )
+    enqueued_at = models.DateTimeField('入队时间', auto_now_add=True)
+    started_at = models.DateTimeField('开始时间', null=True, blank=True)
+    last_attempted_at = models.DateTimeField('最近执行时间', null=True, blank=True)
+    finished_at = models.DateTimeField('完成时间', null=True, blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = '后台任务'
+        verbose_name_plural = '后台任务'
+        permissions = [('run_job', '可以新建和重新执行后台任务')]
+        indexes = [
+            models.Index(fields=['status', 'queue_name', '-priority', 'id']),
+            models.Index(fields=['status', 'lease_expires_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.pk} {self.task_name}'
+
+    @property
+    def task_name(self):
+        return self.task_path.rsplit('.', 1)[-1]
@@ -0,0 +1,26 @@
+"""
+后台可启动的任务
+
+各应用在 tasks.py 中用 admin_task 注册任务及其参数表单，
+后台任务列表的"新建任务"页面列出已注册的任务。
+"""
+from dataclasses import dataclass
+
+from .forms import TaskForm
+
+
+@dataclass(frozen=True)
+class AdminTask:
+    task: object
+    label: str
+    form_class: type
+
+
+admin_tasks = {}
+
+
+def admin_task(label, form_class=TaskForm):
+    def decorator(task):
+        admin_tasks[task.module_path] = AdminTask(task, label, form_class)
+        return task
+    return decorator
@@ -0,0 +1,194 @@
+"""
+后台任务服务模块
+提供任务认领、执行、重试和进度上报，供 run_worker 命令和各应用的 tasks.py 使用
+"""
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from traceback import format_exception
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.tasks import TaskContext, TaskResultStatus, default_task_backend
+from django.tasks.signals import task_finished, task_started
+from django.utils import timezone
+from django.utils.json import normalize_json
+from django.utils.module_loading import import_string
+
+from .models import Job
+from warehouse_management.dbutils import skip_locked
+
+
+class WorkerLost(Exception):
+    """worker 在认领到期前没有完成任务（进程退出或卡住）"""
+
+
+def error_record(exc):
+    exc_type = type(exc)
+    return {
+        'exception_class_path': f'{exc_type.__module__}.{exc_type.__qualname__}',
+        'traceback': ''.join(format_exception(exc)),
+    }
+
+
+def lease_deadline():
+    return timezone.now() + timedelta(seconds=default_task_backend.lease_seconds)
+
+
+def claim_jobs(worker_id, queues=None, batch_size=1):
+    """
+    认领一批可执行的任务（优先级高、ID 小的优先）
+
+    在一个短事务中选出任务 ID，再以 status=READY 为条件 UPDATE 为 RUNNING，
+    同一任务只会被一个 worker 认领；PostgreSQL 上选取时跳过其他 worker 正在认领的行。
+
+    Returns:
+        list: 本 worker 认领到的 Job
+    """
+    now = timezone.now()
+    ready = Job.objects.filter(status=TaskResultStatus.READY).filter(
+        Q(run_after__isnull=True) | Q(run_after__lte=now)
+    )
+    if queues:
+        ready = ready.filter(queue_name__in=queues)
+    with transaction.atomic():
+        ids = list(skip_locked(ready.order_by('-priority', 'id')).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids, status=TaskResultStatus.READY).update(
+            status=TaskResultStatus.RUNNING, worker_id=worker_id, lease_expires_at=lease_deadline(),
+        )
+    return list(
+        Job.objects.filter(pk__in=ids, status=TaskResultStatus.RUNNING, worker_id=worker_id)
+        .order_by('-priority', 'id')
+    )
+
+
+def release_jobs(worker_id):
+    """worker 退出时把已认领但尚未开始的任务放回队列"""
+    return Job.objects.filter(
+        status=TaskResultStatus.RUNNING, worker_id=worker_id, started_at__isnull=True
+    ).update(status=TaskResultStatus.READY, worker_id='', lease_expires_at=None)
+
+
+def requeue_expired_jobs():
+    """
+    处理认领已过期的任务：未开始的放回队列，已开始的按失败处理（未达到最多执行次数时重试）
+
+    Returns:
+        int: 处理的任务数
+    """
+    expired = list(Job.objects.filter(
+        status=TaskResultStatus.RUNNING, lease_expires_at__lt=timezone.now()
+    ))
+    for job in expired:
+        if job.started_at is None:
+            Job.objects.filter(pk=job.pk, worker_id=job.worker_id, status=TaskResultStatus.RUNNING).update(
+                status=TaskResultStatus.READY, worker_id='', lease_expires_at=None
+            )
+        else:
+            fail_job(job, job.worker_id, WorkerLost(f'worker {job.worker_id} 未在认领到期前完成任务'))
+    return len(expired)
+
+
+def fail_job(job, worker_id, exc):
+    """记录失败；未达到最多执行次数时按 RETRY_DELAY 指数退避重新排队"""
+    now = timezone.now()
+    updates = {'errors': job.errors + [error_record(exc)], 'worker_id': '', 'lease_expires_at': None}
+    if job.attempts < job.max_attempts:
+        delay = default_task_backend.retry_delay * 2 ** max(job.attempts - 1, 0)
+        updates.update(status=TaskResultStatus.READY, run_after=now + timedelta(seconds=delay), started_at=None)
+    else:
+        updates.update(status=TaskResultStatus.FAILED, finished_at=now)
+    return Job.objects.filter(pk=job.pk, worker_id=worker_id).update(**updates)
+
+
+def run_job(job, worker_id):
+    """
+    执行一个已认领的任务
+
+    Returns:
+        bool: 是否执行（认领已过期、任务已被其他 worker 接手时不执行）
+    """
+    now = timezone.now()
+    started = Job.objects.filter(pk=job.pk, status=TaskResultStatus.RUNNING, worker_id=worker_id).update(
+        started_at=now, last_attempted_at=now, attempts=F('attempts') + 1,
+        lease_expires_at=lease_deadline(),
+    )
+    if not started:
+        return False
+    job.refresh_from_db()
+    job.worker_ids = job.worker_ids + [worker_id]
+    job.save(update_fields=['worker_ids'])
+
+    backend = default_task_backend
+    task = None
+    try:
+        task = import_string(job.task_path)
+        task_result = backend.to_task_result(job, task)
+        task_started.send(type(backend), task_result=task_result)
+        if task.takes_context:
+            value = task.call(TaskContext(task_result=task_result), *job.args, **job.kwargs)
+        else:
+            value = task.call(*job.args, **job.kwargs)
+        value = normalize_json(value)
+    except KeyboardInterrupt:
+        raise
+    except Exception as exc:
+        fail_job(job, worker_id, exc)
+        if task is not None:
+            task_finished.send(type(backend), task_result=backend.get_result(job.pk))
+        return True
+
+    Job.objects.filter(pk=job.pk, worker_id=worker_id).update(
+        status=TaskResultStatus.SUCCESSFUL, return_value=value, progress=100,
+        finished_at=timezone.now(), worker_id='', lease_expires_at=None,
+    )
+    task_finished.send(type(backend), task_result=backend.get_result(job.pk))
+    return True
+
+
+def report_progress(context, done, total=None, message=''):
+    """
+    任务上报进度并延长认领期限（长任务应定期调用）
+
+    Args:
+        context: 任务的 TaskContext（任务以 takes_context=True 定义）
+        done, total: 已完成数和总数；total 为 None 时 done 即百分比
+    """
+    if total is None:
+        percent = done
+    else:
+        percent = done * 100 // total if total else 100
+    Job.objects.filter(pk=context.task_result.id).update(
+        progress=max(0, min(int(percent), 100)), progress_message=message[:200],
+        lease_expires_at=lease_deadline(),
+    )
+
+
+def result_file_path(context, filename):
+    """任务结果文件的保存路径（JOB_RESULT_ROOT/<任务ID>/<文件名>），后台任务列表提供下载链接"""
+    name = f'{context.task_result.id}/{filename}'
+    path = Path(settings.JOB_RESULT_ROOT) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Job.objects.filter(pk=context.task_result.id).update(result_file=name)
+    return path
+
+
+def save_upload(uploaded_file):
+    """保存后台上传的文件供任务读取，返回文件路径"""
+    path = Path(settings.JOB_RESULT_ROOT) / 'uploads' / f'{uuid.uuid4().hex}_{Path(uploaded_file.name).name}'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+    return str(path)
+
+
+def enqueue(task, user=None, **kwargs):
+    """任务入队并记录创建人，返回 TaskResult"""
+    result = task.enqueue(**kwargs)
+    if user is not None:
+        Job.objects.filter(pk=result.id).update(created_by=user)
+    return result
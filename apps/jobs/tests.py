@@ -0,0 +1,139 @@
+import csv
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.tasks import TaskResultStatus, task
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .services import claim_jobs, requeue_expired_jobs, run_job
+from .worker import Worker
+from apps.orders.models import Order
+from apps.orders.tasks import export_orders_csv
+from apps.users.models import User
+
+
+@task
+def add(a, b):
+    return a + b
+
+
+@task
+def always_fails():
+    raise ValueError('失败')
+
+
+class WorkerTestCase(TestCase):
+    """
+    TestCase 的事务中连接不是自动提交，close_old_connections 会关闭连接（PostgreSQL），
+    与测试客户端断开 request_started 上的 close_old_connections 相同，测试中不关闭
+    """
+
+    def setUp(self):
+        patcher = mock.patch('apps.jobs.worker.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class WorkerTests(WorkerTestCase):
+
+    def run_worker(self):
+        return Worker(batch_size=10).run(burst=True)
+
+    def test_enqueue_and_run(self):
+        result = add.enqueue(2, 3)
+        self.assertEqual(result.status, TaskResultStatus.READY)
+        self.assertEqual(self.run_worker(), 1)
+        result.refresh()
+        self.assertEqual((result.status, result.return_value), (TaskResultStatus.SUCCESSFUL, 5))
+        self.assertEqual(result.attempts, 1)
+
+    def test_failed_task_retries_with_backoff_then_fails(self):
+        result = always_fails.enqueue()
+        self.run_worker()
+        job = Job.objects.get(pk=result.id)
+        self.assertEqual((job.status, job.attempts, len(job.errors)), (TaskResultStatus.READY, 1, 1))
+        self.assertGreater(job.run_after, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_after=None)
+        self.run_worker()
+        Job.objects.filter(pk=job.pk).update(run_after=None)
+        self.run_worker()
+        result.refresh()
+        self.assertEqual((result.status, result.attempts), (TaskResultStatus.FAILED, 3))
+        self.assertIs(result.errors[-1].exception_class, ValueError)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        add.enqueue(1, 1)
+        self.assertEqual(len(claim_jobs('worker-a', batch_size=5)), 1)
+        self.assertEqual(claim_jobs('worker-b', batch_size=5), [])
+
+    def test_expired_claim_is_requeued_and_stale_worker_skips(self):
+        result = add.enqueue(1, 2)
+        [job] = claim_jobs('worker-a')
+        Job.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(requeue_expired_jobs(), 1)
+        self.assertFalse(run_job(job, 'worker-a'))
+        [job] = claim_jobs('worker-b')
+        self.assertTrue(run_job(job, 'worker-b'))
+        result.refresh()
+        self.assertEqual((result.return_value, result.worker_ids), (3, ['worker-b']))
+
+
+class ExportTests(WorkerTestCase):
+
+    def test_export_orders_writes_result_file(self):
+        user = User.objects.create_user('export_user', password='test')
+        for index in range(3):
+            Order.objects.create(
+                order_no=f'ORDEXPORT{index}', user=user, customer_name='测试', status='completed',
+                total_amount=Decimal('10.00'), total_cost=Decimal('6.00'),
+            )
+        with tempfile.TemporaryDirectory() as root, override_settings(JOB_RESULT_ROOT=root):
+            result = export_orders_csv.enqueue(status='completed')
+            Worker().run(burst=True)
+            result.refresh()
+            self.assertEqual(result.return_value, {'rows': 3})
+            job = Job.objects.get(pk=result.id)
+            with open(f'{root}/{job.result_file}', encoding='utf-8-sig') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual([row[0] for row in rows[1:]], ['ORDEXPORT0', 'ORDEXPORT1', 'ORDEXPORT2'])
+
+
+class JobAdminPermissionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        view_job = Permission.objects.get(codename='view_job')
+        cls.owner, cls.clerk, cls.operator = [
+            User.objects.create_user(username, password='test', is_staff=True)
+            for username in ('owner', 'clerk', 'operator')
+        ]
+        for user in (cls.owner, cls.clerk, cls.operator):
+            user.user_permissions.add(view_job)
+        cls.operator.user_permissions.add(Permission.objects.get(codename='run_job'))
+
+    def test_start_requires_run_job(self):
+        self.client.force_login(self.clerk)
+        self.assertEqual(self.client.get('/admin/jobs/job/start/').status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+    def test_download_limited_to_creator_and_run_job(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(JOB_RESULT_ROOT=root):
+            with open(f'{root}/orders.csv', 'w', encoding='utf-8') as f:
+                f.write('order_no\n')
+            job = Job.objects.create(
+                task_path='apps.orders.tasks.export_orders_csv', status=TaskResultStatus.SUCCESSFUL,
+                result_file='orders.csv', created_by=self.owner,
+            )
+            url = f'/admin/jobs/job/{job.pk}/download/'
+            for user, status_code in ((self.owner, 200), (self.clerk, 404), (self.operator, 200)):
+                self.client.force_login(user)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status_code, user.username)
+                if status_code == 200:
+                    self.assertEqual(response.getvalue(), b'order_no\n')
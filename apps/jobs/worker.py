@@ -0,0 +1,90 @@
+"""
+后台任务 worker
+
+每个 worker 进程循环：回收认领过期的任务 -> 认领一批任务 -> 依次执行；
+收到 SIGTERM/SIGINT 后执行完当前任务退出，已认领但未开始的任务放回队列。
+多进程时父进程 fork 出子进程并转发 SIGTERM。
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.db import close_old_connections, connections
+from django.utils.crypto import get_random_string
+
+from .services import claim_jobs, release_jobs, requeue_expired_jobs, run_job
+
+
+class Worker:
+
+    def __init__(self, queues=None, batch_size=1, poll_interval=1.0):
+        self.queues = queues
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{get_random_string(6)}'
+        self.stopping = False
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self, burst=False):
+        """
+        运行直到收到停止信号；burst 为 True 时队列为空即退出
+
+        Returns:
+            int: 执行的任务数
+        """
+        previous = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        processed = 0
+        try:
+            while not self.stopping:
+                close_old_connections()
+                requeue_expired_jobs()
+                jobs = claim_jobs(self.worker_id, self.queues, self.batch_size)
+                if not jobs:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                for job in jobs:
+                    if self.stopping:
+                        break
+                    if run_job(job, self.worker_id):
+                        processed += 1
+                    close_old_connections()
+        finally:
+            release_jobs(self.worker_id)
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        return processed
+
+
+def run_worker_process(options):
+    Worker(options['queues'], options['batch_size'], options['poll_interval']).run(options['burst'])
+
+
+def run_workers(processes=1, queues=None, batch_size=1, poll_interval=1.0, burst=False):
+    """启动 processes 个 worker 进程并等待全部退出"""
+    options = {'queues': queues, 'batch_size': batch_size, 'poll_interval': poll_interval, 'burst': burst}
+    if processes <= 1:
+        return run_worker_process(options)
+
+    # 子进程不能共用父进程的数据库连接
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    children = [context.Process(target=run_worker_process, args=(options,)) for _ in range(processes)]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    # 终端 Ctrl+C 会同时发给子进程，父进程只需等待
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for child in children:
+        child.join()
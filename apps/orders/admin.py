@@ -1,6 +1,18 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.auth import get_permission_codename
+from django.db import transaction
+from django.template.response import TemplateResponse
 from django.utils.html import format_html
 from .models import Order, OrderItem, PaymentConfig, Payment
+from .services import cancel_orders, complete_orders
+from warehouse_management.optimistic import VersionConflict, run_with_retry
+from warehouse_management.routers import ReplicaChangeListMixin
+
+
+class CompleteOrdersForm(forms.Form):
+    payment_method = forms.ChoiceField(label='支付方式', choices=Order.PAYMENT_METHODS)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -35,7 +47,7 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['order_no', 'user', 'total_amount', 'total_cost', 'profit_display',
                     'status', 'payment_method', 'paid_at', 'created_at']
     list_filter = ['status', 'payment_method', 'created_at']
@@ -43,7 +55,7 @@ class OrderAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     list_per_page = 20
     inlines = [OrderItemInline]
-    actions = None  # 禁用所有 actions
+    actions = ['mark_as_completed', 'mark_as_cancelled']
     
     def get_readonly_fields(self, request, obj=None):
         if obj:  # 编辑时
@@ -87,14 +99,59 @@ class OrderAdmin(admin.ModelAdmin):
         return '0.00'
     profit_display.short_description = '利润'
     
-    @admin.action(description='标记为已完成')
+    def has_bulk_update_order_permission(self, request):
+        """批量完成、取消订单需要 bulk_update_order 权限（订单本身不允许修改）"""
+        opts = self.opts
+        return request.user.has_perm(f'{opts.app_label}.{get_permission_codename("bulk_update", opts)}')
+
+    @admin.action(description='标记为已完成', permissions=['bulk_update_order'])
     def mark_as_completed(self, request, queryset):
-        from django.utils import timezone
-        queryset.filter(status='pending').update(status='completed', paid_at=timezone.now())
+        """批量完成选中的待支付订单：先选择支付方式，再按商品汇总扣减冻结库存，补录支付记录"""
+        form = CompleteOrdersForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            order_ids = list(queryset.values_list('pk', flat=True))
+
+            def attempt():
+                with transaction.atomic():
+                    return complete_orders(order_ids, form.cleaned_data['payment_method'], operator_id=request.user.pk)
+
+            try:
+                completed = run_with_retry('order_bulk_complete', attempt)
+            except VersionConflict:
+                self.message_user(request, '选中的订单正在被其他操作修改，请稍后重试', messages.ERROR)
+                return None
+            self.message_user(request, f'已完成 {len(completed)} 个订单（非待支付订单已跳过）')
+            return None
+        # 确认页只回传列表页提交的勾选项（最多一页）和“全选所有”标记，筛选条件保留在提交地址的查询参数中，
+        # 不逐个回传全部订单主键，避免超过 DATA_UPLOAD_MAX_NUMBER_FIELDS
+        context = {
+            **self.admin_site.each_context(request),
+            'title': '标记为已完成',
+            'opts': self.model._meta,
+            'form': form,
+            'order_count': queryset.count(),
+            'sample_orders': queryset[:10],
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/orders/order/complete_orders.html', context)
     
-    @admin.action(description='标记为已取消')
+    @admin.action(description='标记为已取消', permissions=['bulk_update_order'])
     def mark_as_cancelled(self, request, queryset):
-        queryset.filter(status='pending').update(status='cancelled')
+        """批量取消选中的待支付订单：按商品汇总释放冻结库存"""
+        order_ids = list(queryset.values_list('pk', flat=True))
+
+        def attempt():
+            with transaction.atomic():
+                return cancel_orders(order_ids)
+
+        try:
+            cancelled = run_with_retry('order_bulk_cancel', attempt)
+        except VersionConflict:
+            self.message_user(request, '选中的订单正在被其他操作修改，请稍后重试', messages.ERROR)
+            return
+        self.message_user(request, f'已取消 {len(cancelled)} 个订单（非待支付订单已跳过）')
     
     def has_add_permission(self, request):
         # 不允许添加订单
@@ -161,7 +218,7 @@ class PaymentConfigAdmin(admin.ModelAdmin):
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['payment_no', 'order', 'amount', 'payment_method', 'status', 'trade_no', 'operator', 'paid_at', 'created_at']
     list_filter = ['status', 'payment_method', 'created_at']
     search_fields = ['payment_no', 'order__order_no', 'trade_no']
@@ -0,0 +1,185 @@
+"""
+幂等键处理
+
+请求携带幂等键时，先在自动提交模式下插入一条"处理中"记录占用该键（唯一索引保证只有一个请求成功），
+再执行视图；视图完成后保存响应。重试请求通过一次索引查询命中已保存的结果直接返回，
+不会再次进入下单/支付事务和库存加锁。
+
+- API 请求保存响应数据，页面请求保存完整的响应（状态码、类型和正文），重试时原样返回
+- 相同的键用于不同的请求内容时返回 422
+- 首次请求仍在处理中时，重试请求最多等待 IDEMPOTENCY_WAIT_SECONDS 秒，超时返回 409
+- 通过表单隐藏字段提交幂等键的页面请求不返回 422/409 的 JSON，而是用消息提示错误并重定向回提交表单的页面
+- 视图抛出异常时释放该键，客户端可以用同一个键重试
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from .models import IdempotencyKey
+
+
+KEY_HEADER = 'Idempotency-Key'
+KEY_FIELD = 'idempotency_key'
+IGNORED_FIELDS = {KEY_FIELD, 'csrfmiddlewaretoken'}
+
+
+def get_idempotency_key(request):
+    return (request.headers.get(KEY_HEADER) or request.POST.get(KEY_FIELD, '')).strip()[:100]
+
+
+def request_hash(request, data):
+    """请求路径和内容的摘要，用于发现同一个键被用于不同的请求"""
+    if hasattr(data, 'lists'):
+        data = {key: values for key, values in data.lists() if key not in IGNORED_FIELDS}
+    payload = json.dumps([request.path, data], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(user, scope, key, digest):
+    """
+    占用幂等键
+
+    Returns:
+        tuple: (record, created)，created 为 False 时 record 是已存在的记录
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, scope=scope, key=key, request_hash=digest,
+                expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+            ), True
+    except IntegrityError:
+        pass
+    record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+    if record is not None and record.expires_at <= now:
+        # 过期的键视为不存在
+        record.delete()
+        return claim(user, scope, key, digest)
+    return record, False
+
+
+def wait_for_result(record):
+    """等待首次请求完成，返回已完成的记录或 None（超时）"""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while record is not None and record.status_code is None:
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.1)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+    return record
+
+
+def save_result(record, response):
+    record.status_code = response.status_code
+    record.location = response.get('Location', '')[:255]
+    data = getattr(response, 'data', None)  # DRF Response
+    if data is not None:
+        record.response_data = json.loads(json.dumps(data, default=str))
+    elif not response.streaming:
+        record.content_type = response.get('Content-Type', '')[:100]
+        record.response_body = response.content.decode(response.charset, errors='replace')
+    record.save(update_fields=['status_code', 'location', 'response_data', 'content_type', 'response_body'])
+
+
+def replay(record, rest_framework=False):
+    """按保存的结果重建响应"""
+    if record.location and 300 <= record.status_code < 400:
+        response = HttpResponseRedirect(record.location)
+    elif rest_framework:
+        from rest_framework.response import Response
+        response = Response(record.response_data, status=record.status_code)
+    else:
+        response = HttpResponse(
+            record.response_body, status=record.status_code, content_type=record.content_type or None
+        )
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def run_idempotent(request, scope, data, func, rest_framework=False):
+    key = get_idempotency_key(request)
+    if not key or not request.user.is_authenticated:
+        return func()
+
+    digest = request_hash(request, data)
+    record, created = claim(request.user, scope, key, digest)
+    if not created:
+        if record is None:
+            return run_idempotent(request, scope, data, func, rest_framework)
+        if record.request_hash != digest:
+            return error_response(request, '幂等键已用于其他请求', 422, rest_framework)
+        record = wait_for_result(record)
+        if record is None:
+            return error_response(request, '相同幂等键的请求正在处理中', 409, rest_framework)
+        return replay(record, rest_framework)
+
+    try:
+        response = func()
+    except Exception:
+        record.delete()
+        raise
+    save_result(record, response)
+    return response
+
+
+FORM_ERRORS = {
+    422: '该表单已提交过，请刷新页面后重新填写提交',
+    409: '该表单的上一次提交仍在处理中，请稍后刷新页面查看结果',
+}
+
+
+def error_response(request, message, status, rest_framework):
+    if rest_framework:
+        from rest_framework.response import Response
+        return Response({'detail': message}, status=status)
+    if KEY_HEADER not in request.headers:
+        # 页面表单提交：提示错误并回到提交表单的页面
+        messages.error(request, FORM_ERRORS[status])
+        referer = request.headers.get('Referer', '')
+        if not url_has_allowed_host_and_scheme(referer, {request.get_host()}, request.is_secure()):
+            referer = '/'
+        return HttpResponseRedirect(referer)
+    return JsonResponse({'detail': message}, status=status)
+
+
+def idempotent(scope):
+    """函数视图装饰器：POST 请求按幂等键去重"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return run_idempotent(
+                request, scope, request.POST,
+                lambda: view_func(request, *args, **kwargs),
+            )
+        return wrapper
+    return decorator
+
+
+def idempotent_action(scope):
+    """DRF 视图集动作装饰器：按 Idempotency-Key 请求头去重"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            return run_idempotent(
+                request, scope, request.data,
+                lambda: method(self, request, *args, **kwargs),
+                rest_framework=True,
+            )
+        return wrapper
+    return decorator
+
+
+def purge_expired_keys():
+    """删除过期的幂等键，返回删除的条数"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
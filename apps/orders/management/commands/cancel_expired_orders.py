@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.orders.services import cancel_expired_orders
+
+
+class Command(BaseCommand):
+    help = '取消超时未支付的订单并释放冻结库存，可按间隔持续运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=int, default=settings.ORDER_PAYMENT_TIMEOUT_MINUTES,
+            help='订单超时时间（分钟）',
+        )
+        parser.add_argument('--batch-size', type=int, default=100, help='每个事务处理的订单数')
+        parser.add_argument('--interval', type=int, default=0, help='运行间隔（秒），0 表示只运行一次')
+
+    def handle(self, *args, **options):
+        while True:
+            count = cancel_expired_orders(options['timeout'], options['batch_size'])
+            self.stdout.write(f'已取消 {count} 个超时订单')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
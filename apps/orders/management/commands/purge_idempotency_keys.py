@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = '删除过期的幂等键'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'已删除 {purge_expired_keys()} 个过期幂等键')
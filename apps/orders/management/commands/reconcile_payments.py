@@ -0,0 +1,34 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.reconciliation import reconcile, write_unmatched_report
+
+
+class Command(BaseCommand):
+    help = '按支付平台对账单（CSV：交易流水号, 金额, 支付时间）批量确认支付并完成订单'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='对账单 CSV 文件')
+        parser.add_argument(
+            '--window-minutes', type=int, default=None,
+            help='按金额匹配订单的时间窗口（分钟），默认为订单支付超时时间',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='只匹配不写入')
+        parser.add_argument('--report', help='未匹配流水报告输出路径（CSV）')
+
+    def handle(self, *args, **options):
+        with open(options['file'], newline='', encoding='utf-8-sig') as f:
+            result = reconcile(csv.reader(f), options['window_minutes'], options['dry_run'])
+        summary = result.summary()
+        self.stdout.write(
+            f"对账单 {summary['lines']} 行：按流水号匹配 {summary['payment_matches']}，"
+            f"按金额匹配 {summary['order_matches']}，已对账 {summary['reconciled']}，"
+            f"未匹配 {summary['unmatched']}"
+        )
+        if options['dry_run']:
+            self.stdout.write('dry-run：未写入数据')
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8-sig') as f:
+                write_unmatched_report(result, f)
+            self.stdout.write(f"未匹配流水已写入 {options['report']}")
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from warehouse_management.dbutils import brin_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_remove_order_remark_remove_order_shipping_address_and_more'),
+    ]
+
+    operations = [
+        brin_index('orders', 'created_at'),
+        brin_index('payments', 'created_at'),
+    ]
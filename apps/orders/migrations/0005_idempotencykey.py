@@ -0,0 +1,38 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_brin_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, verbose_name='操作')),
+                ('key', models.CharField(max_length=100, verbose_name='幂等键')),
+                ('request_hash', models.CharField(max_length=64, verbose_name='请求摘要')),
+                ('status_code', models.IntegerField(blank=True, help_text='为空表示首次请求仍在处理中', null=True, verbose_name='响应状态码')),
+                ('location', models.CharField(blank=True, max_length=255, verbose_name='重定向地址')),
+                ('response_data', models.JSONField(blank=True, null=True, verbose_name='响应内容')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '幂等键',
+                'verbose_name_plural': '幂等键',
+                'db_table': 'idempotency_keys',
+                'indexes': [models.Index(fields=['expires_at'], name='idempotency_expires_6c9d28_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'scope', 'key'), name='uniq_idempotency_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['trade_no'], name='payments_trade_n_187b96_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_payment_trade_no_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='每次更新加 1，用于乐观并发控制', verbose_name='版本号'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+import datetime
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+import warehouse_management.fields
+
+
+def fill_created_date(apps, schema_editor):
+    """按 settings.TIME_ZONE 把已有订单的创建时间换算为本地日期（一条 UPDATE）"""
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.using(schema_editor.connection.alias).update(created_date=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='created_date',
+            field=warehouse_management.fields.LocalDateField(default=datetime.date(2000, 1, 1), help_text='创建时间的本地日期，报表按该列分组', source='created_at', verbose_name='创建日期'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_created_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_date'], name='orders_status_caf16e_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_created_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=100, verbose_name='响应类型'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response_body',
+            field=models.TextField(blank=True, help_text='页面请求（非 API）的完整响应，重试时原样返回', verbose_name='响应正文'),
+        ),
+    ]
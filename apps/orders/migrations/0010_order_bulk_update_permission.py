@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_idempotencykey_response_body'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='order',
+            options={'permissions': [('bulk_update_order', '可以批量完成或取消订单')], 'verbose_name': '订单', 'verbose_name_plural': '订单'},
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from warehouse_management.fields import LocalDateField
+
 
 class Order(models.Model):
     """订单"""
@@ -30,17 +32,21 @@ class Order(models.Model):
     customer_name = models.CharField('客户名称', max_length=100)
     customer_remark = models.TextField('客户备注', blank=True)
     paid_at = models.DateTimeField('支付时间', null=True, blank=True)
+    version = models.PositiveIntegerField('版本号', default=0, help_text='每次更新加 1，用于乐观并发控制')
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    created_date = LocalDateField('创建日期', source='created_at', help_text='创建时间的本地日期，报表按该列分组')
     updated_at = models.DateTimeField('更新时间', auto_now=True)
 
     class Meta:
         db_table = 'orders'
         verbose_name = '订单'
         verbose_name_plural = '订单'
+        permissions = [('bulk_update_order', '可以批量完成或取消订单')]
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['user', 'status']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', 'created_date']),
         ]
 
     def __str__(self):
@@ -135,7 +141,45 @@ class Payment(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['order']),
             models.Index(fields=['status']),
+            models.Index(fields=['trade_no']),
         ]
 
     def __str__(self):
         return f'{self.payment_no} - {self.order.order_no}'
+
+
+class IdempotencyKey(models.Model):
+    """
+    幂等键
+
+    客户端为一次操作生成唯一的键（表单隐藏字段 idempotency_key 或请求头 Idempotency-Key），
+    重试时直接返回首次请求保存的结果，不会重复创建订单或支付记录。
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='idempotency_keys', verbose_name='用户'
+    )
+    scope = models.CharField('操作', max_length=50)
+    key = models.CharField('幂等键', max_length=100)
+    request_hash = models.CharField('请求摘要', max_length=64)
+    status_code = models.IntegerField('响应状态码', null=True, blank=True, help_text='为空表示首次请求仍在处理中')
+    location = models.CharField('重定向地址', max_length=255, blank=True)
+    response_data = models.JSONField('响应内容', null=True, blank=True)
+    content_type = models.CharField('响应类型', max_length=100, blank=True)
+    response_body = models.TextField('响应正文', blank=True, help_text='页面请求（非 API）的完整响应，重试时原样返回')
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    expires_at = models.DateTimeField('过期时间')
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = '幂等键'
+        verbose_name_plural = '幂等键'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='uniq_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.scope}:{self.key}'
@@ -0,0 +1,268 @@
+"""
+支付对账
+
+把支付平台对账单（CSV：交易流水号, 金额, 支付时间）与支付记录、待支付订单批量匹配：
+1. 按交易流水号匹配已录入的支付记录，金额一致才算匹配
+2. 没有录入支付记录的流水按金额 + 时间窗口匹配待支付订单，窗口内只有一个候选订单时才算匹配，
+   多个候选时交给人工处理
+候选集合按交易流水号 / 金额一次性批量加载到内存中做哈希匹配，不逐行查询数据库；
+匹配结果在一个事务中批量写入，未匹配的流水连同原因输出到报告。
+"""
+import bisect
+import csv
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import batched
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, Payment
+from .services import complete_orders, payment_event
+from apps.events.services import record_events
+from warehouse_management.dbutils import update_rows
+from warehouse_management.optimistic import VersionConflict, run_with_retry
+
+
+STATEMENT_PAYMENT_METHOD = '对账导入'
+QUERY_BATCH_SIZE = 5000
+
+
+@dataclass
+class StatementLine:
+    line_no: int
+    trade_no: str
+    amount: Decimal
+    paid_at: datetime
+
+
+@dataclass
+class ReconciliationResult:
+    lines: int = 0
+    payment_matches: list = field(default_factory=list)  # [(StatementLine, Payment)]
+    order_matches: list = field(default_factory=list)  # [(StatementLine, Order)]
+    reconciled: list = field(default_factory=list)  # 支付记录已是成功状态的流水
+    unmatched: list = field(default_factory=list)  # [(line_no, trade_no, 原因)]
+
+    def summary(self):
+        return {
+            'lines': self.lines,
+            'payment_matches': len(self.payment_matches),
+            'order_matches': len(self.order_matches),
+            'reconciled': len(self.reconciled),
+            'unmatched': len(self.unmatched),
+        }
+
+
+def parse_paid_at(value):
+    paid_at = datetime.fromisoformat(value.strip())
+    return timezone.make_aware(paid_at) if timezone.is_naive(paid_at) else paid_at
+
+
+def parse_statement(rows):
+    """
+    解析对账单 CSV 行（首行为表头时跳过），格式错误的行记入 errors
+
+    Returns:
+        tuple: ([StatementLine], [(line_no, trade_no, 原因)])
+    """
+    lines, errors = [], []
+    for line_no, row in enumerate(rows, start=1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        trade_no = row[0].strip()
+        try:
+            amount = Decimal(row[1].strip())
+            paid_at = parse_paid_at(row[2])
+        except (IndexError, InvalidOperation, ValueError):
+            if line_no > 1:
+                errors.append((line_no, trade_no, '金额或时间格式错误'))
+            continue
+        if not trade_no:
+            errors.append((line_no, trade_no, '缺少交易流水号'))
+            continue
+        lines.append(StatementLine(line_no, trade_no, amount, paid_at))
+    return lines, errors
+
+
+def match_statement(lines, window_minutes=None):
+    """
+    匹配对账单流水（只读，不修改数据）
+
+    Args:
+        lines: [StatementLine]
+        window_minutes: 按金额匹配订单时，订单创建时间早于支付时间的最大分钟数，
+                        默认为订单支付超时时间（超时后订单会被取消）
+
+    Returns:
+        ReconciliationResult
+    """
+    if window_minutes is None:
+        window_minutes = settings.ORDER_PAYMENT_TIMEOUT_MINUTES
+    window = timedelta(minutes=window_minutes)
+    result = ReconciliationResult(lines=len(lines))
+
+    payments = {}
+    for batch in batched({line.trade_no for line in lines}, QUERY_BATCH_SIZE):
+        for payment in Payment.objects.filter(trade_no__in=batch).select_related('order').only(
+            'payment_no', 'order_id', 'amount', 'payment_method', 'status', 'trade_no', 'paid_at', 'order__status'
+        ):
+            payments[payment.trade_no] = payment
+
+    seen, remaining = set(), []
+    for line in lines:
+        if line.trade_no in seen:
+            result.unmatched.append((line.line_no, line.trade_no, '对账单中交易流水号重复'))
+            continue
+        seen.add(line.trade_no)
+        payment = payments.get(line.trade_no)
+        if payment is None:
+            remaining.append(line)
+        elif payment.amount != line.amount:
+            result.unmatched.append((line.line_no, line.trade_no, f'金额不一致，支付记录金额 {payment.amount}'))
+        elif payment.status == 'success':
+            result.reconciled.append(line)
+        elif payment.order.status != 'pending':
+            result.unmatched.append((line.line_no, line.trade_no, f'订单状态为 {payment.order.get_status_display()}'))
+        else:
+            result.payment_matches.append((line, payment))
+
+    if remaining:
+        match_pending_orders(remaining, window, result)
+    return result
+
+
+def match_pending_orders(lines, window, result):
+    """按金额 + 时间窗口把流水匹配到待支付订单，每个订单最多匹配一条流水"""
+    taken = {payment.order_id for _, payment in result.payment_matches}
+    candidates = defaultdict(list)
+    orders = Order.objects.filter(
+        status='pending',
+        created_at__gte=min(line.paid_at for line in lines) - window,
+        created_at__lte=max(line.paid_at for line in lines),
+    ).only('order_no', 'total_amount', 'created_at').order_by('created_at')
+    for order in orders.iterator(chunk_size=QUERY_BATCH_SIZE):
+        if order.pk not in taken:
+            candidates[order.total_amount].append(order)
+    created_times = {amount: [order.created_at for order in bucket] for amount, bucket in candidates.items()}
+
+    for line in sorted(lines, key=lambda line: line.paid_at):
+        bucket = candidates.get(line.amount, [])
+        times = created_times.get(line.amount, [])
+        start = bisect.bisect_left(times, line.paid_at - window)
+        end = bisect.bisect_right(times, line.paid_at)
+        options = [order for order in bucket[start:end] if order.pk not in taken]
+        if len(options) == 1:
+            taken.add(options[0].pk)
+            result.order_matches.append((line, options[0]))
+        elif options:
+            result.unmatched.append((line.line_no, line.trade_no, f'时间窗口内有 {len(options)} 个同金额待支付订单'))
+        else:
+            result.unmatched.append((line.line_no, line.trade_no, '未找到对应的支付记录或待支付订单'))
+
+
+def keep_pending(result, matches, pending, get_order_id):
+    """保留订单仍为待支付的匹配，其余移入未匹配列表"""
+    kept = []
+    for line, target in matches:
+        if get_order_id(target) in pending:
+            kept.append((line, target))
+        else:
+            result.unmatched.append((line.line_no, line.trade_no, '订单已不是待支付状态'))
+    return kept
+
+
+def apply_matches(result, operator_id=None):
+    """
+    在一个事务中写入匹配结果
+
+    - 按交易流水号匹配的支付记录置为成功
+    - 按金额匹配的订单补录成功的支付记录
+    - 涉及的订单通过 complete_orders 批量完成（扣减冻结库存）
+    写入时订单已不是待支付状态的匹配移入未匹配列表；
+    订单在读取后被并发修改（complete_orders 比较交换失败）时整个事务回滚，重新读取订单状态后重试。
+
+    Returns:
+        int: 完成的订单数
+    """
+    payment_matches, order_matches, unmatched = result.payment_matches, result.order_matches, list(result.unmatched)
+
+    def attempt():
+        result.payment_matches, result.order_matches, result.unmatched = (
+            payment_matches, order_matches, list(unmatched)
+        )
+        with transaction.atomic():
+            order_ids = [payment.order_id for _, payment in result.payment_matches]
+            order_ids += [order.pk for _, order in result.order_matches]
+            pending = set()
+            for batch in batched(order_ids, QUERY_BATCH_SIZE):
+                pending.update(
+                    Order.objects.filter(pk__in=batch, status='pending').values_list('pk', flat=True)
+                )
+
+            result.payment_matches = keep_pending(
+                result, result.payment_matches, pending, lambda payment: payment.order_id
+            )
+            result.order_matches = keep_pending(result, result.order_matches, pending, lambda order: order.pk)
+
+            updated = []
+            for line, payment in result.payment_matches:
+                payment.status = 'success'
+                payment.paid_at = line.paid_at
+                updated.append(payment)
+            update_rows(
+                Payment, ['status', 'paid_at'], [(payment.pk, 'success', payment.paid_at) for payment in updated]
+            )
+
+            now = timezone.now()
+            created = Payment.objects.bulk_create([
+                Payment(
+                    payment_no=f'PAY{now.strftime("%Y%m%d%H%M%S")}{uuid.uuid4().hex[:12].upper()}',
+                    order_id=order.pk,
+                    amount=line.amount,
+                    payment_method=STATEMENT_PAYMENT_METHOD,
+                    status='success',
+                    trade_no=line.trade_no,
+                    operator_id=operator_id,
+                    remark=f'对账单第 {line.line_no} 行',
+                    paid_at=line.paid_at,
+                )
+                for line, order in result.order_matches
+            ], batch_size=1000)
+
+            record_events(
+                [payment_event(payment, 'payment.status_changed', 'pending') for payment in updated]
+                + [payment_event(payment, 'payment.created') for payment in created]
+            )
+            completed = complete_orders(sorted(pending), 'online', operator_id=operator_id)
+            if len(completed) != len(pending):
+                raise VersionConflict('对账匹配的订单已不是待支付状态')
+            return len(completed)
+
+    return run_with_retry('order_reconcile', attempt)
+
+
+def reconcile(rows, window_minutes=None, dry_run=False, operator_id=None):
+    """
+    解析、匹配并（非 dry_run 时）写入对账结果
+
+    Returns:
+        ReconciliationResult: unmatched 含格式错误的行，按行号排序
+    """
+    lines, errors = parse_statement(rows)
+    result = match_statement(lines, window_minutes)
+    result.unmatched += errors
+    if not dry_run:
+        apply_matches(result, operator_id)
+    result.unmatched.sort()
+    return result
+
+
+def write_unmatched_report(result, f):
+    writer = csv.writer(f)
+    writer.writerow(['行号', '交易流水号', '原因'])
+    writer.writerows(result.unmatched)
@@ -0,0 +1,367 @@
+"""
+订单服务模块
+提供订单创建、批量下单、批量完成/取消和批处理相关的业务逻辑
+"""
+import uuid
+from datetime import timedelta
+from itertools import batched
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Order, OrderItem, Payment
+from apps.events.services import build_event, record_events
+from apps.inventory.services import (
+    InsufficientStockError, available_quantities, consume_stock, release_stock, reserve_stock, sum_quantities
+)
+from apps.products.models import Product
+from apps.reports.customers import add_completed_orders
+from warehouse_management.dbutils import skip_locked
+from warehouse_management.optimistic import VersionConflict, compare_and_swap, compare_and_swap_many, run_with_retry
+
+
+def generate_order_no(suffix_length=6):
+    """订单号：ORD + 时间戳 + 随机后缀（批量下单同一秒内生成大量订单号，使用更长的后缀）"""
+    return f'ORD{timezone.now().strftime("%Y%m%d%H%M%S")}{uuid.uuid4().hex[:suffix_length].upper()}'
+
+
+def order_created_event(order, quantities):
+    """订单创建事件（含各商品数量），由下单流程在创建订单的事务中写入"""
+    return build_event('order', 'order.created', order.pk, {
+        'order_no': order.order_no,
+        'user_id': order.user_id,
+        'status': order.status,
+        'total_amount': order.total_amount,
+        'total_cost': order.total_cost,
+        'customer_name': order.customer_name,
+        'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in quantities.items()],
+    })
+
+
+def order_status_event(order, previous):
+    """订单状态变化事件"""
+    return build_event('order', 'order.status_changed', order.pk, {
+        'order_no': order.order_no,
+        'from': previous,
+        'to': order.status,
+        'payment_method': order.payment_method,
+        'paid_at': order.paid_at,
+    })
+
+
+def payment_event(payment, event_type, previous=None):
+    """支付记录事件（payment.created / payment.status_changed）"""
+    return build_event('payment', event_type, payment.pk, {
+        'payment_no': payment.payment_no,
+        'order_id': payment.order_id,
+        'amount': payment.amount,
+        'payment_method': payment.payment_method,
+        'status': payment.status,
+        'from': previous,
+        'trade_no': payment.trade_no,
+        'paid_at': payment.paid_at,
+    })
+
+
+def create_orders_bulk(user, orders):
+    """
+    批量创建订单并冻结库存
+
+    全部订单在一个事务中处理：不加锁读取涉及商品的可用库存后按提交顺序分配库存，
+    库存足够的订单成功，不足的订单失败且不影响其他订单；
+    成功订单的库存按商品汇总后每个商品一条条件 UPDATE 冻结，订单、明细和 order.created 事件
+    用 bulk_create 写入（bulk_create 不触发信号）。
+    读取后库存被并发订单占用导致冻结失败时，整批回滚并重新读取库存分配（乐观并发，有次数上限）。
+
+    Args:
+        user: 下单用户
+        orders: [{'customer_name', 'customer_remark', 'items': [{'product_id', 'quantity'}]}]
+
+    Returns:
+        list: 与 orders 一一对应的结果
+              成功 {'success': True, 'order_id', 'order_no'}，失败 {'success': False, 'error'}
+
+    Raises:
+        VersionConflict: 重试后仍然冲突
+    """
+    product_ids = {line['product_id'] for order in orders for line in order['items']}
+
+    def attempt():
+        results = [None] * len(orders)
+        with transaction.atomic():
+            products = Product.objects.filter(pk__in=product_ids, is_active=True).in_bulk()
+            available = available_quantities(product_ids)
+
+            accepted = []
+            for index, order in enumerate(orders):
+                quantities = sum_quantities((line['product_id'], line['quantity']) for line in order['items'])
+                error = allocate(quantities, products, available)
+                if error:
+                    results[index] = {'success': False, 'error': error}
+                else:
+                    accepted.append((index, order, quantities))
+
+            if not accepted:
+                return results
+
+            try:
+                reserve_stock(sum_quantities(
+                    (product_id, quantity)
+                    for _, _, quantities in accepted for product_id, quantity in quantities.items()
+                ))
+            except InsufficientStockError as exc:
+                raise VersionConflict(str(exc))
+
+            new_orders = Order.objects.bulk_create([
+                Order(
+                    order_no=generate_order_no(suffix_length=12),
+                    user=user,
+                    total_amount=sum(products[pk].selling_price * qty for pk, qty in quantities.items()),
+                    total_cost=sum(products[pk].cost_price * qty for pk, qty in quantities.items()),
+                    customer_name=order['customer_name'],
+                    customer_remark=order.get('customer_remark', ''),
+                    status='pending',
+                )
+                for _, order, quantities in accepted
+            ])
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=new_order,
+                    product_id=product_id,
+                    quantity=quantity,
+                    unit_price=products[product_id].selling_price,
+                    cost_price=products[product_id].cost_price,
+                )
+                for new_order, (_, _, quantities) in zip(new_orders, accepted)
+                for product_id, quantity in quantities.items()
+            ])
+            record_events([
+                order_created_event(new_order, quantities)
+                for new_order, (_, _, quantities) in zip(new_orders, accepted)
+            ])
+
+        for new_order, (index, _, _) in zip(new_orders, accepted):
+            results[index] = {'success': True, 'order_id': new_order.pk, 'order_no': new_order.order_no}
+        return results
+
+    return run_with_retry('order_bulk', attempt)
+
+
+def allocate(quantities, products, available):
+    """
+    从剩余库存中为一个订单分配库存，成功时扣减 available
+
+    Returns:
+        str|None: 失败原因，成功时返回 None
+    """
+    for product_id, quantity in quantities.items():
+        if product_id not in products:
+            return f'商品 {product_id} 不存在或已下架'
+        if available.get(product_id, 0) < quantity:
+            return (f'商品 {products[product_id].name} 库存不足,'
+                    f'可用库存:{available.get(product_id, 0)},需要:{quantity}')
+    for product_id, quantity in quantities.items():
+        available[product_id] -= quantity
+    return None
+
+
+def transition_order(order, status, **fields):
+    """
+    按读取时的版本号把待支付订单变更为已完成/已取消（需在事务中调用）
+
+    订单状态用一条比较交换 UPDATE 变更，不加锁读取；订单在读取后被修改过时抛出 VersionConflict。
+    已完成时扣减冻结库存并累加客户汇总，已取消时释放冻结库存，并写入 order.status_changed 事件。
+    """
+    if order.status != 'pending':
+        raise ValueError(f'订单 {order.order_no} 不是待支付状态')
+    if not compare_and_swap(order, status=status, updated_at=timezone.now(), **fields):
+        raise VersionConflict(f'订单 {order.order_no} 已被修改')
+    quantities = sum_quantities(order.items.values_list('product_id', 'quantity'))
+    if status == 'completed':
+        consume_stock(quantities)
+        add_completed_orders([order])
+    else:
+        release_stock(quantities)
+    record_events([order_status_event(order, 'pending')])
+
+
+def pay_order(order_id, user, payment_method, operator=None):
+    """
+    确认支付：完成待支付订单并写入成功的支付记录，版本冲突时重新读取订单重试
+
+    Returns:
+        Order | None: 订单不存在或已不是待支付状态时返回 None
+    """
+    def attempt():
+        order = Order.objects.filter(pk=order_id, user=user, status='pending').first()
+        if order is None:
+            return None
+        now = timezone.now()
+        with transaction.atomic():
+            transition_order(order, 'completed', payment_method=payment_method, paid_at=now)
+            Payment.objects.create(
+                payment_no=f'PAY{now.strftime("%Y%m%d%H%M%S")}{uuid.uuid4().hex[:6].upper()}',
+                order=order,
+                amount=order.total_amount,
+                payment_method=dict(Order.PAYMENT_METHODS).get(payment_method, payment_method),
+                status='success',
+                operator=operator,
+                paid_at=now,
+            )
+        return order
+
+    return run_with_retry('order_pay', attempt)
+
+
+def cancel_order(order_id, user):
+    """
+    取消待支付订单并释放冻结库存，版本冲突时重新读取订单重试
+
+    Returns:
+        Order | None: 订单不存在或已不是待支付状态时返回 None
+    """
+    def attempt():
+        order = Order.objects.filter(pk=order_id, user=user, status='pending').first()
+        if order is None:
+            return None
+        with transaction.atomic():
+            transition_order(order, 'cancelled')
+        return order
+
+    return run_with_retry('order_cancel', attempt)
+
+
+def cancel_expired_orders(timeout_minutes=None, batch_size=100):
+    """
+    取消超时未支付的订单（释放冻结库存由订单信号处理）
+
+    每批在一个事务中认领并处理；PostgreSQL 上使用 SKIP LOCKED，
+    多个清理进程可以并行运行，正在被用户支付的订单会被跳过而不是等待。
+
+    Returns:
+        int: 取消的订单数
+    """
+    if timeout_minutes is None:
+        timeout_minutes = settings.ORDER_PAYMENT_TIMEOUT_MINUTES
+    cutoff = timezone.now() - timedelta(minutes=timeout_minutes)
+
+    cancelled = 0
+    while True:
+        with transaction.atomic():
+            orders = list(skip_locked(
+                Order.objects.filter(status='pending', created_at__lt=cutoff).order_by('id')
+            )[:batch_size])
+            for order in orders:
+                order.status = 'cancelled'
+                order.save(update_fields=['status', 'updated_at'])
+        cancelled += len(orders)
+        if len(orders) < batch_size:
+            return cancelled
+
+
+def pending_order_versions(order_ids, batch_size):
+    """按批读取仍为待支付的订单（不加锁），逐批返回 ({订单 ID: 版本号}, 各批订单明细按商品汇总的 (product_id, quantity))"""
+    for batch in batched(order_ids, batch_size):
+        versions = dict(Order.objects.filter(pk__in=batch, status='pending').values_list('pk', 'version'))
+        if versions:
+            yield versions, list(
+                OrderItem.objects.filter(order_id__in=versions).values_list('product_id').annotate(
+                    quantity=Sum('quantity')
+                ).order_by()
+            )
+
+
+def complete_orders(order_ids, payment_method, operator_id=None, batch_size=2000):
+    """
+    批量完成待支付订单（集合操作：不逐个保存订单，不触发订单信号）
+
+    需在事务中调用，只处理仍为待支付的订单，payment_method 为 Order.PAYMENT_METHODS 中的值：
+    - 没有成功支付记录的订单按订单金额批量补录一条成功的支付记录
+    - 全部订单明细按商品汇总后，每个商品一条 UPDATE 扣减冻结库存
+    - 订单状态按批用比较交换 UPDATE 变更（与 transition_order 相同，不加锁读取），支付时间取订单最近一条成功支付记录的时间
+    - 为每个订单和补录的支付记录写入事件，并累加客户汇总
+
+    Returns:
+        list: 实际完成的订单 ID
+
+    Raises:
+        VersionConflict: 订单在读取后被修改过，调用方应回滚事务后重试（run_with_retry）
+    """
+    now = timezone.now()
+    latest_paid_at = Payment.objects.filter(
+        order=OuterRef('pk'), status='success'
+    ).order_by('-paid_at').values('paid_at')[:1]
+
+    completed, lines, events = [], [], []
+    for versions, quantities in pending_order_versions(order_ids, batch_size):
+        ids = list(versions)
+        paid = set(Payment.objects.filter(order_id__in=ids, status='success').values_list('order_id', flat=True))
+        payments = Payment.objects.bulk_create([
+            Payment(
+                payment_no=f'PAY{now.strftime("%Y%m%d%H%M%S")}{uuid.uuid4().hex[:12].upper()}',
+                order_id=order_id,
+                amount=total_amount,
+                payment_method=dict(Order.PAYMENT_METHODS).get(payment_method, payment_method),
+                status='success',
+                operator_id=operator_id,
+                remark='批量完成订单时补录',
+                paid_at=now,
+            )
+            for order_id, total_amount in Order.objects.filter(pk__in=ids).values_list('pk', 'total_amount')
+            if order_id not in paid
+        ])
+        if not compare_and_swap_many(
+            Order, versions,
+            status='completed',
+            payment_method=payment_method,
+            paid_at=Coalesce(Subquery(latest_paid_at), Value(now, output_field=DateTimeField())),
+            updated_at=now,
+        ):
+            raise VersionConflict(f'批量完成的 {len(ids)} 个订单中有订单已被修改')
+        events += [payment_event(payment, 'payment.created') for payment in payments]
+        orders = list(Order.objects.filter(pk__in=ids).only(
+            'order_no', 'status', 'payment_method', 'paid_at',
+            'user_id', 'customer_name', 'total_amount', 'total_cost', 'created_at',
+        ))
+        events += [order_status_event(order, 'pending') for order in orders]
+        add_completed_orders(orders)
+        lines += quantities
+        completed += ids
+
+    consume_stock(sum_quantities(lines))
+    record_events(events)
+    return completed
+
+
+def cancel_orders(order_ids, batch_size=2000):
+    """
+    批量取消待支付订单（集合操作：不逐个保存订单，不触发订单信号）
+
+    需在事务中调用，只处理仍为待支付的订单：全部订单明细按商品汇总后，
+    每个商品一条 UPDATE 释放冻结库存，订单状态按批用比较交换 UPDATE 变更，并为每个订单写入事件。
+
+    Returns:
+        list: 实际取消的订单 ID
+
+    Raises:
+        VersionConflict: 订单在读取后被修改过，调用方应回滚事务后重试（run_with_retry）
+    """
+    now = timezone.now()
+    cancelled, lines, events = [], [], []
+    for versions, quantities in pending_order_versions(order_ids, batch_size):
+        ids = list(versions)
+        if not compare_and_swap_many(Order, versions, status='cancelled', updated_at=now):
+            raise VersionConflict(f'批量取消的 {len(ids)} 个订单中有订单已被修改')
+        events += [
+            order_status_event(order, 'pending')
+            for order in Order.objects.filter(pk__in=ids).only('order_no', 'status', 'payment_method', 'paid_at')
+        ]
+        lines += quantities
+        cancelled += ids
+
+    release_stock(sum_quantities(lines))
+    record_events(events)
+    return cancelled
@@ -2,49 +2,81 @@ from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.db import transaction
 from django.core.exceptions import ValidationError
+from django.db.models import F
 from .models import Order, Payment
-from apps.products.models import ProductStock
+from .services import order_status_event, payment_event
+from apps.events.services import record_events
+from apps.inventory.services import consume_stock, release_stock, sum_quantities
+from apps.reports.customers import add_completed_orders
+from warehouse_management.optimistic import VersionConflict
 
 
 # 注意：订单创建时的库存冻结已移至 views.py 中的 order_create 函数
 # 因为 post_save 信号触发时 OrderItem 还未保存，instance.items.all() 为空
 
 
+def order_item_quantities(order):
+    """订单各商品数量 {product_id: quantity}"""
+    return sum_quantities(order.items.values_list('product_id', 'quantity'))
+
+
 @receiver(pre_save, sender=Order)
 def handle_order_status_change(sender, instance, **kwargs):
     """
     处理订单状态变化：
-    - 取消订单时恢复库存
+    - 按实例读取时的版本号占用本次更新（version + 1），读取后已被修改时抛出 VersionConflict
+    - 待支付订单取消时恢复库存
     - 支付订单时扣减冻结的库存
     """
     if instance.pk:  # 只处理已存在的订单
-        try:
-            old_order = Order.objects.get(pk=instance.pk)
-            
-            # 订单被取消，恢复库存
-            if old_order.status != 'cancelled' and instance.status == 'cancelled':
-                with transaction.atomic():
-                    for item in instance.items.all():
-                        stock = ProductStock.objects.select_for_update().get(
-                            product=item.product
-                        )
-                        # 从冻结库存恢复到可用库存
-                        stock.frozen_quantity -= item.quantity
-                        stock.available_quantity += item.quantity
-                        stock.save()
-            
-            # 订单完成，扣减库存
-            elif old_order.status == 'pending' and instance.status == 'completed':
-                with transaction.atomic():
-                    for item in instance.items.all():
-                        stock = ProductStock.objects.select_for_update().get(
-                            product=item.product
-                        )
-                        # 扣减冻结库存（不增加可用库存）
-                        stock.frozen_quantity -= item.quantity
-                        stock.save()
-        except Order.DoesNotExist:
-            pass
+        current = Order.objects.filter(pk=instance.pk).values_list('status', 'version').first()
+        if current is None:
+            return
+        previous_status, version = current
+        if version != instance.version or not Order.objects.filter(
+            pk=instance.pk, version=version
+        ).update(version=F('version') + 1):
+            raise VersionConflict(f'订单 {instance.order_no} 已被修改')
+        instance.version = version + 1
+        instance._previous_status = previous_status
+
+        # 订单被取消，恢复库存（从冻结库存恢复到可用库存）
+        if previous_status == 'pending' and instance.status == 'cancelled':
+            with transaction.atomic():
+                release_stock(order_item_quantities(instance))
+
+        # 订单完成，扣减冻结的库存（不增加可用库存）
+        elif previous_status == 'pending' and instance.status == 'completed':
+            with transaction.atomic():
+                consume_stock(order_item_quantities(instance))
+
+
+@receiver(post_save, sender=Order)
+def record_order_status_change(sender, instance, created, **kwargs):
+    """订单状态变化时写入 order.status_changed 事件，订单完成时累加客户汇总（与订单更新在同一事务中）"""
+    previous = instance.__dict__.pop('_previous_status', None)
+    if created or previous is None or previous == instance.status:
+        return
+    record_events([order_status_event(instance, previous)])
+    if previous == 'pending' and instance.status == 'completed':
+        add_completed_orders([instance])
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_status(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_status = (
+            Payment.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def record_payment_event(sender, instance, created, **kwargs):
+    """支付记录创建或状态变化时写入事件"""
+    previous = instance.__dict__.pop('_previous_status', None)
+    if not created and previous == instance.status:
+        return
+    record_events([payment_event(instance, 'payment.created' if created else 'payment.status_changed', previous)])
 
 
 @receiver(post_save, sender=Payment)
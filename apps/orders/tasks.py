@@ -0,0 +1,101 @@
+"""
+订单后台任务
+"""
+import csv
+from datetime import date
+from itertools import chain
+from pathlib import Path
+
+from django import forms
+from django.tasks import task
+from django.utils import timezone
+
+from .models import Order
+from .reconciliation import reconcile, write_unmatched_report
+from apps.archive.models import ArchivedOrder
+from apps.jobs.forms import TaskForm
+from apps.jobs.registry import admin_task
+from apps.jobs.services import report_progress, result_file_path, save_upload
+from warehouse_management.routers import use_replica
+
+
+EXPORT_HEADER = ['订单号', '用户ID', '客户名称', '订单状态', '支付方式', '订单金额', '总成本',
+                 '创建时间', '支付时间', '已归档']
+
+
+class OrderExportForm(TaskForm):
+    start_date = forms.DateField(label='开始日期', required=False, help_text='格式：2025-01-01，留空不限')
+    end_date = forms.DateField(label='结束日期', required=False)
+    status = forms.ChoiceField(label='订单状态', choices=[('', '全部')] + Order.ORDER_STATUS, required=False)
+
+
+def local_time(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def order_row(order, archived):
+    return [
+        order.order_no, order.user_id, order.customer_name,
+        order.get_status_display(), order.get_payment_method_display() or '',
+        order.total_amount, order.total_cost,
+        local_time(order.created_at), local_time(order.paid_at), '是' if archived else '',
+    ]
+
+
+@admin_task('导出订单 CSV', OrderExportForm)
+@task(takes_context=True)
+def export_orders_csv(context, start_date=None, end_date=None, status=''):
+    """导出订单（含已归档订单）为 CSV，在只读副本上按主键分批读取"""
+    filters = {}
+    if start_date:
+        filters['created_at__date__gte'] = date.fromisoformat(start_date)
+    if end_date:
+        filters['created_at__date__lte'] = date.fromisoformat(end_date)
+    if status:
+        filters['status'] = status
+    orders = Order.objects.filter(**filters).order_by('id')
+    archived = ArchivedOrder.objects.filter(**filters).order_by('id')
+
+    path = result_file_path(context, f'orders_{timezone.localdate():%Y%m%d}.csv')
+    rows = 0
+    with use_replica():
+        total = orders.count() + archived.count()
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADER)
+            for order in chain(orders.iterator(chunk_size=2000), archived.iterator(chunk_size=2000)):
+                writer.writerow(order_row(order, isinstance(order, ArchivedOrder)))
+                rows += 1
+                if rows % 2000 == 0:
+                    report_progress(context, rows, total, f'{rows}/{total}')
+    return {'rows': rows}
+
+
+class ReconcileForm(TaskForm):
+    file = forms.FileField(label='对账单 CSV', help_text='列依次为：交易流水号, 金额, 支付时间（如 2025-01-01 12:00:00）')
+    window_minutes = forms.IntegerField(
+        label='匹配时间窗口（分钟）', required=False, min_value=1,
+        help_text='没有支付记录的流水按金额匹配此时间窗口内创建的待支付订单，默认为订单支付超时时间',
+    )
+    dry_run = forms.BooleanField(label='只匹配不写入', required=False)
+
+    def task_kwargs(self):
+        return {
+            'path': save_upload(self.cleaned_data['file']),
+            'window_minutes': self.cleaned_data['window_minutes'],
+            'dry_run': self.cleaned_data['dry_run'],
+            'operator_id': self.user.pk if self.user else None,
+        }
+
+
+@admin_task('支付对账', ReconcileForm)
+@task(takes_context=True)
+def reconcile_statement(context, path, window_minutes=None, dry_run=False, operator_id=None):
+    """按对账单批量确认支付并完成订单，未匹配的流水写入报告文件（重试时已确认的流水计为已对账）"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        result = reconcile(csv.reader(f), window_minutes, dry_run, operator_id)
+    with open(result_file_path(context, f'unmatched_{timezone.localdate():%Y%m%d}.csv'), 'w',
+              newline='', encoding='utf-8-sig') as f:
+        write_unmatched_report(result, f)
+    Path(path).unlink(missing_ok=True)
+    return {**result.summary(), 'dry_run': dry_run}
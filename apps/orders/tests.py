@@ -1,3 +1,366 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin import site
+from django.contrib.auth.models import Permission
+from django.contrib.messages import get_messages
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from .idempotency import idempotent
+from .models import IdempotencyKey, Order, OrderItem, Payment
+from .reconciliation import reconcile
+from .services import cancel_order, cancel_orders, pay_order, pending_order_versions, transition_order
+from apps.events.models import OutboxEvent
+from apps.products.models import Category, Product, ProductStock
+from apps.users.models import User
+from warehouse_management.optimistic import VersionConflict, conflict_stats, run_with_retry
+
+
+class ReconciliationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='test')
+        category = Category.objects.create(name='食品')
+        cls.product = Product.objects.create(
+            name='商品', category=category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+        )
+        ProductStock.objects.create(product=cls.product, available_quantity=90, frozen_quantity=10)
+
+    def create_order(self, index, amount='8.00', minutes_ago=5):
+        order = Order.objects.create(
+            order_no=f'ORDREC{index:04d}', user=self.user, customer_name='测试',
+            total_amount=Decimal(amount), total_cost=Decimal('5.00'),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=2,
+            unit_price=Decimal('4.00'), cost_price=Decimal('2.50'),
+        )
+        return order
+
+    def create_payment(self, order, trade_no, amount='8.00'):
+        return Payment.objects.create(
+            payment_no=f'PAY{trade_no}', order=order, amount=Decimal(amount),
+            payment_method='微信', trade_no=trade_no,
+        )
+
+    def statement(self, *lines):
+        now = timezone.localtime().strftime('%Y-%m-%d %H:%M:%S')
+        return [['交易流水号', '金额', '支付时间']] + [[trade_no, amount, now] for trade_no, amount in lines]
+
+    def test_matches_by_trade_no_and_amount(self):
+        by_trade_no = self.create_order(1)
+        by_amount = self.create_order(2, amount='16.00')
+        self.create_payment(by_trade_no, 'T001')
+
+        result = reconcile(self.statement(('T001', '8.00'), ('T002', '16.00'), ('T003', '99.00')))
+        self.assertEqual(result.summary(), {
+            'lines': 3, 'payment_matches': 1, 'order_matches': 1, 'reconciled': 0, 'unmatched': 1,
+        })
+        self.assertEqual(result.unmatched[0][:2], (4, 'T003'))
+
+        for order in (by_trade_no, by_amount):
+            order.refresh_from_db()
+            self.assertEqual(order.status, 'completed')
+            self.assertIsNotNone(order.paid_at)
+        self.assertEqual(Payment.objects.get(trade_no='T001').status, 'success')
+        self.assertEqual(Payment.objects.get(trade_no='T002').order, by_amount)
+        stock = self.product.stock
+        stock.refresh_from_db()
+        self.assertEqual(stock.frozen_quantity, 6)
+        self.assertEqual(OutboxEvent.objects.filter(event_type='order.status_changed').count(), 2)
+
+        again = reconcile(self.statement(('T001', '8.00'), ('T002', '16.00')))
+        self.assertEqual((again.summary()['reconciled'], again.summary()['unmatched']), (2, 0))
+
+    def test_ambiguous_amount_and_mismatch_left_unmatched(self):
+        self.create_order(1)
+        self.create_order(2)
+        self.create_payment(self.create_order(3, amount='20.00'), 'T010')
+        self.create_order(4, amount='30.00', minutes_ago=120)
+
+        result = reconcile(
+            self.statement(('T009', '8.00'), ('T010', '21.00'), ('T010', '20.00'), ('T011', '30.00'), ('bad', 'x')),
+            window_minutes=30, dry_run=True,
+        )
+        reasons = {line_no: reason for line_no, _, reason in result.unmatched}
+        self.assertIn('2 个同金额', reasons[2])
+        self.assertIn('金额不一致', reasons[3])
+        self.assertIn('重复', reasons[4])
+        self.assertIn('未找到', reasons[5])
+        self.assertIn('格式错误', reasons[6])
+        self.assertFalse(Order.objects.filter(status='completed').exists())
+
+
+class BulkOrderActionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='test')
+        category = Category.objects.create(name='食品')
+        cls.products = [
+            Product.objects.create(
+                name=f'商品{index}', category=category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+            )
+            for index in range(2)
+        ]
+        for product in cls.products:
+            ProductStock.objects.create(product=product, available_quantity=0, frozen_quantity=10)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.orders = []
+        for index in range(4):
+            order = Order.objects.create(
+                order_no=f'ORDBULK{index:04d}', user=self.admin, customer_name='测试',
+                total_amount=Decimal('24.00'), total_cost=Decimal('15.00'),
+            )
+            for product, quantity in zip(self.products, (2, 1)):
+                OrderItem.objects.create(
+                    order=order, product=product, quantity=quantity,
+                    unit_price=Decimal('8.00'), cost_price=Decimal('5.00'),
+                )
+            self.orders.append(order)
+        Order.objects.filter(pk=self.orders[3].pk).update(status='cancelled')
+
+    def post_action(self, action, **data):
+        return self.client.post('/admin/orders/order/', {
+            'action': action, '_selected_action': [order.pk for order in self.orders], **data,
+        })
+
+    def stock(self):
+        return [
+            tuple(ProductStock.objects.filter(product=product).values_list('available_quantity', 'frozen_quantity')[0])
+            for product in self.products
+        ]
+
+    def test_complete_consumes_frozen_stock_and_records_payments(self):
+        Payment.objects.create(
+            payment_no='PAYBULK1', order=self.orders[0], amount=Decimal('24.00'), payment_method='微信',
+            status='pending',
+        )
+        response = self.post_action('mark_as_completed', apply='1', payment_method='offline')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(Order.objects.filter(status='completed').values_list('payment_method', flat=True).distinct()),
+            ['offline'],
+        )
+        self.assertEqual(Order.objects.filter(status='completed').count(), 3)
+        self.assertEqual(self.stock(), [(0, 4), (0, 7)])
+        payments = Payment.objects.filter(status='success')
+        self.assertEqual(payments.count(), 3)
+        self.assertTrue(all(payment.operator_id == self.admin.pk for payment in payments))
+        self.assertEqual(set(payments.values_list('payment_method', flat=True)), {'线下支付'})
+        self.assertEqual(OutboxEvent.objects.filter(event_type='stock.consumed').count(), 2)
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_complete_asks_for_payment_method(self):
+        response = self.post_action('mark_as_completed')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/orders/order/complete_orders.html')
+        self.assertContains(response, 'name="payment_method"')
+        self.assertContains(response, 'ORDBULK0001')
+        self.assertEqual(self.post_action('mark_as_completed', apply='1').status_code, 200)  # 未选择支付方式
+        self.assertFalse(Order.objects.filter(status='completed').exists())
+        self.assertEqual(self.stock(), [(0, 10), (0, 10)])
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_complete_all_matching_orders_keeps_filter_instead_of_ids(self):
+        url = '/admin/orders/order/?status__exact=pending'
+        data = {'action': 'mark_as_completed', 'index': '0', 'select_across': '1', '_selected_action': [self.orders[0].pk]}
+        response = self.client.post(url, data)
+        self.assertContains(response, '选中的 3 个订单')
+        self.assertContains(response, 'name="_selected_action"', count=1)
+        self.assertContains(response, 'name="select_across" value="1"')
+        self.assertContains(response, f'action="{url}"')
+
+        response = self.client.post(url, {**data, 'apply': '1', 'payment_method': 'offline'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(Order.objects.filter(status='completed').count(), 3)
+
+    def test_bulk_actions_require_permission(self):
+        clerk = User.objects.create_user('clerk', password='test', is_staff=True)
+        clerk.user_permissions.add(Permission.objects.get(codename='view_order'))
+        request = RequestFactory().get('/admin/orders/order/')
+        request.user = clerk
+        self.assertNotIn('mark_as_cancelled', site._registry[Order].get_actions(request))
+
+        clerk.user_permissions.add(Permission.objects.get(codename='bulk_update_order'))
+        request.user = User.objects.get(pk=clerk.pk)  # 重新读取，清除权限缓存
+        self.assertIn('mark_as_cancelled', site._registry[Order].get_actions(request))
+        self.client.force_login(clerk)
+        self.post_action('mark_as_cancelled', index='0')
+        self.assertEqual(Order.objects.filter(status='cancelled').count(), 4)
+
+    def stale_versions(self):
+        """在并发支付之前读取的待支付订单版本号：pending_order_versions 第一次调用返回该快照，之后正常读取"""
+        snapshot = list(pending_order_versions([order.pk for order in self.orders], 2000))
+        calls = []
+
+        def versions(order_ids, batch_size):
+            calls.append(order_ids)
+            return iter(snapshot) if len(calls) == 1 else pending_order_versions(order_ids, batch_size)
+        return mock.patch('apps.orders.services.pending_order_versions', side_effect=versions)
+
+    def test_bulk_complete_retries_after_concurrent_payment(self):
+        conflict_stats.reset()
+        with self.stale_versions():
+            pay_order(self.orders[0].pk, self.admin, 'online')  # 读取之后、批量更新之前被用户支付
+            self.post_action('mark_as_completed', apply='1', payment_method='offline')
+        self.assertEqual(conflict_stats.snapshot()['order_bulk_complete'], {'attempts': 2, 'conflicts': 1})
+        self.assertEqual(
+            list(Order.objects.filter(status='completed').order_by('pk').values_list('payment_method', 'version')),
+            [('online', 1), ('offline', 1), ('offline', 1)],
+        )
+        self.assertEqual(self.stock(), [(0, 4), (0, 7)])  # 冻结库存只扣减一次
+        self.assertEqual(Payment.objects.filter(order=self.orders[0]).count(), 1)
+
+    def test_bulk_cancel_conflicts_with_concurrent_payment(self):
+        with self.stale_versions():
+            pay_order(self.orders[0].pk, self.admin, 'online')
+            with self.assertRaises(VersionConflict), transaction.atomic():
+                cancel_orders([order.pk for order in self.orders])
+        self.assertEqual(
+            list(Order.objects.order_by('pk').values_list('status', flat=True)),
+            ['completed', 'pending', 'pending', 'cancelled'],
+        )
+        self.assertEqual(self.stock(), [(0, 8), (0, 9)])
+
+    def test_cancel_releases_frozen_stock_once(self):
+        self.post_action('mark_as_cancelled')
+        self.post_action('mark_as_cancelled')
+        self.assertEqual(Order.objects.filter(status='cancelled').count(), 4)
+        self.assertEqual(self.stock(), [(6, 4), (3, 7)])
+
+
+class OptimisticOrderUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='test')
+        category = Category.objects.create(name='食品')
+        cls.product = Product.objects.create(
+            name='商品', category=category, cost_price=Decimal('5.00'), selling_price=Decimal('8.00'),
+        )
+        ProductStock.objects.create(product=cls.product, available_quantity=0, frozen_quantity=10)
+
+    def setUp(self):
+        conflict_stats.reset()
+        self.order = Order.objects.create(
+            order_no='ORDCAS0001', user=self.user, customer_name='测试',
+            total_amount=Decimal('16.00'), total_cost=Decimal('10.00'),
+        )
+        OrderItem.objects.create(
+            order=self.order, product=self.product, quantity=2,
+            unit_price=Decimal('8.00'), cost_price=Decimal('5.00'),
+        )
+
+    def stock(self):
+        return ProductStock.objects.filter(product=self.product).values_list(
+            'available_quantity', 'frozen_quantity', 'version'
+        ).get()
+
+    def test_stale_instance_conflicts(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        self.order.customer_remark = '先修改'
+        self.order.save()
+        self.assertEqual(self.order.version, 1)
+
+        with self.assertRaises(VersionConflict):
+            transition_order(stale, 'cancelled')
+        stale.status = 'cancelled'
+        with self.assertRaises(VersionConflict):
+            stale.save()
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.customer_remark), ('pending', '先修改'))
+        self.assertEqual(self.stock()[:2], (0, 10))
+
+    def test_pay_then_cancel(self):
+        order = pay_order(self.order.pk, self.user, 'wechat')
+        self.assertEqual((order.status, order.version), ('completed', 1))
+        self.assertEqual(self.stock(), (0, 8, 1))
+        self.assertEqual(Payment.objects.get(order=order).status, 'success')
+
+        self.assertIsNone(cancel_order(self.order.pk, self.user))
+        self.assertIsNone(pay_order(self.order.pk, self.user, 'wechat'))
+        self.assertEqual(self.stock(), (0, 8, 1))
+        self.assertEqual(conflict_stats.snapshot()['order_pay'], {'attempts': 2})
+
+    def test_retry_rereads_after_conflict(self):
+        calls = []
+
+        def attempt():
+            order = Order.objects.get(pk=self.order.pk)
+            if not calls:
+                Order.objects.filter(pk=order.pk).update(version=F('version') + 1)
+            calls.append(order.version)
+            with transaction.atomic():
+                transition_order(order, 'cancelled')
+            return order
+
+        order = run_with_retry('order_cancel', attempt)
+        self.assertEqual((calls, order.status, order.version), ([0, 1], 'cancelled', 2))
+        self.assertEqual(self.stock()[:2], (2, 8))
+        self.assertEqual(conflict_stats.snapshot()['order_cancel'], {'attempts': 2, 'conflicts': 1})
+
+
+class IdempotentFormTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='test')
+
+    def test_replays_full_page_response(self):
+        calls = []
+
+        @idempotent('test_page')
+        def view(request):
+            calls.append(request)
+            return HttpResponse('<p>已提交</p>', status=201, content_type='text/html; charset=utf-8')
+
+        responses = []
+        for _ in range(2):
+            request = RequestFactory().post('/submit/', {'idempotency_key': 'page-key', 'name': '门店'})
+            request.user = self.user
+            responses.append(view(request))
+        first, second = responses
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((second.status_code, second['Content-Type']), (201, 'text/html; charset=utf-8'))
+        self.assertEqual(second.content.decode(), '<p>已提交</p>')
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    def test_reused_form_key_redirects_with_message(self):
+        self.client.force_login(self.user)
+        self.client.post('/orders/create/', {'idempotency_key': 'form-key', 'customer_name': ''})
+        response = self.client.post(
+            '/orders/create/', {'idempotency_key': 'form-key', 'customer_name': '门店'},
+            HTTP_REFERER='http://testserver/cart/',
+        )
+        self.assertRedirects(response, 'http://testserver/cart/', fetch_redirect_response=False)
+        self.assertIn('该表单已提交过', [str(message) for message in get_messages(response.wsgi_request)][-1])
+
+        response = self.client.post(
+            '/orders/create/', {'idempotency_key': 'form-key', 'customer_name': '门店'},
+            HTTP_REFERER='https://example.com/',
+        )
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+
+    def test_reused_header_key_returns_json(self):
+        self.client.force_login(self.user)
+        self.client.post('/orders/create/', {'customer_name': ''}, HTTP_IDEMPOTENCY_KEY='header-key')
+        response = self.client.post('/orders/create/', {'customer_name': '门店'}, HTTP_IDEMPOTENCY_KEY='header-key')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json(), {'detail': '幂等键已用于其他请求'})
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
@@ -1,21 +1,28 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import Http404
 from django.views.decorators.http import require_POST
 from django.db import transaction
-from django.utils import timezone
 import uuid
 
-from .models import Order, OrderItem, PaymentConfig, Payment
+from .models import Order, OrderItem, PaymentConfig
 from apps.cart.models import CartItem
-from apps.products.models import ProductStock
-from apps.inventory.services import check_cart_items_stock, InsufficientStockError
+from apps.inventory.services import (
+    check_cart_items_stock, reserve_stock, sum_quantities, InsufficientStockError
+)
+from apps.archive.services import get_order_history, get_order
+from .services import cancel_order, generate_order_no, order_created_event, pay_order
+from apps.events.services import record_events
+from .idempotency import idempotent
+from warehouse_management.optimistic import VersionConflict
 
 
 # ==================== 前台视图 ====================
 
 @login_required(login_url='login')
 @require_POST
+@idempotent('order_create')
 def order_create(request):
     """创建订单"""
     item_ids = request.POST.getlist('item_ids')
@@ -46,48 +53,56 @@ def order_create(request):
         messages.error(request, str(e))
         return redirect('cart_list')
     
-    with transaction.atomic():
-        # 计算金额
-        total_amount = sum(item.subtotal for item in cart_items)
-        total_cost = sum(item.product.cost_price * item.quantity for item in cart_items)
-        
-        # 创建订单
-        order = Order.objects.create(
-            order_no=f'ORD{timezone.now().strftime("%Y%m%d%H%M%S")}{uuid.uuid4().hex[:6].upper()}',
-            user=request.user,
-            total_amount=total_amount,
-            total_cost=total_cost,
-            customer_name=customer_name,
-            customer_remark=customer_remark,
-            status='pending'
-        )
-        
-        # 创建订单项并冻结库存
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                unit_price=item.product.selling_price,
-                cost_price=item.product.cost_price
+    try:
+        with transaction.atomic():
+            # 计算金额
+            total_amount = sum(item.subtotal for item in cart_items)
+            total_cost = sum(item.product.cost_price * item.quantity for item in cart_items)
+            
+            # 创建订单
+            order = Order.objects.create(
+                order_no=generate_order_no(),
+                user=request.user,
+                total_amount=total_amount,
+                total_cost=total_cost,
+                customer_name=customer_name,
+                customer_remark=customer_remark,
+                status='pending'
             )
             
-            # 冻结库存（从可用库存转移到冻结库存）
-            stock = ProductStock.objects.select_for_update().get(product=item.product)
-            stock.available_quantity -= item.quantity
-            stock.frozen_quantity += item.quantity
-            stock.save()
-        
-        # 删除购物车项
-        cart_items.delete()
+            # 创建订单项
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=item.product,
+                    quantity=item.quantity,
+                    unit_price=item.product.selling_price,
+                    cost_price=item.product.cost_price
+                )
+                for item in cart_items
+            ])
+            
+            # 冻结库存（从可用库存转移到冻结库存），并发下单导致库存不足时整单回滚
+            quantities = sum_quantities((item.product_id, item.quantity) for item in cart_items)
+            reserve_stock(quantities)
+            record_events([order_created_event(order, quantities)])
+            
+            # 删除购物车项
+            cart_items.delete()
+    except InsufficientStockError as e:
+        messages.error(request, str(e))
+        return redirect('cart_list')
     
     return redirect('order_payment', pk=order.pk)
 
 
 @login_required(login_url='login')
 def order_list(request):
-    """订单列表"""
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    """订单列表（按创建时间倒序，游标分页）"""
+    try:
+        orders, next_cursor = get_order_history(request.user, request.GET.get('cursor') or None)
+    except ValueError:
+        raise Http404('页面不存在')
     
     # 获取购物车数量
     cart_count = 0
@@ -96,6 +111,8 @@ def order_list(request):
     
     context = {
         'orders': orders,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
         'cart_count': cart_count,
     }
     return render(request, 'frontend/orders/list.html', context)
@@ -104,10 +121,10 @@ def order_list(request):
 @login_required(login_url='login')
 def order_detail(request, pk):
     """订单详情"""
-    order = get_object_or_404(
-        Order.objects.prefetch_related('items__product'),
-        pk=pk, user=request.user
-    )
+    # 已归档的订单从归档库读取
+    order = get_order(request.user, pk)
+    if order is None:
+        raise Http404('订单不存在')
     
     # 获取购物车数量
     cart_count = 0
@@ -136,34 +153,25 @@ def order_payment(request, pk):
         'order': order,
         'payment_configs': payment_configs,
         'cart_count': cart_count,
+        'idempotency_key': uuid.uuid4().hex,  # 重复提交支付时只生效一次
     }
     return render(request, 'frontend/orders/payment.html', context)
 
 
 @login_required(login_url='login')
 @require_POST
+@idempotent('order_confirm_payment')
 def order_confirm_payment(request, pk):
     """确认支付完成"""
-    order = get_object_or_404(Order, pk=pk, user=request.user, status='pending')
     payment_method = request.POST.get('payment_method', 'offline')
-    
-    with transaction.atomic():
-        # 更新订单状态（库存由 signal 统一处理）
-        order.status = 'completed'
-        order.payment_method = payment_method
-        order.paid_at = timezone.now()
-        order.save()
-        
-        # 创建支付记录
-        Payment.objects.create(
-            payment_no=f'PAY{timezone.now().strftime("%Y%m%d%H%M%S")}{uuid.uuid4().hex[:6].upper()}',
-            order=order,
-            amount=order.total_amount,
-            payment_method='线下支付' if payment_method == 'offline' else '线上支付',
-            status='success',
-            operator=request.user,
-            paid_at=timezone.now()
-        )
+    try:
+        # 订单状态按版本号比较交换更新，冲突时重新读取重试；库存和支付记录在同一事务中处理
+        order = pay_order(pk, request.user, payment_method, operator=request.user)
+    except VersionConflict:
+        messages.error(request, '订单状态已变化，请刷新后重试')
+        return redirect('order_list')
+    if order is None:
+        raise Http404('订单不存在或已不是待支付状态')
     
     messages.success(request, '支付成功！')
     return redirect('order_detail', pk=order.pk)
@@ -173,12 +181,13 @@ def order_confirm_payment(request, pk):
 @require_POST
 def order_cancel(request, pk):
     """取消订单"""
-    order = get_object_or_404(Order, pk=pk, user=request.user, status='pending')
-    
-    with transaction.atomic():
-        # 更新订单状态（库存由 signal 统一处理）
-        order.status = 'cancelled'
-        order.save()
+    try:
+        order = cancel_order(pk, request.user)
+    except VersionConflict:
+        messages.error(request, '订单状态已变化，请刷新后重试')
+        return redirect('order_list')
+    if order is None:
+        raise Http404('订单不存在或已不是待支付状态')
     
     messages.success(request, '订单已取消')
     return redirect('order_list')
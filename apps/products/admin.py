@@ -3,7 +3,10 @@ from django.contrib import messages
 from django.utils.html import format_html
 from django.urls import path
 from django.shortcuts import render
+from django.db.models import Count
 from .models import Category, Product, ProductStock
+from .services import get_category_tree
+from warehouse_management.routers import ReplicaChangeListMixin
 
 
 # 自定义筛选器
@@ -50,9 +53,13 @@ class CategoryAdmin(admin.ModelAdmin):
     ordering = ['sort_order', 'id']
     list_per_page = 20
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('parent').annotate(_product_count=Count('products'))
+    
     def product_count(self, obj):
-        return obj.products.count()
+        return obj._product_count
     product_count.short_description = '商品数'
+    product_count.admin_order_field = '_product_count'
     
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """父分类只能选择顶级分类（限制二级）"""
@@ -68,32 +75,21 @@ class CategoryAdmin(admin.ModelAdmin):
         return custom_urls + urls
     
     def category_tree_view(self, request):
-        # 获取所有顶级分类
-        root_categories = Category.objects.filter(parent__isnull=True).order_by('sort_order')
-        
-        # 为每个分类添加商品数量和子分类（最多二级）
-        def get_category_with_children(category):
-            category.product_count = category.products.count()
-            category.children_list = []
-            for child in category.children.all().order_by('sort_order'):
-                child.product_count = child.products.count()
-                category.children_list.append(child)
-            return category
-        
-        categories = [get_category_with_children(cat) for cat in root_categories]
+        # 分类树（含商品数量，最多二级）由分类服务统一构建并缓存
+        tree = get_category_tree()
         
         context = {
             **self.admin_site.each_context(request),
             'title': '商品分类树',
-            'categories': categories,
-            'total_categories': Category.objects.count(),
-            'total_products': Product.objects.count(),
+            'categories': tree['roots'],
+            'total_categories': tree['total_categories'],
+            'total_products': tree['total_products'],
         }
         return render(request, 'admin/products/category_tree.html', context)
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['name', 'category', 'cost_price', 'selling_price', 'is_active', 'stock_display', 'image_preview', 'created_at']
     list_filter = ['category', 'is_active', HasImageFilter, 'created_at']
     search_fields = ['name', 'description', 'category__name']
@@ -137,6 +133,9 @@ class ProductAdmin(admin.ModelAdmin):
         ('价格信息', {
             'fields': ('cost_price', 'selling_price')
         }),
+        ('补货设置', {
+            'fields': ('reorder_point', 'safety_stock')
+        }),
         ('状态', {
             'fields': ('is_active', 'created_at', 'updated_at')
         }),
@@ -159,9 +158,9 @@ class ProductAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProductStock)
-class ProductStockAdmin(admin.ModelAdmin):
-    list_display = ['product', 'available_quantity', 'frozen_quantity', 'total_quantity_display', 'updated_at']
-    list_filter = ['updated_at']
+class ProductStockAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['product', 'available_quantity', 'frozen_quantity', 'total_quantity_display', 'alert_level', 'shard_count', 'updated_at']
+    list_filter = ['alert_level', 'updated_at']
     search_fields = ['product__name']
     ordering = ['-updated_at']
     list_per_page = 20
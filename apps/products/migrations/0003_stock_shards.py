@@ -0,0 +1,35 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_product_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productstock',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='0 表示不分片；大于 0 时库存记在分片行中，可用/冻结库存为分片合计（提交后刷新）', verbose_name='库存分片数'),
+        ),
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard_no', models.PositiveSmallIntegerField(verbose_name='分片号')),
+                ('available_quantity', models.IntegerField(default=0, verbose_name='可用库存')),
+                ('frozen_quantity', models.IntegerField(default=0, verbose_name='冻结库存')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='products.product', verbose_name='商品')),
+            ],
+            options={
+                'verbose_name': '库存分片',
+                'verbose_name_plural': '库存分片',
+                'db_table': 'product_stock_shards',
+                'constraints': [models.UniqueConstraint(fields=('product', 'shard_no'), name='uniq_stock_shard')],
+            },
+        ),
+    ]
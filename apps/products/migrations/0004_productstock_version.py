@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_stock_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productstock',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='每次库存变更加 1', verbose_name='版本号'),
+        ),
+    ]
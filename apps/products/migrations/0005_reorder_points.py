@@ -0,0 +1,42 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_productstock_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='reorder_point',
+            field=models.PositiveIntegerField(blank=True, help_text='分类下商品未设置补货点时使用，留空使用系统默认值', null=True, verbose_name='默认补货点'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='safety_stock',
+            field=models.PositiveIntegerField(blank=True, help_text='分类下商品未设置安全库存时使用，留空使用系统默认值', null=True, verbose_name='默认安全库存'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reorder_point',
+            field=models.PositiveIntegerField(blank=True, help_text='可用库存降到该值及以下时预警，留空使用分类默认值', null=True, verbose_name='补货点'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='safety_stock',
+            field=models.PositiveIntegerField(blank=True, help_text='可用库存降到该值及以下时紧急预警，留空使用分类默认值', null=True, verbose_name='安全库存'),
+        ),
+        migrations.AddField(
+            model_name='productstock',
+            name='alert_level',
+            field=models.PositiveSmallIntegerField(choices=[(0, '正常'), (1, '低于补货点'), (2, '低于安全库存')], default=0, help_text='库存变更时按补货点/安全库存重新计算', verbose_name='预警级别'),
+        ),
+        migrations.AddIndex(
+            model_name='productstock',
+            index=models.Index(condition=models.Q(('alert_level__gt', 0)), fields=['alert_level', 'available_quantity'], name='product_stock_alert_idx'),
+        ),
+    ]
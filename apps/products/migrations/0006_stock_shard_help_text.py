@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_reorder_points'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productstock',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='0 表示不分片；大于 0 时库存记在分片行中，可用/冻结库存为分片合计（延迟刷新）', verbose_name='库存分片数'),
+        ),
+    ]
@@ -12,6 +12,12 @@ class Category(models.Model):
         verbose_name='父分类'
     )
     sort_order = models.IntegerField('排序', default=0)
+    reorder_point = models.PositiveIntegerField(
+        '默认补货点', null=True, blank=True, help_text='分类下商品未设置补货点时使用，留空使用系统默认值'
+    )
+    safety_stock = models.PositiveIntegerField(
+        '默认安全库存', null=True, blank=True, help_text='分类下商品未设置安全库存时使用，留空使用系统默认值'
+    )
     is_active = models.BooleanField('是否启用', default=True)
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
 
@@ -44,6 +50,12 @@ class Product(models.Model):
     )
     cost_price = models.DecimalField('成本价', max_digits=10, decimal_places=2)
     selling_price = models.DecimalField('售价', max_digits=10, decimal_places=2)
+    reorder_point = models.PositiveIntegerField(
+        '补货点', null=True, blank=True, help_text='可用库存降到该值及以下时预警，留空使用分类默认值'
+    )
+    safety_stock = models.PositiveIntegerField(
+        '安全库存', null=True, blank=True, help_text='可用库存降到该值及以下时紧急预警，留空使用分类默认值'
+    )
     image = models.ImageField('商品图片', upload_to='products/', blank=True)
     description = RichTextUploadingField('商品描述', blank=True)
     is_active = models.BooleanField('是否上架', default=True)
@@ -65,18 +77,40 @@ class Product(models.Model):
 
 class ProductStock(models.Model):
     """商品库存"""
+    ALERT_LEVELS = [
+        (0, '正常'),
+        (1, '低于补货点'),
+        (2, '低于安全库存'),
+    ]
+
     product = models.OneToOneField(
         Product, on_delete=models.CASCADE,
         related_name='stock', verbose_name='商品'
     )
     available_quantity = models.IntegerField('可用库存', default=0, help_text='可以销售的库存数量')
     frozen_quantity = models.IntegerField('冻结库存', default=0, help_text='订单占用的库存数量')
+    shard_count = models.PositiveSmallIntegerField(
+        '库存分片数', default=0,
+        help_text='0 表示不分片；大于 0 时库存记在分片行中，可用/冻结库存为分片合计（延迟刷新）'
+    )
+    version = models.PositiveIntegerField('版本号', default=0, help_text='每次库存变更加 1')
+    alert_level = models.PositiveSmallIntegerField(
+        '预警级别', choices=ALERT_LEVELS, default=0, help_text='库存变更时按补货点/安全库存重新计算'
+    )
     updated_at = models.DateTimeField('更新时间', auto_now=True)
 
     class Meta:
         db_table = 'product_stocks'
         verbose_name = '商品库存'
         verbose_name_plural = '商品库存'
+        indexes = [
+            # 低库存列表只查询预警中的少数商品，部分索引不包含库存正常的行
+            models.Index(
+                fields=['alert_level', 'available_quantity'],
+                condition=models.Q(alert_level__gt=0),
+                name='product_stock_alert_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.product.name} - 可用:{self.available_quantity} 冻结:{self.frozen_quantity}'
@@ -85,3 +119,31 @@ class ProductStock(models.Model):
     def total_quantity(self):
         """总库存 = 可用库存 + 冻结库存"""
         return self.available_quantity + self.frozen_quantity
+
+
+class StockShard(models.Model):
+    """
+    库存分片
+
+    促销热门商品的库存拆分到多行，下单时随机选择一个分片冻结库存，
+    并发下单分散到不同的行锁上，不再全部排队等待同一行库存记录。
+    单个分片的冻结库存可能为负（释放/扣减不要求落在冻结时的分片上），只有合计有意义。
+    """
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE,
+        related_name='stock_shards', verbose_name='商品'
+    )
+    shard_no = models.PositiveSmallIntegerField('分片号')
+    available_quantity = models.IntegerField('可用库存', default=0)
+    frozen_quantity = models.IntegerField('冻结库存', default=0)
+
+    class Meta:
+        db_table = 'product_stock_shards'
+        verbose_name = '库存分片'
+        verbose_name_plural = '库存分片'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard_no'], name='uniq_stock_shard'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id}#{self.shard_no}'
@@ -0,0 +1,77 @@
+"""
+商品分类服务模块
+提供分类树的构建与缓存，供后台分类树、后台筛选器和前台商品列表共用
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Category, Product
+
+
+CATEGORY_TREE_CACHE_KEY = 'products:category_tree'
+
+
+def build_category_tree():
+    """
+    构建分类树（最多二级）
+
+    所有分类及其商品数通过一次分组查询加载，再在内存中组装成树。
+
+    Returns:
+        dict: {
+            'roots': 顶级分类列表（每个分类带 product_count 和 children_list）,
+            'descendants': {分类ID: [该分类及其子分类ID]},
+            'total_categories': 分类总数,
+            'total_products': 商品总数,
+        }
+    """
+    categories = list(
+        Category.objects.annotate(product_count=Count('products')).order_by('sort_order', 'id')
+    )
+
+    by_id = {category.id: category for category in categories}
+    roots = []
+    descendants = {}
+    for category in categories:
+        category.children_list = []
+        descendants[category.id] = [category.id]
+
+    for category in categories:
+        parent = by_id.get(category.parent_id)
+        if parent is None:
+            roots.append(category)
+        else:
+            parent.children_list.append(category)
+            descendants[parent.id].append(category.id)
+
+    return {
+        'roots': roots,
+        'descendants': descendants,
+        'total_categories': len(categories),
+        'total_products': Product.objects.count(),
+    }
+
+
+def get_category_tree():
+    """获取分类树（优先读取缓存）"""
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, settings.CATEGORY_TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def invalidate_category_tree():
+    """清除分类树缓存"""
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
+
+
+def get_category_descendant_ids(category_id):
+    """
+    获取分类及其子分类的ID列表
+
+    Returns:
+        list|None: 分类不存在时返回 None
+    """
+    return get_category_tree()['descendants'].get(category_id)
@@ -1,3 +1,56 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Category, Product
+from .services import CATEGORY_TREE_CACHE_KEY, get_category_descendant_ids, get_category_tree
+
+
+class CategoryTreeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.food = Category.objects.create(name='食品', sort_order=1)
+        cls.drinks = Category.objects.create(name='饮料', sort_order=2)
+        cls.snacks = Category.objects.create(name='零食', parent=cls.food)
+        Product.objects.create(
+            name='薯片', category=cls.snacks, cost_price=Decimal('2.00'), selling_price=Decimal('5.00'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_builds_tree_in_two_queries_then_reads_cache(self):
+        with self.assertNumQueries(2):  # 分类及商品数一次分组查询 + 商品总数
+            tree = get_category_tree()
+        self.assertEqual([category.name for category in tree['roots']], ['食品', '饮料'])
+        self.assertEqual([child.name for child in tree['roots'][0].children_list], ['零食'])
+        self.assertEqual(tree['roots'][0].children_list[0].product_count, 1)
+        self.assertEqual((tree['total_categories'], tree['total_products']), (3, 1))
+        self.assertEqual(sorted(get_category_descendant_ids(self.food.pk)), sorted([self.food.pk, self.snacks.pk]))
+        self.assertIsNone(get_category_descendant_ids(0))
+
+        with self.assertNumQueries(0):
+            get_category_tree()
+
+    def test_category_changes_invalidate_cache(self):
+        get_category_tree()
+        juice = Category.objects.create(name='果汁', parent=self.drinks)
+        self.assertIsNone(cache.get(CATEGORY_TREE_CACHE_KEY))
+        self.assertIn(juice.pk, get_category_descendant_ids(self.drinks.pk))
+
+        juice.delete()
+        self.assertIsNone(cache.get(CATEGORY_TREE_CACHE_KEY))
+        self.assertEqual(get_category_descendant_ids(self.drinks.pk), [self.drinks.pk])
+
+    def test_product_changes_invalidate_cache(self):
+        get_category_tree()
+        product = Product.objects.create(
+            name='饼干', category=self.snacks, cost_price=Decimal('3.00'), selling_price=Decimal('6.00'),
+        )
+        self.assertEqual(get_category_tree()['total_products'], 2)
+
+        product.delete()
+        self.assertEqual(get_category_tree()['roots'][0].children_list[0].product_count, 1)
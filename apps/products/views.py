@@ -1,8 +1,9 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.http import Http404
 
-from .models import Product, Category
+from .models import Product
+from .services import get_category_tree
 
 
 # ==================== 前台视图 ====================
@@ -14,19 +15,17 @@ def product_list(request):
         is_active=True,
         stock__available_quantity__gt=0  # 只显示有库存的商品
     ).select_related('category', 'stock')
-    categories = Category.objects.filter(is_active=True, parent__isnull=True).prefetch_related('children')
+    tree = get_category_tree()
+    categories = [category for category in tree['roots'] if category.is_active]
     
     # 分类筛选
     category_id = request.GET.get('category')
     if category_id:
-        # 包含子分类
-        category = get_object_or_404(Category, id=category_id)
-        if category.parent is None:
-            # 一级分类，包含其下所有子分类
-            child_ids = category.children.values_list('id', flat=True)
-            products = products.filter(Q(category_id=category_id) | Q(category_id__in=child_ids))
-        else:
-            products = products.filter(category_id=category_id)
+        # 一级分类包含其下所有子分类
+        category_ids = tree['descendants'].get(int(category_id)) if category_id.isdigit() else None
+        if category_ids is None:
+            raise Http404('分类不存在')
+        products = products.filter(category_id__in=category_ids)
     
     # 搜索
     search = request.GET.get('search', '').strip()
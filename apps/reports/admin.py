@@ -1,3 +1,37 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CustomerNameStat, CustomerStat
+from warehouse_management.routers import ReplicaChangeListMixin
+
+
+class CustomerStatAdminBase(ReplicaChangeListMixin, admin.ModelAdmin):
+    """客户分析列表：排序列都有索引，客户排行不需要扫描订单表"""
+    list_filter = ['segment', 'recency_score', 'frequency_score', 'monetary_score']
+    ordering = ['-total_amount']
+    list_per_page = 50
+
+    def rfm(self, obj):
+        return f'{obj.recency_score}{obj.frequency_score}{obj.monetary_score}' if obj.recency_score else '-'
+    rfm.short_description = 'RFM'
+
+    def has_add_permission(self, request):
+        # 汇总由订单完成时累加，评分由 score_customers 计算
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CustomerStat)
+class CustomerStatAdmin(CustomerStatAdminBase):
+    list_display = ['user', 'order_count', 'total_amount', 'profit', 'first_order_at', 'last_order_at', 'rfm', 'segment']
+    search_fields = ['user__username', 'user__phone']
+    list_select_related = ['user']
+
+
+@admin.register(CustomerNameStat)
+class CustomerNameStatAdmin(CustomerStatAdminBase):
+    list_display = [
+        'customer_name', 'order_count', 'total_amount', 'profit', 'first_order_at', 'last_order_at', 'rfm', 'segment',
+    ]
+    search_fields = ['customer_name']
@@ -0,0 +1,176 @@
+"""
+商品 ABC/XYZ 分类
+
+统计期为最近 CLASSIFICATION_HISTORY_WEEKS 周的有效订单（已取消订单除外，已归档的订单读取明细日汇总）：
+- ABC：各商品销售额从高到低排列，累计占比（不含自身）低于 CLASSIFICATION_ABC_SHARES[0] 的为 A 类，
+  低于 [1] 的为 B 类，其余及没有销售额的为 C 类
+- XYZ：各商品周销量的变异系数（标准差 / 均值），不超过 CLASSIFICATION_XYZ_CV[0] 的为 X 类，
+  不超过 [1] 的为 Y 类，其余及没有销量的为 Z 类
+
+销售额和周销量用分组 SQL 读取，变异系数和累计占比用 NumPy 整体计算。
+增量计算时只重新统计上次计算之后有新订单的商品，再用全部商品已保存的销售额重新划分 ABC
+（ABC 是相对排名，任何商品销售额变化都可能影响其他商品），只写入分类发生变化的行。
+增量计算不会处理统计期滚动移出的销量和订单取消，需要定期（如每天）执行一次全量计算。
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import batched
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+from .models import OrderItemRollup, ProductClassification
+from apps.inventory.forecasting import demand_matrix
+from apps.orders.models import OrderItem
+from apps.products.models import Product
+from warehouse_management.dbutils import update_rows
+
+
+# 增量计算的商品数不超过该值时，按商品 ID 过滤订单明细；超过时直接按时间范围全部读取
+RESTRICT_LIMIT = 5000
+QUERY_BATCH_SIZE = 5000
+
+
+def abc_classes(revenue):
+    """按销售额累计占比划分 ABC，返回与 revenue 对齐的分类数组"""
+    revenue = np.asarray(revenue, dtype=float)
+    classes = np.full(len(revenue), 'C')
+    total = revenue.sum()
+    if total <= 0:
+        return classes
+    order = np.argsort(-revenue, kind='stable')
+    ranked = revenue[order]
+    share_before = (np.cumsum(ranked) - ranked) / total
+    a_share, b_share = settings.CLASSIFICATION_ABC_SHARES
+    ranked_classes = np.where(share_before < a_share, 'A', np.where(share_before < b_share, 'B', 'C'))
+    ranked_classes[ranked <= 0] = 'C'
+    classes[order] = ranked_classes
+    return classes
+
+
+def xyz_classes(weekly):
+    """
+    按周销量变异系数划分 XYZ
+
+    Args:
+        weekly: (商品数, 周数) 周销量矩阵
+
+    Returns:
+        tuple: (变异系数数组，没有销量时为 nan；分类数组)
+    """
+    mean = weekly.mean(axis=1)
+    cv = np.divide(weekly.std(axis=1), mean, out=np.full(len(mean), np.nan), where=mean > 0)
+    x_cv, y_cv = settings.CLASSIFICATION_XYZ_CV
+    classes = np.select([cv <= x_cv, cv <= y_cv], ['X', 'Y'], 'Z')  # nan 的比较结果为 False
+    return cv, classes
+
+
+def product_revenue(product_ids, begin, end, restrict):
+    """统计期内各商品的销售额，数组按 product_ids 对齐"""
+    items = OrderItem.objects.filter(
+        order__created_at__gte=begin, order__created_at__lt=end,
+    ).exclude(order__status='cancelled')
+    if restrict:
+        items = items.filter(product_id__in=product_ids.tolist())
+    totals = dict(
+        items.values_list('product_id').annotate(revenue=Sum(F('quantity') * F('unit_price'))).order_by()
+    )
+    rollups = OrderItemRollup.objects.filter(
+        date__gte=timezone.localdate(begin), date__lt=timezone.localdate(end),
+    )
+    if restrict:
+        rollups = rollups.filter(product_id__in=product_ids.tolist())
+    for product_id, revenue in rollups.values_list('product_id').annotate(revenue=Sum('total_amount')).order_by():
+        totals[product_id] = (totals.get(product_id) or 0) + revenue
+    return np.array([float(totals.get(product_id) or 0) for product_id in product_ids.tolist()])
+
+
+def changed_products(since):
+    """since 之后创建的有效订单涉及的商品"""
+    return sorted(set(
+        OrderItem.objects.filter(order__created_at__gte=since).exclude(order__status='cancelled')
+        .values_list('product_id', flat=True).distinct()
+    ))
+
+
+def classify_products(full=False):
+    """
+    计算商品 ABC/XYZ 分类
+
+    Args:
+        full: 重新统计全部商品；没有计算过时总是全量计算
+
+    Returns:
+        dict: {'full', 'products' 重新统计的商品数, 'reclassified' ABC 分类变化的商品数}
+    """
+    now = timezone.now()
+    last_run = ProductClassification.objects.aggregate(last=Max('computed_at'))['last']
+    full = full or last_run is None
+    weeks = settings.CLASSIFICATION_HISTORY_WEEKS
+    start = timezone.localdate(now) - timedelta(days=weeks * 7 - 1)
+    begin = timezone.make_aware(datetime.combine(start, time.min))
+    end = begin + timedelta(days=weeks * 7)
+
+    if full:
+        product_ids = np.array(Product.objects.order_by('pk').values_list('pk', flat=True), dtype=np.int64)
+    else:
+        product_ids = np.array(changed_products(last_run), dtype=np.int64)
+    if not len(product_ids):
+        return {'full': full, 'products': 0, 'reclassified': 0}
+    restrict = not full and len(product_ids) <= RESTRICT_LIMIT
+
+    revenue = product_revenue(product_ids, begin, end, restrict)
+    daily = demand_matrix(product_ids, start, weeks * 7, restrict=restrict)
+    weekly = daily.reshape(len(product_ids), weeks, 7).sum(axis=2)
+    quantity = daily.sum(axis=1)
+    cv, xyz = xyz_classes(weekly)
+
+    with transaction.atomic():
+        existing = {}
+        if full:
+            existing = dict(ProductClassification.objects.values_list('product_id', 'pk'))
+        else:
+            for batch in batched(product_ids.tolist(), QUERY_BATCH_SIZE):
+                existing.update(
+                    ProductClassification.objects.filter(product_id__in=batch).values_list('product_id', 'pk')
+                )
+
+        updated, created = [], []
+        for product_id, amount, total, variation, xyz_class in zip(
+            product_ids.tolist(), revenue.tolist(), quantity.tolist(), cv.tolist(), xyz.tolist()
+        ):
+            values = (
+                Decimal(amount).quantize(Decimal('0.01')), int(total),
+                None if np.isnan(variation) else round(variation, 4), xyz_class, now,
+            )
+            if product_id in existing:
+                updated.append((existing[product_id], *values))
+            else:
+                created.append(ProductClassification(
+                    product_id=product_id, revenue=values[0], quantity=values[1], demand_cv=values[2],
+                    xyz_class=xyz_class, computed_at=now,
+                ))
+        update_rows(ProductClassification, ['revenue', 'quantity', 'demand_cv', 'xyz_class', 'computed_at'], updated)
+        ProductClassification.objects.bulk_create(created, batch_size=2000)
+
+        rows = list(ProductClassification.objects.values_list('pk', 'revenue', 'abc_class'))
+        reclassified = []
+        if rows:
+            pks, amounts, current = zip(*rows)
+            classes = abc_classes([float(amount) for amount in amounts])
+            reclassified = [(pk, new) for pk, old, new in zip(pks, current, classes.tolist()) if old != new]
+            update_rows(ProductClassification, ['abc_class'], reclassified)
+
+    return {'full': full, 'products': len(product_ids), 'reclassified': len(reclassified)}
+
+
+def classification_matrix():
+    """3 × 3 分类矩阵 {(abc, xyz): (商品数, 销售额)} 及最近计算时间"""
+    cells = ProductClassification.objects.values_list('abc_class', 'xyz_class').annotate(
+        count=Count('pk'), revenue=Sum('revenue')
+    ).order_by()
+    last_run = ProductClassification.objects.aggregate(last=Max('computed_at'))['last']
+    return {(abc, xyz): (count, revenue) for abc, xyz, count, revenue in cells}, last_run
@@ -0,0 +1,163 @@
+"""
+客户分析：RFM 评分与生命周期利润
+
+按下单用户（CustomerStat）和订单客户名称（CustomerNameStat）分别汇总已完成订单：
+- 订单完成时（支付、后台批量完成、订单状态保存）由 add_completed_orders 累加订单数、消费金额、成本和利润，
+  并更新首次/最近下单时间，与订单更新在同一事务中
+- R/F/M 评分是客户之间的相对排名，由 score_customers 批量计算：最近下单距今天数、订单数、消费金额
+  各自按在全部客户中的百分位划分 1-5 分（越近、越多、越高分数越大，相同的值得分相同），
+  再按评分划分客户分群，只写入评分或分群变化的行
+- 全量计算按已完成订单（含归档订单）分组 SQL 重新汇总后整体替换汇总表，
+  用于上线初始化和修复直接写库造成的偏差；最近下单距今天数每天都在变化，评分需要每天计算一次
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, DateTimeField, Max, Min, Sum, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import CustomerNameStat, CustomerStat
+from apps.archive.models import ArchivedOrder
+from apps.orders.models import Order
+from apps.users.models import User
+from warehouse_management.dbutils import update_rows, upsert_add
+
+
+# 汇总表及其客户键（订单上的字段名）
+CUSTOMER_KEYS = [(CustomerStat, 'user_id'), (CustomerNameStat, 'customer_name')]
+SCORE_FIELDS = ['recency_score', 'frequency_score', 'monetary_score', 'segment']
+
+
+def add_completed_orders(orders):
+    """把新完成的订单累加到客户汇总（需在完成订单的事务中调用）"""
+    totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0'), None, None])
+    for order in orders:
+        for model, key in CUSTOMER_KEYS:
+            total = totals[model, key, getattr(order, key)]
+            total[0] += 1
+            total[1] += order.total_amount
+            total[2] += order.total_cost
+            total[3] = min(total[3] or order.created_at, order.created_at)
+            total[4] = max(total[4] or order.created_at, order.created_at)
+
+    for (model, key, value), (count, amount, cost, first, last) in totals.items():
+        pk = upsert_add(
+            model,
+            keys={key: value},
+            increments={'order_count': count, 'total_amount': amount, 'total_cost': cost, 'profit': amount - cost},
+            defaults={
+                'first_order_at': first, 'last_order_at': last,
+                'recency_score': 0, 'frequency_score': 0, 'monetary_score': 0, 'segment': '',
+            },
+        )
+        model.objects.filter(pk=pk).update(
+            first_order_at=Least('first_order_at', Value(first, output_field=DateTimeField())),
+            last_order_at=Greatest('last_order_at', Value(last, output_field=DateTimeField())),
+        )
+
+
+def grouped_totals(queryset, key):
+    """已完成订单按客户键分组的 (键, 订单数, 消费金额, 成本, 首次下单时间, 最近下单时间)"""
+    return queryset.filter(status='completed').values_list(key).annotate(
+        orders=Count('id'), amount=Sum('total_amount'), cost=Sum('total_cost'),
+        first_at=Min('created_at'), last_at=Max('created_at'),
+    ).order_by()
+
+
+def rebuild_customer_stats():
+    """
+    按已完成订单（主库和归档库）重新汇总，在一个事务中整体替换两张汇总表（评分清零，随后重新计算）
+
+    Returns:
+        int: 汇总行数
+    """
+    user_ids = set(User.objects.values_list('pk', flat=True))  # 归档订单的用户可能已删除
+    rows = 0
+    with transaction.atomic():
+        for model, key in CUSTOMER_KEYS:
+            merged = {}
+            for queryset in (Order.objects.all(), ArchivedOrder.objects.all()):
+                for value, count, amount, cost, first, last in grouped_totals(queryset, key).iterator(chunk_size=5000):
+                    if key == 'user_id' and value not in user_ids:
+                        continue
+                    if value in merged:
+                        previous = merged[value]
+                        count, amount, cost = previous[0] + count, previous[1] + amount, previous[2] + cost
+                        first, last = min(previous[3], first), max(previous[4], last)
+                    merged[value] = (count, amount, cost, first, last)
+            model.objects.all().delete()
+            model.objects.bulk_create([
+                model(**{
+                    key: value, 'order_count': count, 'total_amount': amount, 'total_cost': cost,
+                    'profit': amount - cost, 'first_order_at': first, 'last_order_at': last,
+                })
+                for value, (count, amount, cost, first, last) in merged.items()
+            ], batch_size=2000)
+            rows += len(merged)
+    return rows
+
+
+def quintile_scores(values):
+    """按在全部值中的百分位划分 1-5 分，值越大分数越高，相同的值得分相同"""
+    values = np.asarray(values, dtype=float)
+    below = np.searchsorted(np.sort(values), values, side='left')
+    return below * 5 // max(len(values), 1) + 1
+
+
+def customer_segments(recency, frequency, monetary):
+    """按 R/F/M 评分划分客户分群，返回分群代码数组"""
+    value = (frequency + monetary) / 2
+    return np.select(
+        [
+            (recency >= 4) & (value >= 4),
+            (recency <= 2) & (value >= 4),
+            (recency >= 3) & (value >= 3),
+            (recency >= 4) & (frequency <= 2),
+            (recency <= 2) & (value <= 2),
+        ],
+        ['champion', 'at_risk', 'loyal', 'new', 'lost'],
+        'regular',
+    )
+
+
+def score_model(model, now):
+    """重新计算一张汇总表的评分和分群，返回 (客户数, 变化的行数)"""
+    rows = list(model.objects.values_list('pk', 'order_count', 'total_amount', 'last_order_at', *SCORE_FIELDS))
+    if not rows:
+        return 0, 0
+    _, counts, amounts, last_orders = list(zip(*rows))[:4]
+    days = np.array([(now - last).total_seconds() / 86400 for last in last_orders])
+    recency = quintile_scores(-days)
+    frequency = quintile_scores(counts)
+    monetary = quintile_scores([float(amount) for amount in amounts])
+    segments = customer_segments(recency, frequency, monetary)
+
+    changed = []
+    for row, scores in zip(rows, zip(recency.tolist(), frequency.tolist(), monetary.tolist(), segments.tolist())):
+        if tuple(row[4:]) != scores:
+            changed.append((row[0], *scores))
+    update_rows(model, SCORE_FIELDS, changed)
+    return len(rows), len(changed)
+
+
+def score_customers(full=False):
+    """
+    计算客户 RFM 评分和分群
+
+    Args:
+        full: 先按已完成订单重新汇总；从未汇总过时总是全量计算
+
+    Returns:
+        dict: {'full', 'users' 用户数, 'names' 客户名称数, 'rescored' 评分或分群变化的行数}
+    """
+    full = full or not (CustomerStat.objects.exists() or CustomerNameStat.objects.exists())
+    if full:
+        rebuild_customer_stats()
+    now = timezone.now()
+    with transaction.atomic():
+        users, users_changed = score_model(CustomerStat, now)
+        names, names_changed = score_model(CustomerNameStat, now)
+    return {'full': full, 'users': users, 'names': names, 'rescored': users_changed + names_changed}
@@ -0,0 +1,143 @@
+"""
+报表实时更新
+
+打开的报表页面通过 Server-Sent Events（live_updates_api）接收增量，不再反复刷新、重跑全部查询。
+每个进程一个 dashboard_bus（apps.events.bus.EventBus）读取发件箱中的订单、支付和入库事件，
+每批事件由 dashboard_delta 计算一次报表增量并编码为 SSE 消息，分发给本进程全部连接，
+页面把增量累加到已加载的卡片和图表上：
+- orders：各状态订单数的变化（按订单创建日期），订单创建时新状态 +1，状态变化时原状态 -1、新状态 +1
+- completed：新完成订单的销售额、成本和订单数（按订单创建日期、支付方式），与销售/利润趋势的口径一致
+- stock_ins：新入库记录的数量、成本和记录数（按入库日期），未填写单位成本时按商品成本价
+- stock_alerts：库存预警产生或解除的次数，页面据此增量读取预警流
+支付成功后订单随之完成，支付事件通过订单完成体现在增量中。
+"""
+import asyncio
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .timeseries import to_local_date
+from apps.events.bus import EventBus
+from apps.orders.models import Order
+from apps.products.models import Product
+
+
+def format_sse(event, data, event_id=None):
+    """编码一条 SSE 消息"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def dashboard_delta(events):
+    """
+    一批事件对报表的增量，没有影响报表的事件时返回 None
+
+    Returns:
+        dict: {'today', 'orders': [{'date', 'status', 'name', 'count'}],
+               'completed': [{'date', 'payment_method', 'name', 'sales', 'cost', 'count'}],
+               'stock_ins': [{'date', 'quantity', 'cost', 'count'}], 'stock_alerts'}
+    """
+    order_ids = {int(event.key) for event in events if event.topic == 'order'}
+    orders = {
+        pk: values
+        for pk, *values in Order.objects.filter(pk__in=order_ids).values_list(
+            'pk', 'created_date', 'payment_method', 'total_amount', 'total_cost'
+        )
+    }
+    stock_in_products = {
+        event.payload['product_id'] for event in events
+        if event.event_type == 'stock_in.created' and event.payload.get('unit_cost') is None
+    }
+    cost_prices = dict(Product.objects.filter(pk__in=stock_in_products).values_list('pk', 'cost_price'))
+
+    statuses = defaultdict(int)
+    completed = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0])
+    stock_ins = defaultdict(lambda: [0, Decimal('0'), 0])
+    stock_alerts = 0
+    for event in events:
+        payload = event.payload
+        if event.topic == 'order' and int(event.key) in orders:
+            created_date, method, amount, cost = orders[int(event.key)]
+            if event.event_type == 'order.created':
+                changes = [(payload['status'], 1)]
+            elif event.event_type == 'order.status_changed':
+                changes = [(payload['from'], -1), (payload['to'], 1)]
+            else:
+                continue
+            for status, sign in changes:
+                statuses[created_date, status] += sign
+                if status == 'completed':
+                    total = completed[created_date, method]
+                    total[0] += sign * amount
+                    total[1] += sign * cost
+                    total[2] += sign
+        elif event.event_type == 'stock_in.created':
+            unit_cost = payload.get('unit_cost')
+            unit_cost = Decimal(unit_cost) if unit_cost is not None else cost_prices.get(payload['product_id'], 0)
+            total = stock_ins[to_local_date(event.created_at)]
+            total[0] += payload['quantity']
+            total[1] += payload['quantity'] * unit_cost
+            total[2] += 1
+        elif event.event_type.startswith('stock.alert_'):
+            stock_alerts += 1
+
+    status_names = dict(Order.ORDER_STATUS)
+    method_names = dict(Order.PAYMENT_METHODS)
+    delta = {
+        'orders': [
+            {'date': day, 'status': status, 'name': status_names.get(status, status), 'count': count}
+            for (day, status), count in statuses.items() if count
+        ],
+        'completed': [
+            {
+                'date': day, 'payment_method': method, 'name': method_names.get(method, method or '未知'),
+                'sales': float(sales), 'cost': float(cost), 'count': count,
+            }
+            for (day, method), (sales, cost, count) in completed.items() if count
+        ],
+        'stock_ins': [
+            {'date': day, 'quantity': quantity, 'cost': float(cost), 'count': count}
+            for day, (quantity, cost, count) in stock_ins.items()
+        ],
+        'stock_alerts': stock_alerts,
+    }
+    if not any(delta.values()):
+        return None
+    return {'today': timezone.localdate(), **delta}
+
+
+def build_message(events):
+    delta = dashboard_delta(events)
+    return None if delta is None else format_sse('delta', delta, events[-1].pk)
+
+
+dashboard_bus = EventBus(build_message)
+
+
+async def dashboard_stream():
+    """
+    一个报表页面连接的 SSE 消息流
+
+    连接后先发送 ready（客户端断线重连后收到 ready 时重新加载完整数据），之后推送 dashboard_bus 的增量；
+    没有变更时每 LIVE_HEARTBEAT_SECONDS 秒发送一行注释作为心跳。
+    """
+    queue = dashboard_bus.subscribe()
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MILLISECONDS}\n' + format_sse('ready', {'today': timezone.localdate()})
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), settings.LIVE_HEARTBEAT_SECONDS)
+            except TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        dashboard_bus.unsubscribe(queue)
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouse_management.database import refresh_sqlite_replica
+from warehouse_management.routers import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = '从主库刷新报表只读副本（SQLite 在线备份），可按间隔持续运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0, help='刷新间隔（秒），0 表示只刷新一次')
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            raise CommandError('未配置只读副本，请设置环境变量 SQLITE_REPLICA_NAME')
+        source = settings.DATABASES['default']
+        target = settings.DATABASES[REPLICA_ALIAS]
+        if source['ENGINE'] != 'django.db.backends.sqlite3' or target['ENGINE'] != source['ENGINE']:
+            raise CommandError('refresh_replica 仅支持 SQLite 主库和副本')
+
+        while True:
+            start = time.perf_counter()
+            refresh_sqlite_replica(str(source['NAME']), str(target['NAME']))
+            self.stdout.write(f'副本已刷新，耗时 {time.perf_counter() - start:.2f} 秒')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
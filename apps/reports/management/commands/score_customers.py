@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reports.customers import score_customers
+
+
+class Command(BaseCommand):
+    help = '计算客户 RFM 评分和分群（建议每天执行一次），--full 先按已完成订单重新汇总客户消费'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='按已完成订单（含归档订单）重新汇总后再评分')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = score_customers(full=options['full'])
+        self.stdout.write(
+            f'{"全量" if result["full"] else "增量"}计算：用户 {result["users"]} 个，客户名称 {result["names"]} 个，'
+            f'评分或分群变化 {result["rescored"]} 个，用时 {time.monotonic() - started:.1f} 秒'
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reports.valuation import snapshot_inventory
+
+
+class Command(BaseCommand):
+    help = '生成当天的库存价值快照（建议每天夜间执行一次），当天已有快照时替换'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        snapshot = snapshot_inventory()
+        self.stdout.write(
+            f'{snapshot.date} 库存快照：{snapshot.product_count} 个商品，库存 {snapshot.total_quantity}，'
+            f'价值 ¥{snapshot.total_value}，用时 {time.monotonic() - started:.1f} 秒'
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('status', models.CharField(max_length=20, verbose_name='订单状态')),
+                ('payment_method', models.CharField(blank=True, help_text='未支付订单为空', max_length=20, verbose_name='支付方式')),
+                ('order_count', models.IntegerField(default=0, verbose_name='订单数')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='订单金额')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='总成本')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '订单日汇总',
+                'verbose_name_plural': '订单日汇总',
+                'db_table': 'order_rollups',
+                'constraints': [models.UniqueConstraint(fields=('date', 'status', 'payment_method'), name='uniq_order_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_reorder_points'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductClassification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='销售额')),
+                ('quantity', models.IntegerField(default=0, verbose_name='销量')),
+                ('demand_cv', models.FloatField(blank=True, help_text='没有销量时为空', null=True, verbose_name='周销量变异系数')),
+                ('abc_class', models.CharField(choices=[('A', 'A 类（高销售额）'), ('B', 'B 类'), ('C', 'C 类（低销售额）')], default='C', max_length=1, verbose_name='ABC 分类')),
+                ('xyz_class', models.CharField(choices=[('X', 'X 类（需求稳定）'), ('Y', 'Y 类'), ('Z', 'Z 类（需求波动大）')], default='Z', max_length=1, verbose_name='XYZ 分类')),
+                ('computed_at', models.DateTimeField(verbose_name='计算时间')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='classification', to='products.product', verbose_name='商品')),
+            ],
+            options={
+                'verbose_name': '商品 ABC/XYZ 分类',
+                'verbose_name_plural': '商品 ABC/XYZ 分类',
+                'db_table': 'product_classifications',
+                'indexes': [models.Index(fields=['abc_class', 'xyz_class', '-revenue'], name='product_cla_abc_cla_448107_idx'), models.Index(fields=['-computed_at'], name='product_cla_compute_92ed39_idx')],
+            },
+        ),
+    ]
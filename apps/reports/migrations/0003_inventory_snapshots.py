@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_reorder_points'),
+        ('reports', '0002_product_classification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='日期')),
+                ('taken_at', models.DateTimeField(help_text='下次快照从该时间起读取新的入库记录', verbose_name='生成时间')),
+                ('product_count', models.IntegerField(default=0, verbose_name='商品数')),
+                ('total_quantity', models.BigIntegerField(default=0, verbose_name='库存总数')),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='库存价值')),
+            ],
+            options={
+                'verbose_name': '库存快照',
+                'verbose_name_plural': '库存快照',
+                'db_table': 'inventory_snapshots',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshotItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(verbose_name='库存数量')),
+                ('unit_cost', models.DecimalField(decimal_places=4, help_text='移动加权平均入库成本', max_digits=12, verbose_name='单位成本')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='库存价值')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product', verbose_name='商品')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='reports.inventorysnapshot', verbose_name='快照')),
+            ],
+            options={
+                'verbose_name': '库存快照明细',
+                'verbose_name_plural': '库存快照明细',
+                'db_table': 'inventory_snapshot_items',
+                'constraints': [models.UniqueConstraint(fields=('snapshot', 'product'), name='uniq_inventory_snapshot_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_inventory_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerNameStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_count', models.IntegerField(default=0, verbose_name='订单数')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='消费金额')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='总成本')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, help_text='客户生命周期利润', max_digits=14, verbose_name='累计利润')),
+                ('first_order_at', models.DateTimeField(verbose_name='首次下单时间')),
+                ('last_order_at', models.DateTimeField(verbose_name='最近下单时间')),
+                ('recency_score', models.PositiveSmallIntegerField(default=0, help_text='1-5，0 表示尚未评分', verbose_name='R 评分')),
+                ('frequency_score', models.PositiveSmallIntegerField(default=0, verbose_name='F 评分')),
+                ('monetary_score', models.PositiveSmallIntegerField(default=0, verbose_name='M 评分')),
+                ('segment', models.CharField(blank=True, choices=[('champion', '重要价值客户'), ('loyal', '忠诚客户'), ('new', '新客户'), ('at_risk', '重要挽留客户'), ('lost', '流失客户'), ('regular', '一般客户')], max_length=20, verbose_name='客户分群')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('customer_name', models.CharField(max_length=100, unique=True, verbose_name='客户名称')),
+            ],
+            options={
+                'verbose_name': '客户分析（客户名称）',
+                'verbose_name_plural': '客户分析（客户名称）',
+                'db_table': 'customer_name_stats',
+                'indexes': [models.Index(fields=['-total_amount'], name='customer_name_stat_amount_idx'), models.Index(fields=['-profit'], name='customer_name_stat_profit_idx'), models.Index(fields=['-order_count'], name='customer_name_stat_orders_idx'), models.Index(fields=['-last_order_at'], name='customer_name_stat_recent_idx'), models.Index(fields=['segment', '-total_amount'], name='customer_name_stat_segment_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_count', models.IntegerField(default=0, verbose_name='订单数')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='消费金额')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='总成本')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, help_text='客户生命周期利润', max_digits=14, verbose_name='累计利润')),
+                ('first_order_at', models.DateTimeField(verbose_name='首次下单时间')),
+                ('last_order_at', models.DateTimeField(verbose_name='最近下单时间')),
+                ('recency_score', models.PositiveSmallIntegerField(default=0, help_text='1-5，0 表示尚未评分', verbose_name='R 评分')),
+                ('frequency_score', models.PositiveSmallIntegerField(default=0, verbose_name='F 评分')),
+                ('monetary_score', models.PositiveSmallIntegerField(default=0, verbose_name='M 评分')),
+                ('segment', models.CharField(blank=True, choices=[('champion', '重要价值客户'), ('loyal', '忠诚客户'), ('new', '新客户'), ('at_risk', '重要挽留客户'), ('lost', '流失客户'), ('regular', '一般客户')], max_length=20, verbose_name='客户分群')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='customer_stat', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '客户分析（用户）',
+                'verbose_name_plural': '客户分析（用户）',
+                'db_table': 'customer_stats',
+                'indexes': [models.Index(fields=['-total_amount'], name='customer_stat_amount_idx'), models.Index(fields=['-profit'], name='customer_stat_profit_idx'), models.Index(fields=['-order_count'], name='customer_stat_orders_idx'), models.Index(fields=['-last_order_at'], name='customer_stat_recent_idx'), models.Index(fields=['segment', '-total_amount'], name='customer_stat_segment_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-19 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_customer_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItemRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('product_id', models.BigIntegerField(verbose_name='商品ID')),
+                ('quantity', models.IntegerField(default=0, verbose_name='销量')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='销售额')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='成本')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '订单明细日汇总',
+                'verbose_name_plural': '订单明细日汇总',
+                'db_table': 'order_item_rollups',
+                'constraints': [models.UniqueConstraint(fields=('date', 'product_id'), name='uniq_order_item_rollup')],
+            },
+        ),
+    ]
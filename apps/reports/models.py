@@ -1,3 +1,224 @@
 from django.db import models
 
-# Create your models here.
+
+class OrderRollup(models.Model):
+    """
+    已归档订单的按日汇总
+
+    订单归档移出主库时按 (本地日期, 状态, 支付方式) 累加到该表，
+    报表查询合并主库订单和该表，归档后统计结果保持不变。
+    """
+    date = models.DateField('日期')
+    status = models.CharField('订单状态', max_length=20)
+    payment_method = models.CharField('支付方式', max_length=20, blank=True, help_text='未支付订单为空')
+    order_count = models.IntegerField('订单数', default=0)
+    total_amount = models.DecimalField('订单金额', max_digits=14, decimal_places=2, default=0)
+    total_cost = models.DecimalField('总成本', max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'order_rollups'
+        verbose_name = '订单日汇总'
+        verbose_name_plural = '订单日汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status', 'payment_method'], name='uniq_order_rollup'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.status} {self.payment_method}'
+
+
+class OrderItemRollup(models.Model):
+    """
+    已归档的已完成订单明细按 (本地日期, 商品) 的汇总
+
+    订单归档时与 OrderRollup 一起累加（已取消订单的明细不计入），
+    需求预测和 ABC/XYZ 分类读取订单明细时合并该表，统计期覆盖已归档的日期时结果不变。
+    商品可能已删除，只保存商品 ID。
+    """
+    date = models.DateField('日期')
+    product_id = models.BigIntegerField('商品ID')
+    quantity = models.IntegerField('销量', default=0)
+    total_amount = models.DecimalField('销售额', max_digits=14, decimal_places=2, default=0)
+    total_cost = models.DecimalField('成本', max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'order_item_rollups'
+        verbose_name = '订单明细日汇总'
+        verbose_name_plural = '订单明细日汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product_id'], name='uniq_order_item_rollup'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.product_id}'
+
+
+class ProductClassification(models.Model):
+    """
+    商品 ABC/XYZ 分类
+
+    ABC 按统计期内销售额从高到低累计占比划分，XYZ 按周销量变异系数划分，
+    由 classify_products 命令或后台任务计算，见 apps/reports/classification.py。
+    """
+    ABC_CLASSES = [
+        ('A', 'A 类（高销售额）'),
+        ('B', 'B 类'),
+        ('C', 'C 类（低销售额）'),
+    ]
+    XYZ_CLASSES = [
+        ('X', 'X 类（需求稳定）'),
+        ('Y', 'Y 类'),
+        ('Z', 'Z 类（需求波动大）'),
+    ]
+
+    product = models.OneToOneField(
+        'products.Product', on_delete=models.CASCADE,
+        related_name='classification', verbose_name='商品'
+    )
+    revenue = models.DecimalField('销售额', max_digits=14, decimal_places=2, default=0)
+    quantity = models.IntegerField('销量', default=0)
+    demand_cv = models.FloatField('周销量变异系数', null=True, blank=True, help_text='没有销量时为空')
+    abc_class = models.CharField('ABC 分类', max_length=1, choices=ABC_CLASSES, default='C')
+    xyz_class = models.CharField('XYZ 分类', max_length=1, choices=XYZ_CLASSES, default='Z')
+    computed_at = models.DateTimeField('计算时间')
+
+    class Meta:
+        db_table = 'product_classifications'
+        verbose_name = '商品 ABC/XYZ 分类'
+        verbose_name_plural = '商品 ABC/XYZ 分类'
+        indexes = [
+            models.Index(fields=['abc_class', 'xyz_class', '-revenue']),
+            models.Index(fields=['-computed_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} {self.abc_class}{self.xyz_class}'
+
+
+class InventorySnapshot(models.Model):
+    """
+    库存快照（每日一条）
+
+    由 snapshot_inventory 命令或后台任务每天生成，记录生成时各商品的库存数量和按入库成本计算的库存价值，
+    明细见 InventorySnapshotItem。同一天重复生成时替换当天的快照。
+    """
+    date = models.DateField('日期', unique=True)
+    taken_at = models.DateTimeField('生成时间', help_text='下次快照从该时间起读取新的入库记录')
+    product_count = models.IntegerField('商品数', default=0)
+    total_quantity = models.BigIntegerField('库存总数', default=0)
+    total_value = models.DecimalField('库存价值', max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'inventory_snapshots'
+        verbose_name = '库存快照'
+        verbose_name_plural = '库存快照'
+
+    def __str__(self):
+        return f'{self.date} ¥{self.total_value}'
+
+
+class InventorySnapshotItem(models.Model):
+    """库存快照明细，只记录库存数量大于 0 的商品"""
+    snapshot = models.ForeignKey(
+        InventorySnapshot, on_delete=models.CASCADE,
+        related_name='items', verbose_name='快照'
+    )
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE,
+        related_name='+', verbose_name='商品'
+    )
+    quantity = models.IntegerField('库存数量')
+    unit_cost = models.DecimalField('单位成本', max_digits=12, decimal_places=4, help_text='移动加权平均入库成本')
+    value = models.DecimalField('库存价值', max_digits=14, decimal_places=2)
+
+    class Meta:
+        db_table = 'inventory_snapshot_items'
+        verbose_name = '库存快照明细'
+        verbose_name_plural = '库存快照明细'
+        constraints = [
+            models.UniqueConstraint(fields=['snapshot', 'product'], name='uniq_inventory_snapshot_item'),
+        ]
+
+    def __str__(self):
+        return f'{self.snapshot_id} {self.product_id}'
+
+
+class CustomerStatBase(models.Model):
+    """
+    客户消费汇总（已完成订单）
+
+    订单完成时累加订单数、消费金额和成本，RFM 评分和客户分群由 score_customers 命令或后台任务计算，
+    见 apps/reports/customers.py。
+    """
+    SEGMENTS = [
+        ('champion', '重要价值客户'),
+        ('loyal', '忠诚客户'),
+        ('new', '新客户'),
+        ('at_risk', '重要挽留客户'),
+        ('lost', '流失客户'),
+        ('regular', '一般客户'),
+    ]
+
+    order_count = models.IntegerField('订单数', default=0)
+    total_amount = models.DecimalField('消费金额', max_digits=14, decimal_places=2, default=0)
+    total_cost = models.DecimalField('总成本', max_digits=14, decimal_places=2, default=0)
+    profit = models.DecimalField('累计利润', max_digits=14, decimal_places=2, default=0, help_text='客户生命周期利润')
+    first_order_at = models.DateTimeField('首次下单时间')
+    last_order_at = models.DateTimeField('最近下单时间')
+    recency_score = models.PositiveSmallIntegerField('R 评分', default=0, help_text='1-5，0 表示尚未评分')
+    frequency_score = models.PositiveSmallIntegerField('F 评分', default=0)
+    monetary_score = models.PositiveSmallIntegerField('M 评分', default=0)
+    segment = models.CharField('客户分群', max_length=20, choices=SEGMENTS, blank=True)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_order_amount(self):
+        """客单价"""
+        return self.total_amount / self.order_count if self.order_count else None
+
+
+def customer_stat_indexes(prefix):
+    """客户排行按这些列排序和筛选"""
+    return [
+        models.Index(fields=['-total_amount'], name=f'{prefix}_amount_idx'),
+        models.Index(fields=['-profit'], name=f'{prefix}_profit_idx'),
+        models.Index(fields=['-order_count'], name=f'{prefix}_orders_idx'),
+        models.Index(fields=['-last_order_at'], name=f'{prefix}_recent_idx'),
+        models.Index(fields=['segment', '-total_amount'], name=f'{prefix}_segment_idx'),
+    ]
+
+
+class CustomerStat(CustomerStatBase):
+    """按下单用户汇总"""
+    user = models.OneToOneField(
+        'users.User', on_delete=models.CASCADE,
+        related_name='customer_stat', verbose_name='用户'
+    )
+
+    class Meta:
+        db_table = 'customer_stats'
+        verbose_name = '客户分析（用户）'
+        verbose_name_plural = '客户分析（用户）'
+        indexes = customer_stat_indexes('customer_stat')
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class CustomerNameStat(CustomerStatBase):
+    """按订单客户名称汇总（后台代客下单时同一用户可能对应多个客户）"""
+    customer_name = models.CharField('客户名称', max_length=100, unique=True)
+
+    class Meta:
+        db_table = 'customer_name_stats'
+        verbose_name = '客户分析（客户名称）'
+        verbose_name_plural = '客户分析（客户名称）'
+        indexes = customer_stat_indexes('customer_name_stat')
+
+    def __str__(self):
+        return self.customer_name
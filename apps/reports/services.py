@@ -0,0 +1,100 @@
+"""
+报表服务模块
+合并主库订单和已归档订单的日汇总（OrderRollup），归档前后报表结果一致
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Sum
+
+from apps.orders.models import Order
+from .models import OrderRollup
+
+
+def rollups_between(start_date=None, end_date=None, **filters):
+    """订单日汇总查询集，start_date/end_date 为本地日期（含）"""
+    queryset = OrderRollup.objects.filter(**filters)
+    if start_date is not None:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date is not None:
+        queryset = queryset.filter(date__lte=end_date)
+    return queryset
+
+
+def completed_order_trend(start_date, end_date):
+    """
+    已完成订单（含已归档订单的日汇总）按本地日期的销售额、成本和订单数，start_date/end_date 为本地日期（含）
+
+    按 orders.created_date 分组，由 (status, created_date) 索引过滤；同一天可能有主库和归档汇总两行，
+    由 timeseries.fill_series 累加到周期。
+
+    Returns:
+        list: [{'date': date, 'total_sales', 'total_cost', 'order_count'}]
+    """
+    orders = Order.objects.filter(
+        status='completed', created_date__gte=start_date, created_date__lte=end_date,
+    ).values_list('created_date').annotate(
+        sales=Sum('total_amount'), cost=Sum('total_cost'), count=Count('id'),
+    ).order_by()
+    rollups = rollups_between(start_date, end_date, status='completed').values_list('date').annotate(
+        sales=Sum('total_amount'), cost=Sum('total_cost'), count=Sum('order_count'),
+    ).order_by()
+    return [
+        {'date': day, 'total_sales': sales, 'total_cost': cost, 'order_count': count}
+        for queryset in (orders, rollups)
+        for day, sales, cost, count in queryset
+    ]
+
+
+def order_totals(start_date=None, end_date=None, status='completed'):
+    """
+    订单金额、成本、数量合计，start_date/end_date 为本地日期（含），None 表示不限
+
+    Returns:
+        dict: {'sales', 'cost', 'count'}
+    """
+    orders = Order.objects.filter(status=status)
+    if start_date is not None:
+        orders = orders.filter(created_date__gte=start_date)
+    if end_date is not None:
+        orders = orders.filter(created_date__lte=end_date)
+    hot = orders.aggregate(sales=Sum('total_amount'), cost=Sum('total_cost'), count=Count('id'))
+    archived = rollups_between(start_date, end_date, status=status).aggregate(
+        sales=Sum('total_amount'), cost=Sum('total_cost'), count=Sum('order_count')
+    )
+    return {key: (hot[key] or 0) + (archived[key] or 0) for key in ('sales', 'cost', 'count')}
+
+
+def order_status_counts(start_date=None, end_date=None):
+    """各状态订单数 {status: count}"""
+    orders = Order.objects.all()
+    if start_date is not None:
+        orders = orders.filter(created_date__gte=start_date)
+    if end_date is not None:
+        orders = orders.filter(created_date__lte=end_date)
+    counts = defaultdict(int)
+    for item in orders.values('status').annotate(count=Count('id')).order_by():
+        counts[item['status']] += item['count']
+    rollups = rollups_between(start_date, end_date).values('status').annotate(count=Sum('order_count'))
+    for item in rollups.order_by():
+        counts[item['status']] += item['count']
+    return dict(sorted(counts.items()))
+
+
+def payment_method_totals(start_date=None, end_date=None):
+    """已完成订单按支付方式的订单数和金额 {payment_method: {'count', 'total'}}"""
+    orders = Order.objects.filter(status='completed', payment_method__isnull=False)
+    if start_date is not None:
+        orders = orders.filter(created_date__gte=start_date)
+    if end_date is not None:
+        orders = orders.filter(created_date__lte=end_date)
+    totals = defaultdict(lambda: {'count': 0, 'total': 0})
+    for item in orders.values('payment_method').annotate(count=Count('id'), total=Sum('total_amount')).order_by():
+        totals[item['payment_method']]['count'] += item['count']
+        totals[item['payment_method']]['total'] += item['total'] or 0
+    rollups = rollups_between(start_date, end_date, status='completed').exclude(payment_method='')
+    for item in rollups.values('payment_method').annotate(
+        count=Sum('order_count'), total=Sum('total_amount')
+    ).order_by():
+        totals[item['payment_method']]['count'] += item['count']
+        totals[item['payment_method']]['total'] += item['total'] or 0
+    return dict(sorted(totals.items()))
@@ -0,0 +1,44 @@
+"""
+报表后台任务
+"""
+from django import forms
+from django.tasks import task
+
+from .classification import classify_products
+from .customers import score_customers
+from .valuation import snapshot_inventory
+from apps.jobs.forms import TaskForm
+from apps.jobs.registry import admin_task
+
+
+class ClassificationForm(TaskForm):
+    full = forms.BooleanField(label='全量计算', required=False, help_text='不勾选时只重新统计上次计算后有新订单的商品')
+
+
+@admin_task('计算商品 ABC/XYZ 分类', ClassificationForm)
+@task
+def classify_products_task(full=False):
+    """计算商品 ABC/XYZ 分类"""
+    return classify_products(full=full)
+
+
+@admin_task('生成库存价值快照')
+@task
+def snapshot_inventory_task():
+    """生成当天的库存价值快照"""
+    snapshot = snapshot_inventory()
+    return {
+        'date': snapshot.date.isoformat(), 'products': snapshot.product_count,
+        'quantity': snapshot.total_quantity, 'value': str(snapshot.total_value),
+    }
+
+
+class CustomerScoreForm(TaskForm):
+    full = forms.BooleanField(label='重新汇总', required=False, help_text='勾选时先按已完成订单（含归档订单）重新汇总客户消费')
+
+
+@admin_task('计算客户 RFM 评分', CustomerScoreForm)
+@task
+def score_customers_task(full=False):
+    """计算客户 RFM 评分和分群"""
+    return score_customers(full=full)
@@ -1,3 +1,401 @@
-from django.test import TestCase
+import asyncio
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.db.models import F
+from django.utils import timezone
+
+from .classification import abc_classes, classify_products, xyz_classes
+from .customers import customer_segments, quintile_scores, rebuild_customer_stats, score_customers
+from .live import dashboard_bus, dashboard_delta
+from .models import CustomerNameStat, CustomerStat, InventorySnapshot, ProductClassification
+from .timeseries import bucket_labels, fill_series, trend_buckets
+from .valuation import snapshot_inventory, snapshot_on
+from apps.events.bus import EventBus
+from apps.events.models import OutboxEvent
+from apps.events.services import build_event, record_events
+from apps.inventory.models import StockIn
+from apps.inventory.services import increase_available_stock
+from apps.orders.models import Order, OrderItem
+from apps.orders.services import cancel_orders, complete_orders, order_created_event, pay_order
+from apps.products.models import Category, Product, ProductStock
+from apps.users.models import User
+
+
+class ClassificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', password='test')
+        category = Category.objects.create(name='食品')
+        cls.products = [
+            Product.objects.create(
+                name=f'商品{index}', category=category, cost_price=Decimal('1.00'), selling_price=Decimal('10.00'),
+            )
+            for index in range(4)
+        ]
+
+    def sell(self, product, quantity, days_ago=0, status='completed'):
+        order = Order.objects.create(
+            order_no=f'ORDCLS{Order.objects.count():05d}', user=self.user, customer_name='测试',
+            total_amount=Decimal('10.00') * quantity, total_cost=Decimal('1.00') * quantity, status=status,
+        )
+        OrderItem.objects.create(
+            order=order, product=product, quantity=quantity,
+            unit_price=Decimal('10.00'), cost_price=Decimal('1.00'),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def classes(self):
+        return dict(
+            (product_id, abc + xyz)
+            for product_id, abc, xyz in ProductClassification.objects.values_list('product_id', 'abc_class', 'xyz_class')
+        )
+
+    def test_abc_and_xyz_from_cumulative_share_and_variation(self):
+        self.assertEqual(list(abc_classes([70, 0, 20, 10])), ['A', 'C', 'A', 'B'])
+        cv, classes = xyz_classes(np.array([[5, 5, 5, 5], [0, 10, 0, 10], [0, 0, 0, 20], [0, 0, 0, 0]], dtype=float))
+        self.assertEqual(list(classes), ['X', 'Y', 'Z', 'Z'])
+        self.assertTrue(np.isnan(cv[3]))
+
+    def test_incremental_run_only_restats_products_with_new_sales(self):
+        steady, burst, small, idle = self.products
+        for week in range(13):
+            self.sell(steady, 10, days_ago=week * 7)
+        self.sell(burst, 30)
+        self.sell(small, 1)
+        self.sell(idle, 50, status='cancelled')
+
+        self.assertEqual(classify_products(), {'full': True, 'products': 4, 'reclassified': 2})
+        self.assertEqual(self.classes(), {steady.pk: 'AX', burst.pk: 'BZ', small.pk: 'CZ', idle.pk: 'CZ'})
+        computed_at = dict(ProductClassification.objects.values_list('product_id', 'computed_at'))
+
+        self.sell(burst, 500)
+        result = classify_products()
+        self.assertEqual((result['full'], result['products']), (False, 1))
+        self.assertEqual(self.classes(), {steady.pk: 'BX', burst.pk: 'AZ', small.pk: 'CZ', idle.pk: 'CZ'})
+        row = ProductClassification.objects.get(product=burst)
+        self.assertEqual((row.revenue, row.quantity), (Decimal('5300.00'), 530))
+        self.assertEqual(
+            ProductClassification.objects.get(product=steady).computed_at, computed_at[steady.pk]
+        )
+
+    def test_classification_api(self):
+        self.sell(self.products[0], 5)
+        classify_products()
+        self.client.force_login(self.user)
+        data = self.client.get('/admin/reports/api/classification/', {'abc': 'A', 'xyz': 'Z'}).json()
+        self.assertEqual(len(data['matrix']), 9)
+        self.assertEqual(
+            {(cell['abc'], cell['xyz']): cell['count'] for cell in data['matrix'] if cell['count']},
+            {('A', 'Z'): 1, ('C', 'Z'): 3},
+        )
+        self.assertEqual([item['product_name'] for item in data['products']], ['商品0'])
+        for limit in ('abc', '-1'):
+            response = self.client.get('/admin/reports/api/classification/', {'abc': 'A', 'xyz': 'Z', 'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+
+class InventoryValuationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', password='test')
+        category = Category.objects.create(name='食品')
+        cls.received = Product.objects.create(
+            name='入库商品', category=category, cost_price=Decimal('5.00'), selling_price=Decimal('10.00'),
+        )
+        cls.untracked = Product.objects.create(
+            name='无入库商品', cost_price=Decimal('3.00'), selling_price=Decimal('10.00'),
+        )
+        StockIn.objects.create(stock_in_no='SI0001', product=cls.received, quantity=10, unit_cost=Decimal('8.00'))
+        StockIn.objects.create(stock_in_no='SI0002', product=cls.received, quantity=10)
+        increase_available_stock(cls.untracked.pk, 4)
+
+    def test_snapshots_carry_moving_average_cost(self):
+        first = snapshot_inventory()
+        self.assertEqual((first.total_quantity, first.total_value), (24, Decimal('142.00')))
+        self.assertEqual(first.items.get(product=self.received).unit_cost, Decimal('6.5000'))
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        InventorySnapshot.objects.filter(pk=first.pk).update(date=yesterday)
+        # 卖出 10 件后再以 11.5 入库 10 件：原有 10 件按 6.5 计
+        ProductStock.objects.filter(product=self.received).update(available_quantity=F('available_quantity') - 10)
+        StockIn.objects.create(stock_in_no='SI0003', product=self.received, quantity=10, unit_cost=Decimal('11.50'))
+
+        second = snapshot_inventory()
+        item = second.items.get(product=self.received)
+        self.assertEqual((item.quantity, item.unit_cost, item.value), (20, Decimal('9.0000'), Decimal('180.00')))
+        self.assertEqual(second.total_value, Decimal('192.00'))
+
+        # 同一天重新生成时替换当天快照
+        third = snapshot_inventory()
+        self.assertEqual(InventorySnapshot.objects.count(), 2)
+        self.assertEqual(third.items.get(product=self.received).unit_cost, Decimal('9.0000'))
+        self.assertEqual(snapshot_on(yesterday).pk, first.pk)
+        self.assertIsNone(snapshot_on(yesterday - timedelta(days=1)))
+
+    def test_valuation_api(self):
+        snapshot_inventory()
+        today = timezone.localdate()
+        self.client.force_login(self.user)
+        data = self.client.get('/admin/reports/api/inventory-valuation/', {
+            'date': (today + timedelta(days=3)).isoformat(),
+        }).json()
+        self.assertEqual((data['dates'], data['values']), ([today.isoformat()], [142.0]))
+        self.assertEqual(data['snapshot']['date'], today.isoformat())
+        self.assertEqual(
+            [(item['name'], item['quantity'], item['value']) for item in data['snapshot']['categories']],
+            [('食品', 20, 130.0), ('未分类', 4, 12.0)],
+        )
+        self.assertEqual(
+            self.client.get('/admin/reports/api/inventory-valuation/', {'date': '2026-13-01'}).status_code, 400
+        )
+
+
+class CustomerAnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='test')
+        cls.users = [User.objects.create_user(f'user{index}', password='test') for index in range(3)]
+
+    def order(self, user, amount, customer_name=None, days_ago=0):
+        order = Order.objects.create(
+            order_no=f'ORDCUS{Order.objects.count():05d}', user=user, customer_name=customer_name or user.username,
+            total_amount=Decimal(amount), total_cost=Decimal(amount) / 2,
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        order.refresh_from_db()
+        return order
+
+    def totals(self):
+        return (
+            sorted(CustomerStat.objects.values_list('user_id', 'order_count', 'total_amount', 'profit', 'last_order_at')),
+            sorted(CustomerNameStat.objects.values_list('customer_name', 'order_count', 'total_amount', 'first_order_at')),
+        )
+
+    def test_quintile_scores_and_segments(self):
+        self.assertEqual(quintile_scores([1, 1, 2, 3, 4, 5, 6, 7, 8, 9]).tolist(), [1, 1, 2, 2, 3, 3, 4, 4, 5, 5])
+        self.assertEqual(
+            customer_segments(np.array([5, 1, 3, 5, 1, 3]), np.array([5, 5, 3, 1, 1, 1]), np.array([4, 5, 3, 2, 1, 3])).tolist(),
+            ['champion', 'at_risk', 'loyal', 'new', 'lost', 'regular'],
+        )
+
+    def test_completing_orders_matches_full_rebuild(self):
+        first, second, third = self.users
+        old = self.order(first, '100.00', days_ago=30)
+        pay_order(old.pk, first, 'online')
+        pay_order(self.order(first, '50.00', days_ago=2).pk, first, 'online')
+        complete_orders([
+            self.order(second, '300.00', customer_name='门店客户').pk,
+            self.order(third, '20.00', customer_name='门店客户', days_ago=10).pk,
+        ], 'offline')
+        pending = self.order(third, '80.00')
+        pending.status = 'completed'
+        pending.save()
+        self.order(second, '999.00')  # 未完成订单不计入
+
+        incremental = self.totals()
+        stat = CustomerStat.objects.get(user=first)
+        self.assertEqual(
+            (stat.order_count, stat.total_amount, stat.profit, stat.first_order_at), (2, Decimal('150.00'), Decimal('75.00'), old.created_at)
+        )
+        self.assertEqual(CustomerNameStat.objects.get(customer_name='门店客户').order_count, 2)
+
+        rebuild_customer_stats()
+        self.assertEqual(self.totals(), incremental)
+
+    def test_cancelling_orders_in_bulk_leaves_stats_unchanged(self):
+        first, second, _ = self.users
+        pay_order(self.order(first, '100.00').pk, first, 'online')
+        before = self.totals()
+
+        cancelled = cancel_orders([self.order(first, '6.00').pk, self.order(second, '8.00').pk])
+        self.assertEqual(len(cancelled), 2)
+        self.assertEqual(self.totals(), before)
+        self.assertFalse(CustomerStat.objects.filter(user=second).exists())
+
+    def test_scores_and_customer_api(self):
+        for index, user in enumerate(self.users):
+            for _ in range(index + 1):
+                pay_order(self.order(user, f'{(index + 1) * 100}.00', days_ago=30 - index * 10).pk, user, 'online')
+
+        self.assertEqual(score_customers(), {'full': False, 'users': 3, 'names': 3, 'rescored': 6})
+        self.assertEqual(score_customers()['rescored'], 0)
+        top = CustomerStat.objects.get(user=self.users[2])
+        self.assertEqual((top.recency_score, top.frequency_score, top.monetary_score, top.segment), (4, 4, 4, 'champion'))
+
+        self.client.force_login(self.admin)
+        data = self.client.get('/admin/reports/api/customers/', {'order': 'profit', 'limit': 2}).json()
+        self.assertEqual([item['name'] for item in data['customers']], ['user2', 'user1'])
+        self.assertEqual(data['customers'][0]['profit'], 450.0)
+        self.assertEqual(sum(item['customers'] for item in data['segments']), 3)
+        self.assertEqual(self.client.get('/admin/reports/api/customers/', {'by': 'phone'}).status_code, 400)
+        self.assertEqual(self.client.get('/admin/reports/api/customers/', {'limit': -1}).status_code, 400)
+
+
+class TimeSeriesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='test')
+
+    def test_buckets_are_calendar_aligned(self):
+        today = date(2026, 3, 15)
+        months = trend_buckets('month', 365, today)
+        self.assertEqual(months[0], date(2025, 3, 1))
+        self.assertEqual(months[-1], date(2026, 3, 1))
+        self.assertEqual(len(months), 13)
+        weeks = trend_buckets('week', 15, today)
+        self.assertEqual(weeks, [date(2026, 2, 23), date(2026, 3, 2), date(2026, 3, 9)])
+        self.assertEqual(bucket_labels(trend_buckets('year', 400, today), 'year'), ['2025', '2026'])
+        self.assertEqual(trend_buckets('day', 0, today), [today])
+
+    def test_fill_series_sums_days_and_fills_gaps(self):
+        buckets = trend_buckets('month', 90, date(2026, 3, 15))
+        rows = [
+            {'date': date(2026, 1, 5), 'amount': 3},
+            {'date': date(2026, 1, 20), 'amount': 4},
+            {'date': date(2026, 3, 1), 'amount': None},
+            {'date': date(2025, 1, 1), 'amount': 100},
+        ]
+        self.assertEqual(fill_series(buckets, 'month', rows, ['amount']), {'amount': [0, 7, 0, 0]})
+
+    def test_created_date_uses_local_calendar(self):
+        order = Order.objects.create(
+            order_no='ORDTS00001', user=self.admin, customer_name='客户',
+            total_amount=Decimal('10'), total_cost=Decimal('4'),
+        )
+        order.created_at = datetime(2026, 10, 18, 17, 30, tzinfo=dt_timezone.utc)
+        order.save()
+        order.refresh_from_db()
+        self.assertEqual(order.created_date, date(2026, 10, 19))
+
+        Order.objects.bulk_create([
+            Order(
+                order_no='ORDTS00002', user=self.admin, customer_name='客户',
+                total_amount=Decimal('10'), total_cost=Decimal('4'),
+            ),
+        ])
+        self.assertEqual(Order.objects.get(order_no='ORDTS00002').created_date, timezone.localdate())
+
+    def test_sales_trend_fills_empty_days(self):
+        today = timezone.localdate()
+        for index, days_ago in enumerate([0, 0, 3]):
+            order = Order.objects.create(
+                order_no=f'ORDTS1{index:04d}', user=self.admin, customer_name='客户', status='completed',
+                total_amount=Decimal('10'), total_cost=Decimal('4'),
+            )
+            Order.objects.filter(pk=order.pk).update(
+                created_at=F('created_at') - timedelta(days=days_ago),
+                created_date=today - timedelta(days=days_ago),
+            )
+        Order.objects.create(
+            order_no='ORDTS19999', user=self.admin, customer_name='客户',
+            total_amount=Decimal('99'), total_cost=Decimal('0'),
+        )
+
+        self.client.force_login(self.admin)
+        data = self.client.get('/admin/reports/api/sales-trend/', {'period': 'day', 'days': 7}).json()
+        self.assertEqual(len(data['dates']), 7)
+        self.assertEqual(data['dates'][-1], today.strftime('%Y-%m-%d'))
+        self.assertEqual(data['sales'], [0, 0, 0, 10, 0, 0, 20])
+        self.assertEqual(data['counts'], [0, 0, 0, 1, 0, 0, 2])
+
+        profit = self.client.get('/admin/reports/api/profit-trend/', {'period': 'day', 'days': 7}).json()
+        self.assertEqual(profit['profits'], [0, 0, 0, 6, 0, 0, 12])
+        self.assertEqual(self.client.get('/admin/reports/api/sales-trend/', {'days': 'x'}).status_code, 400)
+
+
+class LiveUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='test')
+        cls.product = Product.objects.create(name='商品', cost_price=Decimal('5.00'), selling_price=Decimal('10.00'))
+
+    def test_dashboard_delta(self):
+        after = OutboxEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        order = Order.objects.create(
+            order_no='ORDLIVE0001', user=self.admin, customer_name='客户',
+            total_amount=Decimal('30'), total_cost=Decimal('12'),
+        )
+        record_events([order_created_event(order, {})])
+        pay_order(order.pk, self.admin, 'online')
+        StockIn.objects.create(stock_in_no='SILIVE1', product=self.product, quantity=4)
+        StockIn.objects.create(stock_in_no='SILIVE2', product=self.product, quantity=2, unit_cost=Decimal('7.50'))
+
+        delta = dashboard_delta(list(OutboxEvent.objects.filter(pk__gt=after).order_by('id')))
+        today = timezone.localdate()
+        # 待支付 +1 -1 抵消
+        self.assertEqual(delta['orders'], [{'date': today, 'status': 'completed', 'name': '已完成', 'count': 1}])
+        self.assertEqual(delta['completed'], [{
+            'date': today, 'payment_method': 'online', 'name': '线上支付', 'sales': 30.0, 'cost': 12.0, 'count': 1,
+        }])
+        self.assertEqual(delta['stock_ins'], [{'date': today, 'quantity': 6, 'cost': 35.0, 'count': 2}])
+        self.assertIsNone(dashboard_delta(list(OutboxEvent.objects.filter(topic='payment'))))
+
+    def test_live_api_requires_asgi(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/admin/reports/api/live/').status_code, 204)
+
+
+class LiveStreamTests(TransactionTestCase):
+    # PostgreSQL 上只读取写入事务已结束的事件，测试数据须实际提交
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='test')
+        self.product = Product.objects.create(name='商品', cost_price=Decimal('5.00'), selling_price=Decimal('10.00'))
+
+    @override_settings(LIVE_POLL_SECONDS=0.05, LIVE_QUEUE_SIZE=2)
+    def test_bus_builds_once_per_batch_for_all_subscribers(self):
+        batches = []
+
+        def build(events):
+            batches.append([event.key for event in events])
+            return len(events)
+
+        bus = EventBus(build)
+        record_events([build_event('order', 'order.created', 'before', {})])
+
+        async def scenario():
+            queues = [bus.subscribe() for _ in range(3)]
+            while bus.last_event_id is None:
+                await asyncio.sleep(0.01)
+            await sync_to_async(record_events)([build_event('order', 'order.created', key, {}) for key in (1, 2)])
+            messages = [await asyncio.wait_for(queue.get(), 5) for queue in queues]
+
+            # 读取过慢的订阅者被断开
+            bus.publish('a')
+            bus.publish('b')
+            slow = queues[0]
+            bus.publish('c')
+            self.assertEqual(slow.qsize(), 1)
+            self.assertIsNone(slow.get_nowait())
+            self.assertEqual(len(bus.subscribers), 0)
+            await asyncio.wait_for(bus._task, 5)
+            return messages
+
+        self.assertEqual(async_to_sync(scenario)(), [2, 2, 2])
+        self.assertEqual(batches, [['1', '2']])
+
+    @override_settings(LIVE_POLL_SECONDS=0.05)
+    async def test_live_api_streams_deltas(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get('/admin/reports/api/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertIn(b'event: ready', await anext(stream))
+        while not dashboard_bus.subscribers or dashboard_bus.last_event_id is None:
+            await asyncio.sleep(0.01)
+
+        await sync_to_async(StockIn.objects.create)(stock_in_no='SILIVE3', product=self.product, quantity=3)
+        message = (await asyncio.wait_for(anext(stream), 5)).decode()
+        await stream.aclose()
+        self.assertIn('event: delta', message)
+        today = timezone.localdate().isoformat()
+        self.assertIn(f'"stock_ins": [{{"date": "{today}", "quantity": 3, "cost": 15.0, "count": 1}}]', message)
@@ -0,0 +1,91 @@
+"""
+报表时间序列
+
+按 settings.TIME_ZONE（Asia/Shanghai）的本地日历划分周期：日、周（周一开始）、月、年。
+趋势接口的统一流程：
+1. trend_buckets(period, days) 得到覆盖最近 days 天（含今天）的各周期起点，第一个周期对齐到日历周期起点
+2. 按本地日期列（orders.created_date、stock_ins.created_date、order_rollups.date）过滤并分组，每天一行，
+   不在 SQL 中逐行做时区转换和日期截断
+3. fill_series 把按日汇总的行累加到所属周期，没有数据的周期补 0，各序列与周期一一对应
+"""
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+
+PERIODS = ('day', 'week', 'month', 'year')
+LABEL_FORMATS = {'day': '%Y-%m-%d', 'week': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+
+
+def to_local_date(value):
+    """时间换算为本地日期，日期原样返回"""
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def period_start(value, period):
+    """日期所在周期的起点"""
+    value = to_local_date(value)
+    if period == 'week':
+        return date.fromordinal(value.toordinal() - value.weekday())
+    if period == 'month':
+        return value.replace(day=1)
+    if period == 'year':
+        return value.replace(month=1, day=1)
+    return value
+
+
+def next_period_start(start, period):
+    """下一个周期的起点"""
+    if period == 'week':
+        return start + timedelta(days=7)
+    if period == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if period == 'year':
+        return start.replace(year=start.year + 1)
+    return start + timedelta(days=1)
+
+
+def trend_buckets(period, days, today=None):
+    """
+    覆盖最近 days 天（含今天）的各周期起点，第一个周期从包含起始日的日历周期起点开始
+
+    Returns:
+        list: 按时间升序的周期起点（本地日期），最后一个周期包含今天
+    """
+    today = today or timezone.localdate()
+    current = period_start(today - timedelta(days=max(days, 1) - 1), period)
+    buckets = []
+    while current <= today:
+        buckets.append(current)
+        current = next_period_start(current, period)
+    return buckets
+
+
+def fill_series(buckets, period, rows, fields):
+    """
+    把按日汇总的行累加到所属周期，没有数据的周期补 0
+
+    Args:
+        buckets: trend_buckets 的结果
+        rows: 可迭代的 {'date': 本地日期, 字段: 值}，同一天可以有多行（如主库订单和归档汇总）
+        fields: 需要累加的字段
+
+    Returns:
+        dict: {字段: 与 buckets 对齐的值列表}
+    """
+    index = {start: position for position, start in enumerate(buckets)}
+    series = {field: [0] * len(buckets) for field in fields}
+    for row in rows:
+        position = index.get(period_start(row['date'], period))
+        if position is None:
+            continue
+        for field in fields:
+            series[field][position] += row[field] or 0
+    return series
+
+
+def bucket_labels(buckets, period):
+    """周期起点的显示文本"""
+    return [start.strftime(LABEL_FORMATS[period]) for start in buckets]
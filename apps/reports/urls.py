@@ -8,6 +8,7 @@ urlpatterns = [
     path('sales/', views.sales_report_view, name='sales_report'),
     path('profit/', views.profit_report_view, name='profit_report'),
     path('inventory/', views.inventory_report_view, name='inventory_report'),
+    path('classification/', views.classification_report_view, name='classification_report'),
     
     # API接口
     path('api/sales-trend/', views.sales_trend_api, name='sales_trend_api'),
@@ -16,7 +17,13 @@ urlpatterns = [
     path('api/profit-trend/', views.profit_trend_api, name='profit_trend_api'),
     path('api/profit-summary/', views.profit_summary_api, name='profit_summary_api'),
     path('api/stock-status/', views.stock_status_api, name='stock_status_api'),
+    path('api/inventory-valuation/', views.inventory_valuation_api, name='inventory_valuation_api'),
     path('api/stock-in-trend/', views.stock_in_trend_api, name='stock_in_trend_api'),
     path('api/supplier-stats/', views.supplier_stats_api, name='supplier_stats_api'),
+    path('api/supplier-analytics/', views.supplier_analytics_api, name='supplier_analytics_api'),
     path('api/low-stock/', views.low_stock_api, name='low_stock_api'),
+    path('api/stock-alerts/', views.stock_alerts_api, name='stock_alerts_api'),
+    path('api/classification/', views.classification_api, name='classification_api'),
+    path('api/customers/', views.customer_stats_api, name='customer_stats_api'),
+    path('api/live/', views.live_updates_api, name='live_updates_api'),
 ]
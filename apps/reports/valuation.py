@@ -0,0 +1,100 @@
+"""
+库存价值快照
+
+每天生成一次快照（snapshot_inventory 命令或后台任务），记录各商品的库存数量和移动加权平均入库成本：
+    原有库存 = max(当前库存 - 期间入库数量, 0)（视为期间的出库先消耗原有库存）
+    单位成本 = (原有库存 × 上次快照单位成本 + 期间入库成本) / (原有库存 + 期间入库数量)
+期间入库只读取上次快照生成之后的入库记录，第一次生成时读取全部入库记录；
+上次快照中没有的商品按商品成本价计算原有库存，入库记录未填写单位成本时同样按商品成本价计算。
+
+报表按快照读取历史库存价值，不再回放订单和入库记录：
+任意日期的库存价值为该日期及之前最近一次快照，按 inventory_snapshots.date 唯一索引一次查询。
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import InventorySnapshot, InventorySnapshotItem
+from apps.inventory.models import StockIn
+from apps.products.models import ProductStock
+
+
+COST_PLACES = Decimal('0.0001')
+VALUE_PLACES = Decimal('0.01')
+
+
+def received_costs(since, until):
+    """[since, until) 期间各商品的入库数量和入库成本 {product_id: (数量, 成本)}，since 为 None 时不限起始时间"""
+    stock_ins = StockIn.objects.filter(created_at__lt=until)
+    if since is not None:
+        stock_ins = stock_ins.filter(created_at__gte=since)
+    rows = stock_ins.values_list('product_id').annotate(
+        received_quantity=Sum('quantity'),
+        received_cost=Sum(F('quantity') * Coalesce('unit_cost', 'product__cost_price')),
+    ).order_by()
+    return {product_id: (quantity, cost) for product_id, quantity, cost in rows}
+
+
+def moving_average_cost(quantity, base_cost, received_quantity, received_cost):
+    """当前库存 quantity（大于 0）的移动加权平均单位成本，base_cost 为原有库存的单位成本"""
+    remaining = max(quantity - received_quantity, 0)
+    return ((remaining * base_cost + received_cost) / (remaining + received_quantity)).quantize(COST_PLACES)
+
+
+def snapshot_inventory():
+    """
+    生成当天（本地日期）的库存快照，当天已有快照时替换
+
+    Returns:
+        InventorySnapshot
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    previous = InventorySnapshot.objects.filter(date__lt=today).order_by('-date').first()
+    base = dict(previous.items.values_list('product_id', 'unit_cost')) if previous else {}
+    received = received_costs(previous.taken_at if previous else None, now)
+
+    items = []
+    total_quantity, total_value = 0, Decimal('0')
+    stocks = ProductStock.objects.values_list(
+        'product_id', 'available_quantity', 'frozen_quantity', 'product__cost_price'
+    ).order_by('product_id')
+    for product_id, available, frozen, cost_price in stocks.iterator(chunk_size=5000):
+        quantity = available + frozen
+        if quantity <= 0:
+            continue
+        received_quantity, received_cost = received.get(product_id, (0, Decimal('0')))
+        unit_cost = moving_average_cost(
+            quantity, base.get(product_id, cost_price), received_quantity, received_cost
+        )
+        value = (quantity * unit_cost).quantize(VALUE_PLACES)
+        items.append(InventorySnapshotItem(product_id=product_id, quantity=quantity, unit_cost=unit_cost, value=value))
+        total_quantity += quantity
+        total_value += value
+
+    with transaction.atomic():
+        InventorySnapshot.objects.filter(date=today).delete()
+        snapshot = InventorySnapshot.objects.create(
+            date=today, taken_at=now, product_count=len(items),
+            total_quantity=total_quantity, total_value=total_value,
+        )
+        for item in items:
+            item.snapshot = snapshot
+        InventorySnapshotItem.objects.bulk_create(items, batch_size=2000)
+    return snapshot
+
+
+def snapshot_on(date):
+    """date 及之前最近一次快照，没有时返回 None"""
+    return InventorySnapshot.objects.filter(date__lte=date).order_by('-date').first()
+
+
+def category_values(snapshot):
+    """快照中各分类（按商品当前分类）的库存数量和价值 [(分类名，未分类为 None, 数量, 价值)]"""
+    return list(
+        snapshot.items.values_list('product__category__name')
+        .annotate(total_quantity=Sum('quantity'), total_value=Sum('value')).order_by('-total_value')
+    )
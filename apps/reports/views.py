@@ -1,41 +1,54 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Sum, Count, F
-from django.db.models.functions import TruncDate, TruncWeek, TruncMonth, TruncYear
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 
 from apps.orders.models import Order
 from apps.products.models import ProductStock
-from apps.inventory.models import StockIn
-
-
-def get_date_range(period='day', days=30):
-    """根据周期获取日期范围"""
-    end_date = timezone.now()
-    if period == 'day':
-        start_date = end_date - timedelta(days=days)
-    elif period == 'week':
-        start_date = end_date - timedelta(weeks=days)
-    elif period == 'month':
-        start_date = end_date - timedelta(days=days)
-    elif period == 'year':
-        start_date = end_date - timedelta(days=days)
-    else:
-        start_date = end_date - timedelta(days=30)
-    return start_date, end_date
+from apps.inventory.alerts import low_stocks
+from apps.inventory.models import StockAlert, StockIn, SupplierMonthlyStat, SupplierProductMonthlyStat
+from apps.inventory.supplier_stats import supplier_totals
+from warehouse_management.routers import read_from_replica
+from .classification import classification_matrix
+from .live import dashboard_stream
+from .models import CustomerNameStat, CustomerStat, InventorySnapshot, ProductClassification
+from .valuation import category_values, snapshot_on
+from .timeseries import PERIODS, bucket_labels, fill_series, trend_buckets
+from .services import completed_order_trend, order_totals, order_status_counts, payment_method_totals
+
+
+def trend_params(request):
+    """
+    趋势接口参数：?period=day|week|month|year（默认 day）&days=最近天数（默认 30）
+
+    Returns:
+        tuple: (period, 各周期起点, 今天)
+
+    Raises:
+        ValueError: days 不是整数
+    """
+    period = request.GET.get('period', 'day')
+    if period not in PERIODS:
+        period = 'day'
+    days = int(request.GET.get('days', 30))
+    today = timezone.localdate()
+    return period, trend_buckets(period, days, today), today
 
 
-def get_trunc_func(period):
-    """根据周期获取日期截断函数"""
-    if period == 'week':
-        return TruncWeek
-    elif period == 'month':
-        return TruncMonth
-    elif period == 'year':
-        return TruncYear
-    return TruncDate
+def get_range_dates(range_type):
+    """根据范围类型（today/month/year/all）获取起止日期，None 表示不限"""
+    today = timezone.localdate()
+    if range_type == 'today':
+        return today, today
+    elif range_type == 'month':
+        return today.replace(day=1), None
+    elif range_type == 'year':
+        return today.replace(month=1, day=1), None
+    return None, None
 
 
 @staff_member_required
@@ -63,103 +76,65 @@ def inventory_report_view(request):
 
 
 @staff_member_required
-def sales_trend_api(request):
-    """销售额趋势数据API"""
-    period = request.GET.get('period', 'day')
-    days = int(request.GET.get('days', 30))
+def classification_report_view(request):
+    """商品 ABC/XYZ 分类报表页面"""
+    return render(request, 'admin/reports/classification_report.html', {
+        'title': '商品 ABC/XYZ 分类',
+    })
 
-    start_date, end_date = get_date_range(period, days)
-    trunc_func = get_trunc_func(period)
-
-    # 查询已完成/已支付的订单
-    orders = Order.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-        status='completed'
-    ).annotate(
-        date=trunc_func('created_at')
-    ).values('date').annotate(
-        total_sales=Sum('total_amount'),
-        order_count=Count('id')
-    ).order_by('date')
-
-    dates = []
-    sales = []
-    counts = []
-
-    date_format = '%Y' if period == 'year' else ('%Y-%m' if period == 'month' else '%Y-%m-%d')
-    for item in orders:
-        dates.append(item['date'].strftime(date_format) if item['date'] else '')
-        sales.append(float(item['total_sales'] or 0))
-        counts.append(item['order_count'])
+
+@staff_member_required
+@read_from_replica
+def sales_trend_api(request):
+    """销售额趋势数据API（已完成订单，含已归档订单的日汇总；没有订单的周期为 0）"""
+    try:
+        period, buckets, today = trend_params(request)
+    except ValueError:
+        return JsonResponse({'error': 'days 须为整数'}, status=400)
+
+    series = fill_series(
+        buckets, period, completed_order_trend(buckets[0], today), ['total_sales', 'order_count']
+    )
 
     return JsonResponse({
-        'dates': dates,
-        'sales': sales,
-        'counts': counts
+        'dates': bucket_labels(buckets, period),
+        'sales': [float(value) for value in series['total_sales']],
+        'counts': series['order_count']
     })
 
 
 @staff_member_required
+@read_from_replica
 def order_status_api(request):
     """订单状态分布数据API"""
     range_type = request.GET.get('range', 'today')  # today, month, year, all
     
     status_map = dict(Order.ORDER_STATUS)
-    queryset = Order.objects.all()
-    
-    today = timezone.now().date()
-    if range_type == 'today':
-        queryset = queryset.filter(created_at__date=today)
-    elif range_type == 'month':
-        queryset = queryset.filter(created_at__date__gte=today.replace(day=1))
-    elif range_type == 'year':
-        queryset = queryset.filter(created_at__date__gte=today.replace(month=1, day=1))
-    # 'all' 不需要过滤
-
-    status_data = queryset.values('status').annotate(
-        count=Count('id')
-    ).order_by('status')
+    start_date, end_date = get_range_dates(range_type)
 
     result = []
-    for item in status_data:
+    for status, count in order_status_counts(start_date, end_date).items():
         result.append({
-            'name': status_map.get(item['status'], item['status']),
-            'value': item['count']
+            'name': status_map.get(status, status),
+            'value': count
         })
 
     return JsonResponse({'data': result})
 
 
 @staff_member_required
+@read_from_replica
 def payment_method_api(request):
     """支付方式分布数据API"""
     range_type = request.GET.get('range', 'today')  # today, month, year, all
     
     method_map = dict(Order.PAYMENT_METHODS)
-    queryset = Order.objects.filter(
-        status='completed',
-        payment_method__isnull=False
-    )
-    
-    today = timezone.now().date()
-    if range_type == 'today':
-        queryset = queryset.filter(created_at__date=today)
-    elif range_type == 'month':
-        queryset = queryset.filter(created_at__date__gte=today.replace(day=1))
-    elif range_type == 'year':
-        queryset = queryset.filter(created_at__date__gte=today.replace(month=1, day=1))
-    # 'all' 不需要过滤
-
-    method_data = queryset.values('payment_method').annotate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    ).order_by('payment_method')
+    start_date, end_date = get_range_dates(range_type)
 
     result = []
-    for item in method_data:
+    for method, item in payment_method_totals(start_date, end_date).items():
         result.append({
-            'name': method_map.get(item['payment_method'], item['payment_method'] or '未知'),
+            'name': method_map.get(method, method or '未知'),
             'count': item['count'],
             'total': float(item['total'] or 0)
         })
@@ -168,40 +143,24 @@ def payment_method_api(request):
 
 
 @staff_member_required
+@read_from_replica
 def profit_trend_api(request):
-    """利润趋势数据API"""
-    period = request.GET.get('period', 'day')
-    days = int(request.GET.get('days', 30))
+    """利润趋势数据API（已完成订单，含已归档订单的日汇总；没有订单的周期为 0）"""
+    try:
+        period, buckets, today = trend_params(request)
+    except ValueError:
+        return JsonResponse({'error': 'days 须为整数'}, status=400)
+
+    series = fill_series(
+        buckets, period, completed_order_trend(buckets[0], today), ['total_sales', 'total_cost']
+    )
 
-    start_date, end_date = get_date_range(period, days)
-    trunc_func = get_trunc_func(period)
-
-    orders = Order.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-        status='completed'
-    ).annotate(
-        date=trunc_func('created_at')
-    ).values('date').annotate(
-        total_sales=Sum('total_amount'),
-        total_cost=Sum('total_cost')
-    ).order_by('date')
-
-    dates = []
     profits = []
     profit_rates = []
-    sales = []
-    costs = []
-
-    date_format = '%Y' if period == 'year' else ('%Y-%m' if period == 'month' else '%Y-%m-%d')
-    for item in orders:
-        dates.append(item['date'].strftime(date_format) if item['date'] else '')
-        total_sales = float(item['total_sales'] or 0)
-        total_cost = float(item['total_cost'] or 0)
+    sales = [float(value) for value in series['total_sales']]
+    costs = [float(value) for value in series['total_cost']]
+    for total_sales, total_cost in zip(sales, costs):
         profit = total_sales - total_cost
-
-        sales.append(total_sales)
-        costs.append(total_cost)
         profits.append(profit)
 
         # 毛利率
@@ -211,7 +170,7 @@ def profit_trend_api(request):
             profit_rates.append(0)
 
     return JsonResponse({
-        'dates': dates,
+        'dates': bucket_labels(buckets, period),
         'profits': profits,
         'profit_rates': profit_rates,
         'sales': sales,
@@ -220,32 +179,20 @@ def profit_trend_api(request):
 
 
 @staff_member_required
+@read_from_replica
 def profit_summary_api(request):
     """利润汇总数据API"""
-    # 总体统计
-    total_stats = Order.objects.filter(
-        status='completed'
-    ).aggregate(
-        total_sales=Sum('total_amount'),
-        total_cost=Sum('total_cost'),
-        order_count=Count('id')
-    )
+    # 总体统计（含已归档订单）
+    total_stats = order_totals()
 
-    total_sales = float(total_stats['total_sales'] or 0)
-    total_cost = float(total_stats['total_cost'] or 0)
+    total_sales = float(total_stats['sales'] or 0)
+    total_cost = float(total_stats['cost'] or 0)
     total_profit = total_sales - total_cost
     profit_rate = round(total_profit / total_sales * 100, 2) if total_sales > 0 else 0
 
     # 今日统计
-    today = timezone.now().date()
-    today_stats = Order.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).aggregate(
-        sales=Sum('total_amount'),
-        cost=Sum('total_cost'),
-        count=Count('id')
-    )
+    today = timezone.localdate()
+    today_stats = order_totals(today, today)
 
     today_sales = float(today_stats['sales'] or 0)
     today_cost = float(today_stats['cost'] or 0)
@@ -253,14 +200,7 @@ def profit_summary_api(request):
 
     # 本月统计
     month_start = today.replace(day=1)
-    month_stats = Order.objects.filter(
-        created_at__date__gte=month_start,
-        status='completed'
-    ).aggregate(
-        sales=Sum('total_amount'),
-        cost=Sum('total_cost'),
-        count=Count('id')
-    )
+    month_stats = order_totals(month_start)
 
     month_sales = float(month_stats['sales'] or 0)
     month_cost = float(month_stats['cost'] or 0)
@@ -272,7 +212,7 @@ def profit_summary_api(request):
             'cost': total_cost,
             'profit': total_profit,
             'profit_rate': profit_rate,
-            'order_count': total_stats['order_count'] or 0
+            'order_count': total_stats['count'] or 0
         },
         'today': {
             'sales': today_sales,
@@ -290,6 +230,7 @@ def profit_summary_api(request):
 
 
 @staff_member_required
+@read_from_replica
 def stock_status_api(request):
     """库存状态数据API"""
     stocks = ProductStock.objects.select_related('product', 'product__category').all()
@@ -325,84 +266,364 @@ def stock_status_api(request):
 
 
 @staff_member_required
-def stock_in_trend_api(request):
-    """入库趋势数据API"""
-    period = request.GET.get('period', 'day')
-    days = int(request.GET.get('days', 30))
+@read_from_replica
+def inventory_valuation_api(request):
+    """
+    库存价值趋势API（读取每日库存快照）
+
+    ?start=&end= 日期范围（默认最近 90 天）内各快照的库存数量和价值；
+    ?date= 指定日期时同时返回该日期（及之前最近一次快照）的库存价值和分类明细
+    """
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=89)
+        on = date.fromisoformat(request.GET['date']) if request.GET.get('date') else None
+    except ValueError:
+        return JsonResponse({'error': '日期格式应为 YYYY-MM-DD'}, status=400)
+
+    snapshots = InventorySnapshot.objects.filter(date__gte=start, date__lte=end).order_by('date').values_list(
+        'date', 'total_quantity', 'total_value'
+    )
+    result = {'dates': [], 'quantities': [], 'values': []}
+    for day, quantity, value in snapshots:
+        result['dates'].append(day.isoformat())
+        result['quantities'].append(quantity)
+        result['values'].append(float(value))
+
+    if on is not None:
+        snapshot = snapshot_on(on)
+        result['snapshot'] = snapshot and {
+            'date': snapshot.date.isoformat(),
+            'product_count': snapshot.product_count,
+            'quantity': snapshot.total_quantity,
+            'value': float(snapshot.total_value),
+            'categories': [
+                {'name': name or '未分类', 'quantity': quantity, 'value': float(value)}
+                for name, quantity, value in category_values(snapshot)
+            ],
+        }
+
+    return JsonResponse(result)
+
 
-    start_date, end_date = get_date_range(period, days)
-    trunc_func = get_trunc_func(period)
+@staff_member_required
+@read_from_replica
+def stock_in_trend_api(request):
+    """入库趋势数据API（按入库记录的本地日期列分组；没有入库的周期为 0）"""
+    try:
+        period, buckets, today = trend_params(request)
+    except ValueError:
+        return JsonResponse({'error': 'days 须为整数'}, status=400)
 
     stock_ins = StockIn.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date
-    ).annotate(
-        date=trunc_func('created_at')
-    ).values('date').annotate(
+        created_date__gte=buckets[0],
+        created_date__lte=today
+    ).values_list('created_date').annotate(
         total_quantity=Sum('quantity'),
-        total_cost=Sum(F('quantity') * F('unit_cost')),
+        total_cost=Sum(F('quantity') * Coalesce('unit_cost', 'product__cost_price')),
         record_count=Count('id')
-    ).order_by('date')
-
-    dates = []
-    quantities = []
-    costs = []
-    counts = []
-
-    date_format = '%Y' if period == 'year' else ('%Y-%m' if period == 'month' else '%Y-%m-%d')
-    for item in stock_ins:
-        dates.append(item['date'].strftime(date_format) if item['date'] else '')
-        quantities.append(item['total_quantity'] or 0)
-        costs.append(float(item['total_cost'] or 0))
-        counts.append(item['record_count'])
+    ).order_by()
+    series = fill_series(buckets, period, (
+        {'date': day, 'total_quantity': quantity, 'total_cost': cost, 'record_count': count}
+        for day, quantity, cost, count in stock_ins
+    ), ['total_quantity', 'total_cost', 'record_count'])
 
     return JsonResponse({
-        'dates': dates,
-        'quantities': quantities,
-        'costs': costs,
-        'counts': counts
+        'dates': bucket_labels(buckets, period),
+        'quantities': series['total_quantity'],
+        'costs': [float(value) for value in series['total_cost']],
+        'counts': series['record_count']
     })
 
 
 @staff_member_required
+@read_from_replica
 def supplier_stats_api(request):
-    """供应商统计数据API"""
-    supplier_data = StockIn.objects.values(
-        'supplier__name'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_cost=Sum(F('quantity') * F('unit_cost')),
-        record_count=Count('id')
-    ).order_by('-total_quantity')
-
+    """供应商统计数据API（读取供应商入库月汇总）"""
     result = []
-    for item in supplier_data:
+    for item in supplier_totals():
         result.append({
-            'name': item['supplier__name'] or '无供应商',
-            'quantity': item['total_quantity'] or 0,
-            'cost': float(item['total_cost'] or 0),
-            'count': item['record_count']
+            'name': item['supplier__name'],
+            'quantity': item['stock_in_quantity'] or 0,
+            'cost': float(item['stock_in_cost'] or 0),
+            'count': item['stock_in_count']
         })
 
     return JsonResponse({'data': result})
 
 
+def parse_month(value):
+    """解析 YYYY-MM 或 YYYY-MM-DD，返回当月 1 日"""
+    return date.fromisoformat(f'{value}-01' if len(value) == 7 else value).replace(day=1)
+
+
+def average_cost(cost, quantity):
+    return round(float(cost) / quantity, 4) if quantity else None
+
+
 @staff_member_required
-def low_stock_api(request):
-    """低库存预警数据API"""
-    threshold = int(request.GET.get('threshold', 10))
+@read_from_replica
+def supplier_analytics_api(request):
+    """
+    供应商分析API（读取供应商入库月汇总）
+
+    ?start=&end= 月份范围（YYYY-MM 或日期，按所在月份计，默认最近 12 个月）内各供应商的入库数量、成本、次数和平均单位成本；
+    ?supplier= 指定供应商时同时返回该供应商的月度走势和入库成本最高的 limit 个商品的单位成本走势
+    """
+    try:
+        end = parse_month(request.GET['end']) if request.GET.get('end') else timezone.localdate().replace(day=1)
+        start = parse_month(request.GET['start']) if request.GET.get('start') else (
+            end.replace(year=end.year - 1, month=end.month + 1) if end.month < 12 else end.replace(month=1)
+        )
+        supplier_id = int(request.GET['supplier']) if request.GET.get('supplier') else None
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        return JsonResponse({'error': '月份格式应为 YYYY-MM，supplier 和 limit 须为整数'}, status=400)
+    if limit < 0:
+        return JsonResponse({'error': 'limit 不能为负数'}, status=400)
+
+    result = {
+        'start': start.strftime('%Y-%m'),
+        'end': end.strftime('%Y-%m'),
+        'suppliers': [{
+            'id': item['supplier_id'],
+            'name': item['supplier__name'],
+            'quantity': item['stock_in_quantity'],
+            'cost': float(item['stock_in_cost']),
+            'count': item['stock_in_count'],
+            'avg_unit_cost': average_cost(item['stock_in_cost'], item['stock_in_quantity']),
+        } for item in supplier_totals(start, end)],
+    }
+
+    if supplier_id is not None:
+        months = SupplierMonthlyStat.objects.filter(
+            supplier_id=supplier_id, month__gte=start, month__lte=end,
+        ).order_by('month')
+        result['months'] = [{
+            'month': stat.month.strftime('%Y-%m'),
+            'quantity': stat.quantity,
+            'cost': float(stat.total_cost),
+            'count': stat.record_count,
+            'avg_unit_cost': average_cost(stat.total_cost, stat.quantity),
+        } for stat in months]
+
+        product_stats = SupplierProductMonthlyStat.objects.filter(
+            supplier_id=supplier_id, month__gte=start, month__lte=end,
+        )
+        top = list(
+            product_stats.values_list('product_id', 'product__name').annotate(
+                stock_in_quantity=Sum('quantity'), stock_in_cost=Sum('total_cost'),
+            ).order_by('-stock_in_cost')[:limit]
+        )
+        trends = {product_id: [] for product_id, *_ in top}
+        for stat in product_stats.filter(product_id__in=list(trends)).order_by('month'):
+            trends[stat.product_id].append({
+                'month': stat.month.strftime('%Y-%m'),
+                'quantity': stat.quantity,
+                'avg_unit_cost': average_cost(stat.total_cost, stat.quantity),
+            })
+        result['products'] = [{
+            'product_id': product_id,
+            'product_name': name,
+            'quantity': quantity,
+            'cost': float(cost),
+            'avg_unit_cost': average_cost(cost, quantity),
+            'trend': trends[product_id],
+        } for product_id, name, quantity, cost in top]
+
+    return JsonResponse(result)
 
-    low_stocks = ProductStock.objects.select_related('product').filter(
-        available_quantity__lte=threshold
-    ).order_by('available_quantity')
 
+@staff_member_required
+@read_from_replica
+def low_stock_api(request):
+    """
+    低库存预警数据API
+
+    返回预警级别大于 0 的商品（库存变更时按各商品的补货点/安全库存计算），按部分索引查询
+    """
     result = []
-    for stock in low_stocks:
+    for stock in low_stocks():
         result.append({
+            'product_id': stock.product_id,
             'product_name': stock.product.name,
             'available': stock.available_quantity,
             'frozen': stock.frozen_quantity,
-            'total': stock.total_quantity
+            'total': stock.total_quantity,
+            'reorder_point': stock.reorder,
+            'safety_stock': stock.safety,
+            'level': stock.alert_level,
+            'level_display': stock.get_alert_level_display(),
         })
 
     return JsonResponse({'data': result})
+
+
+@staff_member_required
+@read_from_replica
+def stock_alerts_api(request):
+    """
+    库存预警流API：?after= 上次响应中的 next_after，按预警 ID 升序增量返回
+
+    不带 after 时返回最近 limit 条（升序）
+    """
+    try:
+        after = int(request.GET['after']) if 'after' in request.GET else None
+        limit = min(int(request.GET.get('limit', 50)), 200)
+    except ValueError:
+        return JsonResponse({'error': 'after 和 limit 须为整数'}, status=400)
+    if limit < 0:
+        return JsonResponse({'error': 'limit 不能为负数'}, status=400)
+
+    alerts = StockAlert.objects.select_related('product')
+    if after is None:
+        alerts = list(alerts.order_by('-id')[:limit])[::-1]
+    else:
+        alerts = list(alerts.filter(id__gt=after).order_by('id')[:limit])
+
+    return JsonResponse({
+        'data': [{
+            'id': alert.pk,
+            'product_id': alert.product_id,
+            'product_name': alert.product.name,
+            'level': alert.level,
+            'level_display': alert.get_level_display(),
+            'available': alert.available_quantity,
+            'reorder_point': alert.reorder_point,
+            'safety_stock': alert.safety_stock,
+            'created_at': timezone.localtime(alert.created_at).strftime('%Y-%m-%d %H:%M:%S'),
+            'resolved': alert.resolved_at is not None,
+        } for alert in alerts],
+        'next_after': alerts[-1].pk if alerts else after,
+    })
+
+
+@staff_member_required
+@read_from_replica
+def classification_api(request):
+    """
+    商品 ABC/XYZ 分类数据API
+
+    返回 3 × 3 分类矩阵（商品数、销售额）；?abc=&xyz= 指定分类时同时返回该分类销售额最高的 limit 个商品
+    """
+    try:
+        limit = min(int(request.GET.get('limit', 100)), 500)
+    except ValueError:
+        return JsonResponse({'error': 'limit 须为整数'}, status=400)
+    if limit < 0:
+        return JsonResponse({'error': 'limit 不能为负数'}, status=400)
+
+    cells, last_run = classification_matrix()
+    matrix = [
+        {
+            'abc': abc, 'xyz': xyz,
+            'count': cells.get((abc, xyz), (0, 0))[0],
+            'revenue': float(cells.get((abc, xyz), (0, 0))[1] or 0),
+        }
+        for abc, _ in ProductClassification.ABC_CLASSES
+        for xyz, _ in ProductClassification.XYZ_CLASSES
+    ]
+
+    products = []
+    abc, xyz = request.GET.get('abc'), request.GET.get('xyz')
+    if abc and xyz:
+        for item in ProductClassification.objects.filter(abc_class=abc, xyz_class=xyz).select_related(
+            'product'
+        ).order_by('-revenue')[:limit]:
+            products.append({
+                'product_id': item.product_id,
+                'product_name': item.product.name,
+                'revenue': float(item.revenue),
+                'quantity': item.quantity,
+                'demand_cv': item.demand_cv,
+            })
+
+    return JsonResponse({
+        'computed_at': timezone.localtime(last_run).strftime('%Y-%m-%d %H:%M:%S') if last_run else None,
+        'matrix': matrix,
+        'products': products,
+    })
+
+
+CUSTOMER_ORDERINGS = {
+    'amount': '-total_amount',
+    'profit': '-profit',
+    'orders': '-order_count',
+    'recent': '-last_order_at',
+}
+
+
+@staff_member_required
+@read_from_replica
+def customer_stats_api(request):
+    """
+    客户分析API（读取客户汇总表）
+
+    ?by=user|name 按下单用户或订单客户名称（默认 user）；?segment= 客户分群；
+    ?order=amount|profit|orders|recent 排序（默认 amount）；返回各分群汇总和排名前 limit 的客户
+    """
+    by = request.GET.get('by', 'user')
+    order = request.GET.get('order', 'amount')
+    if by not in ('user', 'name') or order not in CUSTOMER_ORDERINGS:
+        return JsonResponse({'error': 'by 须为 user 或 name，order 须为 amount/profit/orders/recent'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', 50)), 500)
+    except ValueError:
+        return JsonResponse({'error': 'limit 须为整数'}, status=400)
+    if limit < 0:
+        return JsonResponse({'error': 'limit 不能为负数'}, status=400)
+
+    model = CustomerStat if by == 'user' else CustomerNameStat
+    labels = dict(model.SEGMENTS)
+    segments = model.objects.values_list('segment').annotate(
+        customers=Count('pk'), amount=Sum('total_amount'), total_profit=Sum('profit'),
+    ).order_by('-amount')
+
+    stats = model.objects.all()
+    if request.GET.get('segment'):
+        stats = stats.filter(segment=request.GET['segment'])
+    if by == 'user':
+        stats = stats.select_related('user')
+    customers = []
+    for stat in stats.order_by(CUSTOMER_ORDERINGS[order])[:limit]:
+        customers.append({
+            'user_id': stat.user_id if by == 'user' else None,
+            'name': stat.user.username if by == 'user' else stat.customer_name,
+            'orders': stat.order_count,
+            'amount': float(stat.total_amount),
+            'profit': float(stat.profit),
+            'average_amount': round(float(stat.average_order_amount), 2),
+            'first_order_at': timezone.localtime(stat.first_order_at).strftime('%Y-%m-%d %H:%M:%S'),
+            'last_order_at': timezone.localtime(stat.last_order_at).strftime('%Y-%m-%d %H:%M:%S'),
+            'rfm': [stat.recency_score, stat.frequency_score, stat.monetary_score],
+            'segment': stat.segment,
+            'segment_display': stat.get_segment_display() or '未评分',
+        })
+
+    return JsonResponse({
+        'segments': [{
+            'segment': segment,
+            'label': labels.get(segment, '未评分'),
+            'customers': count,
+            'amount': float(amount or 0),
+            'profit': float(profit or 0),
+        } for segment, count, amount, profit in segments],
+        'customers': customers,
+    })
+
+
+@staff_member_required
+async def live_updates_api(request):
+    """
+    报表实时更新（Server-Sent Events）
+
+    推送订单、支付和入库变更对报表的增量（见 live.py），同一进程的全部连接共享一次计算。
+    长连接只能以 ASGI 部署，WSGI 下返回 204（EventSource 收到 204 后不再重连）。
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    return StreamingHttpResponse(
+        dashboard_stream(),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,245 @@
+"""
+SQLite 配置档并发基准测试
+用 gunicorn 多进程启动站点，对同一份数据副本分别以不同配置档施加读写混合负载，
+比较吞吐量、延迟和锁冲突错误
+
+读请求：商品详情、低库存报表（轻量读，避免模板渲染掩盖数据库锁的影响）
+写请求：加入购物车 -> 下单（冻结库存）-> 取消订单（释放库存），库存总量保持不变
+"""
+import http.client
+import os
+import random
+import re
+import secrets
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+
+from .runner import check_benchmark_database, get_bench_users, percentile, PERCENTILES
+from .scenarios import BenchmarkContext
+
+
+ORDER_ID_RE = re.compile(r'/orders/(\d+)/payment/')
+CART_ITEM_RE = re.compile(r'name="item_ids" value="(\d+)"')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def create_sessions(users):
+    """为基准测试用户创建登录会话，返回 sessionid 列表"""
+    keys = []
+    for user in users:
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        keys.append(session.session_key)
+    return keys
+
+
+def copy_database(source, target, journal_mode):
+    """用 SQLite 在线备份接口复制数据库，并设置副本的日志模式"""
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        dst.execute(f'PRAGMA journal_mode={journal_mode}')
+    finally:
+        src.close()
+        dst.close()
+
+
+class GunicornServer:
+    """以指定配置档启动 gunicorn"""
+
+    def __init__(self, database, profile, workers):
+        self.database = database
+        self.profile = profile
+        self.workers = workers
+        self.port = free_port()
+        self.process = None
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            'SQLITE_NAME': str(self.database),
+            'SQLITE_PROFILE': self.profile,
+        }
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', 'warehouse_management.wsgi:application',
+                '--workers', str(self.workers),
+                '--bind', f'127.0.0.1:{self.port}',
+                '--timeout', '120',
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError('gunicorn 启动超时')
+
+    def __exit__(self, *exc):
+        if self.process:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class HttpWorker:
+    """一个并发用户的 HTTP 会话（会话 Cookie + CSRF）"""
+
+    def __init__(self, port, session_key, product_id):
+        self.port = port
+        self.product_id = product_id
+        self.body = ''
+        self.csrf = secrets.token_hex(16)
+        self.cookie = f'sessionid={session_key}; csrftoken={self.csrf}'
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+
+    def request(self, method, path, data=None):
+        headers = {'Cookie': self.cookie}
+        body = None
+        if method == 'POST':
+            body = urlencode(data or {}, doseq=True)
+            headers.update({
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': self.csrf,
+            })
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            self.body = response.read().decode('utf-8', errors='replace')
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+            raise
+        return response
+
+
+def run_load(port, session_keys, product_ids, threads, duration, read_ratio, seed=0):
+    """
+    施加读写混合负载
+
+    Returns:
+        dict: 读/写操作数、吞吐量、延迟分位数、错误数
+    """
+    lock = threading.Lock()
+    stats = {'read': [], 'write': [], 'errors': 0}
+    deadline = time.monotonic() + duration
+
+    def work(index):
+        rng = random.Random(seed + index)
+        worker = HttpWorker(port, session_keys[index], product_ids[index % len(product_ids)])
+        while time.monotonic() < deadline:
+            kind = 'read' if rng.random() < read_ratio else 'write'
+            start = time.perf_counter()
+            try:
+                ok = read_op(worker, rng) if kind == 'read' else write_op(worker)
+            except (OSError, http.client.HTTPException):
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    stats[kind].append(elapsed)
+                else:
+                    stats['errors'] += 1
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    result = {'errors': stats['errors'], 'seconds': round(wall, 2)}
+    for kind in ('read', 'write'):
+        latencies = sorted(stats[kind])
+        result[kind] = {
+            'ops': len(latencies),
+            'throughput_ops': round(len(latencies) / wall, 2),
+            'latency_ms': {f'p{pct}': round(percentile(latencies, pct), 2) for pct in PERCENTILES},
+        }
+    return result
+
+
+def read_op(worker, rng):
+    if rng.random() < 0.8:
+        path = f'/products/{worker.product_id}/'
+    else:
+        path = '/admin/reports/api/low-stock/'
+    return worker.request('GET', path).status == 200
+
+
+def write_op(worker):
+    """加入购物车、查看购物车、下单、取消订单，任一步失败即视为一次失败的写操作"""
+    response = worker.request('POST', '/cart/add/', {'product_id': worker.product_id, 'quantity': 1})
+    if response.status != 200:
+        return False
+    response, body = worker.request('GET', '/cart/'), worker.body
+    match = CART_ITEM_RE.search(body)
+    if response.status != 200 or not match:
+        return False
+    response = worker.request('POST', '/orders/create/', {
+        'item_ids': [match.group(1)], 'customer_name': '并发测试',
+    })
+    match = ORDER_ID_RE.search(response.getheader('Location', ''))
+    if response.status != 302 or not match:
+        return False
+    response = worker.request('POST', f'/orders/{match.group(1)}/cancel/')
+    return response.status == 302
+
+
+def run_profiles(profiles, workers=4, threads=16, duration=20, read_ratio=0.8, stdout=None):
+    """
+    依次以各配置档运行并发基准测试
+
+    每个配置档使用当前数据库的独立副本，basic 配置档副本使用 DELETE 日志模式，
+    tuned 配置档副本使用 WAL 日志模式。
+    """
+    check_benchmark_database()
+    stdout = stdout or (lambda message: None)
+    source = settings.DATABASES['default']['NAME']
+    context = BenchmarkContext()
+    for product_id in context.product_ids[:threads]:
+        context.ensure_stock(product_id)
+    users = get_bench_users(threads)
+    session_keys = create_sessions(users)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for profile in profiles:
+            database = Path(tmpdir) / f'{profile}.sqlite3'
+            copy_database(str(source), str(database), 'WAL' if profile == 'tuned' else 'DELETE')
+            stdout(f'配置档 {profile}: {workers} 个 gunicorn worker, {threads} 个并发线程, {duration} 秒')
+            with GunicornServer(database, profile, workers) as server:
+                results[profile] = run_load(
+                    server.port, session_keys, context.product_ids,
+                    threads, duration, read_ratio,
+                )
+    return results
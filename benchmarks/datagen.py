@@ -0,0 +1,601 @@
+"""
+测试数据生成模块
+按配置规模批量生成用户、分类、商品、库存、供应商、入库记录、购物车、订单及支付数据
+
+生成规则：
+- 使用固定随机种子和固定截止日期（DEFAULT_END_DATE），相同参数生成相同数据
+- 分批写入，主键预先分配，不依赖 RETURNING；基础数据使用 bulk_create，
+  订单、明细、支付按元组 executemany 写入
+- bulk_create 不触发信号，库存余额由生成器按单据直接计算：
+  冻结库存 = 待支付订单数量之和
+  可用库存 = 入库总量 - 已完成订单数量 - 待支付订单数量
+"""
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, time as dt_time
+from decimal import Decimal
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, router, transaction
+from django.utils import timezone
+
+from apps.archive.models import ArchivedOrder, ArchivedOrderItem, ArchivedPayment
+from apps.cart.models import Cart, CartItem
+from apps.events.models import OutboxCursor, OutboxEvent
+from apps.inventory.models import (
+    StockAlert, StockIn, Supplier, SupplierMonthlyStat, SupplierProductMonthlyStat,
+)
+from apps.inventory.supplier_stats import rebuild_supplier_stats
+from apps.jobs.models import Job
+from apps.orders.models import IdempotencyKey, Order, OrderItem, Payment
+from apps.products.models import Category, Product, ProductStock, StockShard
+from apps.products.services import invalidate_category_tree
+from apps.reports.models import (
+    CustomerNameStat, CustomerStat, InventorySnapshot, InventorySnapshotItem, OrderItemRollup, OrderRollup,
+    ProductClassification,
+)
+from apps.users.models import User
+from warehouse_management.fields import LocalDateField
+
+
+# 默认数据截止日期：生成的时间不依赖运行时刻
+DEFAULT_END_DATE = date(2026, 10, 1)
+# 生成器创建的用户名（user_<种子>_<序号>），清空数据时只删除这些用户
+GENERATED_USERNAME_REGEX = r'^user_[0-9]+_[0-9]{7,}$'
+
+CATEGORY_NAMES = [
+    '食品饮料', '日用百货', '家用电器', '数码配件', '服装鞋帽', '美妆个护',
+    '母婴用品', '运动户外', '办公文具', '家居家装', '五金工具', '宠物用品',
+]
+SUBCATEGORY_NAMES = [
+    '零食', '饮料', '粮油', '清洁', '纸品', '厨具', '小家电', '大家电', '耳机',
+    '充电器', '上衣', '裤装', '护肤', '彩妆', '奶粉', '玩具', '健身', '露营',
+    '纸张', '书写', '灯具', '收纳', '电动工具', '猫粮',
+]
+PRODUCT_WORDS = ['经典', '精选', '特惠', '家庭装', '便携', '加厚', '升级版', '进口', '有机', '轻量']
+SURNAMES = ['王', '李', '张', '刘', '陈', '杨', '黄', '赵', '吴', '周', '徐', '孙', '马', '朱', '胡']
+CUSTOMER_SUFFIXES = ['先生', '女士', '便利店', '超市', '商行', '餐厅']
+SUPPLIER_SUFFIXES = ['贸易有限公司', '食品厂', '供应链公司', '批发部', '实业公司']
+
+# 订单状态分布（已完成 / 已取消 / 待支付）
+STATUS_WEIGHTS = [('completed', 80), ('cancelled', 12), ('pending', 8)]
+# 下单时段分布（0-23 点）
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 3, 5, 8, 10, 12, 12, 11, 10, 10, 11, 12, 13, 14, 13, 10, 7, 4, 2]
+# 每单商品数量分布
+QUANTITY_WEIGHTS = [(1, 50), (2, 25), (3, 12), (4, 8), (5, 5)]
+
+# 订单类数据按元组直接写入时的列顺序
+ORDER_COLUMNS = [
+    'id', 'order_no', 'user_id', 'total_amount', 'total_cost', 'status', 'payment_method',
+    'customer_name', 'paid_at', 'created_at', 'updated_at',
+]
+ORDER_ITEM_COLUMNS = ['id', 'order_id', 'product_id', 'quantity', 'unit_price', 'cost_price']
+PAYMENT_COLUMNS = [
+    'id', 'payment_no', 'order_id', 'amount', 'payment_method', 'status', 'trade_no',
+    'operator_id', 'paid_at', 'created_at',
+]
+
+
+@contextmanager
+def disable_auto_now(*models):
+    """临时关闭 auto_now/auto_now_add，使批量写入可以指定历史时间"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+@contextmanager
+def fast_sqlite_writes():
+    """SQLite 批量写入期间关闭同步刷盘，生成结束后恢复（事务中不能修改，保持不变）"""
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+
+
+# 归档表沿用原主键，预分配订单、明细、支付主键时需避开已归档的 ID
+ARCHIVE_MODELS = {Order: ArchivedOrder, OrderItem: ArchivedOrderItem, Payment: ArchivedPayment}
+
+
+def next_id(model):
+    """预分配主键起始值"""
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    if model in ARCHIVE_MODELS:
+        archived = ARCHIVE_MODELS[model].objects.order_by('-pk').values_list('pk', flat=True).first()
+        last = max(last, archived or 0)
+    return last + 1
+
+
+def cumulative(weights):
+    total = 0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+class DataGenerator:
+    """
+    测试数据生成器
+
+    Args:
+        seed: 随机种子
+        users/categories/subcategories/products/suppliers/carts: 各类数据数量
+            （subcategories 为每个一级分类下的子分类数）
+        stock_ins_per_product: 每个商品的入库记录数
+        orders: 订单数量
+        order_items: 订单明细目标数量，设置后按明细数量生成订单（优先于 orders）
+        max_items_per_order: 每单最多商品种类数
+        days: 历史数据覆盖的天数
+        end_date: 数据截止日期（含当天，按 TIME_ZONE），默认 DEFAULT_END_DATE
+        chunk_size: 每批写入的记录数
+        stdout: 进度输出函数
+    """
+
+    def __init__(self, seed=42, users=100, categories=8, subcategories=4, products=500,
+                 suppliers=20, stock_ins_per_product=3, carts=50, orders=10000,
+                 order_items=None, max_items_per_order=5, days=365, end_date=None, chunk_size=5000,
+                 stdout=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.users = users
+        self.categories = min(categories, len(CATEGORY_NAMES) * 10)
+        self.subcategories = subcategories
+        self.products = products
+        self.suppliers = suppliers
+        self.stock_ins_per_product = max(stock_ins_per_product, 1)
+        self.carts = min(carts, users)
+        self.orders = orders
+        self.order_items = order_items
+        self.max_items_per_order = max(max_items_per_order, 1)
+        self.days = max(days, 1)
+        self.chunk_size = chunk_size
+        self.stdout = stdout or (lambda message: None)
+
+        end_date = end_date or DEFAULT_END_DATE
+        self.end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), dt_time.min))
+        self.start = self.end - timedelta(days=self.days)
+        self.counts = Counter()
+
+    # ---------- 公共入口 ----------
+
+    def run(self):
+        started = time.perf_counter()
+        models = [User, Category, Product, ProductStock, Supplier, StockIn, Cart, CartItem,
+                  Order, OrderItem, Payment]
+        with disable_auto_now(*models), fast_sqlite_writes():
+            self.operator_id = (
+                User.objects.filter(is_superuser=True).values_list('id', flat=True).first()
+            )
+            user_ids = self.generate_users()
+            category_ids = self.generate_categories()
+            products = self.generate_products(category_ids)
+            supplier_ids = self.generate_suppliers()
+            demand, frozen = self.generate_orders(user_ids, products)
+            stock_in_totals = self.generate_stock_ins(products, supplier_ids, demand)
+            self.generate_stocks(products, stock_in_totals, demand, frozen)
+            self.generate_carts(user_ids, products)
+            self.reset_sequences(models)
+        # 入库记录批量写入不触发入库信号，按全部入库记录重新计算供应商汇总
+        monthly, _ = rebuild_supplier_stats()
+        self.stdout(f'供应商月汇总: {monthly}')
+        invalidate_category_tree()
+        self.counts['seconds'] = round(time.perf_counter() - started, 1)
+        return self.counts
+
+    # ---------- 基础数据 ----------
+
+    def bulk_create(self, model, objs):
+        for offset in range(0, len(objs), self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(objs[offset:offset + self.chunk_size])
+        self.counts[model._meta.db_table] += len(objs)
+
+    def random_datetime(self, start=None, end=None):
+        start = start or self.start
+        end = end or self.end
+        return start + timedelta(seconds=self.random.uniform(0, (end - start).total_seconds()))
+
+    def generate_users(self):
+        password = make_password('password')
+        first_id = next_id(User)
+        users = []
+        for index in range(self.users):
+            joined = self.random_datetime(self.start - timedelta(days=30), self.start)
+            users.append(User(
+                id=first_id + index,
+                username=f'user_{self.seed}_{index:07d}',
+                password=password,
+                is_active=True,
+                date_joined=joined,
+                created_at=joined,
+                updated_at=joined,
+            ))
+        self.bulk_create(User, users)
+        self.stdout(f'用户: {len(users)}')
+        return [user.id for user in users]
+
+    def generate_categories(self):
+        first_id = next_id(Category)
+        roots = []
+        children = []
+        created = self.start - timedelta(days=30)
+        for index in range(self.categories):
+            name = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+            if index >= len(CATEGORY_NAMES):
+                name = f'{name}{index // len(CATEGORY_NAMES) + 1}'
+            roots.append(Category(
+                id=first_id + index, name=name, sort_order=index, created_at=created,
+            ))
+        next_child_id = first_id + len(roots)
+        for root in roots:
+            for index in range(self.subcategories):
+                children.append(Category(
+                    id=next_child_id,
+                    name=f'{root.name}-{self.random.choice(SUBCATEGORY_NAMES)}{index + 1}',
+                    parent_id=root.id,
+                    sort_order=index,
+                    created_at=created,
+                ))
+                next_child_id += 1
+        self.bulk_create(Category, roots + children)
+        self.stdout(f'分类: {len(roots)} 个一级, {len(children)} 个二级')
+        # 商品挂在二级分类下，没有二级分类时挂在一级分类下
+        return [category.id for category in (children or roots)]
+
+    def generate_products(self, category_ids):
+        first_id = next_id(Product)
+        products = []
+        for index in range(self.products):
+            cost = Decimal(self.random.randint(500, 50000)) / 100
+            margin = Decimal(self.random.randint(110, 180)) / 100
+            # 商品及期初入库早于所有订单
+            created = self.random_datetime(self.start - timedelta(days=30), self.start)
+            products.append(Product(
+                id=first_id + index,
+                name=f'{self.random.choice(PRODUCT_WORDS)}商品-{self.seed}-{index:07d}',
+                category_id=self.random.choice(category_ids) if category_ids else None,
+                cost_price=cost,
+                selling_price=(cost * margin).quantize(Decimal('0.01')),
+                is_active=self.random.random() > 0.03,
+                created_at=created,
+                updated_at=created,
+            ))
+        self.bulk_create(Product, products)
+        self.stdout(f'商品: {len(products)}')
+        return products
+
+    def generate_suppliers(self):
+        first_id = next_id(Supplier)
+        suppliers = []
+        for index in range(self.suppliers):
+            suppliers.append(Supplier(
+                id=first_id + index,
+                name=f'{self.random.choice(SURNAMES)}氏{self.random.choice(SUPPLIER_SUFFIXES)}{index + 1}',
+                contact=f'{self.random.choice(SURNAMES)}经理',
+                phone=f'13{self.random.randint(100000000, 999999999)}',
+                created_at=self.start - timedelta(days=30),
+            ))
+        self.bulk_create(Supplier, suppliers)
+        self.stdout(f'供应商: {len(suppliers)}')
+        return [supplier.id for supplier in suppliers]
+
+    # ---------- 订单 ----------
+
+    def generate_orders(self, user_ids, products):
+        """
+        生成订单、订单明细和支付记录
+
+        商品热度服从长尾分布，下单时间带有增长趋势、周末和时段波动。
+
+        Returns:
+            tuple: (各商品已售+待支付数量, 各商品冻结数量)
+        """
+        demand = Counter()
+        frozen = Counter()
+        if not user_ids or not products:
+            return demand, frozen
+
+        rng = self.random
+        product_cum = cumulative(1 / (rank + 1) ** 1.1 for rank in range(len(products)))
+        status_values = [status for status, _ in STATUS_WEIGHTS]
+        status_cum = cumulative(weight for _, weight in STATUS_WEIGHTS)
+        quantity_values = [quantity for quantity, _ in QUANTITY_WEIGHTS]
+        quantity_cum = cumulative(weight for _, weight in QUANTITY_WEIGHTS)
+        hour_cum = cumulative(HOUR_WEIGHTS)
+        # 越接近当前日期订单越多，周末上浮
+        day_weights = []
+        for offset in range(self.days):
+            day = (self.start + timedelta(days=offset)).date()
+            weight = 1 + offset / self.days
+            if day.weekday() >= 5:
+                weight *= 1.3
+            day_weights.append(weight)
+        day_cum = cumulative(day_weights)
+        start_day = timezone.localtime(self.start).date()
+        tz = timezone.get_current_timezone()
+
+        order_id = next_id(Order)
+        item_id = next_id(OrderItem)
+        payment_id = next_id(Payment)
+        order_limit = self.orders if self.order_items is None else None
+        item_limit = self.order_items
+
+        orders, items, payments = [], [], []
+        order_count = item_count = flushes = 0
+        while True:
+            if order_limit is not None and order_count >= order_limit:
+                break
+            if item_limit is not None and item_count >= item_limit:
+                break
+
+            day = start_day + timedelta(days=rng.choices(range(self.days), cum_weights=day_cum)[0])
+            hour = rng.choices(range(24), cum_weights=hour_cum)[0]
+            created = timezone.make_aware(
+                datetime.combine(day, dt_time(hour, rng.randrange(60), rng.randrange(60))), tz
+            )
+            if created > self.end:
+                created = self.end
+            status = rng.choices(status_values, cum_weights=status_cum)[0]
+            if status == 'pending':
+                # 待支付订单只出现在最近几天
+                created = self.random_datetime(self.end - timedelta(days=min(3, self.days)), self.end)
+
+            line_count = rng.randint(1, self.max_items_per_order)
+            if item_limit is not None:
+                line_count = min(line_count, item_limit - item_count)
+            chosen = {rng.choices(products, cum_weights=product_cum)[0] for _ in range(line_count)}
+
+            total_amount = Decimal('0')
+            total_cost = Decimal('0')
+            for product in chosen:
+                quantity = rng.choices(quantity_values, cum_weights=quantity_cum)[0]
+                items.append((
+                    item_id, order_id, product.id, quantity, product.selling_price, product.cost_price,
+                ))
+                item_id += 1
+                total_amount += product.selling_price * quantity
+                total_cost += product.cost_price * quantity
+                if status != 'cancelled':
+                    demand[product.id] += quantity
+                if status == 'pending':
+                    frozen[product.id] += quantity
+
+            paid_at = None
+            payment_method = None
+            if status == 'completed':
+                paid_at = created + timedelta(minutes=rng.randint(1, 120))
+                payment_method = 'offline' if rng.random() < 0.6 else 'online'
+                payments.append((
+                    payment_id, f'PAY{self.seed}{payment_id:012d}', order_id, total_amount,
+                    '线下支付' if payment_method == 'offline' else '线上支付', 'success',
+                    f'T{self.seed}{payment_id:014d}' if payment_method == 'online' else '',
+                    self.operator_id, paid_at, paid_at,
+                ))
+                payment_id += 1
+            elif status == 'cancelled' and rng.random() < 0.2:
+                payments.append((
+                    payment_id, f'PAY{self.seed}{payment_id:012d}', order_id, total_amount,
+                    '线上支付', 'failed', '', self.operator_id, None, created,
+                ))
+                payment_id += 1
+
+            orders.append((
+                order_id, f'ORD{self.seed}{order_id:012d}', rng.choice(user_ids),
+                total_amount, total_cost, status, payment_method,
+                f'{rng.choice(SURNAMES)}{rng.choice(CUSTOMER_SUFFIXES)}',
+                paid_at, created, paid_at or created,
+            ))
+            order_id += 1
+            order_count += 1
+            item_count += len(chosen)
+
+            if len(items) >= self.chunk_size:
+                self.flush_orders(orders, items, payments)
+                orders, items, payments = [], [], []
+                flushes += 1
+                if flushes % 20 == 0:
+                    self.stdout(f'订单: {order_count}, 明细: {item_count}')
+
+        self.flush_orders(orders, items, payments)
+        self.stdout(f'订单: {order_count}, 明细: {item_count}')
+        return demand, frozen
+
+    def flush_orders(self, orders, items, payments):
+        with transaction.atomic():
+            self.insert_rows(Order, ORDER_COLUMNS, orders)
+            self.insert_rows(OrderItem, ORDER_ITEM_COLUMNS, items)
+            self.insert_rows(Payment, PAYMENT_COLUMNS, payments)
+
+    def insert_rows(self, model, columns, rows):
+        """
+        按列批量插入元组数据
+
+        订单、明细、支付是千万级数据表，跳过模型实例化和 bulk_create 的逐字段编译，
+        直接 executemany。未列出的 LocalDateField 按源字段计算本地日期，其他未列出的字段写入字段默认值。
+        """
+        if not rows:
+            return
+        fields = [model._meta.get_field(column) for column in columns]
+        local_dates = [
+            (field, columns.index(field.source)) for field in model._meta.concrete_fields
+            if isinstance(field, LocalDateField) and field.attname not in columns
+        ]
+        fields += [field for field, _ in local_dates]
+        rows = [
+            tuple(row) + tuple(timezone.localdate(row[index]) for _, index in local_dates) for row in rows
+        ]
+        missing = [field for field in model._meta.concrete_fields if field not in fields]
+        defaults = tuple(field.get_db_prep_save(field.get_default(), connection) for field in missing)
+        converters = [
+            (index, field) for index, field in enumerate(fields)
+            if field.get_internal_type() in ('DecimalField', 'DateField', 'DateTimeField')
+        ]
+        prepared = []
+        for row in rows:
+            row = list(row)
+            for index, field in converters:
+                row[index] = field.get_db_prep_save(row[index], connection)
+            prepared.append(tuple(row) + defaults)
+
+        quote = connection.ops.quote_name
+        names = ', '.join(quote(field.column) for field in fields + missing)
+        placeholders = ', '.join(['%s'] * (len(fields) + len(missing)))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {quote(model._meta.db_table)} ({names}) VALUES ({placeholders})',
+                prepared,
+            )
+        self.counts[model._meta.db_table] += len(rows)
+
+    # ---------- 库存 ----------
+
+    def generate_stock_ins(self, products, supplier_ids, demand):
+        """
+        生成入库记录
+
+        期初入库覆盖全部销售需求，后续补货只增加结余，保证任意时刻库存不为负。
+
+        Returns:
+            Counter: 各商品入库总量
+        """
+        rng = self.random
+        totals = Counter()
+        first_id = next_id(StockIn)
+        records = []
+        for product in products:
+            restocks = [rng.randint(10, 200) for _ in range(self.stock_ins_per_product - 1)]
+            opening = demand[product.id] + rng.randint(0, 100)
+            dates = [product.created_at] + sorted(
+                self.random_datetime(product.created_at) for _ in restocks
+            )
+            for quantity, created in zip([opening] + restocks, dates):
+                if quantity <= 0:
+                    continue
+                stock_in_id = first_id + len(records)
+                records.append(StockIn(
+                    id=stock_in_id,
+                    stock_in_no=f'SI{self.seed}{stock_in_id:012d}',
+                    product_id=product.id,
+                    quantity=quantity,
+                    unit_cost=(product.cost_price * Decimal(rng.randint(90, 110)) / 100).quantize(Decimal('0.01')),
+                    supplier_id=rng.choice(supplier_ids) if supplier_ids else None,
+                    operator_id=self.operator_id,
+                    created_at=created,
+                ))
+                totals[product.id] += quantity
+            if len(records) >= self.chunk_size:
+                self.bulk_create(StockIn, records)
+                first_id += len(records)
+                records = []
+        self.bulk_create(StockIn, records)
+        self.stdout(f'入库记录: {self.counts[StockIn._meta.db_table]}')
+        return totals
+
+    def generate_stocks(self, products, stock_in_totals, demand, frozen):
+        first_id = next_id(ProductStock)
+        stocks = []
+        for index, product in enumerate(products):
+            stocks.append(ProductStock(
+                id=first_id + index,
+                product_id=product.id,
+                available_quantity=stock_in_totals[product.id] - demand[product.id],
+                frozen_quantity=frozen[product.id],
+                updated_at=self.end,
+            ))
+        self.bulk_create(ProductStock, stocks)
+        self.stdout(f'商品库存: {len(stocks)}')
+
+    def generate_carts(self, user_ids, products):
+        rng = self.random
+        first_cart_id = next_id(Cart)
+        first_item_id = next_id(CartItem)
+        carts = []
+        items = []
+        active = [product for product in products if product.is_active]
+        for index, user_id in enumerate(rng.sample(user_ids, self.carts)):
+            created = self.random_datetime(self.end - timedelta(days=30))
+            cart = Cart(id=first_cart_id + index, user_id=user_id, created_at=created, updated_at=created)
+            carts.append(cart)
+            for product in rng.sample(active, min(rng.randint(1, 5), len(active))):
+                items.append(CartItem(
+                    id=first_item_id + len(items), cart_id=cart.id, product_id=product.id,
+                    quantity=rng.randint(1, 3), created_at=created, updated_at=created,
+                ))
+        self.bulk_create(Cart, carts)
+        self.bulk_create(CartItem, items)
+        self.stdout(f'购物车: {len(carts)}, 购物车商品: {len(items)}')
+
+    def reset_sequences(self, models):
+        """显式主键写入后同步数据库序列（SQLite 无需处理）"""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def clear_data(stdout=None):
+    """
+    清空业务数据（保留生成器以外的用户和支付配置）
+
+    直接执行 DELETE，避免 ORM 级联删除在大数据量下逐行加载对象。
+    用户只删除生成器创建的（见 GENERATED_USERNAME_REGEX），先删除其管理日志和用户组、权限关联。
+    """
+    stdout = stdout or (lambda message: None)
+    models = [
+        OutboxEvent, OutboxCursor, IdempotencyKey, Job,
+        OrderRollup, OrderItemRollup, InventorySnapshotItem, InventorySnapshot, ProductClassification,
+        CustomerStat, CustomerNameStat, Payment, OrderItem, Order, CartItem, Cart,
+        SupplierProductMonthlyStat, SupplierMonthlyStat, StockAlert,
+        StockIn, StockShard, ProductStock, Supplier, Product, Category,
+    ]
+    generated_users, params = User.objects.filter(
+        username__regex=GENERATED_USERNAME_REGEX, is_superuser=False,
+    ).values('pk').query.sql_with_params()
+    user_references = [
+        (LogEntry, 'user_id'),
+        (User.groups.through, 'user_id'),
+        (User.user_permissions.through, 'user_id'),
+        (User, 'id'),
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+            stdout(f'已清空 {model._meta.db_table}')
+        for model, column in user_references:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+                f'WHERE {connection.ops.quote_name(column)} IN (SELECT * FROM ({generated_users}) AS generated)',
+                params,
+            )
+        stdout(f'已删除生成的用户 {cursor.rowcount}')
+    # 归档表可能在独立的归档库
+    archive = connections[router.db_for_write(ArchivedOrder)]
+    with transaction.atomic(using=archive.alias), archive.cursor() as cursor:
+        for model in [ArchivedPayment, ArchivedOrderItem, ArchivedOrder]:
+            cursor.execute(f'DELETE FROM {archive.ops.quote_name(model._meta.db_table)}')
+            stdout(f'已清空 {model._meta.db_table}')
+    invalidate_category_tree()
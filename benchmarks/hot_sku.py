@@ -0,0 +1,129 @@
+"""
+热门商品下单争用基准测试
+
+多个进程对同一个商品并发执行下单事务（创建订单和明细 -> 冻结库存 -> 模拟其余下单工作），
+分别在不分片和不同库存分片数下测量下单吞吐量和延迟。
+
+hold_ms 模拟冻结库存之后事务中的其余工作（写事件、清购物车、应用服务器与数据库之间的往返），
+这段时间内库存行锁一直被持有：不分片时所有下单排队等待同一行，分片后分散到多行。
+SQLite 的写事务对整个数据库互斥，分片不会提高吞吐量，该测试主要用于 PostgreSQL。
+分片商品的 ProductStock 合计由后台任务合并刷新（STOCK_SHARD_REFRESH_SECONDS），
+结果中的 stock_writes 为压测期间 ProductStock 行的写入次数。
+"""
+import multiprocessing
+import time
+
+from django.db import DatabaseError, connections, transaction
+
+from apps.events.services import record_events
+from apps.inventory.services import InsufficientStockError, reserve_stock, set_stock_shards
+from apps.orders.models import Order, OrderItem
+from apps.orders.services import cancel_orders, generate_order_no, order_created_event
+from apps.products.models import Product, ProductStock
+
+from .runner import check_benchmark_database, get_bench_users, percentile, PERCENTILES
+from warehouse_management.dbutils import close_before_fork
+from .scenarios import BenchmarkContext
+
+
+CUSTOMER_NAME = '热门商品压测'
+
+
+def checkout(user, product, hold_ms):
+    """与 order_create 视图相同的下单事务，购买 1 件"""
+    with transaction.atomic():
+        order = Order.objects.create(
+            order_no=generate_order_no(suffix_length=12),
+            user=user,
+            total_amount=product.selling_price,
+            total_cost=product.cost_price,
+            customer_name=CUSTOMER_NAME,
+            status='pending',
+        )
+        OrderItem.objects.create(
+            order=order, product=product, quantity=1,
+            unit_price=product.selling_price, cost_price=product.cost_price,
+        )
+        reserve_stock({product.pk: 1})
+        if hold_ms:
+            time.sleep(hold_ms / 1000)
+        record_events([order_created_event(order, {product.pk: 1})])
+
+
+def worker_process(user, product, duration, hold_ms, queue):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            checkout(user, product, hold_ms)
+        except (DatabaseError, InsufficientStockError):
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    connections.close_all()
+    queue.put((latencies, errors))
+
+
+def run_once(users, product, duration, hold_ms):
+    """所有进程同时压测一轮，返回吞吐量、延迟分位数、ProductStock 写入次数和错误数"""
+    version = ProductStock.objects.values_list('version', flat=True).get(product=product)
+    close_before_fork()
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    processes = [
+        context.Process(target=worker_process, args=(user, product, duration, hold_ms, queue))
+        for user in users
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    return {
+        'orders': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        # 压测期间 ProductStock 行的写入次数（分片商品只有刷新合计时写入）
+        'stock_writes': ProductStock.objects.values_list('version', flat=True).get(product=product) - version,
+        'throughput_ops': round(len(latencies) / wall, 2),
+        'latency_ms': {f'p{pct}': round(percentile(latencies, pct), 2) for pct in PERCENTILES},
+    }
+
+
+def cleanup():
+    """取消压测订单，释放冻结的库存"""
+    ids = list(Order.objects.filter(customer_name=CUSTOMER_NAME, status='pending').values_list('pk', flat=True))
+    with transaction.atomic():
+        cancel_orders(ids)
+
+
+def run_hot_sku(shard_counts, processes=16, duration=10, hold_ms=5, stdout=None):
+    """
+    依次以各分片数运行热门商品下单压测，结束后恢复商品原来的分片数
+
+    Returns:
+        dict: {分片数: 结果}
+    """
+    check_benchmark_database()
+    stdout = stdout or (lambda message: None)
+    context = BenchmarkContext()
+    product_id = context.product_ids[0]
+    context.ensure_stock(product_id)
+    product = Product.objects.select_related('stock').get(pk=product_id)
+    original_shards = product.stock.shard_count
+    users = get_bench_users(processes)
+
+    results = {}
+    try:
+        for shard_count in shard_counts:
+            set_stock_shards(product_id, shard_count)
+            stdout(f'分片数 {shard_count}: {processes} 个进程, {duration} 秒, 事务持锁 {hold_ms} ms')
+            results[shard_count] = run_once(users, product, duration, hold_ms)
+            cleanup()
+    finally:
+        set_stock_shards(product_id, original_shards)
+    return results
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from benchmarks.hot_sku import run_hot_sku
+from benchmarks.runner import write_results
+
+
+class Command(BaseCommand):
+    help = '多进程并发购买同一个商品，比较不分片和库存分片下的下单吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', nargs='+', type=int, default=[0, 4, 16], help='依次测试的分片数，0 表示不分片')
+        parser.add_argument('--processes', type=int, default=16, help='并发下单进程数')
+        parser.add_argument('--duration', type=int, default=10, help='每个分片数的压测时长（秒）')
+        parser.add_argument('--hold-ms', type=int, default=5, help='冻结库存后事务继续持有的时间（毫秒）')
+        parser.add_argument('--output', help='结果文件路径，默认 benchmarks/results/hot_sku_<时间>.json')
+
+    def handle(self, *args, **options):
+        results = run_hot_sku(
+            options['shards'],
+            processes=options['processes'],
+            duration=options['duration'],
+            hold_ms=options['hold_ms'],
+            stdout=self.stdout.write,
+        )
+
+        self.stdout.write(f'{"分片数":<8}{"下单/秒":>10}{"p50":>10}{"p95":>10}{"p99":>10}{"库存行写入":>10}{"错误":>8}')
+        for shard_count, result in results.items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{shard_count:<8}{result["throughput_ops"]:>10.1f}'
+                f'{latency["p50"]:>10.1f}{latency["p95"]:>10.1f}{latency["p99"]:>10.1f}{result["stock_writes"]:>10}{result["errors"]:>8}'
+            )
+
+        output = Path(options['output']) if options['output'] else (
+            Path(settings.BASE_DIR) / 'benchmarks' / 'results'
+            / f'hot_sku_{timezone.localtime().strftime("%Y%m%d_%H%M%S")}.json'
+        )
+        write_results({
+            'options': {k: options[k] for k in ('processes', 'duration', 'hold_ms')},
+            'database': settings.DATABASES['default']['ENGINE'],
+            'results': results,
+        }, output)
+        self.stdout.write(f'结果已保存: {output}')
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from benchmarks.concurrency import run_profiles
+from benchmarks.runner import write_results
+from warehouse_management.database import SQLITE_PROFILES
+
+
+class Command(BaseCommand):
+    help = '在 gunicorn 多进程下比较 SQLite 配置档的并发读写吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES), choices=SQLITE_PROFILES)
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 进程数')
+        parser.add_argument('--threads', type=int, default=16, help='并发客户端线程数')
+        parser.add_argument('--duration', type=int, default=20, help='每个配置档的压测时长（秒）')
+        parser.add_argument('--read-ratio', type=float, default=0.8, help='读请求占比')
+        parser.add_argument('--output', help='结果文件路径，默认 benchmarks/results/sqlite_profiles_<时间>.json')
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('该基准测试仅适用于 SQLite 数据库')
+
+        results = run_profiles(
+            options['profiles'],
+            workers=options['workers'],
+            threads=options['threads'],
+            duration=options['duration'],
+            read_ratio=options['read_ratio'],
+            stdout=self.stdout.write,
+        )
+
+        self.stdout.write(
+            f'{"配置档":<10}{"读/秒":>10}{"读p95":>10}{"写/秒":>10}{"写p95":>10}{"错误":>8}'
+        )
+        for profile, result in results.items():
+            self.stdout.write(
+                f'{profile:<10}{result["read"]["throughput_ops"]:>10.1f}'
+                f'{result["read"]["latency_ms"]["p95"]:>10.1f}'
+                f'{result["write"]["throughput_ops"]:>10.1f}'
+                f'{result["write"]["latency_ms"]["p95"]:>10.1f}{result["errors"]:>8}'
+            )
+
+        output = Path(options['output']) if options['output'] else (
+            Path(settings.BASE_DIR) / 'benchmarks' / 'results'
+            / f'sqlite_profiles_{timezone.localtime().strftime("%Y%m%d_%H%M%S")}.json'
+        )
+        write_results({'options': {k: options[k] for k in ('workers', 'threads', 'duration', 'read_ratio')},
+                       'profiles': results}, output)
+        self.stdout.write(f'结果已保存: {output}')
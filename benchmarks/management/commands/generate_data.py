@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from benchmarks.datagen import DEFAULT_END_DATE, DataGenerator, clear_data
+from benchmarks.runner import check_benchmark_database
+
+
+def end_date(value):
+    return timezone.localdate() if value == 'today' else date.fromisoformat(value)
+
+
+class Command(BaseCommand):
+    help = '批量生成测试数据（用户、分类、商品、库存、入库、购物车、订单、支付）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='随机种子，相同种子生成相同数据')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=8, help='一级分类数')
+        parser.add_argument('--subcategories', type=int, default=4, help='每个一级分类下的子分类数')
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--suppliers', type=int, default=20)
+        parser.add_argument('--stock-ins-per-product', type=int, default=3)
+        parser.add_argument('--carts', type=int, default=50)
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--order-items', type=int, default=None,
+                            help='订单明细目标数量，设置后忽略 --orders')
+        parser.add_argument('--max-items-per-order', type=int, default=5)
+        parser.add_argument('--days', type=int, default=365, help='订单历史覆盖的天数')
+        parser.add_argument('--end-date', type=end_date, default=DEFAULT_END_DATE,
+                            help=f'数据截止日期 YYYY-MM-DD（默认 {DEFAULT_END_DATE}）；'
+                                 'today 表示今天，报表按最近天数统计的基准测试需要')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='每批写入的记录数')
+        parser.add_argument('--clear', action='store_true', help='生成前清空业务数据（保留超级用户）')
+
+    def handle(self, *args, **options):
+        check_benchmark_database()
+        if options['clear']:
+            clear_data(stdout=self.stdout.write)
+
+        generator = DataGenerator(
+            seed=options['seed'],
+            users=options['users'],
+            categories=options['categories'],
+            subcategories=options['subcategories'],
+            products=options['products'],
+            suppliers=options['suppliers'],
+            stock_ins_per_product=options['stock_ins_per_product'],
+            carts=options['carts'],
+            orders=options['orders'],
+            order_items=options['order_items'],
+            max_items_per_order=options['max_items_per_order'],
+            days=options['days'],
+            end_date=options['end_date'],
+            chunk_size=options['chunk_size'],
+            stdout=self.stdout.write,
+        )
+        counts = generator.run()
+
+        self.stdout.write(self.style.SUCCESS(f'生成完成，耗时 {counts.pop("seconds")} 秒'))
+        for table, count in counts.items():
+            self.stdout.write(f'  {table}: {count}')
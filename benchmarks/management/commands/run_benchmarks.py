@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from benchmarks.runner import BenchmarkRunner, compare, write_results
+from benchmarks.scenarios import SCENARIOS
+
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+DEFAULT_RESULTS_DIR = Path(settings.BASE_DIR) / 'benchmarks' / 'results'
+
+
+class Command(BaseCommand):
+    help = '运行前台、下单和报表接口的基准测试，输出 JSON 结果并与基线比较'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help='场景名称或前缀，留空运行全部场景')
+        parser.add_argument('--list', action='store_true', help='列出所有场景')
+        parser.add_argument('--iterations', type=int, default=50, help='串行阶段每个场景的计时请求数')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--threads', type=int, default=4, help='并发阶段线程数，0 跳过并发阶段')
+        parser.add_argument('--load-requests', type=int, default=200, help='并发阶段每个场景的总请求数')
+        parser.add_argument('--read-only', action='store_true', help='跳过会修改数据的场景')
+        parser.add_argument('--instrumentation', action='store_true', help='保留 SQL 统计中间件')
+        parser.add_argument('--output', help='结果文件路径，默认 benchmarks/results/<时间>.json')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='基线结果文件路径')
+        parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='允许的性能波动比例')
+        parser.add_argument('--fail-on-regression', action='store_true', help='出现性能回退时返回错误')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, scenario in SCENARIOS.items():
+                self.stdout.write(f'{name}{" (写)" if scenario.writes else ""}')
+            return
+
+        names = self.select(options['scenarios'], options['read_only'])
+        runner = BenchmarkRunner(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            threads=options['threads'],
+            load_requests=options['load_requests'],
+            instrumentation=options['instrumentation'],
+            stdout=self.stdout.write,
+        )
+        results = runner.run(names)
+
+        output = Path(options['output']) if options['output'] else (
+            DEFAULT_RESULTS_DIR / f'{timezone.localtime().strftime("%Y%m%d_%H%M%S")}.json'
+        )
+        write_results(results, output)
+        self.print_table(results)
+        self.stdout.write(f'结果已保存: {output}')
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            write_results(results, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f'基线已保存: {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            return
+        regressions = compare(results, json.loads(baseline_path.read_text()), options['tolerance'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('未发现性能回退'))
+            return
+        for name, metric, base, current in regressions:
+            self.stdout.write(self.style.WARNING(f'性能回退 {name} {metric}: {base} -> {current}'))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} 项指标出现性能回退')
+
+    def select(self, patterns, read_only):
+        names = [
+            name for name in SCENARIOS
+            if not patterns or any(name.startswith(pattern) for pattern in patterns)
+        ]
+        if read_only:
+            names = [name for name in names if not SCENARIOS[name].writes]
+        if not names:
+            raise CommandError('没有匹配的场景，使用 --list 查看全部场景')
+        return names
+
+    def print_table(self, results):
+        self.stdout.write(
+            f'{"场景":<32}{"p50":>9}{"p95":>9}{"p99":>9}{"查询":>7}{"错误":>6}{"吞吐/秒":>10}'
+        )
+        for name, result in results['scenarios'].items():
+            latency = result['latency_ms']
+            load = result.get('load', {})
+            errors = result['errors'] + load.get('errors', 0)
+            self.stdout.write(
+                f'{name:<32}{latency["p50"]:>9.2f}{latency["p95"]:>9.2f}{latency["p99"]:>9.2f}'
+                f'{result["queries"]["max"]:>7}{errors:>6}{load.get("throughput_rps", 0):>10.1f}'
+            )
@@ -0,0 +1,271 @@
+"""
+基准测试执行器
+串行阶段测量单请求延迟分位数和查询数，并发阶段用多线程测量吞吐量
+"""
+import json
+import math
+import platform
+import subprocess
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+from apps.users.models import User
+from warehouse_management.middleware import QueryStats
+
+from .scenarios import SCENARIOS, BenchmarkContext
+
+
+PERCENTILES = [50, 90, 95, 99]
+BENCHMARK_DATABASE_MARKER = 'bench'
+
+
+class Worker:
+    """一个并发用户：独立的用户、登录会话和测试客户端"""
+
+    def __init__(self, index, user):
+        self.index = index
+        self.user = user
+        self.client = Client()
+        self.client.force_login(user)
+
+
+def check_benchmark_database():
+    """
+    确认默认数据库是基准测试专用库：数据库名（SQLite 为文件名）包含 bench，否则抛出 CommandError
+
+    基准测试会创建 bench_N 员工账号、订单、购物车和入库记录，generate_data --clear 会清空业务数据，
+    不能在开发或生产数据库上运行。
+    """
+    name = Path(str(connection.settings_dict['NAME'])).name
+    if BENCHMARK_DATABASE_MARKER not in name.lower():
+        raise CommandError(
+            f'数据库 {name} 不是基准测试专用库（名称需包含 {BENCHMARK_DATABASE_MARKER}），'
+            '请通过 SQLITE_NAME 或 POSTGRES_DB 指定，如 SQLITE_NAME=bench.sqlite3'
+        )
+
+
+def get_bench_users(count):
+    """获取或创建基准测试专用的员工账号（报表接口需要员工权限）"""
+    users = []
+    for index in range(count):
+        user, created = User.objects.get_or_create(
+            username=f'bench_{index}', defaults={'is_staff': True}
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+        users.append(user)
+    return users
+
+
+def percentile(sorted_values, pct):
+    """最近秩法计算分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(latencies, queries):
+    latencies = sorted(latencies)
+    result = {
+        'latency_ms': {
+            'min': round(latencies[0], 3) if latencies else 0,
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else 0,
+            'max': round(latencies[-1], 3) if latencies else 0,
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else 0,
+            'max': max(queries) if queries else 0,
+        },
+    }
+    for pct in PERCENTILES:
+        result['latency_ms'][f'p{pct}'] = round(percentile(latencies, pct), 3)
+    return result
+
+
+def timed_request(scenario, context, worker):
+    """
+    执行一次场景请求（准备工作不计时）
+
+    Returns:
+        tuple: (耗时毫秒, 查询数, 是否成功)
+    """
+    path, data = scenario.prepare(context, worker)
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(stats))
+        start = time.perf_counter()
+        response = scenario.execute(worker.client, path, data)
+        elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, stats.count, scenario.succeeded(response)
+
+
+class BenchmarkRunner:
+    """
+    基准测试执行器
+
+    Args:
+        iterations: 串行阶段每个场景的计时请求数
+        warmup: 串行阶段的预热请求数（不计入结果）
+        threads: 并发阶段的线程数，0 表示跳过并发阶段
+        load_requests: 并发阶段每个场景的总请求数
+        instrumentation: 是否保留 SQL 统计中间件（默认关闭，避免影响计时）
+        stdout: 进度输出函数
+    """
+
+    def __init__(self, iterations=50, warmup=5, threads=4, load_requests=200,
+                 instrumentation=False, stdout=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.threads = threads
+        self.load_requests = load_requests
+        self.instrumentation = instrumentation
+        self.stdout = stdout or (lambda message: None)
+
+    def run(self, names=None):
+        check_benchmark_database()
+        names = names or list(SCENARIOS)
+        overrides = {'DEBUG': False}
+        if not self.instrumentation:
+            overrides['QUERY_INSTRUMENTATION'] = {
+                **getattr(settings, 'QUERY_INSTRUMENTATION', {}), 'ENABLED': False,
+            }
+        with override_settings(**overrides):
+            context = BenchmarkContext()
+            users = get_bench_users(max(self.threads, 1))
+            results = {}
+            for name in names:
+                scenario = SCENARIOS[name]
+                self.stdout(f'运行 {name} ...')
+                result = self.run_serial(scenario, context, Worker(0, users[0]))
+                if self.threads:
+                    result.update(self.run_load(scenario, context, users))
+                results[name] = result
+        return {'meta': self.meta(), 'scenarios': results}
+
+    def run_serial(self, scenario, context, worker):
+        latencies = []
+        queries = []
+        errors = 0
+        for index in range(self.warmup + self.iterations):
+            elapsed, query_count, ok = timed_request(scenario, context, worker)
+            if index < self.warmup:
+                continue
+            latencies.append(elapsed)
+            queries.append(query_count)
+            errors += not ok
+        result = summarize(latencies, queries)
+        result['errors'] = errors
+        return result
+
+    def run_load(self, scenario, context, users):
+        lock = threading.Lock()
+        remaining = [self.load_requests]
+        latencies = []
+        failures = []
+
+        def work(index):
+            worker = Worker(index, users[index])
+            try:
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                    try:
+                        elapsed, _, ok = timed_request(scenario, context, worker)
+                    except Exception as exc:
+                        with lock:
+                            failures.append(repr(exc))
+                        continue
+                    with lock:
+                        latencies.append(elapsed)
+                        if not ok:
+                            failures.append('bad response')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=(index,)) for index in range(self.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            'load': {
+                'threads': self.threads,
+                'requests': len(latencies),
+                'errors': len(failures),
+                'throughput_rps': round(len(latencies) / wall, 2) if wall else 0,
+                'latency_ms': {f'p{pct}': round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            },
+        }
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ''
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'commit': commit,
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'threads': self.threads,
+            'dataset': {
+                'products': Product.objects.count(),
+                'orders': Order.objects.count(),
+                'order_items': OrderItem.objects.count(),
+            },
+        }
+
+
+def write_results(results, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    与基线结果比较
+
+    p95 延迟超过基线 (1 + tolerance) 倍、查询数增加、或吞吐量低于基线 (1 - tolerance) 倍
+    视为性能回退。
+
+    Returns:
+        list: [(场景, 指标, 基线值, 当前值)]
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        base_p95 = base['latency_ms']['p95']
+        if base_p95 and current['latency_ms']['p95'] > base_p95 * (1 + tolerance):
+            regressions.append((name, 'p95_ms', base_p95, current['latency_ms']['p95']))
+        if current['queries']['max'] > base['queries']['max']:
+            regressions.append((name, 'queries', base['queries']['max'], current['queries']['max']))
+        base_rps = base.get('load', {}).get('throughput_rps')
+        current_rps = current.get('load', {}).get('throughput_rps')
+        if base_rps and current_rps is not None and current_rps < base_rps * (1 - tolerance):
+            regressions.append((name, 'throughput_rps', base_rps, current_rps))
+    return regressions
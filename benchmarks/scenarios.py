@@ -0,0 +1,202 @@
+"""
+基准测试场景
+每个场景在计时前完成准备工作（如准备购物车、待支付订单），只对目标请求计时
+"""
+import uuid
+
+from django.db.models import F
+from django.urls import reverse
+
+from apps.cart.models import Cart, CartItem
+from apps.inventory.models import StockIn
+from apps.orders.models import Order
+from apps.products.models import Category, Product, ProductStock
+
+
+SCENARIOS = {}
+
+REPORT_APIS = [
+    ('sales_trend_day', 'reports:sales_trend_api', {'period': 'day', 'days': 30}),
+    ('sales_trend_week', 'reports:sales_trend_api', {'period': 'week', 'days': 12}),
+    ('sales_trend_month', 'reports:sales_trend_api', {'period': 'month', 'days': 365}),
+    ('sales_trend_year', 'reports:sales_trend_api', {'period': 'year', 'days': 1825}),
+    ('order_status', 'reports:order_status_api', {'range': 'all'}),
+    ('payment_method', 'reports:payment_method_api', {'range': 'all'}),
+    ('profit_trend', 'reports:profit_trend_api', {'period': 'day', 'days': 30}),
+    ('profit_summary', 'reports:profit_summary_api', {}),
+    ('stock_status', 'reports:stock_status_api', {}),
+    ('stock_in_trend', 'reports:stock_in_trend_api', {'period': 'day', 'days': 30}),
+    ('inventory_valuation', 'reports:inventory_valuation_api', {}),
+    ('supplier_stats', 'reports:supplier_stats_api', {}),
+    ('supplier_analytics', 'reports:supplier_analytics_api', {}),
+    ('low_stock', 'reports:low_stock_api', {}),
+    ('stock_alerts', 'reports:stock_alerts_api', {}),
+    ('classification', 'reports:classification_api', {}),
+    ('classification_products', 'reports:classification_api', {'abc': 'A', 'xyz': 'X'}),
+    ('customer_stats', 'reports:customer_stats_api', {}),
+    ('customer_stats_by_name', 'reports:customer_stats_api', {'by': 'name', 'order': 'recent'}),
+]
+
+# 写场景使用的商品可用库存低于 RESTOCK_BELOW 时先补货
+RESTOCK_BELOW = 1000
+RESTOCK_QUANTITY = 100000
+
+
+class Scenario:
+    """
+    基准测试场景
+
+    Args:
+        name: 场景名称
+        method: 'get' 或 'post'
+        prepare: prepare(context, worker) -> (path, data)，在计时前调用
+        writes: 是否修改数据
+        failure_url: 失败时视图重定向到的 URL 名称（视图以重定向+消息提示错误时使用）
+    """
+
+    def __init__(self, name, method, prepare, writes=False, failure_url=None):
+        self.name = name
+        self.method = method
+        self.prepare = prepare
+        self.writes = writes
+        self.failure_url = failure_url
+
+    def execute(self, client, path, data):
+        return getattr(client, self.method)(path, data)
+
+    def succeeded(self, response):
+        if response.status_code >= 400:
+            return False
+        if self.failure_url and response.status_code == 302:
+            return response.url != reverse(self.failure_url)
+        return True
+
+
+def register(name, method='get', writes=False, failure_url=None):
+    def decorator(prepare):
+        SCENARIOS[name] = Scenario(name, method, prepare, writes, failure_url)
+        return prepare
+    return decorator
+
+
+class BenchmarkContext:
+    """
+    场景共享的数据集信息
+
+    在运行前一次性读取：库存最多的商品（写场景使用）、一级分类、搜索关键词。
+    """
+
+    def __init__(self):
+        stocks = (
+            ProductStock.objects.filter(product__is_active=True)
+            .order_by('-available_quantity')
+            .values_list('product_id', flat=True)[:50]
+        )
+        self.product_ids = list(stocks)
+        if not self.product_ids:
+            raise ValueError('没有可售商品，请先运行 generate_data 生成数据')
+        root = (
+            Category.objects.filter(parent__isnull=True, is_active=True)
+            .order_by('sort_order', 'id').first()
+        )
+        self.category_id = root.id if root else None
+        name = Product.objects.filter(pk=self.product_ids[0]).values_list('name', flat=True).first()
+        # 取商品名称前缀（生成数据的修饰词），保证 icontains 能命中多个商品
+        self.search_term = name[:2] if name else ''
+
+    def product_for(self, worker):
+        return self.product_ids[worker.index % len(self.product_ids)]
+
+    def ensure_stock(self, product_id):
+        """库存不足时补货，避免写场景因库存耗尽而失败"""
+        available = ProductStock.objects.filter(product_id=product_id).values_list(
+            'available_quantity', flat=True
+        ).first()
+        if available is None or available < RESTOCK_BELOW:
+            StockIn.objects.create(
+                stock_in_no=f'SIBENCH{uuid.uuid4().hex[:12].upper()}',
+                product_id=product_id,
+                quantity=RESTOCK_QUANTITY,
+                remark='基准测试补货',
+            )
+
+    def prepare_cart_item(self, worker):
+        product_id = self.product_for(worker)
+        self.ensure_stock(product_id)
+        cart, _ = Cart.objects.get_or_create(user=worker.user)
+        item, created = CartItem.objects.get_or_create(
+            cart=cart, product_id=product_id, defaults={'quantity': 1}
+        )
+        if not created:
+            CartItem.objects.filter(pk=item.pk).update(quantity=1)
+        return item
+
+    def prepare_pending_order(self, worker):
+        """通过下单接口创建待支付订单（不计时），保证库存冻结与正常流程一致"""
+        item = self.prepare_cart_item(worker)
+        worker.client.post(reverse('order_create'), {
+            'item_ids': [item.pk], 'customer_name': '基准测试',
+        })
+        return Order.objects.filter(user=worker.user, status='pending').order_by('-id').first()
+
+
+# ==================== 前台 ====================
+
+@register('product_list')
+def product_list(context, worker):
+    return reverse('product_list'), {}
+
+
+@register('product_list_search')
+def product_list_search(context, worker):
+    return reverse('product_list'), {'search': context.search_term}
+
+
+@register('product_list_category')
+def product_list_category(context, worker):
+    return reverse('product_list'), {'category': context.category_id or ''}
+
+
+@register('product_list_search_category')
+def product_list_search_category(context, worker):
+    return reverse('product_list'), {'category': context.category_id or '', 'search': context.search_term}
+
+
+@register('cart_add', method='post', writes=True)
+def cart_add(context, worker):
+    product_id = context.product_for(worker)
+    # 防止同一购物车项数量无限累加
+    CartItem.objects.filter(cart__user=worker.user, product_id=product_id, quantity__gt=100).update(
+        quantity=F('quantity') - 100
+    )
+    return reverse('cart_add'), {'product_id': product_id, 'quantity': 1}
+
+
+@register('order_create', method='post', writes=True, failure_url='cart_list')
+def order_create(context, worker):
+    item = context.prepare_cart_item(worker)
+    return reverse('order_create'), {'item_ids': [item.pk], 'customer_name': '基准测试'}
+
+
+@register('order_confirm_payment', method='post', writes=True)
+def order_confirm_payment(context, worker):
+    order = context.prepare_pending_order(worker)
+    return reverse('order_confirm_payment', args=[order.pk]), {'payment_method': 'offline'}
+
+
+@register('order_cancel', method='post', writes=True)
+def order_cancel(context, worker):
+    order = context.prepare_pending_order(worker)
+    return reverse('order_cancel', args=[order.pk]), {}
+
+
+# ==================== 报表 ====================
+
+def _report_prepare(url_name, params):
+    def prepare(context, worker):
+        return reverse(url_name), params
+    return prepare
+
+
+for _name, _url_name, _params in REPORT_APIS:
+    register(f'report_{_name}')(_report_prepare(_url_name, _params))
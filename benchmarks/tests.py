@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Group
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test import SimpleTestCase, TestCase
+
+from .datagen import DataGenerator, clear_data
+from .runner import check_benchmark_database, compare
+from apps.inventory.models import StockIn
+from apps.orders.models import Order, OrderItem, Payment
+from apps.products.models import Product, ProductStock
+from apps.users.models import User
+
+
+class DataGeneratorTests(TestCase):
+    SIZES = {
+        'users': 8, 'categories': 2, 'subcategories': 2, 'products': 12, 'suppliers': 3,
+        'carts': 3, 'orders': 120, 'days': 30,
+    }
+
+    def generate(self, seed=7):
+        return DataGenerator(seed=seed, **self.SIZES).run()
+
+    def snapshot(self):
+        return {
+            'users': list(User.objects.order_by('pk').values_list('username', 'date_joined')),
+            'products': list(Product.objects.order_by('pk').values_list('name', 'category__name', 'cost_price')),
+            'orders': list(Order.objects.order_by('pk').values_list(
+                'order_no', 'user__username', 'status', 'total_amount', 'customer_name', 'created_at',
+            )),
+            'items': list(OrderItem.objects.order_by('pk').values_list('order__order_no', 'product__name', 'quantity')),
+            'payments': list(Payment.objects.order_by('pk').values_list('payment_no', 'amount', 'status')),
+            'stock_ins': list(StockIn.objects.order_by('pk').values_list('stock_in_no', 'quantity', 'created_at')),
+            'stocks': list(ProductStock.objects.order_by('product_id').values_list(
+                'product__name', 'available_quantity', 'frozen_quantity',
+            )),
+        }
+
+    def test_same_seed_generates_same_data(self):
+        self.generate()
+        first = self.snapshot()
+        self.assertEqual(len(first['orders']), 120)
+        clear_data()
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+
+        clear_data()
+        self.generate(seed=8)
+        self.assertNotEqual(self.snapshot()['orders'], first['orders'])
+
+    def test_stock_balances_match_documents(self):
+        self.generate()
+        stock_ins = dict(StockIn.objects.values('product_id').annotate(total=Sum('quantity')).values_list(
+            'product_id', 'total',
+        ))
+        sold = OrderItem.objects.values('product_id').annotate(
+            completed=Sum('quantity', filter=Q(order__status='completed'), default=0),
+            pending=Sum('quantity', filter=Q(order__status='pending'), default=0),
+        )
+        sold = {row['product_id']: (row['completed'], row['pending']) for row in sold}
+        stocks = ProductStock.objects.values_list('product_id', 'available_quantity', 'frozen_quantity')
+        self.assertEqual(len(stocks), 12)
+        for product_id, available, frozen in stocks:
+            completed, pending = sold.get(product_id, (0, 0))
+            self.assertEqual((available, frozen), (stock_ins[product_id] - completed - pending, pending))
+            self.assertGreaterEqual(available, 0)
+
+    def test_clear_data_keeps_other_users(self):
+        admin = User.objects.create_superuser('admin', password='test')
+        staff = User.objects.create_user('clerk', password='test', is_staff=True)
+        self.generate()
+        generated = User.objects.get(username='user_7_0000000')
+        group = Group.objects.create(name='仓管')
+        for user in (staff, generated):
+            user.groups.add(group)
+            LogEntry.objects.create(user=user, object_repr='订单', action_flag=ADDITION)
+
+        clear_data()
+        self.assertEqual(list(User.objects.order_by('pk')), [admin, staff])
+        self.assertEqual(list(LogEntry.objects.values_list('user_id', flat=True)), [staff.pk])
+        self.assertEqual(list(group.user_set.all()), [staff])
+        self.assertFalse(Order.objects.exists())
+
+
+class RunnerTests(SimpleTestCase):
+
+    def test_refuses_non_benchmark_database(self):
+        for name in ('/srv/app/db.sqlite3', 'warehouse_management'):
+            with mock.patch.dict(connection.settings_dict, NAME=name), self.assertRaises(CommandError):
+                check_benchmark_database()
+        for name in ('/tmp/bench.sqlite3', 'warehouse_BENCH'):
+            with mock.patch.dict(connection.settings_dict, NAME=name):
+                check_benchmark_database()
+
+    @staticmethod
+    def result(p95, queries, rps=None):
+        scenario = {'latency_ms': {'p95': p95}, 'queries': {'max': queries}}
+        if rps is not None:
+            scenario['load'] = {'throughput_rps': rps}
+        return scenario
+
+    def test_compare_thresholds(self):
+        baseline = {'scenarios': {
+            'stable': self.result(10, 3, 100),
+            'slower': self.result(10, 3, 100),
+            'more_queries': self.result(10, 3),
+            'removed': self.result(10, 3),
+        }}
+        results = {'scenarios': {
+            'stable': self.result(11.9, 3, 81),  # 波动在 20% 以内
+            'slower': self.result(12.5, 3, 79),
+            'more_queries': self.result(5, 4),
+            'new': self.result(100, 50),  # 基线中没有的场景不比较
+        }}
+        self.assertEqual(compare(results, baseline), [
+            ('slower', 'p95_ms', 10, 12.5),
+            ('slower', 'throughput_rps', 100, 79),
+            ('more_queries', 'queries', 3, 4),
+        ])
+        self.assertEqual(compare(results, baseline, tolerance=0.3), [('more_queries', 'queries', 3, 4)])
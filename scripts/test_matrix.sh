@@ -0,0 +1,54 @@
+#!/usr/bin/env bash
+# 测试矩阵：依次在 SQLite（tuned / basic 配置档）和临时 PostgreSQL 实例上运行检查、迁移和测试
+#
+# 用法: scripts/test_matrix.sh [sqlite] [postgresql]   （默认全部运行）
+# PostgreSQL 需要本机安装 initdb / pg_ctl 和 psycopg[pool]（uv sync --extra postgres），
+# 实例建在临时目录中，只监听本地 Unix socket，运行结束后删除。
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+PYTHON=${PYTHON:-python}
+if [ $# -eq 0 ]; then
+    set -- sqlite postgresql
+fi
+
+run_suite() {
+    echo "==> $1"
+    "$PYTHON" manage.py check
+    "$PYTHON" manage.py makemigrations --check --dry-run > /dev/null || echo "警告: 存在未生成的迁移"
+    "$PYTHON" manage.py test --noinput
+}
+
+run_sqlite() {
+    local tmpdir
+    tmpdir=$(mktemp -d)
+    trap 'rm -rf "$tmpdir"' RETURN
+    for profile in tuned basic; do
+        SQLITE_NAME="$tmpdir/$profile.sqlite3" SQLITE_PROFILE=$profile run_suite "sqlite ($profile)"
+    done
+}
+
+run_postgresql() {
+    local pgdir port
+    if ! command -v initdb > /dev/null; then
+        echo "未找到 initdb，请安装 PostgreSQL 服务端或将其 bin 目录加入 PATH" >&2
+        return 1
+    fi
+    pgdir=$(mktemp -d)
+    port=${POSTGRES_PORT:-55432}
+    # 显式使用 UTF8：系统 locale 为 POSIX/C 时 initdb 默认 SQL_ASCII，jsonb 不接受非 ASCII 的 \u 转义
+    initdb -D "$pgdir/data" -U postgres -A trust -E UTF8 --locale=C --no-sync > /dev/null
+    pg_ctl -D "$pgdir/data" -l "$pgdir/postgres.log" -w start \
+        -o "-p $port -k $pgdir -c listen_addresses='' -c fsync=off -c full_page_writes=off" > /dev/null
+    trap 'pg_ctl -D "$pgdir/data" -m immediate stop > /dev/null; rm -rf "$pgdir"' RETURN
+    DATABASE_ENGINE=postgresql POSTGRES_HOST="$pgdir" POSTGRES_PORT=$port \
+        POSTGRES_USER=postgres POSTGRES_DB=postgres run_suite "postgresql"
+}
+
+for target in "$@"; do
+    case $target in
+        sqlite) run_sqlite ;;
+        postgresql) run_postgresql ;;
+        *) echo "未知目标: $target" >&2; exit 2 ;;
+    esac
+done
@@ -3,6 +3,11 @@ ASGI config for warehouse_management project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+报表实时更新（/admin/reports/api/live/，Server-Sent Events 长连接）需要以 ASGI 部署，例如：
+    uvicorn warehouse_management.asgi:application --workers 4
+    gunicorn warehouse_management.asgi:application -k uvicorn.workers.UvicornWorker
+以 WSGI 部署时该接口返回 204，报表页面不自动更新。
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
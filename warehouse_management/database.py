@@ -0,0 +1,130 @@
+"""
+数据库配置档
+
+SQLite 默认配置下每个请求新建连接，写事务以 DEFERRED 方式开始：
+读事务升级为写事务时遇到其他写者会直接返回 "database is locked"，不经过 busy 等待；
+rollback 日志模式下写者还会阻塞所有读者。
+
+默认使用 basic 配置档（Django 默认行为）；tuned 配置档需设置 SQLITE_PROFILE=tuned：
+- WAL 日志模式，读写互不阻塞；synchronous=NORMAL 在 WAL 下仍保证崩溃一致性
+- mmap_size / cache_size / temp_store 减少读路径的系统调用和临时文件
+- 事务以 BEGIN IMMEDIATE 开始，写事务在开始时即获取写锁，锁冲突进入 busy 等待而不是失败。
+  该选项作用于连接上的每一个 atomic()，包括只读的事务：后台的新增/修改/删除页面（打开表单的 GET 请求也在
+  atomic() 中）和管理命令中的事务同样会在开始时获取写锁并持有到事务结束，与其他写者排队；
+  不在 atomic() 中的读取（前台页面、报表、后台列表页）不获取写锁，不受影响
+- 持久连接，避免每个请求重新打开数据库并执行 PRAGMA
+
+PostgreSQL 配置（DATABASE_ENGINE=postgresql）：
+- 使用 Django 内置的 psycopg 连接池，进程内复用连接，突发请求在池上排队而不是打满数据库连接数
+- 运行时按数据库特性选择快速路径（见 dbutils.py）：SKIP LOCKED 认领待处理行、
+  INSERT ... ON CONFLICT 累加购物车行和库存行，created_at 上的 BRIN 索引只在 PostgreSQL 上创建
+"""
+
+import sqlite3
+
+SQLITE_PROFILES = ('basic', 'tuned')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # 负数单位为 KiB，即 64MB
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_init_command(pragmas=None):
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    return ';'.join(f'PRAGMA {key}={value}' for key, value in pragmas.items())
+
+
+def sqlite_database(name, profile='basic', timeout=20, conn_max_age=600):
+    """
+    生成 SQLite 的 DATABASES 配置项
+
+    Args:
+        name: 数据库文件路径
+        profile: 'basic'（Django 默认行为）或 'tuned'
+        timeout: 锁等待超时时间（秒）
+        conn_max_age: tuned 配置下持久连接的最长存活时间（秒）
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f'未知的 SQLite 配置档: {profile}，可选: {", ".join(SQLITE_PROFILES)}')
+
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'OPTIONS': {
+            'timeout': timeout,  # 数据库锁超时时间(秒)
+        },
+    }
+    if profile == 'tuned':
+        database['CONN_MAX_AGE'] = conn_max_age
+        database['CONN_HEALTH_CHECKS'] = True
+        database['OPTIONS'].update({
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': sqlite_init_command(),
+        })
+    return database
+
+
+def postgres_database(name, user='', password='', host='', port='',
+                      pool_min=2, pool_max=10, pool_timeout=10):
+    """
+    生成 PostgreSQL 的 DATABASES 配置项（需要安装 psycopg[pool]）
+
+    Args:
+        pool_min: 连接池保持的最少连接数
+        pool_max: 连接池最大连接数（每个进程），应使 worker 数 * pool_max 小于 max_connections
+        pool_timeout: 从连接池获取连接的等待超时时间（秒）
+    """
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': name,
+        'USER': user,
+        'PASSWORD': password,
+        'HOST': host,
+        'PORT': port,
+        # 连接池与持久连接互斥，连接由池负责复用
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': pool_min,
+                'max_size': pool_max,
+                'timeout': pool_timeout,
+            },
+        },
+    }
+
+
+def sqlite_replica_database(name, profile='basic', **kwargs):
+    """
+    生成 SQLite 只读副本的 DATABASES 配置项
+
+    连接以 query_only 打开，禁止任何写入；副本只由 refresh_sqlite_replica 更新。
+    测试时副本镜像主库。
+    """
+    database = sqlite_database(name, profile, **kwargs)
+    options = database['OPTIONS']
+    options.pop('transaction_mode', None)
+    init_command = options.get('init_command', '')
+    options['init_command'] = ';'.join(filter(None, [init_command, 'PRAGMA query_only=1']))
+    database['TEST'] = {'MIRROR': 'default'}
+    return database
+
+
+def refresh_sqlite_replica(source, target, pages=-1):
+    """
+    用 SQLite 在线备份接口把主库复制到副本
+
+    默认一步复制全部页面，期间主库仍可读写（WAL 模式下备份的读事务不阻塞写者）；
+    分批复制（pages > 0）时其他连接每次写入主库都会让备份从头开始，主库写入频繁时可能一直无法完成。
+    副本在复制完成时整体切换，读者只会看到完整的快照。
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst, pages=pages)
+    finally:
+        src.close()
+        dst.close()
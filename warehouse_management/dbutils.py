@@ -0,0 +1,188 @@
+"""
+数据库特性相关的快速路径
+
+按当前连接的数据库特性在运行时选择实现：
+- skip_locked(): 认领待处理行时跳过其他事务已锁定的行（PostgreSQL SKIP LOCKED），
+  多个清理进程/任务 worker 可以并行处理不同的行而不是互相等待
+- upsert_add(): INSERT ... ON CONFLICT DO UPDATE 原子累加计数列，一条语句完成"不存在则插入，存在则累加"
+- update_rows(): 按主键逐行更新不同的值，一条参数化 UPDATE 语句 executemany 执行
+- brin_index(): 只在 PostgreSQL 上创建的 BRIN 索引迁移操作
+- close_before_fork(): fork 子进程前关闭全部连接和连接池
+- CurrentTransactionId / SnapshotXmin: 写入行的事务号和当前快照中最早的未结束事务号（PostgreSQL），
+  用于按提交可见性而不是主键顺序增量读取
+"""
+from django.db import connections, migrations, router, transaction
+from django.db.models import BigIntegerField, F, Func
+from django.utils import timezone
+
+
+def skip_locked(queryset):
+    """
+    对查询集加行锁并跳过已被其他事务锁定的行（需在事务中使用）
+
+    SQLite 没有行锁，写事务以 BEGIN IMMEDIATE 开始即已互斥，直接返回原查询集。
+    """
+    connection = connections[queryset.db]
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    if connection.features.has_select_for_update:
+        return queryset.select_for_update()
+    return queryset
+
+
+def supports_upsert(connection):
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def upsert_add(model, keys, increments, defaults=None):
+    """
+    按唯一键插入一行，已存在时把 increments 累加到现有值上
+
+    Args:
+        model: 模型类，keys 必须对应唯一约束
+        keys: 唯一键字段值，例如 {'cart_id': 1, 'product_id': 2}
+        increments: 需要累加的字段及增量，例如 {'quantity': 3}
+        defaults: 插入新行时的其他字段值
+
+    Returns:
+        int: 该行的主键
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    now = timezone.now()
+    auto_now = [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+    if not supports_upsert(connection):
+        with transaction.atomic(using=using):
+            obj, created = model.objects.using(using).select_for_update().get_or_create(
+                **keys, defaults={**(defaults or {}), **increments}
+            )
+            if not created:
+                model.objects.using(using).filter(pk=obj.pk).update(
+                    **{name: F(name) + value for name, value in increments.items()},
+                    **{name: now for name in auto_now if model._meta.get_field(name).auto_now},
+                )
+            return obj.pk
+
+    values = {**{name: now for name in auto_now}, **(defaults or {}), **keys, **increments}
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+
+    def column(name):
+        return qn(model._meta.get_field(name).column)
+
+    updates = [f'{column(name)} = {table}.{column(name)} + EXCLUDED.{column(name)}' for name in increments]
+    updates += [
+        f'{column(name)} = EXCLUDED.{column(name)}'
+        for name in auto_now if model._meta.get_field(name).auto_now
+    ]
+    sql = (
+        f'INSERT INTO {table} ({", ".join(column(name) for name in values)}) '
+        f'VALUES ({", ".join(["%s"] * len(values))}) '
+        f'ON CONFLICT ({", ".join(column(name) for name in keys)}) '
+        f'DO UPDATE SET {", ".join(updates)} '
+        f'RETURNING {qn(model._meta.pk.column)}'
+    )
+    params = [
+        model._meta.get_field(name).get_db_prep_save(value, connection)
+        for name, value in values.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+
+
+def update_rows(model, fields, rows):
+    """
+    按主键批量更新每行各自的字段值（bulk_update 的快速路径）
+
+    bulk_update 为每批生成 CASE WHEN 表达式，行数多时构造 SQL 的开销远大于执行；
+    这里只生成一条 UPDATE ... WHERE pk = %s 语句，参数交给数据库驱动 executemany。
+    不更新 auto_now 字段，不触发信号。
+
+    Args:
+        model: 模型类
+        fields: 字段名列表
+        rows: [(pk, 值1, 值2, ...)]，值按 fields 的顺序
+
+    Returns:
+        int: 提交的行数
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    model_fields = [model._meta.get_field(name) for name in fields]
+    sql = (
+        f'UPDATE {qn(model._meta.db_table)} '
+        f'SET {", ".join(f"{qn(field.column)} = %s" for field in model_fields)} '
+        f'WHERE {qn(model._meta.pk.column)} = %s'
+    )
+    params = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(model_fields, values)] + [pk]
+        for pk, *values in rows
+    ]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+    return len(params)
+
+
+class CurrentTransactionId(Func):
+    """
+    当前事务号（PostgreSQL pg_current_xact_id()，没有事务号时分配一个）
+
+    其他数据库的写事务串行提交，主键顺序即提交顺序，取 0。
+    """
+    template = '0'
+    output_field = BigIntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='pg_current_xact_id()::text::bigint', **extra_context)
+
+
+class SnapshotXmin(Func):
+    """
+    当前快照中最早的未结束事务号（PostgreSQL），小于它的事务均已提交或回滚
+
+    只用于 PostgreSQL 查询。
+    """
+    template = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+    output_field = BigIntegerField()
+
+
+def close_before_fork():
+    """
+    fork 子进程前关闭全部数据库连接，并关闭 PostgreSQL 连接池
+
+    子进程不能共用父进程的连接；psycopg 连接池由后台线程维护，fork 后子进程中没有这些线程，
+    从继承的连接池取连接会一直等待，需在 fork 前关闭，子进程首次查询时重新创建。
+    """
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if connection.settings_dict['OPTIONS'].get('pool') and hasattr(connection, 'close_pool'):
+            connection.close_pool()
+
+
+def brin_index(table, column):
+    """
+    迁移操作：在 PostgreSQL 上为按时间追加写入的大表创建 BRIN 索引，其他数据库跳过
+
+    BRIN 索引只记录每组数据页的取值范围，体积只有 B-tree 的百分之一左右，
+    适合 created_at 这类与物理写入顺序高度相关的列上的范围查询。
+    """
+    name = f'{table}_{column}_brin'
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING brin ({column})'
+            )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    return migrations.RunPython(forwards, backwards, elidable=False)
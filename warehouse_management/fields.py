@@ -0,0 +1,33 @@
+"""
+自定义模型字段
+
+LocalDateField：保存某个时间字段在 settings.TIME_ZONE 下的本地日期。
+报表按本地日期分组和过滤时直接使用该列（可建索引），不再在 SQL 中逐行做时区转换和日期截断。
+值在写入时由 pre_save 计算，save() 和 bulk_create() 都会调用，源字段须定义在该字段之前
+（auto_now_add 的源字段先完成取值）；用 QuerySet.update() 修改源字段时需要同时更新该列。
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class LocalDateField(models.DateField):
+
+    def __init__(self, *args, source='created_at', **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        if kwargs.get('editable') is False:
+            del kwargs['editable']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.source)
+        if value is None:
+            return super().pre_save(model_instance, add)
+        value = timezone.localdate(value) if timezone.is_aware(value) else value.date()
+        setattr(model_instance, self.attname, value)
+        return value
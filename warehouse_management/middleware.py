@@ -0,0 +1,160 @@
+"""
+项目级中间件
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('warehouse_management.queries')
+
+# 合并 IN (%s, %s, ...) 与多行 VALUES，使同一语句不同参数数量得到相同指纹
+_IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_VALUES_RE = re.compile(r'(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint_sql(sql):
+    """
+    生成 SQL 指纹
+
+    参数占位符、字面量和 IN 列表被归一化，只保留语句结构，
+    用于识别同一请求中重复执行的查询（N+1）。
+    """
+    normalized = _STRING_RE.sub('?', sql)
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _IN_LIST_RE.sub('(?)', normalized)
+    normalized = normalized.replace('%s', '?')
+    normalized = _VALUES_RE.sub(r'\1', normalized)
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
+    return normalized
+
+
+class QueryStats:
+    """单个请求内的 SQL 统计"""
+
+    def __init__(self, slow_query_count=3):
+        self.slow_query_count = slow_query_count
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints = {}
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.record(context['connection'].alias, sql, duration)
+
+    def record(self, alias, sql, duration):
+        self.count += 1
+        self.total_time += duration
+
+        fingerprint = fingerprint_sql(sql)
+        entry = self.fingerprints.setdefault(fingerprint, {'count': 0, 'time': 0.0, 'alias': alias})
+        entry['count'] += 1
+        entry['time'] += duration
+
+        self.slowest.append((duration, alias, sql))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[self.slow_query_count:]
+
+    def duplicates(self, threshold=2):
+        """执行次数达到阈值的指纹，按次数倒序"""
+        result = [
+            (fingerprint, entry) for fingerprint, entry in self.fingerprints.items()
+            if entry['count'] >= threshold
+        ]
+        result.sort(key=lambda item: item[1]['count'], reverse=True)
+        return result
+
+    @property
+    def duplicate_count(self):
+        return sum(entry['count'] - 1 for entry in self.fingerprints.values() if entry['count'] > 1)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    SQL 查询统计中间件
+
+    通过 connection.execute_wrapper 统计每个请求的查询数、SQL 总耗时、
+    重复查询指纹和最慢语句，以 Server-Timing 响应头和结构化日志输出，
+    并在同一指纹重复次数超过阈值时告警疑似 N+1 查询。
+
+    由 QUERY_INSTRUMENTATION['ENABLED'] 控制是否启用。
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'QUERY_INSTRUMENTATION', {})
+        if not config.get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.exclude_prefixes = tuple(config.get('EXCLUDE_PATH_PREFIXES', ()))
+        self.n_plus_one_threshold = config.get('N_PLUS_ONE_THRESHOLD', 5)
+        self.slow_query_count = config.get('SLOW_QUERY_COUNT', 3)
+
+    def __call__(self, request):
+        if self.exclude_prefixes and request.path.startswith(self.exclude_prefixes):
+            return self.get_response(request)
+
+        stats = QueryStats(slow_query_count=self.slow_query_count)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        total_time = time.perf_counter() - start
+
+        response.headers['Server-Timing'] = self.server_timing(stats, total_time)
+        self.log(request, response, stats, total_time)
+        return response
+
+    def server_timing(self, stats, total_time):
+        metrics = [
+            f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries"',
+            f'dbdup;desc="{stats.duplicate_count} duplicates"',
+            f'app;dur={total_time * 1000:.2f}',
+        ]
+        if stats.slowest:
+            metrics.append(f'dbslow;dur={stats.slowest[0][0] * 1000:.2f}')
+        return ', '.join(metrics)
+
+    def log(self, request, response, stats, total_time):
+        n_plus_one = stats.duplicates(self.n_plus_one_threshold)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total_time * 1000, 2),
+            'queries': stats.count,
+            'sql_ms': round(stats.total_time * 1000, 2),
+            'duplicates': stats.duplicate_count,
+            'slowest': [
+                {'ms': round(duration * 1000, 2), 'db': alias, 'sql': sql[:500]}
+                for duration, alias, sql in stats.slowest
+            ],
+        }
+        logger.info(json.dumps(record, ensure_ascii=False), extra={'query_stats': record})
+
+        for fingerprint, entry in n_plus_one:
+            warning = {
+                'method': request.method,
+                'path': request.path,
+                'fingerprint': hashlib.sha1(fingerprint.encode()).hexdigest()[:12],
+                'count': entry['count'],
+                'sql_ms': round(entry['time'] * 1000, 2),
+                'db': entry['alias'],
+                'sql': fingerprint[:500],
+            }
+            logger.warning('N+1 %s', json.dumps(warning, ensure_ascii=False), extra={'query_stats': warning})
@@ -0,0 +1,119 @@
+"""
+乐观并发控制
+
+带 version 列的模型用比较交换（compare-and-swap）更新：
+UPDATE ... SET ..., version = version + 1 WHERE id = %s AND version = %s
+读取时不加锁，没有冲突时一条 UPDATE 完成；更新 0 行说明读取之后被其他事务修改过，
+抛出 VersionConflict，由 run_with_retry 重新读取后重试，超过次数上限后把异常交给调用方。
+批量操作用 compare_and_swap_many 按各行读取时的版本号一条 UPDATE 更新一批行，任一行冲突时整批回滚重试。
+
+冲突按操作名计数（进程内，conflict_stats.snapshot()），每次冲突和重试耗尽
+以结构化日志写入 warehouse_management.concurrency。
+"""
+import json
+import logging
+import operator
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import F, Q
+
+
+logger = logging.getLogger('warehouse_management.concurrency')
+
+
+class VersionConflict(Exception):
+    """记录在读取后被其他事务修改（版本号不一致）"""
+
+
+class ConflictStats:
+    """各操作的尝试、冲突和重试耗尽次数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(Counter)
+
+    def add(self, operation, name):
+        with self.lock:
+            self.counts[operation][name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {operation: dict(counts) for operation, counts in self.counts.items()}
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+conflict_stats = ConflictStats()
+
+
+def compare_and_swap(instance, **values):
+    """
+    按实例读取时的版本号更新字段，成功时同步实例的字段值和版本号
+
+    Returns:
+        bool: 版本号一致并已更新
+    """
+    updated = type(instance)._default_manager.filter(pk=instance.pk, version=instance.version).update(
+        version=F('version') + 1, **values
+    )
+    if updated:
+        for name, value in values.items():
+            setattr(instance, name, value)
+        instance.version += 1
+    return bool(updated)
+
+
+def compare_and_swap_many(model, versions, **values):
+    """
+    按各行读取时的版本号批量更新字段（versions: {主键: 版本号}），一条 UPDATE 完成
+
+    条件按版本号分组：(id IN (...) AND version = 0) OR (id IN (...) AND version = 1) ...
+
+    Returns:
+        bool: 全部行的版本号一致并已更新；返回 False 时部分行已更新，调用方应抛出 VersionConflict 回滚事务
+    """
+    if not versions:
+        return True
+    groups = defaultdict(list)
+    for pk, version in versions.items():
+        groups[version].append(pk)
+    condition = reduce(operator.or_, (Q(pk__in=pks, version=version) for version, pks in groups.items()))
+    updated = model._default_manager.filter(condition).update(version=F('version') + 1, **values)
+    return updated == len(versions)
+
+
+def run_with_retry(operation, func, attempts=None):
+    """
+    执行 func()，遇到 VersionConflict 时短暂随机退避后重试
+
+    func 每次都应重新读取数据，并在自己的事务中完成比较交换更新。
+
+    Raises:
+        VersionConflict: 重试 attempts 次后仍然冲突
+    """
+    attempts = attempts or settings.OPTIMISTIC_RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        conflict_stats.add(operation, 'attempts')
+        try:
+            return func()
+        except VersionConflict as exc:
+            conflict_stats.add(operation, 'conflicts')
+            logger.info(json.dumps(
+                {'event': 'version_conflict', 'operation': operation, 'attempt': attempt, 'detail': str(exc)},
+                ensure_ascii=False,
+            ))
+            if attempt == attempts:
+                conflict_stats.add(operation, 'exhausted')
+                logger.warning(json.dumps(
+                    {'event': 'retries_exhausted', 'operation': operation, 'attempts': attempts},
+                    ensure_ascii=False,
+                ))
+                raise
+            time.sleep(random.uniform(0, 0.005 * attempt))
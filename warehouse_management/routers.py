@@ -0,0 +1,166 @@
+"""
+数据库路由
+
+报表查询、数据导出和后台列表页的读请求可以路由到只读副本（DATABASES['replica']），
+下单、支付、库存变更等写操作始终在主库执行。
+
+- 只有显式进入 use_replica() 的代码才会读副本，其余读请求默认走主库
+- 请求中一旦在主库执行了写语句（INSERT/UPDATE/DELETE），本次请求后续的读全部固定在主库（读己之写）；
+  ReplicaPinningMiddleware 还会通过 Cookie 让该客户端在 REPLICA_PIN_SECONDS 内继续读主库，
+  避免副本尚未刷新时读到旧数据。只看实际执行的语句，不看 db_for_write：
+  后台修改页的 GET 请求等只读代码也会调用 db_for_write（如 atomic(using=router.db_for_write(...))），不会因此固定主库
+
+归档订单（apps.archive）的表在独立的归档库（DATABASES['archive']），未配置时与主库相同。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE_NAME = 'pin_primary'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_use_replica = ContextVar('use_replica', default=False)
+# 请求级状态 {'pinned': 是否固定主库, 'wrote': 是否发生写操作}，请求之外为 None
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_enabled():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def use_replica():
+    """在该上下文中的读查询使用只读副本（未配置副本或已固定主库时仍走主库）"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_from_replica(view_func):
+    """视图装饰器：视图内的读查询使用只读副本"""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view_func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaChangeListMixin:
+    """ModelAdmin 混入：列表页的 GET 请求读只读副本（列表页内编辑、批量操作的 POST 仍走主库）"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with use_replica():
+            response = super().changelist_view(request, extra_context)
+            # TemplateResponse 延迟渲染，需在副本上下文内完成查询
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class ReplicaRouter:
+    """只读副本路由"""
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or not replica_enabled():
+            return None
+        state = _request_state.get()
+        if state is not None and state['pinned']:
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # 是否固定主库由 ReplicaPinningMiddleware 按实际执行的写语句判断
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本是主库的完整拷贝，跨库关联视为同一数据
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    请求级主库固定
+
+    非安全方法（POST 等）的请求和带有 pin_primary Cookie 的请求全程读主库；
+    请求中在主库执行写语句后，后续的读固定在主库，并下发 pin_primary Cookie。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {
+            'pinned': (
+                request.method not in ('GET', 'HEAD', 'OPTIONS')
+                or PIN_COOKIE_NAME in request.COOKIES
+            ),
+            'wrote': False,
+        }
+
+        def track_writes(execute, sql, params, many, context):
+            if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+                state['pinned'] = state['wrote'] = True
+            return execute(sql, params, many, context)
+
+        token = _request_state.set(state)
+        try:
+            with connections['default'].execute_wrapper(track_writes):
+                response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state['wrote'] and replica_enabled():
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+ARCHIVE_ALIAS = 'archive'
+ARCHIVE_APP_LABEL = 'archive'
+
+
+def archive_database():
+    """归档表所在的数据库别名（未配置独立归档库时为主库）"""
+    return ARCHIVE_ALIAS if ARCHIVE_ALIAS in settings.DATABASES else 'default'
+
+
+class ArchiveRouter:
+    """归档库路由：apps.archive 的模型读写都在归档库，其他模型不进入归档库"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == ARCHIVE_APP_LABEL:
+            return archive_database()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == ARCHIVE_APP_LABEL:
+            return archive_database()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if ARCHIVE_APP_LABEL in (obj1._meta.app_label, obj2._meta.app_label):
+            return obj1._meta.app_label == obj2._meta.app_label
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ARCHIVE_ALIAS:
+            return app_label == ARCHIVE_APP_LABEL
+        if app_label == ARCHIVE_APP_LABEL:
+            return db == archive_database()
+        return None
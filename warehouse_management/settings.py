@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import postgres_database, sqlite_database, sqlite_replica_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -58,6 +61,13 @@ INSTALLED_APPS = [
     'apps.orders',
     'apps.cart',
     'apps.reports',
+    'apps.archive',
+    'apps.events',
+    'apps.jobs',
+    'apps.api',
+    
+    # 性能测试（测试数据生成、基准测试）
+    'benchmarks',
 ]
 
 # 登录配置
@@ -65,6 +75,8 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'product_list'
 
 MIDDLEWARE = [
+    'warehouse_management.middleware.QueryInstrumentationMiddleware',  # SQL统计，放在最前以覆盖所有中间件的查询
+    'warehouse_management.routers.ReplicaPinningMiddleware',  # 写入后固定读主库
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise必须紧跟SecurityMiddleware
     'corsheaders.middleware.CorsMiddleware',
@@ -99,15 +111,45 @@ WSGI_APPLICATION = 'warehouse_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-        'OPTIONS': {
-            'timeout': 20,  # 数据库锁超时时间(秒)
-        }
+# 数据库引擎：sqlite（默认）/ postgresql
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+# SQLite 配置档：basic（Django 默认行为）/ tuned（WAL、IMMEDIATE 事务、持久连接，见 database.py）
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'basic')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': postgres_database(
+            os.environ.get('POSTGRES_DB', 'warehouse_management'),
+            user=os.environ.get('POSTGRES_USER', ''),
+            password=os.environ.get('POSTGRES_PASSWORD', ''),
+            host=os.environ.get('POSTGRES_HOST', ''),
+            port=os.environ.get('POSTGRES_PORT', ''),
+            pool_max=int(os.environ.get('POSTGRES_POOL_MAX', 10)),
+        ),
     }
-}
+else:
+    DATABASES = {
+        'default': sqlite_database(os.environ.get('SQLITE_NAME', BASE_DIR / 'db.sqlite3'), SQLITE_PROFILE),
+    }
+
+    # 报表只读副本：设置 SQLITE_REPLICA_NAME 后启用，由 refresh_replica 命令定期从主库复制
+    # 报表、导出和后台列表页读副本，下单、支付、库存变更始终在主库（见 routers.py）
+    SQLITE_REPLICA_NAME = os.environ.get('SQLITE_REPLICA_NAME')
+    if SQLITE_REPLICA_NAME:
+        DATABASES['replica'] = sqlite_replica_database(SQLITE_REPLICA_NAME, SQLITE_PROFILE)
+
+    # 订单归档库：设置 SQLITE_ARCHIVE_NAME 后归档表放在独立的 SQLite 文件中，
+    # 需执行 migrate --database archive 建表；未设置时归档表在主库
+    SQLITE_ARCHIVE_NAME = os.environ.get('SQLITE_ARCHIVE_NAME')
+    if SQLITE_ARCHIVE_NAME:
+        DATABASES['archive'] = sqlite_database(SQLITE_ARCHIVE_NAME, SQLITE_PROFILE)
+
+DATABASE_ROUTERS = [
+    'warehouse_management.routers.ArchiveRouter',
+    'warehouse_management.routers.ReplicaRouter',
+]
+REPLICA_PIN_SECONDS = 5  # 写入后该客户端继续读主库的时长(秒)，应不小于副本刷新间隔
 
 
 # Password validation
@@ -181,9 +223,115 @@ REST_FRAMEWORK = {
     ],
 }
 
+# 批量下单接口单次请求的最大订单数
+BULK_ORDER_MAX_SIZE = 1000
+
+# 幂等键：保留时长(小时)，以及首次请求仍在处理时重试请求的最长等待时间(秒)
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+IDEMPOTENCY_WAIT_SECONDS = 5
+
 # CORS 配置
 CORS_ALLOW_ALL_ORIGINS = True  # 开发环境使用
 
+# SQL 查询统计配置（Server-Timing 响应头 + 结构化日志），设置 QUERY_INSTRUMENTATION=1 启用
+QUERY_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('QUERY_INSTRUMENTATION') == '1',
+    'EXCLUDE_PATH_PREFIXES': ['/static/', '/media/', '/ckeditor/'],
+    'N_PLUS_ONE_THRESHOLD': 5,  # 同一指纹重复执行达到该次数时告警
+    'SLOW_QUERY_COUNT': 3,  # 日志中记录的最慢语句数
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'warehouse_management.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'warehouse_management.concurrency': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# 缓存配置
+# 分类树缓存在分类/商品保存时主动失效；本地内存缓存按进程隔离，
+# 超时时间作为多进程部署下的兜底刷新周期（秒）
+CATEGORY_TREE_CACHE_TIMEOUT = 300
+
+# 未支付订单超时时间(分钟)，超时后由 cancel_expired_orders 命令取消并释放冻结库存
+ORDER_PAYMENT_TIMEOUT_MINUTES = 30
+
+# 库存预警：商品和分类都未设置补货点/安全库存时使用的默认值
+# 可用库存 <= 补货点时预警，<= 安全库存时紧急预警，见 apps/inventory/alerts.py
+STOCK_REORDER_POINT_DEFAULT = 10
+STOCK_SAFETY_STOCK_DEFAULT = 0
+
+# 库存分片：分片商品的 ProductStock 合计最多延迟刷新的秒数，期间的变更合并为一次刷新（0 表示每次提交后立即刷新）
+STOCK_SHARD_REFRESH_SECONDS = 5
+
+# 需求预测与补货建议（apps/inventory/forecasting.py）
+FORECAST_HISTORY_DAYS = 56  # 使用的历史天数（取整周，季节系数各星期样本数相同）
+FORECAST_HALF_LIFE_DAYS = 14  # 日均销量指数加权的半衰期
+FORECAST_REVIEW_DAYS = 7  # 补货间隔：建议采购量覆盖到货周期 + 补货间隔内的需求
+FORECAST_COVER_DAYS = 60  # 按季节系数逐日预测可支撑天数的最长范围，超出后按日均销量外推
+FORECAST_SERVICE_LEVEL_Z = 1.65  # 统计安全库存的服务水平系数（约 95%）
+
+# 商品 ABC/XYZ 分类（apps/reports/classification.py）
+CLASSIFICATION_HISTORY_WEEKS = 13  # 统计最近的周数
+CLASSIFICATION_ABC_SHARES = (0.8, 0.95)  # A/B 类的销售额累计占比上限
+CLASSIFICATION_XYZ_CV = (0.5, 1.0)  # X/Y 类的周销量变异系数上限
+
+# 订单和库存的乐观并发控制（版本号比较交换）冲突时的最大尝试次数
+OPTIMISTIC_RETRY_ATTEMPTS = 3
+
+# 已完成/已取消订单超过该天数后由 archive_orders 命令移入归档表
+ORDER_ARCHIVE_HORIZON_DAYS = 180
+
+# 变更事件投递目标（dispatch_outbox 命令），BACKEND 为实现 deliver(messages) 的类
+OUTBOX_SINKS = {
+    'jsonl': {
+        'BACKEND': 'apps.events.sinks.JsonlFileSink',
+        'OPTIONS': {'path': os.environ.get('OUTBOX_JSONL_PATH', BASE_DIR / 'logs' / 'outbox.jsonl')},
+    },
+}
+# 设置 OUTBOX_WEBHOOK_URL 后同时投递到 Webhook（本地联调可用 run_webhook_receiver 命令）
+OUTBOX_WEBHOOK_URL = os.environ.get('OUTBOX_WEBHOOK_URL')
+if OUTBOX_WEBHOOK_URL:
+    OUTBOX_SINKS['webhook'] = {
+        'BACKEND': 'apps.events.sinks.WebhookSink',
+        'OPTIONS': {'url': OUTBOX_WEBHOOK_URL, 'timeout': 10},
+    }
+
+# 报表实时更新（apps/reports/live.py，Server-Sent Events，需以 ASGI 部署，见 warehouse_management/asgi.py）
+LIVE_POLL_SECONDS = 2  # 读取发件箱新事件的间隔（本进程内提交的变更立即读取）
+LIVE_HEARTBEAT_SECONDS = 15  # 没有变更时发送心跳的间隔，保持连接并及时发现已断开的客户端
+LIVE_QUEUE_SIZE = 100  # 每个连接最多积压的消息数，超过时断开该连接，客户端重连后重新加载
+LIVE_RETRY_MILLISECONDS = 3000  # 客户端断线后的重连间隔
+
+# 后台任务（django.tasks）：任务写入 jobs 表，由 run_worker 命令启动的 worker 进程执行，见 apps/jobs/backends.py
+TASKS = {
+    'default': {
+        'BACKEND': 'apps.jobs.backends.DatabaseBackend',
+        'OPTIONS': {
+            'MAX_ATTEMPTS': 3,  # 失败后最多执行的总次数
+            'RETRY_DELAY': 30,  # 首次重试等待秒数，之后每次翻倍
+            'LEASE_SECONDS': 300,  # 认领后超过该秒数未完成也未上报进度则重新排队
+        },
+    },
+}
+# 任务结果文件（导出的 CSV 等）和上传文件的保存目录，不在 MEDIA_ROOT 下，只能通过后台下载
+JOB_RESULT_ROOT = BASE_DIR / 'var' / 'jobs'
+
 # 默认主键类型
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -217,8 +365,15 @@ SIMPLEUI_ICON = {
     '订单明细': 'fas fa-list',
     '支付配置': 'fas fa-credit-card',
     '支付记录': 'fas fa-money-check',
+    '归档订单': 'fas fa-archive',
+    '变更事件': 'fas fa-stream',
+    '投递进度': 'fas fa-paper-plane',
+    '后台任务': 'fas fa-tasks',
     '供应商': 'fas fa-truck',
     '入库记录': 'fas fa-sign-in-alt',
+    '库存预警': 'fas fa-exclamation-triangle',
+    '客户分析（用户）': 'fas fa-user-tag',
+    '客户分析（客户名称）': 'fas fa-address-book',
     '购物车': 'fas fa-shopping-cart',
 }
 
@@ -230,7 +385,7 @@ ADMIN_INDEX_TITLE = '欢迎使用仓库管理系统'
 # SimpleUI 菜单配置
 SIMPLEUI_CONFIG = {
     'system_keep': False,
-    'menu_display': ['前台商城', '统计报表', '用户管理', '商品管理', '库存管理', '订单管理', '购物车'],
+    'menu_display': ['前台商城', '统计报表', '用户管理', '商品管理', '库存管理', '订单管理', '购物车', '系统集成', '后台任务'],
     'dynamic': True,
     'menus': [
         {
@@ -246,6 +401,7 @@ SIMPLEUI_CONFIG = {
                 {'name': '销售统计', 'icon': 'fas fa-chart-bar', 'url': '/admin/reports/sales/'},
                 {'name': '利润分析', 'icon': 'fas fa-money-bill-wave', 'url': '/admin/reports/profit/'},
                 {'name': '库存报表', 'icon': 'fas fa-boxes', 'url': '/admin/reports/inventory/'},
+                {'name': 'ABC/XYZ 分类', 'icon': 'fas fa-th', 'url': '/admin/reports/classification/'},
             ]
         },
         {
@@ -253,6 +409,8 @@ SIMPLEUI_CONFIG = {
             'icon': 'fas fa-users',
             'models': [
                 {'name': '用户列表', 'icon': 'fas fa-user', 'url': 'users/user/'},
+                {'name': '客户分析', 'icon': 'fas fa-user-tag', 'url': 'reports/customerstat/'},
+                {'name': '客户名称分析', 'icon': 'fas fa-address-book', 'url': 'reports/customernamestat/'},
             ]
         },
         {
@@ -271,6 +429,7 @@ SIMPLEUI_CONFIG = {
             'models': [
                 {'name': '供应商', 'icon': 'fas fa-truck', 'url': 'inventory/supplier/'},
                 {'name': '入库记录', 'icon': 'fas fa-arrow-circle-down', 'url': 'inventory/stockin/'},
+                {'name': '库存预警', 'icon': 'fas fa-exclamation-triangle', 'url': 'inventory/stockalert/'},
             ]
         },
         {
@@ -279,6 +438,7 @@ SIMPLEUI_CONFIG = {
             'models': [
                 {'name': '订单列表', 'icon': 'fas fa-file-invoice', 'url': 'orders/order/'},
                 {'name': '支付记录', 'icon': 'fas fa-money-bill-wave', 'url': 'orders/payment/'},
+                {'name': '归档订单', 'icon': 'fas fa-archive', 'url': 'archive/archivedorder/'},
                 {'name': '支付配置', 'icon': 'fas fa-credit-card', 'url': 'orders/paymentconfig/'},
             ]
         },
@@ -289,6 +449,19 @@ SIMPLEUI_CONFIG = {
                 {'name': '购物车列表', 'icon': 'fas fa-cart-arrow-down', 'url': 'cart/cart/'},
             ]
         },
+        {
+            'name': '系统集成',
+            'icon': 'fas fa-plug',
+            'models': [
+                {'name': '变更事件', 'icon': 'fas fa-stream', 'url': 'events/outboxevent/'},
+                {'name': '投递进度', 'icon': 'fas fa-paper-plane', 'url': 'events/outboxcursor/'},
+            ]
+        },
+        {
+            'name': '后台任务',
+            'icon': 'fas fa-tasks',
+            'url': 'jobs/job/',
+        },
     ]
 }
 
@@ -0,0 +1,220 @@
+import json
+import sqlite3
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, router, transaction
+from django.db.models.signals import post_save
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .database import refresh_sqlite_replica
+from .dbutils import upsert_add
+from .middleware import QueryInstrumentationMiddleware, fingerprint_sql
+from .routers import PIN_COOKIE_NAME, REPLICA_ALIAS, ReplicaPinningMiddleware, use_replica
+from apps.cart.models import Cart, CartItem
+from apps.inventory.models import StockIn
+from apps.products.models import Category, Product, ProductStock
+from apps.users.models import User
+
+
+class UpsertAddTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='test')
+        cls.cart = Cart.objects.create(user=cls.user)
+        cls.product = Product.objects.create(name='商品', cost_price=Decimal('5.00'), selling_price=Decimal('8.00'))
+
+    def add_to_cart(self, quantity):
+        return upsert_add(
+            CartItem, keys={'cart_id': self.cart.pk, 'product_id': self.product.pk}, increments={'quantity': quantity},
+        )
+
+    def check_inserts_then_accumulates(self):
+        pk = self.add_to_cart(2)
+        item = CartItem.objects.get(pk=pk)
+        self.assertEqual(item.quantity, 2)
+        self.assertIsNotNone(item.created_at)
+
+        CartItem.objects.filter(pk=pk).update(updated_at=item.updated_at - timedelta(hours=1))
+        self.assertEqual(self.add_to_cart(3), pk)
+        updated = CartItem.objects.get(pk=pk)
+        self.assertEqual(updated.quantity, 5)
+        self.assertEqual(updated.created_at, item.created_at)  # auto_now_add 只在插入时写入
+        self.assertGreater(updated.updated_at, item.updated_at - timedelta(hours=1))  # auto_now 每次更新
+        self.assertEqual(CartItem.objects.count(), 1)
+
+    def test_inserts_then_accumulates(self):
+        self.check_inserts_then_accumulates()
+
+    def test_fallback_without_on_conflict(self):
+        with mock.patch('warehouse_management.dbutils.supports_upsert', return_value=False):
+            self.check_inserts_then_accumulates()
+
+    def test_defaults_only_apply_on_insert(self):
+        pk = upsert_add(
+            ProductStock, keys={'product_id': self.product.pk}, increments={'available_quantity': 4, 'version': 1},
+            defaults={'frozen_quantity': 3, 'shard_count': 0, 'alert_level': 0},
+        )
+        upsert_add(
+            ProductStock, keys={'product_id': self.product.pk}, increments={'available_quantity': 6, 'version': 1},
+            defaults={'frozen_quantity': 9, 'shard_count': 0, 'alert_level': 0},
+        )
+        stock = ProductStock.objects.get(pk=pk)
+        self.assertEqual((stock.available_quantity, stock.frozen_quantity, stock.version), (10, 3, 2))
+
+    def test_stock_in_writes_stock_without_model_signals(self):
+        """入库只通过 upsert_add 写库存，不调用 save()，ProductStock 的 post_save 不会触发"""
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance.pk)
+
+        post_save.connect(receiver, sender=ProductStock)
+        self.addCleanup(post_save.disconnect, receiver, sender=ProductStock)
+        StockIn.objects.create(stock_in_no='SIUPSERT1', product=self.product, quantity=7)
+        StockIn.objects.create(stock_in_no='SIUPSERT2', product=self.product, quantity=5)
+        self.assertEqual(ProductStock.objects.get(product=self.product).available_quantity, 12)
+        self.assertEqual(saved, [])
+
+
+class BrinIndexTests(TestCase):
+
+    def indexes(self, table):
+        with connection.cursor() as cursor:
+            return {
+                name for name, index in connection.introspection.get_constraints(cursor, table).items()
+                if index['index']
+            }
+
+    def test_brin_indexes_only_on_postgresql(self):
+        names = {'orders_created_at_brin', 'payments_created_at_brin', 'stock_ins_created_at_brin'}
+        found = self.indexes('orders') | self.indexes('payments') | self.indexes('stock_ins')
+        if connection.vendor == 'postgresql':
+            self.assertLessEqual(names, found)
+        else:
+            self.assertFalse(names & found)
+
+
+@mock.patch('warehouse_management.routers.replica_enabled', return_value=True)
+class ReplicaRoutingTests(TestCase):
+    """只检查路由结果，不在副本上执行查询（测试环境没有副本库）"""
+
+    def read_alias(self):
+        with use_replica():
+            return router.db_for_read(Product)
+
+    def call(self, view, method='get', **cookies):
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies)
+        aliases = []
+
+        def wrapped(request):
+            view()
+            aliases.append(self.read_alias())
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(wrapped)(request)
+        return aliases[0], PIN_COOKIE_NAME in response.cookies
+
+    def test_only_use_replica_reads_go_to_replica(self, enabled):
+        self.assertEqual(router.db_for_read(Product), 'default')
+        self.assertEqual(self.read_alias(), REPLICA_ALIAS)
+        self.assertEqual(router.db_for_write(Product), 'default')
+
+    def test_read_only_atomic_block_does_not_pin(self, enabled):
+        def view():
+            # 与后台修改页的 GET 请求相同：在 db_for_write 的连接上开启事务，只读取
+            with transaction.atomic(using=router.db_for_write(Product)):
+                list(Product.objects.select_for_update().all())
+        self.assertEqual(self.call(view), (REPLICA_ALIAS, False))
+
+    def test_write_pins_rest_of_request_and_client(self, enabled):
+        self.assertEqual(self.call(lambda: Category.objects.create(name='饮料')), ('default', True))
+
+    def test_unsafe_method_and_pin_cookie_read_primary(self, enabled):
+        self.assertEqual(self.call(lambda: None, method='post'), ('default', False))
+        self.assertEqual(self.call(lambda: None, **{PIN_COOKIE_NAME: '1'}), ('default', False))
+
+
+class RefreshReplicaTests(TestCase):
+
+    def test_copies_primary_while_another_connection_writes(self):
+        with tempfile.TemporaryDirectory() as root:
+            source, target = Path(root) / 'primary.sqlite3', Path(root) / 'replica.sqlite3'
+            primary = sqlite3.connect(source)
+            primary.execute('PRAGMA journal_mode=WAL')
+            primary.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)')
+            primary.executemany('INSERT INTO items (value) VALUES (?)', [('x' * 500,)] * 2000)
+            primary.commit()
+
+            writer = sqlite3.connect(source)
+            writer.execute('INSERT INTO items (value) VALUES (?)', ('未提交',))  # 备份期间未提交的写事务
+            refresh_sqlite_replica(str(source), str(target))
+            writer.rollback()
+            writer.close()
+            primary.close()
+
+            replica = sqlite3.connect(target)
+            try:
+                self.assertEqual(replica.execute('SELECT COUNT(*) FROM items').fetchone(), (2000,))
+            finally:
+                replica.close()
+
+
+@override_settings(QUERY_INSTRUMENTATION={
+    'ENABLED': True, 'EXCLUDE_PATH_PREFIXES': ['/static/'], 'N_PLUS_ONE_THRESHOLD': 3, 'SLOW_QUERY_COUNT': 2,
+})
+class QueryInstrumentationTests(TestCase):
+
+    def call(self, path, lookups):
+        def view(request):
+            for pk in lookups:
+                User.objects.filter(pk=pk).exists()
+            return HttpResponse()
+        return QueryInstrumentationMiddleware(view)(RequestFactory().get(path))
+
+    def test_fingerprint_ignores_literals_and_in_list_length(self):
+        self.assertEqual(
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'a'"),
+            fingerprint_sql("SELECT  *  FROM t WHERE id IN (%s) AND name = 'b'"),
+        )
+        self.assertEqual(fingerprint_sql('SELECT * FROM t WHERE id = 1'), 'SELECT * FROM t WHERE id = ?')
+
+    def test_server_timing_and_n_plus_one_warning(self):
+        with self.assertLogs('warehouse_management.queries', 'INFO') as logs:
+            response = self.call('/orders/', [1, 2, 3, 4])
+        metrics = response.headers['Server-Timing'].split(', ')
+        self.assertRegex(metrics[0], r'^db;dur=\d+\.\d{2};desc="4 queries"$')
+        self.assertEqual(metrics[1], 'dbdup;desc="3 duplicates"')
+        self.assertRegex(metrics[2], r'^app;dur=\d+\.\d{2}$')
+        self.assertRegex(metrics[3], r'^dbslow;dur=')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['path'], record['queries'], record['duplicates']), ('/orders/', 4, 3))
+        self.assertEqual(len(record['slowest']), 2)
+        self.assertEqual([entry.levelname for entry in logs.records], ['INFO', 'WARNING'])
+        self.assertEqual(logs.records[1].query_stats['count'], 4)
+
+    def test_no_warning_below_threshold(self):
+        with self.assertLogs('warehouse_management.queries', 'INFO') as logs:
+            response = self.call('/orders/', [1, 2])
+        self.assertIn('desc="2 queries"', response.headers['Server-Timing'])
+        self.assertEqual([entry.levelname for entry in logs.records], ['INFO'])
+
+    def test_header_on_site_responses(self):
+        with self.assertLogs('warehouse_management.queries', 'INFO'):
+            response = self.client.get('/login/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('desc="0 queries"', response.headers['Server-Timing'])
+
+    def test_excluded_paths_and_disabled(self):
+        self.assertNotIn('Server-Timing', self.call('/static/app.css', [1]).headers)
+        with override_settings(QUERY_INSTRUMENTATION={'ENABLED': False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                QueryInstrumentationMiddleware(lambda request: HttpResponse())
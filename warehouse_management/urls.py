@@ -34,6 +34,7 @@ urlpatterns = [
     path('admin/reports/', include('apps.reports.urls')),  # 必须在admin/之前
     path('admin/', admin.site.urls),
     path('ckeditor/', include('ckeditor_uploader.urls')),
+    path('api/', include('apps.api.urls')),
     
     # 认证
     path('login/', users_views.login_view, name='login'),